@@ -0,0 +1,55 @@
+"""performance indexes
+
+Columns and indexes added after the initial schema: export progress, the
+keyset index behind the indicator query API and the refresh log
+started_at index. Databases created by create_all after those model changes
+already have some of them, so each step checks before it runs.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 07:40:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('indicator_values', 'ix_indicator_code_country_date_id', ['indicator_code', 'country_code', 'date', 'id']),
+    ('data_refresh_logs', 'idx_refresh_started_at', ['started_at']),
+]
+
+
+def upgrade() -> None:
+    # Offline (--sql) output cannot inspect, so it emits every step
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    def exists(kind, table, name):
+        if inspector is None:
+            return False
+        items = inspector.get_columns(table) if kind == 'column' else inspector.get_indexes(table)
+        return name in {item['name'] for item in items}
+
+    if not exists('column', 'exports', 'progress'):
+        with op.batch_alter_table('exports', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('progress', sa.Float(), nullable=True))
+
+    for table, name, columns in INDEXES:
+        if not exists('index', table, name):
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for table, name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table('exports', schema=None) as batch_op:
+        batch_op.drop_column('progress')
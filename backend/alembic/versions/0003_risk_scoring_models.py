@@ -0,0 +1,59 @@
+"""risk scoring models
+
+Versioned scoring model definitions, and the model version each company
+risk score was produced by. Databases created by create_all after those
+model changes already have them, so each step checks before it runs.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:02:47.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Offline (--sql) output cannot inspect, so it emits every step
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    if inspector is None or not inspector.has_table('risk_scoring_models'):
+        op.create_table('risk_scoring_models',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(length=500), nullable=True),
+        sa.Column('definition', sa.JSON(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_by', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('risk_scoring_models', schema=None) as batch_op:
+            batch_op.create_index('idx_scoring_model_name_version', ['name', 'version'], unique=True)
+            batch_op.create_index(batch_op.f('ix_risk_scoring_models_id'), ['id'], unique=False)
+
+    columns = set() if inspector is None else {c['name'] for c in inspector.get_columns('company_risk_scores')}
+    if 'model_version' not in columns:
+        with op.batch_alter_table('company_risk_scores', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('model_version', sa.String(length=60), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('company_risk_scores', schema=None) as batch_op:
+        batch_op.drop_column('model_version')
+
+    with op.batch_alter_table('risk_scoring_models', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_risk_scoring_models_id'))
+        batch_op.drop_index('idx_scoring_model_name_version')
+
+    op.drop_table('risk_scoring_models')
@@ -0,0 +1,48 @@
+"""fx rates
+
+Daily ECB reference rates for converting financial statements to EUR at
+their period end. Databases created by create_all after the model was
+added already have the table, so it is only created when missing.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:21:05.318442
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Offline (--sql) output cannot inspect, so it emits every step
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    if inspector is None or not inspector.has_table('fx_rates'):
+        op.create_table('fx_rates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('rate_date', sa.Date(), nullable=False),
+        sa.Column('rate', sa.Float(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('last_refreshed', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('currency', 'rate_date', name='uix_fx_rate_currency_date')
+        )
+        with op.batch_alter_table('fx_rates', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_fx_rates_id'), ['id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('fx_rates', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_fx_rates_id'))
+
+    op.drop_table('fx_rates')
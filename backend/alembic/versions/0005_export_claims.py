@@ -0,0 +1,38 @@
+"""export claims
+
+When an export job was claimed by a worker, so jobs abandoned mid-run by
+a crashed process can be told apart from ones still running. Databases
+created by create_all after the model change already have the column,
+so it is only added when missing.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:05:31.227841
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Offline (--sql) output cannot inspect, so it emits every step
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    columns = set() if inspector is None else {c['name'] for c in inspector.get_columns('exports')}
+    if 'claimed_at' not in columns:
+        with op.batch_alter_table('exports', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('exports', schema=None) as batch_op:
+        batch_op.drop_column('claimed_at')
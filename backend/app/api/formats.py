@@ -0,0 +1,184 @@
+"""
+Response format negotiation for time-series endpoints
+Serves the same records as row JSON, columnar JSON or Arrow IPC stream
+"""
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.atlasiq.columnar+json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+SUPPORTED_MEDIA_TYPES = [JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE]
+
+
+def negotiate_media_type(request: Request) -> str:
+    """
+    Pick the response media type from the Accept header
+
+    Honours q-values; ties are broken in favour of the most compact format.
+    Falls back to plain JSON when nothing supported is requested, so existing
+    clients keep working whatever they send.
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    best_type = None
+    best_q = 0.0
+    for part in accept.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        media_type = fields[0].lower()
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+
+        if media_type in ("*/*", "application/*"):
+            candidate = JSON_MEDIA_TYPE
+        elif media_type == ARROW_STREAM_MEDIA_TYPE and pa is None:
+            continue
+        elif media_type in SUPPORTED_MEDIA_TYPES:
+            candidate = media_type
+        else:
+            continue
+
+        if q > best_q or (
+            q == best_q and best_type is not None
+            and SUPPORTED_MEDIA_TYPES.index(candidate) > SUPPORTED_MEDIA_TYPES.index(best_type)
+        ):
+            best_type, best_q = candidate, q
+
+    return best_type or JSON_MEDIA_TYPE
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Pivot a list of row dicts into a dict of column lists
+
+    Column order follows first appearance; missing keys become None.
+    """
+    names: List[str] = []
+    for record in records:
+        for key in record:
+            if key not in names:
+                names.append(key)
+
+    return {name: [record.get(name) for record in records] for name in names}
+
+
+def build_columnar_payload(records: List[Dict[str, Any]], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the compact columnar JSON body
+
+    Columns holding a single repeated value (indicator, unit, ...) are hoisted
+    into ``constants`` so they are sent once instead of once per row.
+    """
+    columns = records_to_columns(records)
+    constants = {}
+
+    if len(records) > 1:
+        for name in list(columns):
+            values = columns[name]
+            first = values[0]
+            if all(value == first for value in values):
+                constants[name] = first
+                del columns[name]
+
+    return {
+        "columns": columns,
+        "constants": constants,
+        "row_count": len(records),
+        "meta": meta,
+    }
+
+
+def build_arrow_stream(records: List[Dict[str, Any]], meta: Dict[str, Any]) -> bytes:
+    """
+    Encode records as an Arrow IPC stream
+
+    String columns are dictionary-encoded and ``date`` columns become date32,
+    so pandas/Polars can load the result without per-row parsing. The ``meta``
+    block travels in the schema metadata.
+    """
+    if pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="Arrow output requires pyarrow on the server"
+        )
+
+    arrays = []
+    names = []
+    for name, values in records_to_columns(records).items():
+        if name == "date" and all(isinstance(v, (str, type(None))) for v in values):
+            array = pa.array(
+                [date.fromisoformat(v) if v else None for v in values],
+                type=pa.date32()
+            )
+        else:
+            array = pa.array(values)
+            if pa.types.is_string(array.type):
+                array = array.dictionary_encode()
+        arrays.append(array)
+        names.append(name)
+
+    schema_metadata = {b"meta": json.dumps(meta, default=str).encode("utf-8")}
+    table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(schema_metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+def render_records(
+    request: Request,
+    records: List[Dict[str, Any]],
+    meta: Dict[str, Any],
+    media_type: Optional[str] = None
+) -> Response:
+    """
+    Render time-series records in the format requested by the client
+
+    Args:
+        request: Incoming request (used for Accept negotiation)
+        records: Row dicts, as returned by the JSON endpoints
+        meta: Response metadata block
+        media_type: Pre-negotiated media type, if already known
+
+    Returns:
+        Response in row JSON, columnar JSON or Arrow IPC stream format
+    """
+    media_type = media_type or negotiate_media_type(request)
+    headers = {"Vary": "Accept"}
+
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return Response(
+            content=build_arrow_stream(records, meta),
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return JSONResponse(
+            content=jsonable_encoder(build_columnar_payload(records, meta)),
+            media_type=COLUMNAR_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    return JSONResponse(content=jsonable_encoder({"data": records, "meta": meta}), headers=headers)
@@ -2,9 +2,10 @@
 Authentication endpoints
 Handles user registration, login, token refresh, and logout
 """
+import math
 from datetime import datetime, timedelta
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -12,21 +13,40 @@ from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, TokenRefresh, TokenResponse
 from app.auth.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     verify_token,
 )
 from app.auth.dependencies import get_current_active_user
+from app.auth.throttle import login_throttle
 from app.config import settings
+from app.rate_limit import client_address
 
 router = APIRouter()
 
 
+def enforce_login_throttle(request: Request, email: Optional[str] = None):
+    """
+    Reject the attempt with 429 if the client or account is over its budget
+    
+    Raises:
+        HTTPException: If too many attempts were made
+    """
+    wait = login_throttle.check(client_address(request.scope), email)
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -37,6 +57,8 @@ async def register(
     - **full_name**: Optional full name
     - **organization**: Optional organization name
     """
+    enforce_login_throttle(request)
+    
     # Check if user already exists
     result = await db.execute(
         select(User).where(User.email == user_data.email)
@@ -52,7 +74,7 @@ async def register(
     # Create new user
     new_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         organization=user_data.organization,
         is_active=True,
@@ -69,6 +91,7 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     credentials: UserLogin,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -78,7 +101,11 @@ async def login(
     
     - **email**: User email address
     - **password**: User password
+    
+    Attempts are throttled per client address and per email (429 with Retry-After).
     """
+    enforce_login_throttle(request, credentials.email)
+    
     # Get user from database
     result = await db.execute(
         select(User).where(User.email == credentials.email)
@@ -86,7 +113,8 @@ async def login(
     user = result.scalar_one_or_none()
     
     # Verify credentials
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
+        login_throttle.record_failure(credentials.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -100,6 +128,8 @@ async def login(
             detail="User account is inactive"
         )
     
+    login_throttle.record_success(credentials.email)
+    
     # Update last login timestamp
     user.last_login_at = datetime.utcnow()
     await db.commit()
@@ -2,13 +2,13 @@
 Company API endpoints
 Handles company data, financials, and risk analysis
 """
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_, and_, desc, asc
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.company import Company, FinancialStatement, CashFlow, CompanyRiskScore
 from app.schemas.company import (
     CompanyResponse,
@@ -20,20 +20,60 @@ from app.schemas.company import (
     CompanySearchResult,
     CompanySearchResponse,
     CompanyComparisonRequest,
+    CompanyComparisonItem,
     CompanyComparisonResponse,
     CompanyIngestRequest,
     CompanyIngestResponse,
     CompanyRiskAnalysis,
+    CompanyPeersResponse,
+    CompanyRiskHistoryResponse,
+    RiskBackfillRequest,
+    StressTestRequest,
+    StressTestResponse,
 )
 from app.services.yahoo_finance import yahoo_client
+from app.services.fx_rates import BASE_CURRENCY
 from app.services.normalization import normalization_service
 from app.services.company_risk import risk_scoring_service
-from app.auth.dependencies import get_current_user
+from app.services.company_comparison import company_comparison_service
+from app.services.financial_history import financial_history_service
+from app.services.peer_ranking import peer_ranking_service
+from app.services.risk_backfill import risk_backfill
+from app.services.stress_testing import stress_test_service
+from app.services.scoring_models import scoring_model_registry
+from app.auth.dependencies import get_current_user, require_admin
 from app.models.user import User
 
 router = APIRouter(prefix="/companies", tags=["Companies"])
 
 
+async def latest_per_company(db: AsyncSession, model, order_column, company_ids: List[int]) -> Dict[int, Any]:
+    """
+    Load the latest row of a per-company table for many companies at once
+    
+    Args:
+        db: Database session
+        model: Model with a company_id column
+        order_column: Column that orders rows, newest highest
+        company_ids: Companies to load
+    
+    Returns:
+        Latest row by company id (companies without rows are missing)
+    """
+    if not company_ids:
+        return {}
+    ranked = select(
+        model,
+        func.row_number().over(
+            partition_by=model.company_id,
+            order_by=(order_column.desc(), model.id.desc()),
+        ).label("rn"),
+    ).where(model.company_id.in_(company_ids)).subquery()
+    latest = aliased(model, ranked)
+    result = await db.execute(select(latest).where(ranked.c.rn == 1))
+    return {row.company_id: row for row in result.scalars()}
+
+
 @router.get("/search", response_model=CompanySearchResponse)
 async def search_companies(
     query: Optional[str] = Query(None, description="Search by company name"),
@@ -46,7 +86,7 @@ async def search_companies(
     sort_order: str = Query("asc", regex="^(asc|desc)$"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -85,24 +125,19 @@ async def search_companies(
     result = await db.execute(stmt)
     companies = result.scalars().all()
     
-    # Enrich with latest financial data and risk scores
+    # Enrich with latest financial data and risk scores (one query each)
+    company_ids = [company.id for company in companies]
+    latest_financials = await latest_per_company(
+        db, FinancialStatement, FinancialStatement.fiscal_year, company_ids
+    )
+    latest_risks = await latest_per_company(
+        db, CompanyRiskScore, CompanyRiskScore.calculation_date, company_ids
+    )
+    
     results = []
     for company in companies:
-        # Get latest financial data
-        financial_stmt = select(FinancialStatement).where(
-            FinancialStatement.company_id == company.id
-        ).order_by(desc(FinancialStatement.fiscal_year)).limit(1)
-        
-        financial_result = await db.execute(financial_stmt)
-        latest_financial = financial_result.scalar_one_or_none()
-        
-        # Get latest risk score
-        risk_stmt = select(CompanyRiskScore).where(
-            CompanyRiskScore.company_id == company.id
-        ).order_by(desc(CompanyRiskScore.calculation_date)).limit(1)
-        
-        risk_result = await db.execute(risk_stmt)
-        latest_risk = risk_result.scalar_one_or_none()
+        latest_financial = latest_financials.get(company.id)
+        latest_risk = latest_risks.get(company.id)
         
         # Apply risk score filter
         if min_risk_score is not None or max_risk_score is not None:
@@ -140,7 +175,7 @@ async def search_companies(
 @router.get("/{company_id}", response_model=CompanyDetailResponse)
 async def get_company(
     company_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -183,34 +218,107 @@ async def get_company(
 async def get_company_financials(
     company_id: int,
     years: int = Query(5, ge=1, le=10, description="Number of years of historical data"),
-    db: AsyncSession = Depends(get_db),
+    include_derived: bool = Query(False, description="Add YoY growth, CAGR and margin series"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get multi-year financial statements and cash flows
+    
+    Cash flows are those of the returned statement years.
     """
     company = await db.get(Company, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    # Get financial statements
-    financial_stmt = select(FinancialStatement).where(
-        FinancialStatement.company_id == company_id
-    ).order_by(desc(FinancialStatement.fiscal_year)).limit(years)
-    financial_result = await db.execute(financial_stmt)
-    financials = financial_result.scalars().all()
-    
-    # Get cash flows
-    cashflow_stmt = select(CashFlow).where(
-        CashFlow.company_id == company_id
-    ).order_by(desc(CashFlow.fiscal_year)).limit(years)
-    cashflow_result = await db.execute(cashflow_stmt)
-    cashflows = cashflow_result.scalars().all()
+    history = await financial_history_service.get_history(db, company_id, years)
     
     return CompanyFinancialsResponse(
         company=company,
-        financial_statements=financials,
-        cashflows=cashflows,
+        financial_statements=history.financial_statements,
+        cashflows=history.cashflows,
+        derived=history.derived if include_derived else None,
+    )
+
+
+@router.get("/{company_id}/peers", response_model=CompanyPeersResponse)
+async def get_company_peers(
+    company_id: int,
+    scope: str = Query(
+        "country_sector", pattern="^(country_sector|sector|country)$",
+        description="Peers with the same country and NACE code, the same NACE code, or the same country",
+    ),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Rank a company's latest risk score ratios against its peer group
+    """
+    company = await db.get(Company, company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    
+    ranking = await peer_ranking_service.rank(company, scope)
+    if not ranking:
+        raise HTTPException(status_code=404, detail="No risk score or peer group available")
+    
+    return CompanyPeersResponse(
+        company={
+            "id": company.id,
+            "name": company.name,
+            "country_code": company.country_code,
+            "sector": company.sector,
+            "ticker": company.ticker,
+            "is_listed": company.is_listed,
+        },
+        **ranking,
+    )
+
+
+@router.get("/{company_id}/risk/history", response_model=CompanyRiskHistoryResponse)
+async def get_company_risk_history(
+    company_id: int,
+    from_year: Optional[int] = Query(None, ge=1950),
+    to_year: Optional[int] = Query(None, ge=1950),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get a company's risk trajectory: the latest score of each fiscal year
+    
+    Scores for past years are filled in by POST /companies/risk/backfill.
+    """
+    company = await db.get(Company, company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    
+    filters = [CompanyRiskScore.company_id == company_id]
+    if from_year:
+        filters.append(CompanyRiskScore.fiscal_year >= from_year)
+    if to_year:
+        filters.append(CompanyRiskScore.fiscal_year <= to_year)
+    ranked = select(
+        CompanyRiskScore,
+        func.row_number().over(
+            partition_by=CompanyRiskScore.fiscal_year,
+            order_by=(CompanyRiskScore.calculation_date.desc(), CompanyRiskScore.id.desc()),
+        ).label("rn"),
+    ).where(*filters).subquery()
+    latest = aliased(CompanyRiskScore, ranked)
+    result = await db.execute(
+        select(latest).where(ranked.c.rn == 1).order_by(latest.fiscal_year)
+    )
+    
+    return CompanyRiskHistoryResponse(
+        company={
+            "id": company.id,
+            "name": company.name,
+            "country_code": company.country_code,
+            "sector": company.sector,
+            "ticker": company.ticker,
+            "is_listed": company.is_listed,
+        },
+        points=result.scalars().all(),
     )
 
 
@@ -297,41 +405,87 @@ async def get_company_risk_analysis(
 @router.post("/compare", response_model=CompanyComparisonResponse)
 async def compare_companies(
     request: CompanyComparisonRequest,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Compare multiple companies side-by-side
-    """
-    if len(request.company_ids) < 2:
-        raise HTTPException(status_code=400, detail="At least 2 companies required")
     
-    if len(request.company_ids) > 5:
-        raise HTTPException(status_code=400, detail="Maximum 5 companies allowed")
+    All companies are compared on one fiscal year: the requested one, or the
+    latest year they all reported.
+    """
+    rows, fiscal_year = await company_comparison_service.compare(
+        db, request.company_ids, request.fiscal_year
+    )
     
-    # Determine fiscal year
-    fiscal_year = request.fiscal_year
-    if not fiscal_year:
-        # Use latest common year
-        fiscal_year = 2024  # Default to current year - 1
-    
-    companies_data = []
-    for company_id in request.company_ids:
-        try:
-            company_detail = await get_company(company_id, db, current_user)
-            companies_data.append(company_detail)
-        except HTTPException:
-            continue
-    
-    if len(companies_data) < 2:
+    if len(rows) < 2:
         raise HTTPException(status_code=404, detail="Not enough valid companies found")
     
+    found_ids = {row.company.id for row in rows}
     return CompanyComparisonResponse(
-        companies=companies_data,
+        companies=[
+            CompanyComparisonItem(
+                **row.company.__dict__,
+                latest_financial=row.financial,
+                latest_cashflow=row.cashflow,
+                latest_risk_score=row.risk_score,
+                ratios=row.ratios,
+            )
+            for row in rows
+        ],
         fiscal_year=fiscal_year,
+        missing_company_ids=[
+            company_id for company_id in dict.fromkeys(request.company_ids) if company_id not in found_ids
+        ],
     )
 
 
+@router.post("/stress-test", response_model=StressTestResponse)
+async def run_stress_test(
+    request: StressTestRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Apply a what-if scenario to every company and report the risk shift
+    
+    Compares the risk score distribution before and after the shocks and
+    lists the companies that change risk category.
+    """
+    scenario_model = None
+    if request.model:
+        scenario_model = await scoring_model_registry.get(request.model)
+        if scenario_model is None:
+            raise HTTPException(status_code=404, detail="Scoring model not found")
+    
+    return await stress_test_service.run(request, scenario_model)
+
+
+@router.post("/risk/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def backfill_risk_scores(
+    request: RiskBackfillRequest,
+    current_user: User = Depends(require_admin),
+):
+    """
+    Recompute risk scores for every stored fiscal year in the background (admin only)
+    
+    Each year's score is dated at its fiscal year end, so re-running
+    overwrites the same rows instead of adding new ones. Only one backfill
+    runs at a time: 409 while one is in progress.
+    """
+    if risk_backfill.is_running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A risk backfill is already running (started {risk_backfill.current['started_at'].isoformat()})"
+        )
+    job = risk_backfill.start(request.company_ids, request.from_year)
+    return {
+        "status": "accepted",
+        "company_ids": job["company_ids"],
+        "from_year": job["from_year"],
+        "started_at": job["started_at"],
+    }
+
+
 @router.post("/ingest", response_model=CompanyIngestResponse)
 async def ingest_company_data(
     request: CompanyIngestRequest,
@@ -362,8 +516,7 @@ async def ingest_company_data(
         if not company:
             # Create new company
             company = Company(
-                **normalized_info,
-                ticker=request.ticker,
+                **{**normalized_info, 'ticker': request.ticker},
                 data_source='yahoo_finance'
             )
             db.add(company)
@@ -377,25 +530,29 @@ async def ingest_company_data(
         financial_years = []
         validation_errors = []
         
+        # Years already stored, so existing statements are skipped without a query per year
+        existing_financial_years = set((await db.execute(
+            select(FinancialStatement.fiscal_year).where(FinancialStatement.company_id == company.id)
+        )).scalars())
+        existing_cashflow_years = set((await db.execute(
+            select(CashFlow.fiscal_year).where(CashFlow.company_id == company.id)
+        )).scalars())
+        
+        currency = company_info.get('currency', 'USD')
+        
         if financial_data:
-            for financial in financial_data:
-                # Normalize data
-                normalized_financial = await normalization_service.normalize_financial_statement(
-                    financial, company_info.get('currency', 'USD')
-                )
-                
-                if normalization_service.has_validation_errors():
-                    validation_errors.extend(normalization_service.get_validation_errors())
-                
-                # Check if already exists
-                stmt = select(FinancialStatement).where(
-                    FinancialStatement.company_id == company.id,
-                    FinancialStatement.fiscal_year == normalized_financial['fiscal_year']
-                )
-                result = await db.execute(stmt)
-                existing = result.scalar_one_or_none()
-                
-                if not existing:
+            # Normalize all years at once, each at the FX rate of its period end
+            normalized_financials, errors = await normalization_service.normalize_financial_statements(
+                financial_data, currency
+            )
+            validation_errors.extend(errors)
+            
+            for normalized_financial in normalized_financials:
+                # Unconverted years (no FX rate yet) are left out, so a later ingest can store them in EUR
+                if normalized_financial['currency'] != BASE_CURRENCY:
+                    continue
+                if normalized_financial['fiscal_year'] not in existing_financial_years:
+                    existing_financial_years.add(normalized_financial['fiscal_year'])
                     financial_stmt = FinancialStatement(
                         company_id=company.id,
                         data_source='yahoo_finance',
@@ -405,20 +562,16 @@ async def ingest_company_data(
                     financial_years.append(normalized_financial['fiscal_year'])
         
         if cashflow_data:
-            for cashflow in cashflow_data:
-                normalized_cashflow = await normalization_service.normalize_cashflow_statement(
-                    cashflow, company_info.get('currency', 'USD')
-                )
-                
-                # Check if already exists
-                stmt = select(CashFlow).where(
-                    CashFlow.company_id == company.id,
-                    CashFlow.fiscal_year == normalized_cashflow['fiscal_year']
-                )
-                result = await db.execute(stmt)
-                existing = result.scalar_one_or_none()
-                
-                if not existing:
+            normalized_cashflows, errors = await normalization_service.normalize_cashflow_statements(
+                cashflow_data, currency
+            )
+            validation_errors.extend(errors)
+            
+            for normalized_cashflow in normalized_cashflows:
+                if normalized_cashflow['currency'] != BASE_CURRENCY:
+                    continue
+                if normalized_cashflow['fiscal_year'] not in existing_cashflow_years:
+                    existing_cashflow_years.add(normalized_cashflow['fiscal_year'])
                     cashflow_stmt = CashFlow(
                         company_id=company.id,
                         data_source='yahoo_finance',
@@ -427,6 +580,8 @@ async def ingest_company_data(
                     db.add(cashflow_stmt)
         
         await db.commit()
+        if financial_years:
+            stress_test_service.invalidate()
         
         return CompanyIngestResponse(
             success=True,
@@ -2,103 +2,66 @@
 Data API endpoints
 Handles country, indicator, and dashboard data requests
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import os
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.auth.dependencies import get_current_active_user
+from app.api.files import RangeFileResponse
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.auth.dependencies import get_current_active_user, require_admin
 from app.models.user import User
+from app.models.export import Export
+from app.models.indicator import IndicatorValue
+from app.models.macro_indicators import DataRefreshLog
+from app.schemas.export import ExportRequest, ExportResponse
+from app.schemas.indicator import IndicatorListResponse, IndicatorQuery, IndicatorValueResponse
+from app.services.dashboard import dashboard_service
+from app.services.export import export_service
+from app.services.export_jobs import export_job_runner, ExportQueueFull
+from app.services.ingestion import ingestion_service
+from app.services.scheduler import job_scheduler
 
 router = APIRouter()
 
 
 @router.get("/dashboard")
 async def get_dashboard_summary(
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
 ):
     """
     Get dashboard summary with KPIs and overview data
     
-    Returns summary statistics for the dashboard view
+    Returns latest indicator values, data freshness (days) and chart series
+    per country. The summary is shared by all users and served from cache.
     """
-    # Mock data for now - in production this would query real data
-    return {
-        "total_indicators": 25,
-        "data_freshness": 2,
-        "last_updated": "2025-10-21T10:00:00Z",
-        "countries": [
-            {
-                "country": {
-                    "code": "NL",
-                    "name": "Netherlands",
-                    "flag": "🇳🇱"
-                },
-                "gdp_growth": 2.3,
-                "inflation": 3.1,
-                "unemployment": 3.5,
-                "business_confidence": 65,
-                "risk_score": 25
-            },
-            {
-                "country": {
-                    "code": "BE",
-                    "name": "Belgium",
-                    "flag": "🇧🇪"
-                },
-                "gdp_growth": 1.8,
-                "inflation": 2.9,
-                "unemployment": 5.2,
-                "business_confidence": 58,
-                "risk_score": 32
-            },
-            {
-                "country": {
-                    "code": "LU",
-                    "name": "Luxembourg",
-                    "flag": "🇱🇺"
-                },
-                "gdp_growth": 2.8,
-                "inflation": 2.5,
-                "unemployment": 4.8,
-                "business_confidence": 72,
-                "risk_score": 18
-            },
-            {
-                "country": {
-                    "code": "DE",
-                    "name": "Germany",
-                    "flag": "🇩🇪"
-                },
-                "gdp_growth": 1.5,
-                "inflation": 3.8,
-                "unemployment": 5.5,
-                "business_confidence": 55,
-                "risk_score": 38
-            }
-        ],
-        "charts": {
-            "gdp_growth": [
-                {"country": "NL", "value": 2.3},
-                {"country": "BE", "value": 1.8},
-                {"country": "LU", "value": 2.8},
-                {"country": "DE", "value": 1.5}
-            ],
-            "risk_scores": [
-                {"country": "NL", "value": 25},
-                {"country": "BE", "value": 32},
-                {"country": "LU", "value": 18},
-                {"country": "DE", "value": 38}
-            ]
-        }
+    try:
+        payload = await dashboard_service.get_summary()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Dashboard data unavailable: {str(e)}"
+        )
+
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"private, max-age={settings.CACHE_DASHBOARD_TTL}",
     }
+    if request.headers.get("if-none-match") == payload.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
 
 @router.get("/countries")
 async def get_countries(
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get list of all supported countries
@@ -147,7 +110,7 @@ async def get_countries(
 async def get_country_detail(
     country_code: str,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get detailed data for a specific country
@@ -202,7 +165,7 @@ async def get_country_detail(
 @router.get("/indicators")
 async def get_indicators(
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get list of all available indicators
@@ -239,10 +202,181 @@ async def get_indicators(
     }
 
 
+# Columns projected for the indicator query API (no ORM hydration)
+INDICATOR_QUERY_COLUMNS = [
+    getattr(IndicatorValue, name) for name in IndicatorValueResponse.model_fields
+]
+
+
+@router.post("/indicators/query", response_model=IndicatorListResponse)
+async def query_indicators(
+    query: IndicatorQuery,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Query indicator values with filters and keyset pagination
+    
+    Results are ordered by (date, id). Pass ``next_cursor`` from the
+    response as ``cursor`` to fetch the next page; ``offset`` is only
+    honoured when no cursor is given. Exact totals are computed only
+    when ``include_total`` is set.
+    """
+    filters = []
+    if query.country_codes:
+        filters.append(IndicatorValue.country_code.in_([c.upper() for c in query.country_codes]))
+    if query.indicator_codes:
+        filters.append(IndicatorValue.indicator_code.in_(query.indicator_codes))
+    if query.sectors:
+        filters.append(IndicatorValue.sector.in_(query.sectors))
+    if query.sources:
+        filters.append(IndicatorValue.source.in_(query.sources))
+    if query.date_from:
+        filters.append(IndicatorValue.date >= query.date_from)
+    if query.date_to:
+        filters.append(IndicatorValue.date <= query.date_to)
+
+    stmt = (
+        select(*INDICATOR_QUERY_COLUMNS)
+        .where(*filters)
+        .order_by(IndicatorValue.date, IndicatorValue.id)
+        .limit(query.limit + 1)
+    )
+    if query.cursor:
+        cursor_date, cursor_id = _decode_cursor(query.cursor)
+        stmt = stmt.where(tuple_(IndicatorValue.date, IndicatorValue.id) > (cursor_date, cursor_id))
+    elif query.offset:
+        stmt = stmt.offset(query.offset)
+
+    result = await db.execute(stmt)
+    items = [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if len(items) > query.limit:
+        items = items[:query.limit]
+        next_cursor = _encode_cursor(items[-1]["date"], items[-1]["id"])
+
+    total = None
+    if query.include_total:
+        total_result = await db.execute(
+            select(func.count()).select_from(IndicatorValue).where(*filters)
+        )
+        total = total_result.scalar()
+
+    return {
+        "total": total,
+        "items": items,
+        "limit": query.limit,
+        "offset": 0 if query.cursor else query.offset,
+        "next_cursor": next_cursor,
+    }
+
+
+def _encode_cursor(row_date: date, row_id: int) -> str:
+    """Encode a (date, id) keyset position as an opaque cursor"""
+    return base64.urlsafe_b64encode(f"{row_date.isoformat()}|{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a cursor produced by _encode_cursor"""
+    try:
+        raw_date, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.post("/refresh", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_refresh(
+    background_tasks: BackgroundTasks,
+    source: Optional[str] = Query(None, description="Single source to refresh; all when omitted"),
+    refresh_type: str = Query(
+        "incremental",
+        pattern="^(full|incremental|backfill)$",
+        description="incremental: new periods only; full: re-fetch all; backfill: insert missing history"
+    ),
+    start_year: Optional[int] = Query(None, ge=1950, description="First year to fetch (backfill)"),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Trigger an ingestion run in the background (admin only)
+    
+    Upstream sources are otherwise refreshed incrementally on
+    FETCH_SCHEDULE_CRON; user requests only read the stored data.
+    """
+    if source and source not in settings.INGESTION_SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown source. Available: {', '.join(settings.INGESTION_SOURCES)}"
+        )
+    if refresh_type == "backfill" and start_year is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_year is required for backfill"
+        )
+
+    options = {
+        "trigger": "manual",
+        "triggered_by": str(current_user.id),
+        "refresh_type": refresh_type,
+        "start_year": start_year,
+    }
+    if source:
+        background_tasks.add_task(ingestion_service.run_source, source, **options)
+    else:
+        background_tasks.add_task(ingestion_service.run_all, **options)
+
+    return {
+        "status": "accepted",
+        "refresh_type": refresh_type,
+        "sources": [source] if source else settings.INGESTION_SOURCES,
+    }
+
+
+@router.get("/refresh/status")
+async def get_refresh_status(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get recent ingestion runs and the next scheduled job times (admin only)
+
+    Jobs are only listed by the worker that currently holds the scheduler lease.
+    """
+    result = await db.execute(
+        select(DataRefreshLog).order_by(DataRefreshLog.started_at.desc()).limit(limit)
+    )
+    return {
+        "leader": job_scheduler.is_leader,
+        "jobs": job_scheduler.get_jobs(),
+        "runs": [
+            {
+                "id": log.id,
+                "source": log.source,
+                "refresh_type": log.refresh_type,
+                "status": log.status,
+                "trigger": log.trigger,
+                "started_at": log.started_at,
+                "completed_at": log.completed_at,
+                "duration_seconds": log.duration_seconds,
+                "records_inserted": log.records_inserted,
+                "records_updated": log.records_updated,
+                "records_failed": log.records_failed,
+                "error_message": log.error_message,
+            }
+            for log in result.scalars().all()
+        ],
+    }
+
+
 @router.get("/risk-scores")
 async def get_risk_scores(
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get current risk scores for all countries
@@ -259,33 +393,127 @@ async def get_risk_scores(
     }
 
 
-@router.post("/export/csv")
+@router.post("/export/csv", response_model=ExportResponse, status_code=status.HTTP_202_ACCEPTED)
 async def export_to_csv(
+    export_request: ExportRequest,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Export data to CSV format
     
-    Returns download URL for CSV file
+    Queues a CSV export and returns immediately; poll the export status
+    until it is completed, then fetch its download URL
     """
-    return {
-        "message": "CSV export feature coming soon",
-        "status": "not_implemented"
-    }
+    return await _submit_export(db, current_user, "csv", export_request)
 
 
-@router.post("/export/excel")
+@router.post("/export/excel", response_model=ExportResponse, status_code=status.HTTP_202_ACCEPTED)
 async def export_to_excel(
+    export_request: ExportRequest,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Export data to Excel format
     
-    Returns download URL for Excel file
+    Queues an XLSX export and returns immediately; poll the export status
+    until it is completed, then fetch its download URL
     """
-    return {
-        "message": "Excel export feature coming soon",
-        "status": "not_implemented"
-    }
\ No newline at end of file
+    return await _submit_export(db, current_user, "excel", export_request)
+
+
+@router.get("/export/{export_id}", response_model=ExportResponse)
+async def get_export(
+    export_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get export status and metadata
+    """
+    export = await _get_user_export(db, current_user, export_id)
+    return _export_response(export)
+
+
+@router.get("/export/{export_id}/download")
+async def download_export(
+    export_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Download a completed export file
+    
+    Supports Range requests so interrupted downloads can resume
+    """
+    export = await _get_user_export(db, current_user, export_id)
+    
+    if export.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is {export.status}"
+        )
+    
+    if export.is_expired() or not os.path.exists(export.file_path):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export has expired"
+        )
+    
+    export.downloaded_at = datetime.utcnow()
+    
+    return RangeFileResponse(
+        export.file_path,
+        request,
+        media_type=export_service.get_media_type(export),
+        filename=export.filename,
+    )
+
+
+async def _submit_export(
+    db: AsyncSession,
+    user: User,
+    export_type: str,
+    export_request: ExportRequest
+) -> ExportResponse:
+    """Create a pending export row and hand it to the background runner"""
+    export = await export_service.create_export(db, user.id, export_type, export_request)
+    await db.commit()
+    
+    try:
+        export_job_runner.submit(export.id)
+    except ExportQueueFull as e:
+        export.status = "failed"
+        export.error_message = str(e)
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    return _export_response(export)
+
+
+async def _get_user_export(db: AsyncSession, user: User, export_id: int) -> Export:
+    """Load an export owned by the user (admins can see all exports)"""
+    export = await db.get(Export, export_id)
+    if not export or (export.user_id != user.id and not user.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Export {export_id} not found"
+        )
+    return export
+
+
+def _export_response(export: Export) -> ExportResponse:
+    """Build the export response including its download URL"""
+    response = ExportResponse.model_validate(export)
+    if export.status == "processing":
+        live_progress = export_job_runner.get_progress(export.id)
+        if live_progress:
+            response.row_count, response.progress = live_progress
+    if export.status == "completed":
+        response.download_url = f"/api/v1/data/export/{export.id}/download"
+    return response
@@ -1,26 +1,78 @@
 """
 Macro Economic Indicators API Endpoints
 Provides access to historical economic data for Benelux + Germany
+Series are read from the local database, filled by the scheduled ingestion jobs
+
+Time-series responses honour the Accept header: application/json (default),
+application/vnd.atlasiq.columnar+json or application/vnd.apache.arrow.stream
 """
 
-from fastapi import APIRouter, Query, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from typing import Dict, List, Optional
 from datetime import datetime
 import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.historical_economic_data import HistoricalEconomicDataService
+from app.api.formats import render_records
+from app.database import get_read_db
+from app.services.macro_data import macro_data_service
 
 router = APIRouter(prefix="/api/v1/macro", tags=["Macro Indicators"])
 
-# Initialize service
-macro_service = HistoricalEconomicDataService()
+# Curated baseline, used for interest rates (not ingested yet)
+macro_service = macro_data_service.baseline
+
+
+def _source_meta(series_by_country: Dict[str, pd.Series], baseline_label: str) -> dict:
+    """Describe where the returned series came from (ingested sources or the baseline)"""
+    sources = sorted({series.attrs.get("source") for series in series_by_country.values()} - {None})
+    refreshed = [
+        series.attrs["last_refreshed"]
+        for series in series_by_country.values()
+        if series.attrs.get("last_refreshed")
+    ]
+    ingested = [source for source in sources if source != macro_data_service.BASELINE_SOURCE]
+    labels = ingested + ([baseline_label] if len(ingested) < len(sources) else [])
+
+    return {
+        "data_source": ", ".join(labels) or baseline_label,
+        "data_type": "ingested" if ingested else "historical",
+        "last_updated": max(refreshed).strftime("%Y-%m-%d") if refreshed else "2024-01-01",
+    }
+
+
+# Baseline label per indicator of the comprehensive view
+COMPREHENSIVE_BASELINE_LABELS = {
+    "gdp_growth": "OECD",
+    "inflation": "Eurostat/OECD",
+    "unemployment": "OECD",
+}
+
+
+def _comprehensive_meta(series_by_indicator: Dict[str, Dict[str, pd.Series]]) -> dict:
+    """Source of each indicator, and the data type and last update over all of them"""
+    combined = _source_meta({
+        f"{indicator}:{country}": series
+        for indicator, series_by_country in series_by_indicator.items()
+        for country, series in series_by_country.items()
+    }, "")
+    return {
+        "data_sources": {
+            indicator: _source_meta(series_by_country, COMPREHENSIVE_BASELINE_LABELS[indicator])["data_source"]
+            for indicator, series_by_country in series_by_indicator.items()
+        },
+        "data_type": combined["data_type"],
+        "last_updated": combined["last_updated"],
+    }
 
 
 @router.get("/gdp")
 async def get_gdp_growth(
+    request: Request,
     countries: Optional[List[str]] = Query(default=None, description="Country codes (NLD, BEL, LUX, DEU)"),
     start_year: int = Query(default=2015, ge=2015, le=2023, description="Start year"),
-    end_year: int = Query(default=2023, ge=2015, le=2023, description="End year")
+    end_year: int = Query(default=2023, ge=2015, le=2023, description="End year"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get real GDP growth rates for specified countries
@@ -30,7 +82,7 @@ async def get_gdp_growth(
     """
     try:
         # Get data
-        gdp_data = macro_service.get_gdp_growth(countries, start_year)
+        gdp_data = await macro_data_service.get_series(db, "GDP_GROWTH", countries, start_year)
         
         # Convert to API response format
         result = []
@@ -46,18 +98,13 @@ async def get_gdp_growth(
                         "unit": "percent"
                     })
         
-        return {
-            "data": result,
-            "meta": {
-                "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
-                "start_year": start_year,
-                "end_year": end_year,
-                "total_records": len(result),
-                "data_source": "OECD Statistics",
-                "data_type": "historical",
-                "last_updated": "2024-01-01"
-            }
-        }
+        return render_records(request, result, {
+            "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
+            "start_year": start_year,
+            "end_year": end_year,
+            "total_records": len(result),
+            **_source_meta(gdp_data, "OECD Statistics")
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -65,9 +112,11 @@ async def get_gdp_growth(
 
 @router.get("/inflation")
 async def get_inflation(
+    request: Request,
     countries: Optional[List[str]] = Query(default=None, description="Country codes"),
     start_year: int = Query(default=2015, ge=2015, le=2023),
-    end_year: int = Query(default=2023, ge=2015, le=2023)
+    end_year: int = Query(default=2023, ge=2015, le=2023),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get inflation rates (HICP - Harmonized Index of Consumer Prices)
@@ -76,7 +125,7 @@ async def get_inflation(
     Data source: Eurostat / OECD
     """
     try:
-        inflation_data = macro_service.get_inflation_rate(countries, start_year)
+        inflation_data = await macro_data_service.get_series(db, "INFLATION", countries, start_year)
         
         result = []
         for country, series in inflation_data.items():
@@ -91,18 +140,13 @@ async def get_inflation(
                         "unit": "percent"
                     })
         
-        return {
-            "data": result,
-            "meta": {
-                "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
-                "start_year": start_year,
-                "end_year": end_year,
-                "total_records": len(result),
-                "data_source": "Eurostat/OECD",
-                "data_type": "historical",
-                "last_updated": "2024-01-01"
-            }
-        }
+        return render_records(request, result, {
+            "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
+            "start_year": start_year,
+            "end_year": end_year,
+            "total_records": len(result),
+            **_source_meta(inflation_data, "Eurostat/OECD")
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -110,9 +154,11 @@ async def get_inflation(
 
 @router.get("/unemployment")
 async def get_unemployment(
+    request: Request,
     countries: Optional[List[str]] = Query(default=None, description="Country codes"),
     start_year: int = Query(default=2015, ge=2015, le=2023),
-    end_year: int = Query(default=2023, ge=2015, le=2023)
+    end_year: int = Query(default=2023, ge=2015, le=2023),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get unemployment rates
@@ -121,7 +167,7 @@ async def get_unemployment(
     Data source: OECD Labour Force Statistics
     """
     try:
-        unemployment_data = macro_service.get_unemployment_rate(countries, start_year)
+        unemployment_data = await macro_data_service.get_series(db, "UNEMPLOYMENT", countries, start_year)
         
         result = []
         for country, series in unemployment_data.items():
@@ -136,18 +182,13 @@ async def get_unemployment(
                         "unit": "percent"
                     })
         
-        return {
-            "data": result,
-            "meta": {
-                "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
-                "start_year": start_year,
-                "end_year": end_year,
-                "total_records": len(result),
-                "data_source": "OECD",
-                "data_type": "historical",
-                "last_updated": "2024-01-01"
-            }
-        }
+        return render_records(request, result, {
+            "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
+            "start_year": start_year,
+            "end_year": end_year,
+            "total_records": len(result),
+            **_source_meta(unemployment_data, "OECD")
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -155,6 +196,7 @@ async def get_unemployment(
 
 @router.get("/interest-rates")
 async def get_interest_rates(
+    request: Request,
     start_year: int = Query(default=2015, ge=2015, le=2023),
     end_year: int = Query(default=2023, ge=2015, le=2023)
 ):
@@ -195,18 +237,15 @@ async def get_interest_rates(
                     "unit": "percent"
                 })
         
-        return {
-            "data": result,
-            "meta": {
-                "rate_types": ["DFR", "MRO"],
-                "start_year": start_year,
-                "end_year": end_year,
-                "total_records": len(result),
-                "data_source": "European Central Bank",
-                "data_type": "historical",
-                "last_updated": "2024-01-01"
-            }
-        }
+        return render_records(request, result, {
+            "rate_types": ["DFR", "MRO"],
+            "start_year": start_year,
+            "end_year": end_year,
+            "total_records": len(result),
+            "data_source": "European Central Bank",
+            "data_type": "historical",
+            "last_updated": "2024-01-01"
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -214,9 +253,11 @@ async def get_interest_rates(
 
 @router.get("/comprehensive")
 async def get_comprehensive_indicators(
+    request: Request,
     countries: Optional[List[str]] = Query(default=None, description="Country codes"),
     start_year: int = Query(default=2020, ge=2015, le=2023),
-    end_year: int = Query(default=2023, ge=2015, le=2023)
+    end_year: int = Query(default=2023, ge=2015, le=2023),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all key economic indicators in one request
@@ -225,7 +266,8 @@ async def get_comprehensive_indicators(
     Useful for dashboard views and multi-indicator analysis.
     """
     try:
-        df = macro_service.get_comprehensive_indicators(countries, start_year)
+        series_by_indicator = await macro_data_service.get_comprehensive_series(db, countries, start_year)
+        df = macro_data_service.comprehensive_frame(series_by_indicator)
         
         # Filter by end year
         df = df[pd.to_datetime(df['date']).dt.year <= end_year]
@@ -239,23 +281,14 @@ async def get_comprehensive_indicators(
                 record['date'] = record['date'].strftime("%Y-%m-%d")
                 record['year'] = record['date'][:4]
         
-        return {
-            "data": result,
-            "meta": {
-                "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
-                "indicators": ["gdp_growth", "inflation", "unemployment"],
-                "start_year": start_year,
-                "end_year": end_year,
-                "total_records": len(result),
-                "data_sources": {
-                    "gdp_growth": "OECD",
-                    "inflation": "Eurostat/OECD",
-                    "unemployment": "OECD"
-                },
-                "data_type": "historical",
-                "last_updated": "2024-01-01"
-            }
-        }
+        return render_records(request, result, {
+            "countries": countries or ["NLD", "BEL", "LUX", "DEU"],
+            "indicators": ["gdp_growth", "inflation", "unemployment"],
+            "start_year": start_year,
+            "end_year": end_year,
+            "total_records": len(result),
+            **_comprehensive_meta(series_by_indicator)
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -263,7 +296,9 @@ async def get_comprehensive_indicators(
 
 @router.get("/summary")
 async def get_macro_summary(
-    countries: Optional[List[str]] = Query(default=None, description="Country codes")
+    request: Request,
+    countries: Optional[List[str]] = Query(default=None, description="Country codes"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get latest macro indicators summary for each country
@@ -278,40 +313,31 @@ async def get_macro_summary(
         summary = []
         
         # Get latest data for each country
-        gdp_data = macro_service.get_gdp_growth(countries, 2022)
-        inflation_data = macro_service.get_inflation_rate(countries, 2022)
-        unemployment_data = macro_service.get_unemployment_rate(countries, 2022)
+        series_by_indicator = await macro_data_service.get_comprehensive_series(db, countries, 2022)
         
         for country in countries:
+            latest = {
+                indicator: series_by_country[country]
+                for indicator, series_by_country in series_by_indicator.items()
+                if country in series_by_country and len(series_by_country[country]) > 0
+            }
             country_summary = {
                 "country": country,
-                "year": 2023,
-                "gdp_growth": None,
-                "inflation": None,
-                "unemployment": None
+                # Year of the most recent period among the country's indicators
+                "year": max((series.index[-1].year for series in latest.values()), default=None),
             }
-            
-            # Get latest values
-            if country in gdp_data and len(gdp_data[country]) > 0:
-                country_summary["gdp_growth"] = round(float(gdp_data[country].iloc[-1]), 2)
-            
-            if country in inflation_data and len(inflation_data[country]) > 0:
-                country_summary["inflation"] = round(float(inflation_data[country].iloc[-1]), 2)
-            
-            if country in unemployment_data and len(unemployment_data[country]) > 0:
-                country_summary["unemployment"] = round(float(unemployment_data[country].iloc[-1]), 2)
+            for indicator in series_by_indicator:
+                country_summary[indicator] = (
+                    round(float(latest[indicator].iloc[-1]), 2) if indicator in latest else None
+                )
             
             summary.append(country_summary)
         
-        return {
-            "data": summary,
-            "meta": {
-                "countries": countries,
-                "reference_year": 2023,
-                "data_type": "historical",
-                "last_updated": "2024-01-01"
-            }
-        }
+        return render_records(request, summary, {
+            "countries": countries,
+            "reference_year": max((s["year"] for s in summary if s["year"] is not None), default=None),
+            **_comprehensive_meta(series_by_indicator)
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,99 @@
+"""
+Realtime updates over WebSocket
+Clients subscribe to dashboard, country and indicator topics and receive change events
+"""
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import select
+
+from app.auth.security import verify_token
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.realtime import Subscription, realtime_hub
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _authenticate(token: str) -> bool:
+    """Check the access token belongs to an active user"""
+    payload = verify_token(token, token_type="access")
+    if payload is None or payload.get("sub") is None:
+        return False
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.is_active).where(User.email == payload["sub"]))
+        return bool(result.scalar_one_or_none())
+
+
+async def _receive(websocket: WebSocket, subscription: Subscription):
+    """Handle subscribe/unsubscribe/ping messages from the client"""
+    while True:
+        try:
+            message = json.loads(await websocket.receive_text())
+            action = message.get("action")
+            topics = message.get("topics") or []
+        except (ValueError, AttributeError):
+            await websocket.send_json({"type": "error", "detail": "Expected a JSON object"})
+            continue
+
+        if action == "subscribe":
+            accepted = realtime_hub.subscribe(subscription, topics)
+            await websocket.send_json({"type": "subscribed", "topics": sorted(accepted)})
+        elif action == "unsubscribe":
+            realtime_hub.unsubscribe(subscription, topics)
+            await websocket.send_json({"type": "unsubscribed", "topics": sorted(topics)})
+        elif action == "ping":
+            await websocket.send_json({"type": "pong"})
+        else:
+            await websocket.send_json({"type": "error", "detail": f"Unknown action: {action}"})
+
+
+async def _send(websocket: WebSocket, subscription: Subscription):
+    """Forward queued events to the client"""
+    while True:
+        message = await subscription.queue.get()
+        if subscription.overflowed:
+            # Events were dropped while the client lagged; it should refetch
+            subscription.overflowed = False
+            await websocket.send_json({"type": "resync"})
+        await websocket.send_text(message)
+
+
+@router.websocket("/ws")
+async def realtime_updates(websocket: WebSocket, token: str = Query(...)):
+    """
+    Stream change events for subscribed topics
+
+    Authenticate with ?token=<access token>, then send
+    {"action": "subscribe", "topics": ["dashboard", "country:NLD", "indicator:GDP_GROWTH"]}.
+    Events: indicator_update (latest changed period per country), dashboard_updated,
+    and resync when the connection fell behind and events were dropped.
+    """
+    if not await _authenticate(token):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    subscription = realtime_hub.connect()
+    if subscription is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    await websocket.accept()
+    tasks = [
+        asyncio.create_task(_receive(websocket, subscription)),
+        asyncio.create_task(_send(websocket, subscription)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = None if task.cancelled() else task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.warning(f"Realtime connection closed with error: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        realtime_hub.disconnect(subscription)
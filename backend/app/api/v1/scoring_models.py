@@ -0,0 +1,154 @@
+"""
+Scoring model API endpoints
+Versioned risk scoring models: list, add a version, activate
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_user, require_admin
+from app.database import get_db, get_read_db
+from app.models.company import RiskScoringModel
+from app.models.user import User
+from app.schemas.scoring_model import ScoringModelCreate, ScoringModelResponse
+from app.services.scoring_models import (
+    DEFAULT_DEFINITION,
+    DEFAULT_MODEL_NAME,
+    DEFAULT_MODEL_VERSION,
+    ScoringModel,
+    scoring_model_registry,
+)
+
+router = APIRouter(prefix="/scoring-models", tags=["Scoring Models"])
+
+# Tries at numbering a new version while other admins add versions of the same model
+CREATE_ATTEMPTS = 3
+
+
+def _response(row: RiskScoringModel) -> ScoringModelResponse:
+    return ScoringModelResponse(
+        name=row.name,
+        version=row.version,
+        label=f"{row.name}@{row.version}",
+        description=row.description,
+        definition=row.definition,
+        is_active=row.is_active,
+        created_by=row.created_by,
+        created_at=row.created_at,
+    )
+
+
+def _default_response(is_active: bool) -> ScoringModelResponse:
+    return ScoringModelResponse(
+        name=DEFAULT_MODEL_NAME,
+        version=DEFAULT_MODEL_VERSION,
+        label=f"{DEFAULT_MODEL_NAME}@{DEFAULT_MODEL_VERSION}",
+        description="Built-in model",
+        definition=DEFAULT_DEFINITION,
+        is_active=is_active,
+        built_in=True,
+    )
+
+
+@router.get("", response_model=List[ScoringModelResponse])
+async def list_scoring_models(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    List scoring model versions, the built-in default first
+    """
+    result = await db.execute(
+        select(RiskScoringModel).order_by(RiskScoringModel.name, RiskScoringModel.version)
+    )
+    rows = result.scalars().all()
+    return [_default_response(not any(row.is_active for row in rows))] + [_response(row) for row in rows]
+
+
+@router.post("", response_model=ScoringModelResponse, status_code=status.HTTP_201_CREATED)
+async def create_scoring_model(
+    request: ScoringModelCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin),
+):
+    """
+    Add a new version of a scoring model (admin only)
+
+    Versions are immutable; changing a model means adding a version. Risk
+    scores record the version that produced them. When another version of
+    the same model is added at the same time, the next number is taken;
+    409 if that keeps clashing.
+    """
+    definition = request.definition.model_dump(exclude_none=True)
+    created_by = str(current_user.id)
+
+    for _ in range(CREATE_ATTEMPTS):
+        latest = await db.scalar(
+            select(func.max(RiskScoringModel.version)).where(RiskScoringModel.name == request.name)
+        )
+        version = (latest or (DEFAULT_MODEL_VERSION if request.name == DEFAULT_MODEL_NAME else 0)) + 1
+        try:
+            ScoringModel(request.name, version, definition)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if request.activate:
+            await db.execute(update(RiskScoringModel).values(is_active=False))
+        row = RiskScoringModel(
+            name=request.name,
+            version=version,
+            description=request.description,
+            definition=definition,
+            is_active=request.activate,
+            created_by=created_by,
+        )
+        db.add(row)
+        try:
+            await db.commit()
+            break
+        except IntegrityError:
+            # The version number was taken in the meantime
+            await db.rollback()
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Other versions of {request.name} are being added; try again"
+        )
+    await db.refresh(row)
+    scoring_model_registry.invalidate()
+    return _response(row)
+
+
+@router.post("/{name}/{version}/activate", response_model=ScoringModelResponse)
+async def activate_scoring_model(
+    name: str,
+    version: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin),
+):
+    """
+    Make a model version the one that scores new risk (admin only)
+
+    Activating the built-in default deactivates all stored models.
+    """
+    row = None
+    if (name, version) != (DEFAULT_MODEL_NAME, DEFAULT_MODEL_VERSION):
+        row = (await db.execute(
+            select(RiskScoringModel).where(RiskScoringModel.name == name, RiskScoringModel.version == version)
+        )).scalar_one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Scoring model not found")
+
+    await db.execute(update(RiskScoringModel).values(is_active=False))
+    if row is not None:
+        row.is_active = True
+    await db.commit()
+    scoring_model_registry.invalidate()
+
+    if row is None:
+        return _default_response(True)
+    await db.refresh(row)
+    return _response(row)
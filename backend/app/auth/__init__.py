@@ -4,6 +4,8 @@ Authentication and authorization module
 from app.auth.security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     verify_token,
@@ -17,6 +19,8 @@ from app.auth.dependencies import (
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
     "create_access_token",
     "create_refresh_token",
     "verify_token",
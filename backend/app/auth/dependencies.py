@@ -4,27 +4,73 @@ FastAPI dependencies for authentication and authorization
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import event, select
 
-from app.database import get_db
+from app.config import settings
+from app.database import AsyncSessionLocal
 from app.models.user import User
 from app.auth.security import verify_token
+from app.services.cache import SWRCache
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Users by token subject (email). A dashboard load sends 6-8 authenticated
+# calls at once; they share one lookup instead of one query each.
+user_cache = SWRCache(ttl=settings.AUTH_USER_CACHE_TTL, name="auth_users")
+
+
+async def load_user(email: str) -> Optional[User]:
+    """
+    Look up a user by email, through the cache when enabled
+    
+    The returned instance is detached and shared between requests; treat it
+    as read-only and load the user in the request's own session to change it.
+    
+    Args:
+        email: Token subject
+        
+    Returns:
+        User object, or None if no user has this email
+    """
+    async def fetch() -> Optional[User]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User).where(User.email == email))
+            return result.scalar_one_or_none()
+    
+    if not settings.CACHE_ENABLED or user_cache.ttl <= 0:
+        return await fetch()
+    
+    user = await user_cache.get_or_compute(email, fetch)
+    if user is None:
+        # Do not remember unknown subjects
+        user_cache.invalidate(email)
+    return user
+
+
+def invalidate_user(email: Optional[str] = None):
+    """Drop a cached user (or all users) so the next request reloads it"""
+    user_cache.invalidate(email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User):
+    """Deactivation, role changes and deletes through the ORM apply at once in this process"""
+    invalidate_user(target.email)
+
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
     """
     Get current authenticated user from JWT token
     
+    The user row comes from a short-lived cache (AUTH_USER_CACHE_TTL), so
+    a request without other database work does not open a session at all.
+    
     Args:
         credentials: HTTP Bearer credentials
-        db: Database session
         
     Returns:
         User object
@@ -50,11 +96,8 @@ async def get_current_user(
     if email is None:
         raise credentials_exception
     
-    # Get user from database
-    result = await db.execute(
-        select(User).where(User.email == email)
-    )
-    user = result.scalar_one_or_none()
+    # Get user from cache or database
+    user = await load_user(email)
     
     if user is None:
         raise credentials_exception
@@ -111,8 +154,7 @@ async def require_admin(
 
 
 async def get_optional_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: AsyncSession = Depends(get_db)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[User]:
     """
     Get current user if authenticated, None otherwise
@@ -120,7 +162,6 @@ async def get_optional_user(
     
     Args:
         credentials: Optional HTTP Bearer credentials
-        db: Database session
         
     Returns:
         User object if authenticated, None otherwise
@@ -129,6 +170,6 @@ async def get_optional_user(
         return None
     
     try:
-        return await get_current_user(credentials, db)
+        return await get_current_user(credentials)
     except HTTPException:
         return None
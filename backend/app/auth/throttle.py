@@ -0,0 +1,64 @@
+"""
+Login throttling
+Limits login and registration attempts per client address and per account
+"""
+from typing import Optional
+
+from app.config import settings
+from app.rate_limit import TokenBuckets
+
+
+class LoginThrottle:
+    """
+    Login attempt budgets built from the RATE_LIMIT_* settings
+
+    - Per address: every attempt costs a token; RATE_LIMIT_BURST attempts,
+      refilled at RATE_LIMIT_REQUESTS_PER_MINUTE.
+    - Per email: only failed attempts cost a token; RATE_LIMIT_BURST
+      failures, refilled at RATE_LIMIT_REQUESTS_PER_MINUTE per hour. A
+      successful login resets the account's budget.
+
+    Checks run before the user query and bcrypt, so a rejected attempt
+    costs no database or hashing time.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.RATE_LIMIT_ENABLED,
+        requests_per_minute: int = settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
+        burst: int = settings.RATE_LIMIT_BURST,
+    ):
+        self.enabled = enabled
+        self.by_address = TokenBuckets(rate=requests_per_minute / 60, burst=burst)
+        self.by_email = TokenBuckets(rate=requests_per_minute / 3600, burst=burst)
+
+    def check(self, address: str, email: Optional[str] = None) -> float:
+        """
+        Count an attempt and check both budgets
+
+        Args:
+            address: Client IP address
+            email: Account being logged into, if any
+
+        Returns:
+            0.0 if the attempt may proceed, otherwise seconds to wait
+        """
+        if not self.enabled:
+            return 0.0
+        wait = self.by_address.acquire(address)
+        if email is not None:
+            wait = max(wait, self.by_email.peek(email.lower()))
+        return wait
+
+    def record_failure(self, email: str):
+        """Charge a failed login to the account"""
+        if self.enabled:
+            self.by_email.acquire(email.lower())
+
+    def record_success(self, email: str):
+        """Clear the account's failures after a successful login"""
+        self.by_email.reset(email.lower())
+
+
+# Singleton instance
+login_throttle = LoginThrottle()
@@ -26,8 +26,22 @@ class Settings(BaseSettings):
     DATABASE_URL: str = Field(
         default="sqlite+aiosqlite:///./atlasiq.db"
     )
+    DATABASE_READ_URL: Optional[str] = None  # Streaming replica for read-only endpoints
+    DB_READ_YOUR_WRITES_SECONDS: int = 5  # Reads stay on the primary this long after a client writes
+    DB_READ_YOUR_WRITES_BACKEND: str = "redis"  # redis (shared by every worker) or local (per process)
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection before erroring
+    DB_POOL_RECYCLE: int = 1800  # Replace connections older than this (seconds)
+    DB_POOL_PRE_PING: bool = True
+    DB_SQLITE_POOL_SIZE: int = 5  # Connections kept open to a SQLite file
+    SQLITE_TUNING: bool = True  # Apply the pragmas below on every SQLite connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for a lock held by another process
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB memory-mapped I/O
+    SQLITE_WRITE_QUEUE: bool = True  # Serialise background writes through one task
     DB_ECHO: bool = False
     
     # Redis
@@ -43,6 +57,11 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    AUTH_USER_CACHE_TTL: int = 30  # Seconds a user looked up from a token subject is reused (0 disables)
+    
+    # Password Hashing
+    BCRYPT_ROUNDS: int = 12  # Cost of new hashes; each step doubles hashing time
+    PASSWORD_HASH_WORKERS: int = 2  # Threads per process reserved for bcrypt
     
     # CORS
     CORS_ORIGINS: str = Field(
@@ -56,6 +75,17 @@ class Settings(BaseSettings):
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = 60
     RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Clients tracked per process before the least recent are dropped
+    RATE_LIMIT_BACKEND: str = "local"  # local (per worker) or redis (adds a cluster-wide sliding window)
+    RATE_LIMIT_SYNC_INTERVAL: float = 1.0  # Seconds between Redis window syncs
+    RATE_LIMIT_ROUTE_COSTS: str = Field(
+        default="POST /api/v1/data/export=10,POST /api/v1/companies/ingest=10,POST /api/v1/data/refresh=10,"
+                "POST /api/v1/companies/compare=3,POST /api/v1/data/indicators/query=2"
+    )  # "[METHOD ]path-prefix=tokens", longest prefix wins, other routes cost 1
+    RATE_LIMIT_EXEMPT_PATHS: str = "/health,/docs,/redoc,/openapi.json"
+    # Proxies whose X-Forwarded-For is believed (comma-separated addresses or CIDRs, * for any).
+    # Render/Railway/Docker proxies connect from private ranges; clients reaching the app directly never do
+    TRUSTED_PROXIES: str = "127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7"
     
     # Data Sources - Eurostat
     EUROSTAT_API_BASE: str = "https://ec.europa.eu/eurostat/api/dissemination"
@@ -66,6 +96,7 @@ class Settings(BaseSettings):
     ECB_API_BASE: str = "https://data-api.ecb.europa.eu/service/data"
     ECB_API_KEY: Optional[str] = None
     ECB_TIMEOUT: int = 30
+    ECB_FX_CURRENCIES: List[str] = Field(default=["USD", "GBP", "CHF", "DKK", "SEK", "NOK", "PLN", "CZK", "JPY"])
     
     # Data Sources - World Bank
     WORLDBANK_API_BASE: str = "https://api.worldbank.org/v2"
@@ -83,6 +114,12 @@ class Settings(BaseSettings):
         "LU": "Luxembourg",
         "DE": "Germany"
     })
+    COUNTRY_ISO3: dict = Field(default={
+        "NL": "NLD",
+        "BE": "BEL",
+        "LU": "LUX",
+        "DE": "DEU"
+    })
     
     # Supported Sectors
     SUPPORTED_SECTORS: List[str] = Field(default=[
@@ -99,17 +136,44 @@ class Settings(BaseSettings):
     FETCH_SCHEDULE_CRON: str = "0 2 * * *"  # Daily at 2 AM
     RISK_CALC_SCHEDULE_CRON: str = "0 3 * * *"  # Daily at 3 AM
     CLEANUP_SCHEDULE_CRON: str = "0 4 * * 0"  # Weekly on Sunday at 4 AM
+    INGESTION_SOURCES: List[str] = Field(default=["eurostat", "imf", "worldbank", "yahoo", "ecb"])
+    INGESTION_START_YEAR: int = 2015  # First year requested on a full refresh
+    MARKET_DATA_TICKERS: List[str] = Field(default=["^AEX", "^BFX", "^GDAXI", "EURUSD=X"])
+    INGESTION_LOG_RETENTION_DAYS: int = 90  # Refresh/fetch logs older than this are pruned
+    LEADER_ELECTION_BACKEND: str = "auto"  # auto, postgres, redis, file or none
+    LEADER_LEASE_TTL: int = 30  # Seconds a Redis lease survives without renewal
+    LEADER_RENEW_INTERVAL: int = 10  # Seconds between acquire/renew attempts
+    LEADER_LOCK_KEY: str = "atlasiq:scheduler:leader"
+    LEADER_LOCK_FILE: str = "/tmp/atlasiq_scheduler.lock"
     
     # Caching
     CACHE_ENABLED: bool = True
     CACHE_DEFAULT_TTL: int = 3600
     CACHE_DASHBOARD_TTL: int = 1800  # 30 minutes
+    CACHE_DASHBOARD_STALE_TTL: int = 3600  # Serve stale while refreshing for up to 1 hour
     CACHE_DATA_QUERY_TTL: int = 3600  # 1 hour
+    CACHE_FINANCIAL_HISTORY_TTL: int = 3600  # Keyed by data version, so edits show up at once
+    CACHE_FINANCIAL_HISTORY_MAX_ENTRIES: int = 5000
+    PEER_INDEX_MAX_AGE: int = 900  # Rebuild peer percentile arrays after 15 minutes (other workers' scores)
+    STRESS_UNIVERSE_MAX_AGE: int = 900  # Reload the stress test statement columns after 15 minutes
+    SCORING_MODEL_REFRESH_SECONDS: int = 60  # Re-read the active scoring model (activations in other workers)
+    FX_TABLE_MAX_AGE: int = 3600  # Reload the in-memory FX rate arrays after 1 hour (other workers' fetches)
+    FX_RATE_MAX_LAG_DAYS: int = 10  # Oldest reference rate accepted for a date (covers weekends and holidays)
     
     # Export Settings
     EXPORT_MAX_ROWS: int = 100000
     EXPORT_TEMP_DIR: str = "/tmp/atlasiq_exports"
     EXPORT_EXPIRE_HOURS: int = 24
+    EXPORT_CHUNK_SIZE: int = 5000  # Rows fetched per DB round-trip while streaming
+    EXPORT_WORKER_CONCURRENCY: int = 2  # Export jobs processed in parallel per process
+    EXPORT_QUEUE_SIZE: int = 100
+    EXPORT_SWEEP_INTERVAL_SECONDS: int = 900  # How often expired files are deleted
+    EXPORT_STALE_CLAIM_SECONDS: int = 1800  # A processing export not heard from for this long is re-queued
+    
+    # Risk Score Backfill
+    RISK_BACKFILL_CHUNK_SIZE: int = 2000  # Statements read, scored and upserted per batch
+    RISK_BACKFILL_WORKERS: int = 4  # Scoring processes for large universes (0 = score inline)
+    RISK_BACKFILL_PARALLEL_MIN_ROWS: int = 20000  # Below this, process start-up costs more than it saves
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -119,6 +183,9 @@ class Settings(BaseSettings):
     # Monitoring
     METRICS_ENABLED: bool = True
     METRICS_PORT: int = 9090
+    QUERY_TRACKING_ENABLED: bool = True  # Count SQL statements per request, warn on repeated shapes
+    QUERY_DEBUG_HEADERS: bool = False  # Add X-Query-Count / X-Query-Max-Repeats to responses
+    QUERY_REPEAT_THRESHOLD: int = 5  # Same statement shape this often in one request looks like N+1
     SENTRY_DSN: Optional[str] = None
     
     # Feature Flags
@@ -127,6 +194,13 @@ class Settings(BaseSettings):
     FEATURE_REALTIME_UPDATES: bool = True
     FEATURE_EXPORT_PDF: bool = False
     
+    # Realtime Updates
+    REALTIME_BROKER: str = "redis"  # redis (fan out across workers) or local
+    REALTIME_CHANNEL: str = "atlasiq:realtime"
+    REALTIME_MAX_CONNECTIONS: int = 1000  # WebSocket connections per worker
+    REALTIME_MAX_TOPICS: int = 50  # Topics per connection
+    REALTIME_QUEUE_SIZE: int = 100  # Pending messages per connection before dropping
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -160,6 +234,21 @@ class Settings(BaseSettings):
             return ["*"]
         return [h.strip() for h in self.CORS_ALLOW_HEADERS.split(",")]
     
+    def get_rate_limit_route_costs(self) -> list[tuple[Optional[str], str, float]]:
+        """Get route cost weights as (method or None, path prefix, cost)"""
+        costs = []
+        for entry in self.RATE_LIMIT_ROUTE_COSTS.split(","):
+            if not entry.strip():
+                continue
+            route, cost = entry.rsplit("=", 1)
+            method, _, path = route.strip().rpartition(" ")
+            costs.append((method.strip().upper() or None, path, float(cost)))
+        return costs
+    
+    def get_rate_limit_exempt_paths(self) -> list[str]:
+        """Get path prefixes that are never rate limited"""
+        return [p.strip() for p in self.RATE_LIMIT_EXEMPT_PATHS.split(",") if p.strip()]
+    
     def get_database_url(self) -> str:
         """Get database URL as string"""
         return str(self.DATABASE_URL)
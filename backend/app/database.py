@@ -3,39 +3,50 @@ Database connection and session management
 Async SQLAlchemy setup with connection pooling
 """
 from typing import AsyncGenerator
+from fastapi import Request
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool, QueuePool
 
 from app.config import settings
+from app.db_pool import PoolMetrics, engine_pool_options, install_sqlite_pragmas
+from app.db_routing import client_key, recent_writes
+from app.db_writer import WriteQueue
+from app.metrics import instrument_engine
 
-# Create async engine with connection pooling
-# SQLite must use NullPool or StaticPool for async
+# Create async engine with a pool suited to the database (see db_pool)
 database_url = settings.get_database_url()
 is_sqlite = database_url.startswith("sqlite")
 
-if is_sqlite or settings.DEBUG:
-    # SQLite or debug mode: use NullPool
-    engine = create_async_engine(
-        database_url,
-        echo=settings.DB_ECHO,
-        poolclass=NullPool,
-        connect_args={"check_same_thread": False} if is_sqlite else {},
-    )
-else:
-    # PostgreSQL in production: use QueuePool with pooling
-    engine = create_async_engine(
-        database_url,
-        echo=settings.DB_ECHO,
-        pool_pre_ping=True,
-        pool_size=settings.DB_POOL_SIZE,
-        max_overflow=settings.DB_MAX_OVERFLOW,
-        poolclass=QueuePool,
-    )
+pool_metrics = PoolMetrics()
+engine = create_async_engine(
+    database_url,
+    echo=settings.DB_ECHO,
+    **engine_pool_options(database_url, pool_metrics),
+)
+if is_sqlite and settings.SQLITE_TUNING:
+    install_sqlite_pragmas(engine)
+
+# Background writes go through one queue on SQLite (single writer)
+db_writer = WriteQueue(enabled=is_sqlite and settings.SQLITE_WRITE_QUEUE)
+
+# Optional read replica; without one, reads use the primary engine
+read_database_url = settings.DATABASE_READ_URL
+read_pool_metrics = PoolMetrics() if read_database_url else pool_metrics
+read_engine = create_async_engine(
+    read_database_url,
+    echo=settings.DB_ECHO,
+    **engine_pool_options(read_database_url, read_pool_metrics),
+) if read_database_url else engine
+
+# Statement timings, per-request query counts (Prometheus) and N+1 warnings
+if settings.METRICS_ENABLED or settings.QUERY_TRACKING_ENABLED:
+    instrument_engine(engine)
+    if read_engine is not engine:
+        instrument_engine(read_engine)
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -46,6 +57,14 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if read_database_url else AsyncSessionLocal
+
 # Create declarative base for models
 Base = declarative_base()
 
@@ -70,14 +89,38 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def init_db() -> None:
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only endpoints
+    
+    Uses the read replica when DATABASE_READ_URL is set, except for clients
+    that wrote within DB_READ_YOUR_WRITES_SECONDS, whose reads stay on the
+    primary so they see their own changes. Nothing is committed.
+    """
+    client = request.client.host if request.client else None
+    use_primary = read_engine is engine or await recent_writes.wrote_recently(
+        client_key(request.headers, client)
+    )
+    session_factory = AsyncSessionLocal if use_primary else AsyncReadSessionLocal
+
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
+
+async def init_db() -> bool:
     """
-    Initialize database - create all tables
-    Should be called on application startup
+    Initialize database - apply pending Alembic migrations
+    Called by docker_init.py and setup scripts; app startup only checks the revision
+    
+    Returns:
+        True if any migration ran
     """
-    async with engine.begin() as conn:
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
+    from app.migrations import run_migrations
+    return await run_migrations(engine)
 
 
 async def close_db() -> None:
@@ -85,7 +128,25 @@ async def close_db() -> None:
     Close database connections
     Should be called on application shutdown
     """
+    await db_writer.stop()
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def get_pool_status() -> dict:
+    """
+    Get connection pool gauges and checkout wait statistics
+    Used by /health/pool and load tests to spot pool saturation
+    """
+    status = {
+        **pool_metrics.snapshot(engine.sync_engine.pool),
+        "write_queue_pending": db_writer.pending,
+        "write_queue_completed": db_writer.completed,
+    }
+    if read_engine is not engine:
+        status["replica"] = read_pool_metrics.snapshot(read_engine.sync_engine.pool)
+    return status
 
 
 # Health check function
@@ -0,0 +1,211 @@
+"""
+Connection pool configuration and metrics
+Picks the pool class per database, tunes SQLite connections and records checkout wait time and usage
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app.config import settings
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """Counters and gauges for one engine's connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Zero the counters and the wait histogram
+
+        Connections checked out right now are still in use, so in_use is
+        kept and the peak starts from it.
+        """
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.peak_in_use = self.in_use
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_checkout(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.in_use += 1
+                self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.wait_buckets[self._bucket(wait)] += 1
+
+    def record_checkin(self):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        """
+        Current pool state
+
+        Args:
+            pool: The engine's pool (sync_engine.pool)
+
+        Returns:
+            Dictionary of gauges, counters and the wait histogram
+        """
+        size = pool.size() if hasattr(pool, "size") else None
+        max_overflow = getattr(pool, "_max_overflow", 0) if size is not None else None
+        capacity = size + max(max_overflow, 0) if size is not None and max_overflow >= 0 else None
+
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            histogram = {f"le_{bound}": count for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)}
+            histogram["le_inf"] = self.wait_buckets[-1]
+            return {
+                "pool_class": getattr(pool, "base_name", type(pool).__name__),
+                "size": size,
+                "max_overflow": max_overflow,
+                "in_use": self.in_use,
+                "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0,
+                "peak_in_use": self.peak_in_use,
+                "saturation": round(self.in_use / capacity, 3) if capacity else None,
+                "peak_saturation": round(self.peak_in_use / capacity, 3) if capacity else None,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": round(self.wait_total / attempts, 6) if attempts else 0.0,
+                "wait_seconds_max": round(self.wait_max, 6),
+                "wait_seconds_histogram": histogram,
+            }
+
+    @staticmethod
+    def _bucket(wait: float) -> int:
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if wait <= bound:
+                return i
+        return len(WAIT_BUCKETS)
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout (queue wait plus connect) and tracks connections in use"""
+
+    metrics: PoolMetrics
+    base_name: str
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return record
+
+    def _do_return_conn(self, record):
+        self.metrics.record_checkin()
+        return super()._do_return_conn(record)
+
+
+def instrumented(pool_class, metrics: PoolMetrics):
+    """Subclass a pool class so it reports into metrics (kept across pool.recreate())"""
+    return type(
+        f"Instrumented{pool_class.__name__}",
+        (InstrumentedPoolMixin, pool_class),
+        {"metrics": metrics, "base_name": pool_class.__name__},
+    )
+
+
+def is_memory_sqlite(database_url: str) -> bool:
+    return database_url.startswith("sqlite") and (
+        ":memory:" in database_url or database_url.split("://", 1)[-1] in ("", "/")
+    )
+
+
+def engine_pool_options(database_url: str, metrics: Optional[PoolMetrics] = None) -> Dict[str, Any]:
+    """
+    Pool keyword arguments for create_async_engine
+
+    - In-memory SQLite: StaticPool, one connection shared by every session
+      (each new connection would otherwise be a new, empty database)
+    - File SQLite: a small queue pool so requests reuse connections instead
+      of opening the file per session
+    - Postgres: queue pool sized by DB_POOL_SIZE/DB_MAX_OVERFLOW with
+      timeout, recycle and pre-ping
+
+    Args:
+        database_url: SQLAlchemy database URL
+        metrics: Metrics sink for the instrumented pool
+
+    Returns:
+        Keyword arguments including poolclass
+    """
+    metrics = metrics or PoolMetrics()
+
+    if is_memory_sqlite(database_url):
+        return {
+            "poolclass": instrumented(StaticPool, metrics),
+            "connect_args": {"check_same_thread": False},
+        }
+
+    if database_url.startswith("sqlite"):
+        return {
+            "poolclass": instrumented(AsyncAdaptedQueuePool, metrics),
+            "pool_size": settings.DB_SQLITE_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "connect_args": {"check_same_thread": False},
+        }
+
+    return {
+        "poolclass": instrumented(AsyncAdaptedQueuePool, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def sqlite_pragmas() -> List[str]:
+    """PRAGMA statements applied to every new SQLite connection"""
+    return [
+        # WAL lets readers run while a write is in progress
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        # NORMAL is durable across app crashes in WAL mode; only power loss can drop the last commits
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def install_sqlite_pragmas(engine):
+    """
+    Apply sqlite_pragmas() whenever the engine opens a connection
+
+    Args:
+        engine: Async engine for a SQLite database
+    """
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
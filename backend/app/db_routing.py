@@ -0,0 +1,158 @@
+"""
+Read-replica routing helpers
+Tracks clients that just wrote so their next reads stay on the primary
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# POST endpoints that only read (query bodies too large for a query string)
+READ_ONLY_POST_PATHS = frozenset({
+    "/api/v1/companies/compare",
+    "/api/v1/companies/stress-test",
+    "/api/v1/data/indicators/query",
+})
+
+
+def client_key(headers: Dict[str, str], client_host: Optional[str]) -> str:
+    """Identify a client by its bearer token, falling back to its address"""
+    authorization = headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return f"addr:{client_host or 'unknown'}"
+
+
+class RecentWrites:
+    """
+    Remembers which clients wrote within the last window seconds
+
+    A replica can lag the primary by a moment; sending a client's reads to
+    the primary right after its own write means it always sees that write.
+
+    Marks are kept in a per-process map (pruned as it is used and capped in
+    size) and, with the redis backend, as expiring Redis keys, so a write
+    handled by one worker also pins the reads another worker handles. The
+    local map answers first; Redis is only asked when it has no entry.
+    Without Redis the marks stay per process.
+    """
+
+    def __init__(
+        self,
+        window: float = settings.DB_READ_YOUR_WRITES_SECONDS,
+        max_entries: int = 10000,
+        backend: str = settings.DB_READ_YOUR_WRITES_BACKEND,
+        prefix: str = "atlasiq:rw",
+    ):
+        self.window = window
+        self.max_entries = max_entries
+        self.backend = backend
+        self.prefix = prefix
+        self._writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+
+    async def start(self):
+        """Connect to Redis (redis backend only)"""
+        if self.backend != "redis":
+            return
+        try:
+            from redis import asyncio as aioredis
+
+            self._redis = aioredis.from_url(settings.get_redis_url(), decode_responses=True)
+            await self._redis.ping()
+        except Exception as e:
+            logger.warning(f"Read-your-writes store unavailable, tracking writes per worker only: {e}")
+            self._redis = None
+
+    async def stop(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def mark(self, key: str):
+        self._mark_local(key)
+        if self._redis is not None:
+            try:
+                await self._redis.set(f"{self.prefix}:{key}", 1, px=int(self.window * 1000))
+            except Exception as e:
+                logger.debug(f"Read-your-writes mark not shared: {e}")
+
+    async def wrote_recently(self, key: str) -> bool:
+        if self._wrote_recently_local(key):
+            return True
+        if self._redis is None:
+            return False
+        try:
+            return bool(await self._redis.exists(f"{self.prefix}:{key}"))
+        except Exception as e:
+            logger.debug(f"Read-your-writes lookup failed, using the replica: {e}")
+            return False
+
+    def _mark_local(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._writes) >= self.max_entries:
+                self._prune(now)
+            if len(self._writes) >= self.max_entries:
+                # Still full of fresh entries: drop the oldest
+                self._writes.pop(next(iter(self._writes)))
+            self._writes.pop(key, None)
+            self._writes[key] = now
+
+    def _wrote_recently_local(self, key: str) -> bool:
+        with self._lock:
+            written = self._writes.get(key)
+            if written is None:
+                return False
+            if time.monotonic() - written > self.window:
+                del self._writes[key]
+                return False
+            return True
+
+    def _prune(self, now: float):
+        expired = [key for key, written in self._writes.items() if now - written > self.window]
+        for key in expired:
+            del self._writes[key]
+
+
+# Singleton instance
+recent_writes = RecentWrites()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Marks the client after every successful unsafe (POST/PUT/PATCH/DELETE) request
+
+    Read-only POST endpoints (READ_ONLY_POST_PATHS) do not count as writes.
+    Pure ASGI so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app, tracker: RecentWrites = recent_writes):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or (scope["method"] == "POST" and scope["path"].rstrip("/") in READ_ONLY_POST_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+                client = scope.get("client")
+                await self.tracker.mark(client_key(headers, client[0] if client else None))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
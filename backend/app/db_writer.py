@@ -0,0 +1,98 @@
+"""
+Single-writer queue for SQLite
+Background jobs submit their write transactions here so they run one at a time
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteQueue:
+    """
+    Runs submitted write coroutines one after another on a single worker task
+
+    SQLite allows one writer at a time; two sessions writing concurrently
+    means one of them spins on busy_timeout or fails with "database is
+    locked". Funnelling ingestion, risk and export-progress writes through
+    this queue keeps them in order while readers (WAL mode) carry on
+    concurrently. On other databases, or with SQLITE_WRITE_QUEUE off,
+    submit() just awaits the coroutine directly.
+
+    The submitted callable should do its writes and commit; reads and slow
+    upstream calls belong outside it so the queue is never held up.
+    """
+
+    def __init__(self, enabled: bool = False, max_pending: int = 1000):
+        self.enabled = enabled
+        self.max_pending = max_pending
+        self.completed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, func: Callable[..., Awaitable[T]], *args: Any) -> T:
+        """
+        Run func(*args) on the writer and wait for its result
+
+        Args:
+            func: Coroutine function performing the write (and commit)
+            *args: Arguments for func
+
+        Returns:
+            Whatever func returns; exceptions are re-raised to the caller
+        """
+        if not self.enabled or asyncio.current_task() is self._worker:
+            # Nested submits from inside a write run inline to avoid deadlock
+            return await func(*args)
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((func, args, future))
+        return await future
+
+    async def stop(self):
+        """Finish queued writes and stop the worker"""
+        if self._worker is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except (asyncio.CancelledError, RuntimeError):
+            pass
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # First use, or a new event loop (scripts and tests call asyncio.run repeatedly)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            func, args, future = await self._queue.get()
+            try:
+                if not future.cancelled():
+                    result = await func(*args)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.completed += 1
+                self._queue.task_done()
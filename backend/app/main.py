@@ -3,13 +3,22 @@ FastAPI main application
 AtlasIQ Web - Macro-economic data aggregation and risk assessment platform
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, status
+from fastapi import Depends, FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 
 from app.config import settings
-from app.database import init_db, close_db, check_db_connection
+from app.auth.dependencies import require_admin
+from app.database import engine, close_db, check_db_connection, get_pool_status, pool_metrics, read_pool_metrics
+from app.db_routing import ReadYourWritesMiddleware, recent_writes
+from app.metrics import MetricsMiddleware, mark_worker_stopped, start_metrics_server
+from app.migrations import check_schema
+from app.models.user import User
+from app.rate_limit import RateLimitMiddleware, rate_limiter
+from app.services.export_jobs import export_job_runner
+from app.services.realtime import realtime_hub
+from app.services.scheduler import job_scheduler
 
 
 @asynccontextmanager
@@ -23,21 +32,45 @@ async def lifespan(app: FastAPI):
     print(f"   Environment: {settings.ENVIRONMENT}")
     print(f"   Debug: {settings.DEBUG}")
     
-    # Initialize database (non-blocking in dev mode)
+    # Check database (non-blocking in dev mode); migrations run from the entrypoint
     try:
-        await init_db()
-        print("✅ Database initialized")
-        
-        # Check database connection
         if await check_db_connection():
             print("✅ Database connection healthy")
         else:
             print("⚠️  Database connection check failed")
+        
+        if await check_schema(engine):
+            print("✅ Database schema up to date")
+        else:
+            print("⚠️  Database schema is behind, run `alembic upgrade head`")
     except Exception as e:
         print(f"⚠️  Database initialization failed: {e}")
         print("   Server will start anyway. Some features may not work without database.")
         print("   To fix: Start PostgreSQL or update DATABASE_URL in .env")
     
+    # Start background export workers
+    await export_job_runner.start()
+    print(f"✅ Export workers started ({export_job_runner.concurrency})")
+
+    # Connect the realtime hub to the pub/sub broker
+    await realtime_hub.start()
+    
+    # Connect the cluster-wide rate limit window (redis backend only)
+    await rate_limiter.start()
+
+    # Share read-your-writes marks between workers (redis backend only)
+    if settings.DATABASE_READ_URL:
+        await recent_writes.start()
+    
+    # Serve Prometheus metrics on their own port
+    if settings.METRICS_ENABLED and start_metrics_server():
+        print(f"✅ Metrics served on port {settings.METRICS_PORT}")
+
+    # Start scheduled ingestion, risk and cleanup jobs (runs on the elected leader only)
+    await job_scheduler.start()
+    if settings.SCHEDULER_ENABLED:
+        print(f"✅ Scheduler campaigning for leadership ({settings.LEADER_ELECTION_BACKEND})")
+    
     print(f"\n🌐 Server running on http://{settings.HOST}:{settings.PORT}")
     print(f"📚 API docs available at http://{settings.HOST}:{settings.PORT}/docs")
     print(f"🔍 Health check at http://{settings.HOST}:{settings.PORT}/health\n")
@@ -46,8 +79,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down...")
+    await job_scheduler.stop()
+    await recent_writes.stop()
+    await rate_limiter.stop()
+    await realtime_hub.stop()
+    await export_job_runner.stop()
     await close_db()
     print("✅ Database connections closed")
+    mark_worker_stopped()
 
 
 # Create FastAPI application
@@ -61,6 +100,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Per-client request budgets; added first so CORS headers still wrap 429s
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 cors_origins = settings.get_cors_origins()
 print(f"🔒 CORS Origins: {cors_origins}")
@@ -77,6 +120,19 @@ app.add_middleware(
 # Add GZip compression middleware
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Keep a client's reads on the primary right after it writes (read replica only)
+if settings.DATABASE_READ_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Outermost, so latency covers every other middleware (including 429s).
+# With query tracking it also warns about queries run in loops
+if settings.METRICS_ENABLED or settings.QUERY_TRACKING_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        debug_headers=settings.QUERY_TRACKING_ENABLED and (settings.QUERY_DEBUG_HEADERS or settings.DEBUG),
+        repeat_threshold=settings.QUERY_REPEAT_THRESHOLD if settings.QUERY_TRACKING_ENABLED else None,
+    )
+
 
 # Health check endpoint
 @app.get("/health", tags=["Health"])
@@ -100,6 +156,28 @@ async def health_check():
     return JSONResponse(content=health_status, status_code=status_code)
 
 
+@app.get("/health/pool", tags=["Health"])
+async def pool_status():
+    """
+    Database connection pool status
+    Returns in-use/idle/overflow gauges, saturation and checkout wait times.
+    """
+    return get_pool_status()
+
+
+@app.post("/health/pool/reset", tags=["Health"])
+async def reset_pool_counters(current_user: User = Depends(require_admin)):
+    """
+    Clear the pool checkout counters, e.g. at the start of a load test (admin only)
+    
+    Returns the status as it was before the reset.
+    """
+    pool = get_pool_status()
+    pool_metrics.reset()
+    read_pool_metrics.reset()
+    return pool
+
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
@@ -116,11 +194,14 @@ async def root():
 
 
 # Import and include routers
-from app.api.v1 import auth, data, companies, macro
+from app.api.v1 import auth, data, companies, macro, realtime, scoring_models
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(data.router, prefix="/api/v1/data", tags=["Data"])
 app.include_router(companies.router, prefix="/api/v1", tags=["Companies"])
+app.include_router(scoring_models.router, prefix="/api/v1", tags=["Scoring Models"])
 app.include_router(macro.router)  # Macro router has prefix already defined
+if settings.FEATURE_REALTIME_UPDATES:
+    app.include_router(realtime.router, prefix="/api/v1/realtime", tags=["Realtime"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,387 @@
+"""
+Prometheus metrics
+Request latency per route, SQL timings per request (with N+1 detection),
+upstream fetch stats, and scrape-time gauges for caches, connection pools
+and the rate limiter
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HTTP_REQUESTS = Counter(
+    "atlasiq_http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "atlasiq_http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "atlasiq_http_requests_in_progress", "HTTP requests being served", ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERY_LATENCY = Histogram(
+    "atlasiq_db_query_duration_seconds", "SQL statement execution time", ["operation"],
+    buckets=QUERY_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "atlasiq_db_queries_per_request", "SQL statements per HTTP request", ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "atlasiq_db_time_per_request_seconds", "SQL time per HTTP request", ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_LATENCY = Histogram(
+    "atlasiq_upstream_fetch_duration_seconds", "Upstream data source call latency", ["source", "operation"],
+    buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAM_FETCHES = Counter(
+    "atlasiq_upstream_fetches_total", "Upstream data source calls by outcome (ok, empty, error)",
+    ["source", "outcome"],
+)
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape
+
+    Literals and bound parameters become ``?`` and ``IN (?, ?, ...)`` lists
+    collapse to ``(?)``, so the same query issued for different ids maps to
+    the same shape.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PARAMETER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PARAMETER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class RequestStats:
+    """
+    SQL work done in one scope: a request, or a query_budget block
+
+    Statements are also charged to the enclosing stats, so a budget around
+    several requests sees all of their queries.
+    """
+    parent: Optional["RequestStats"] = None
+    queries: int = 0
+    db_seconds: float = 0.0
+    shapes: Tally = field(default_factory=Tally)
+
+    def record(self, statement: str, elapsed: float):
+        shape = statement_shape(statement)
+        stats = self
+        while stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int = settings.QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """Shapes executed at least threshold times, most frequent first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    @property
+    def max_repeats(self) -> int:
+        top = self.shapes.most_common(1)
+        return top[0][1] if top else 0
+
+
+# Stats for the current request or budget block (None outside both)
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Time every SQL statement and charge it to the current request or budget"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_LATENCY.labels(_operation(statement)).observe(elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def on_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def _operation(statement: str) -> str:
+    operation = statement.lstrip()[:8].split(None, 1)
+    return operation[0].upper() if operation else "OTHER"
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and SQL work per route template
+
+    Pure ASGI; the route label is the matched path template (e.g.
+    /api/v1/companies/{company_id}), or "unmatched" for 404s, so label
+    cardinality stays bounded.
+
+    With repeat_threshold set it logs a warning when one statement shape
+    runs that many times or more in a request, which usually means a query
+    in a loop. With debug_headers the response carries X-Query-Count and
+    X-Query-Max-Repeats (statements issued before the response starts).
+    """
+
+    def __init__(self, app, debug_headers: bool = False, repeat_threshold: Optional[int] = None):
+        self.app = app
+        self.debug_headers = debug_headers
+        self.repeat_threshold = repeat_threshold
+        self._templates: Dict[Callable, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats(parent=request_stats.get())
+        token = request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.debug_headers:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-query-count", str(stats.queries).encode()),
+                        (b"x-query-max-repeats", str(stats.max_repeats).encode()),
+                    ]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            request_stats.reset(token)
+            route = self._route(scope)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_seconds)
+            if self.repeat_threshold is not None:
+                for shape, n in stats.repeated(self.repeat_threshold):
+                    logger.warning(
+                        f"Possible N+1: {method} {scope['path']} ran {n}x "
+                        f"(of {stats.queries} queries): {shape}"
+                    )
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+            template = template or getattr(endpoint, "__name__", "unknown")
+            self._templates[endpoint] = template
+        return template
+
+
+class UpstreamCall:
+    """Outcome of one upstream call; see upstream_call"""
+
+    def __init__(self):
+        self.outcome = "ok"
+
+    def result(self, value: Any):
+        """Classify a source's return value: None is a failure, empty is no data"""
+        self.outcome = "error" if value is None else "empty" if not len(value) else "ok"
+
+
+@contextmanager
+def upstream_call(source: str, operation: str) -> Iterator[UpstreamCall]:
+    """
+    Time a call to an upstream data source
+
+    Usage:
+        with upstream_call("eurostat", "get_gdp_growth") as call:
+            data = await asyncio.to_thread(fetch, countries, year)
+            call.result(data)
+    """
+    call = UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.outcome = "error"
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(source, operation).observe(time.perf_counter() - started)
+        UPSTREAM_FETCHES.labels(source, call.outcome).inc()
+
+
+class AppCollector:
+    """Reads cache, pool and rate limiter counters at scrape time"""
+
+    def describe(self):
+        # Registering must not call collect(): app.database imports this module
+        return []
+
+    def collect(self):
+        yield from self._cache_metrics()
+        yield from self._pool_metrics()
+        yield from self._rate_limit_metrics()
+
+    def _cache_metrics(self):
+        from app.services.cache import all_caches
+
+        requests = CounterMetricFamily("atlasiq_cache_requests", "Cache lookups by result", labels=["cache", "result"])
+        ratio = GaugeMetricFamily("atlasiq_cache_hit_ratio", "Share of lookups served from cache", labels=["cache"])
+        entries = GaugeMetricFamily("atlasiq_cache_entries", "Cached entries", labels=["cache"])
+        for cache in all_caches():
+            stats = cache.stats()
+            served = stats["hits"] + stats["stale_hits"]
+            total = served + stats["misses"]
+            requests.add_metric([stats["name"], "hit"], stats["hits"])
+            requests.add_metric([stats["name"], "stale"], stats["stale_hits"])
+            requests.add_metric([stats["name"], "miss"], stats["misses"])
+            ratio.add_metric([stats["name"]], served / total if total else 0.0)
+            entries.add_metric([stats["name"]], stats["entries"])
+        yield from (requests, ratio, entries)
+
+    def _pool_metrics(self):
+        from app.database import db_writer, engine, pool_metrics, read_engine, read_pool_metrics
+
+        pools = [("primary", engine, pool_metrics)]
+        if read_engine is not engine:
+            pools.append(("replica", read_engine, read_pool_metrics))
+
+        gauges = {
+            name: GaugeMetricFamily(f"atlasiq_db_pool_{name}", help_text, labels=["pool"])
+            for name, help_text in (
+                ("in_use", "Connections checked out"),
+                ("idle", "Connections idle in the pool"),
+                ("overflow", "Overflow connections open"),
+                ("saturation", "Checked out connections / (size + max_overflow)"),
+            )
+        }
+        checkouts = CounterMetricFamily("atlasiq_db_pool_checkouts", "Connection checkouts", labels=["pool"])
+        timeouts = CounterMetricFamily("atlasiq_db_pool_timeouts", "Checkouts that timed out", labels=["pool"])
+        wait = HistogramMetricFamily(
+            "atlasiq_db_pool_wait_seconds", "Time spent waiting for a connection", labels=["pool"]
+        )
+        for label, pool_engine, metrics in pools:
+            snapshot = metrics.snapshot(pool_engine.sync_engine.pool)
+            for name, gauge in gauges.items():
+                if snapshot[name] is not None:
+                    gauge.add_metric([label], snapshot[name])
+            checkouts.add_metric([label], snapshot["checkouts"])
+            timeouts.add_metric([label], snapshot["timeouts"])
+            counts = list(snapshot["wait_seconds_histogram"].values())
+            bounds = [key[3:] for key in snapshot["wait_seconds_histogram"]][:-1] + ["+Inf"]
+            cumulative = [sum(counts[:i + 1]) for i in range(len(counts))]
+            wait.add_metric([label], list(zip(bounds, cumulative)), sum_value=metrics.wait_total)
+
+        queue = GaugeMetricFamily("atlasiq_db_write_queue_pending", "Writes waiting for the single writer")
+        queue.add_metric([], db_writer.pending)
+        yield from (*gauges.values(), checkouts, timeouts, wait, queue)
+
+    def _rate_limit_metrics(self):
+        from app.rate_limit import rate_limiter
+
+        decisions = CounterMetricFamily("atlasiq_rate_limit_decisions", "Rate limit decisions", labels=["result"])
+        stats = rate_limiter.stats()
+        decisions.add_metric(["allowed"], stats["allowed"])
+        decisions.add_metric(["rejected"], stats["rejected"])
+        clients = GaugeMetricFamily("atlasiq_rate_limit_clients", "Clients with a tracked bucket")
+        clients.add_metric([], stats["clients"])
+        yield from (decisions, clients)
+
+
+REGISTRY.register(AppCollector())
+
+
+def multiprocess_mode() -> bool:
+    """Whether prometheus_client shares metrics between workers through PROMETHEUS_MULTIPROC_DIR"""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    Registry served on the metrics port
+
+    In multiprocess mode the request, SQL and upstream metrics of every
+    worker are read from PROMETHEUS_MULTIPROC_DIR and summed. The
+    AppCollector gauges (caches, pools, rate limiter) still describe the
+    serving worker only: they are read from its memory at scrape time.
+    """
+    if not multiprocess_mode():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(AppCollector())
+    return registry
+
+
+def start_metrics_server(port: int = settings.METRICS_PORT) -> bool:
+    """
+    Serve /metrics on its own port
+
+    With several workers on one host only the first binds the port. Without
+    PROMETHEUS_MULTIPROC_DIR it then reports that worker's traffic alone;
+    set it (to an empty directory, cleared before the workers start, see
+    start.sh) so the served metrics cover every worker.
+
+    Returns:
+        True if this process is serving metrics
+    """
+    try:
+        start_http_server(port, registry=metrics_registry())
+    except OSError as e:
+        logger.warning(f"Metrics port {port} unavailable, not serving metrics from this process: {e}")
+        return False
+    return True
+
+
+def mark_worker_stopped():
+    """Drop this worker's live gauges from the shared metrics (multiprocess mode only)"""
+    if multiprocess_mode():
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,151 @@
+"""
+Schema migrations
+Runs the Alembic chain from the entrypoint and checks the revision at startup
+"""
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import exc as sa_exc, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import Base
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revision matching the tables create_all used to build before migrations
+BASELINE_REVISION = "0001"
+
+# Tables created by the baseline revision
+BASELINE_TABLES = (
+    "cashflows", "companies", "company_risk_scores", "data_refresh_logs", "data_sources",
+    "economic_forecasts", "exports", "fetch_logs", "financial_statements", "indicator_values",
+    "interest_rates", "macro_indicators", "market_data", "users",
+)
+
+# Serializes concurrent entrypoints on PostgreSQL (arbitrary constant)
+MIGRATION_LOCK_KEY = 7264513
+
+
+def alembic_config() -> Config:
+    """Alembic config pointing at backend/alembic regardless of the working directory"""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return config
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    """Latest revision in alembic/versions"""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(engine: AsyncEngine) -> Optional[str]:
+    """
+    Revision stamped in the database
+
+    A single-row SELECT, no reflection.
+
+    Returns:
+        Revision id, or None if the database has never been migrated
+    """
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except sa_exc.DBAPIError:
+        return None
+
+
+def _complete_baseline(connection: Connection, inspector) -> None:
+    """
+    Create baseline tables missing from a legacy create_all database
+
+    Old create_all runs could stop part-way (on SQLite a duplicate index
+    name aborted it after the first few tables), so stamping the baseline
+    is only safe once every baseline table exists. Missing tables are
+    built from the current models; the later migrations check before
+    adding anything, so columns and indexes the models already have are
+    skipped.
+    """
+    missing = [name for name in BASELINE_TABLES if not inspector.has_table(name)]
+    if not missing:
+        return
+    logger.info(f"Legacy schema is incomplete, creating {', '.join(missing)}")
+    Base.metadata.create_all(connection, tables=[Base.metadata.tables[name] for name in missing], checkfirst=True)
+
+
+def _upgrade(connection: Connection, config: Config) -> Optional[str]:
+    """Stamp legacy databases and upgrade to head on one connection"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+    inspector = inspect(connection)
+    current = None
+    if inspector.has_table("alembic_version"):
+        current = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    if current == head_revision():
+        # Another process migrated while we waited for the lock
+        return current
+
+    config.attributes["connection"] = connection
+    if current is None and inspector.has_table("users"):
+        _complete_baseline(connection, inspector)
+        logger.info(f"Existing schema without migration history, stamping {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+        current = BASELINE_REVISION
+    command.upgrade(config, "head")
+    return current
+
+
+async def run_migrations(engine: AsyncEngine) -> bool:
+    """
+    Upgrade the database to the latest revision
+
+    Costs a single SELECT when the schema is already current. Databases built
+    by create_all before migrations existed are stamped at the baseline
+    revision first, so only the later migrations run on them.
+
+    Args:
+        engine: Engine for the primary database
+
+    Returns:
+        True if any migration ran, False if the schema was already current
+    """
+    head = head_revision()
+    if await current_revision(engine) == head:
+        return False
+
+    async with engine.begin() as conn:
+        previous = await conn.run_sync(_upgrade, alembic_config())
+
+    if previous == head:
+        return False
+    logger.info(f"Database migrated from {previous or 'empty'} to {head}")
+    return True
+
+
+async def check_schema(engine: AsyncEngine) -> bool:
+    """
+    Check the database is at the latest revision without touching the schema
+
+    Used at app startup; migrations themselves run from the entrypoint.
+
+    Returns:
+        True if the schema is current
+    """
+    current, head = await current_revision(engine), head_revision()
+    if current != head:
+        logger.warning(
+            f"Database schema is at revision {current or 'none'}, expected {head}. "
+            "Run `alembic upgrade head` or docker_init.py."
+        )
+        return False
+    return True
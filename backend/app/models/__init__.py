@@ -5,7 +5,15 @@ from app.models.user import User
 from app.models.indicator import IndicatorValue
 from app.models.data_source import DataSource, FetchLog
 from app.models.export import Export
-from app.models.company import Company, FinancialStatement, CashFlow, CompanyRiskScore
+from app.models.company import Company, FinancialStatement, CashFlow, CompanyRiskScore, RiskScoringModel
+from app.models.macro_indicators import (
+    MacroIndicator,
+    InterestRate,
+    FxRate,
+    EconomicForecast,
+    DataRefreshLog,
+    MarketData,
+)
 
 __all__ = [
     "User",
@@ -17,4 +25,11 @@ __all__ = [
     "FinancialStatement",
     "CashFlow",
     "CompanyRiskScore",
+    "RiskScoringModel",
+    "MacroIndicator",
+    "InterestRate",
+    "FxRate",
+    "EconomicForecast",
+    "DataRefreshLog",
+    "MarketData",
 ]
@@ -4,7 +4,7 @@ Stores company information, financial statements, and cash flows
 """
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import String, Integer, Float, Boolean, Date, ForeignKey, Index, CheckConstraint
+from sqlalchemy import String, Integer, Float, Boolean, Date, ForeignKey, Index, CheckConstraint, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -217,6 +217,7 @@ class CompanyRiskScore(Base):
     free_cashflow_yield: Mapped[Optional[float]] = mapped_column(Float)
     
     # Metadata
+    model_version: Mapped[Optional[str]] = mapped_column(String(60))  # Scoring model that produced it, name@version
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     
     # Relationships
@@ -230,3 +231,35 @@ class CompanyRiskScore(Base):
     
     def __repr__(self):
         return f"<CompanyRiskScore(company_id={self.company_id}, score={self.overall_risk_score})>"
+
+
+class RiskScoringModel(Base):
+    """
+    Versioned risk scoring model
+    Weights, category thresholds and health score band tables, stored as data
+    """
+    __tablename__ = "risk_scoring_models"
+    
+    # Primary key
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    
+    # Identification
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(String(500))
+    
+    # Model definition (see app.services.scoring_models)
+    definition: Mapped[dict] = mapped_column(JSON, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=False)  # At most one model scores new risk
+    
+    # Metadata
+    created_by: Mapped[Optional[str]] = mapped_column(String(100))
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    
+    # Constraints
+    __table_args__ = (
+        Index('idx_scoring_model_name_version', 'name', 'version', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<RiskScoringModel({self.name}@{self.version}, active={self.is_active})>"
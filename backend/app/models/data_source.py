@@ -121,7 +121,6 @@ class FetchLog(Base):
     
     __table_args__ = (
         Index('ix_fetch_logs_source_date', 'source_name', 'completed_at'),
-        Index('ix_fetch_logs_status', 'status'),
         Index('ix_fetch_logs_completed_at', 'completed_at'),
     )
     
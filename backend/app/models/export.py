@@ -3,7 +3,7 @@ Export model for tracking generated files
 """
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, JSON, Index
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -30,7 +30,9 @@ class Export(Base):
     query_params: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     
     # Status
-    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)  # pending, completed, failed, expired
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)  # pending, processing, completed, failed, expired
+    progress: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # 0-100 while processing
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # Set on claim, refreshed with progress
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Metadata
@@ -81,6 +83,7 @@ class Export(Base):
             "filename": self.filename,
             "file_size_bytes": self.file_size_bytes,
             "status": self.status,
+            "progress": self.progress,
             "row_count": self.row_count,
             "column_count": self.column_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
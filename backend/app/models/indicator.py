@@ -64,6 +64,8 @@ class IndicatorValue(Base):
     __table_args__ = (
         # Query by country + indicator + date range
         Index('ix_indicator_country_code_date', 'country_code', 'indicator_code', 'date'),
+        # Indicator query API: equality on code/country, keyset on (date, id)
+        Index('ix_indicator_code_country_date_id', 'indicator_code', 'country_code', 'date', 'id'),
         # Query by sector + indicator
         Index('ix_indicator_sector_code', 'sector', 'indicator_code'),
         # Query by source
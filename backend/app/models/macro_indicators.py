@@ -98,6 +98,31 @@ class InterestRate(Base):
         return f"<InterestRate {self.source}:{self.rate_type} {self.period_date} = {self.rate_value}%>"
 
 
+class FxRate(Base):
+    """
+    Daily ECB euro foreign exchange reference rates
+    Read into memory by the FX rate table used to convert statements to EUR
+    """
+    __tablename__ = "fx_rates"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    currency = Column(String(3), nullable=False)  # ISO 4217 (USD, GBP, CHF)
+    rate_date = Column(Date, nullable=False)
+    rate = Column(Float, nullable=False)  # Units of currency per 1 EUR, as quoted by the ECB
+    source = Column(String, nullable=False, default='ECB')
+
+    # Tracking
+    last_refreshed = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('currency', 'rate_date', name='uix_fx_rate_currency_date'),
+    )
+
+    def __repr__(self):
+        return f"<FxRate {self.currency} {self.rate_date} = {self.rate} per EUR>"
+
+
 class EconomicForecast(Base):
     """
     Economic forecasts from IMF, OECD, ECB
@@ -182,6 +207,11 @@ class DataRefreshLog(Base):
     # Tracking
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Refresh status listing and log pruning
+        Index('idx_refresh_started_at', 'started_at'),
+    )
+    
     def __repr__(self):
         return f"<DataRefreshLog {self.source} {self.status} {self.started_at}>"
 
@@ -0,0 +1,40 @@
+"""
+Query budgets
+Lets tests cap the SQL statements an endpoint may issue, using the
+per-request statement counts kept by app.metrics
+"""
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.metrics import RequestStats, request_stats
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block issued more SQL statements than its budget allows"""
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[RequestStats]:
+    """
+    Fail if the block issues more than max_queries SQL statements
+
+    Counts statements on engines set up with app.metrics.instrument_engine
+    and executed in this context: direct awaits, or requests sent through
+    httpx.ASGITransport (TestClient runs the app in another thread, so its
+    queries are not seen).
+
+    Usage:
+        with query_budget(4):
+            response = await client.get("/api/v1/companies/search")
+    """
+    stats = RequestStats(parent=request_stats.get())
+    token = request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        request_stats.reset(token)
+    if stats.queries > max_queries:
+        shapes = "\n".join(f"  {n}x {shape}" for shape, n in stats.shapes.most_common())
+        raise QueryBudgetExceeded(
+            f"{stats.queries} queries issued, budget is {max_queries}:\n{shapes}"
+        )
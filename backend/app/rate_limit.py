@@ -0,0 +1,422 @@
+"""
+Rate limiting
+Per-worker token buckets, an optional Redis-backed cluster-wide window and
+the ASGI middleware that enforces them
+"""
+import asyncio
+import ipaddress
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.auth.security import verify_token
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def parse_trusted_proxies(spec: str) -> Optional[List[Any]]:
+    """
+    Parse TRUSTED_PROXIES
+
+    Returns:
+        List of networks, or None when every proxy is trusted ("*")
+    """
+    entries = [entry.strip() for entry in spec.split(",") if entry.strip()]
+    if "*" in entries:
+        return None
+    return [ipaddress.ip_network(entry, strict=False) for entry in entries]
+
+
+# Parsed once; tests replace it
+trusted_proxies = parse_trusted_proxies(settings.TRUSTED_PROXIES)
+
+
+def _is_trusted(host: str) -> bool:
+    if trusted_proxies is None:
+        return True
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted_proxies)
+
+
+def client_address(scope: Dict[str, Any]) -> str:
+    """
+    Address of the client behind any trusted proxies
+
+    The deploy targets run uvicorn behind a load balancer, so the socket
+    peer is the proxy. X-Forwarded-For is read from the right, skipping
+    hops that are trusted proxies; the first other hop is the client. The
+    header is ignored unless the peer itself is trusted, so a client
+    connecting directly cannot pick its own address.
+
+    Args:
+        scope: ASGI scope (request.scope for a Request)
+
+    Returns:
+        Client IP address, or 'unknown'
+    """
+    client = scope.get("client")
+    host = client[0] if client else None
+    if not host or not _is_trusted(host):
+        return host or "unknown"
+
+    forwarded = [
+        value.decode("latin-1") for name, value in scope.get("headers", ()) if name == b"x-forwarded-for"
+    ]
+    hops = [hop.strip() for hop in ",".join(forwarded).split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop):
+            return hop
+    # Every hop is a proxy (internal traffic): the original sender is the leftmost
+    return hops[0] if hops else host
+
+
+class TokenBuckets:
+    """
+    One token bucket per key
+
+    Each bucket holds up to ``burst`` tokens and refills at ``rate`` tokens
+    per second. Buckets are only touched when their key is used, so a
+    decision is a dict lookup and some arithmetic. Tracking is capped at
+    ``max_keys``; the least recently used key is dropped first and comes
+    back with a full bucket.
+
+    Not thread-safe: use from the event loop only.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_keys: int = settings.RATE_LIMIT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: Dict[Hashable, List[float]] = {}  # key -> [tokens, updated_at]
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        """
+        Take tokens from a bucket if it has enough
+
+        Args:
+            key: Client key
+            cost: Tokens this request costs
+
+        Returns:
+            0.0 if allowed, otherwise seconds until the request would be allowed
+        """
+        now = self._clock()
+        tokens = self._tokens(key, now)
+        wait = self._wait(tokens, cost)
+        if wait == 0.0:
+            tokens -= cost
+        # Re-inserting keeps the dict in least-recently-used order
+        self._buckets[key] = [tokens, now]
+        return wait
+
+    def peek(self, key: Hashable, cost: float = 1.0) -> float:
+        """Like acquire, without taking any tokens"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self._wait(self.burst, cost)
+        return self._wait(self._refill(bucket, self._clock()), cost)
+
+    def reset(self, key: Hashable):
+        """Give a key a full bucket again"""
+        self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        bucket = self._buckets.pop(key, None)
+        if bucket is not None:
+            return self._refill(bucket, now)
+        if len(self._buckets) >= self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+        return self.burst
+
+    def _refill(self, bucket: List[float], now: float) -> float:
+        tokens, updated_at = bucket
+        return min(self.burst, tokens + (now - updated_at) * self.rate)
+
+    def _wait(self, tokens: float, cost: float) -> float:
+        if tokens >= cost:
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (cost - tokens) / self.rate
+
+
+class ClusterWindow:
+    """
+    Cluster-wide request counts per key in a Redis sliding window
+
+    Decisions never wait on Redis. Each worker adds the usage it has not
+    pushed yet to the last cluster totals it read. A background task pushes
+    local usage and reads fresh totals every ``sync_interval`` seconds, so
+    the cluster limit holds to within about one interval. The sliding window
+    is approximated from the current and previous fixed windows, with the
+    previous one weighted by how much it still overlaps.
+
+    If Redis is unreachable the window stays empty and only the local
+    buckets apply.
+    """
+
+    def __init__(
+        self,
+        limit: float,
+        window: float = 60.0,
+        sync_interval: float = settings.RATE_LIMIT_SYNC_INTERVAL,
+        prefix: str = "atlasiq:ratelimit",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.limit = limit
+        self.window = window
+        self.sync_interval = sync_interval
+        self.prefix = prefix
+        self._clock = clock
+        self._pending: Dict[str, float] = {}
+        self._usage: Dict[str, Tuple[float, float, int]] = {}  # key -> (previous, current, window index)
+        self._redis = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Connect to Redis and start syncing"""
+        try:
+            from redis import asyncio as aioredis
+
+            self._redis = aioredis.from_url(settings.get_redis_url(), decode_responses=True)
+            await self._redis.ping()
+        except Exception as e:
+            logger.warning(f"Rate limit store unavailable, limiting per worker only: {e}")
+            self._redis = None
+            return
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Push remaining usage and close the connection"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._redis is not None:
+            try:
+                await self.sync()
+            except Exception:
+                pass
+            await self._redis.close()
+            self._redis = None
+
+    def wait(self, key: str, cost: float) -> float:
+        """
+        Check a request against the cluster-wide limit
+
+        Returns:
+            0.0 if within the limit, otherwise estimated seconds to wait
+        """
+        now = self._clock()
+        index, offset = divmod(now, self.window)
+        previous, current = self._counts(key, int(index))
+        weight = 1 - offset / self.window
+        used = previous * weight + current + self._pending.get(key, 0.0)
+        excess = used + cost - self.limit
+        if excess <= 0:
+            return 0.0
+        if previous > 0 and excess <= previous * weight:
+            # Enough of the previous window slides out before this one ends
+            return excess / previous * self.window
+        return self.window - offset
+
+    def record(self, key: str, cost: float):
+        """Count an allowed request; pushed to Redis on the next sync"""
+        self._pending[key] = self._pending.get(key, 0.0) + cost
+
+    async def sync(self):
+        """Push local usage and read back cluster totals for the keys seen"""
+        pending, self._pending = self._pending, {}
+        index = int(self._clock() // self.window)
+        keys = list(pending)
+        if keys:
+            pipe = self._redis.pipeline(transaction=False)
+            for key in keys:
+                current_key = f"{self.prefix}:{key}:{index}"
+                pipe.incrbyfloat(current_key, pending[key])
+                pipe.expire(current_key, int(self.window * 2) + 1)
+                pipe.get(f"{self.prefix}:{key}:{index - 1}")
+            results = await pipe.execute()
+            for i, key in enumerate(keys):
+                current, previous = results[3 * i], results[3 * i + 2]
+                self._usage[key] = (float(previous or 0), float(current), index)
+
+        # Forget keys this worker has not seen for a full window
+        for key in [k for k, (_, _, at) in self._usage.items() if at < index - 1]:
+            del self._usage[key]
+
+    def _counts(self, key: str, index: int) -> Tuple[float, float]:
+        usage = self._usage.get(key)
+        if usage is None:
+            return 0.0, 0.0
+        previous, current, at = usage
+        if at == index:
+            return previous, current
+        if at == index - 1:
+            return current, 0.0
+        return 0.0, 0.0
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Rate limit sync failed: {e}")
+
+
+class RateLimiter:
+    """
+    Request budgets per client, weighted per route
+
+    Clients are keyed by the subject of a valid access token, otherwise by
+    address. Every request costs tokens from the client's bucket: 1 by
+    default, more for routes listed in RATE_LIMIT_ROUTE_COSTS (a cost above
+    the burst is capped at the burst). With the redis backend the same
+    per-minute limit also applies across all workers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
+        burst: int = settings.RATE_LIMIT_BURST,
+        backend: str = settings.RATE_LIMIT_BACKEND,
+        route_costs: Optional[List[Tuple[Optional[str], str, float]]] = None,
+        exempt_paths: Optional[List[str]] = None,
+        max_tokens: int = 10000,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.buckets = TokenBuckets(rate=requests_per_minute / 60, burst=burst)
+        self.cluster = ClusterWindow(limit=requests_per_minute) if backend == "redis" else None
+        costs = settings.get_rate_limit_route_costs() if route_costs is None else route_costs
+        self.route_costs = sorted(costs, key=lambda c: len(c[1]), reverse=True)
+        paths = settings.get_rate_limit_exempt_paths() if exempt_paths is None else exempt_paths
+        self.exempt_paths = tuple(paths)
+        self.max_tokens = max_tokens
+        self._subjects: Dict[str, Tuple[str, float]] = {}  # verified token -> (subject, expires at)
+        self.allowed = 0
+        self.rejected = 0
+
+    async def start(self):
+        if self.cluster is not None:
+            await self.cluster.start()
+
+    async def stop(self):
+        if self.cluster is not None:
+            await self.cluster.stop()
+
+    def is_exempt(self, method: str, path: str) -> bool:
+        return method == "OPTIONS" or path.startswith(self.exempt_paths)
+
+    def cost(self, method: str, path: str) -> float:
+        """Tokens a request costs: the longest matching route prefix, else 1"""
+        for route_method, prefix, cost in self.route_costs:
+            if path.startswith(prefix) and (route_method is None or route_method == method):
+                return min(cost, self.buckets.burst)
+        return 1.0
+
+    def client_key(self, authorization: Optional[str], client_host: Optional[str]) -> str:
+        """
+        Identify the client: user for a valid bearer token, else address
+        (as resolved by client_address)
+
+        Invalid or forged tokens fall back to the address, so minting tokens
+        does not buy fresh buckets. Verified tokens are remembered until they
+        expire, keeping the signature check off the hot path.
+        """
+        if authorization and authorization[:7].lower() == "bearer ":
+            token = authorization[7:]
+            known = self._subjects.get(token)
+            if known is not None and known[1] > time.time():
+                return f"user:{known[0]}"
+            payload = verify_token(token, token_type="access")
+            if payload and payload.get("sub"):
+                if len(self._subjects) >= self.max_tokens:
+                    del self._subjects[next(iter(self._subjects))]
+                self._subjects[token] = (payload["sub"], float(payload["exp"]))
+                return f"user:{payload['sub']}"
+        return f"ip:{client_host or 'unknown'}"
+
+    def check(self, key: str, cost: float = 1.0) -> float:
+        """
+        Charge a request to a client
+
+        Returns:
+            0.0 if allowed, otherwise seconds until it would be allowed
+        """
+        wait = self.cluster.wait(key, cost) if self.cluster is not None else 0.0
+        if wait == 0.0:
+            wait = self.buckets.acquire(key, cost)
+        if wait > 0:
+            self.rejected += 1
+            return wait
+        if self.cluster is not None:
+            self.cluster.record(key, cost)
+        self.allowed += 1
+        return 0.0
+
+    def stats(self) -> Dict[str, int]:
+        return {"allowed": self.allowed, "rejected": self.rejected, "clients": len(self.buckets)}
+
+
+# Singleton instance
+rate_limiter = RateLimiter()
+
+
+class RateLimitMiddleware:
+    """
+    Rejects requests over the client's budget with 429 and Retry-After
+
+    Pure ASGI and placed inside CORS, so rejections still carry CORS
+    headers and allowed requests pass through untouched.
+    """
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.limiter.is_exempt(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        key = self.limiter.client_key(authorization, client_address(scope))
+
+        wait = self.limiter.check(key, self.limiter.cost(scope["method"], scope["path"]))
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded, try again later"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
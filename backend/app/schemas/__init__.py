@@ -12,6 +12,11 @@ from app.schemas.user import (
 from app.schemas.indicator import (
     IndicatorValueResponse,
     IndicatorQuery,
+    IndicatorListResponse,
+)
+from app.schemas.export import (
+    ExportRequest,
+    ExportResponse,
 )
 
 __all__ = [
@@ -23,4 +28,7 @@ __all__ = [
     "TokenRefresh",
     "IndicatorValueResponse",
     "IndicatorQuery",
+    "IndicatorListResponse",
+    "ExportRequest",
+    "ExportResponse",
 ]
@@ -2,7 +2,7 @@
 Pydantic schemas for company data
 """
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field, validator
 
 
@@ -172,10 +172,12 @@ class CompanyRiskScoreResponse(BaseModel):
     quick_ratio: Optional[float]
     free_cashflow_yield: Optional[float]
     
+    model_version: Optional[str] = None  # Scoring model that produced it, name@version
     created_at: datetime
     
     class Config:
         from_attributes = True
+        protected_namespaces = ()
 
 
 # Combined Schemas
@@ -186,11 +188,22 @@ class CompanyDetailResponse(CompanyResponse):
     latest_risk_score: Optional[CompanyRiskScoreResponse] = None
 
 
+class FinancialDerivedSeries(BaseModel):
+    """Growth and margin series (percent), aligned with fiscal_years (ascending)"""
+    fiscal_years: List[int]
+    yoy_growth: Dict[str, List[Optional[float]]]  # metric -> change on previous year
+    cagr: Dict[str, Optional[float]]  # metric -> compound annual growth, first to last year
+    margins: Dict[str, List[Optional[float]]]  # share of revenue
+    rolling_margins: Dict[str, List[Optional[float]]]  # over rolling_window consecutive years
+    rolling_window: int
+
+
 class CompanyFinancialsResponse(BaseModel):
     """Company with multiple years of financial data"""
     company: CompanyResponse
     financial_statements: List[FinancialStatementResponse]
     cashflows: List[CashFlowResponse]
+    derived: Optional[FinancialDerivedSeries] = None
 
 
 class CompanyRiskAnalysis(BaseModel):
@@ -239,15 +252,152 @@ class CompanySearchResponse(BaseModel):
 
 
 class CompanyComparisonRequest(BaseModel):
-    """Request for comparing companies"""
-    company_ids: List[int] = Field(..., min_items=2, max_items=5)
-    fiscal_year: Optional[int] = None
+    """Request for comparing companies (up to a peer group of 50)"""
+    company_ids: List[int] = Field(..., min_items=2, max_items=50)
+    fiscal_year: Optional[int] = None  # Defaults to the latest year all companies reported
+
+
+class CompanyRatios(BaseModel):
+    """Key financial ratios for one fiscal year"""
+    debt_to_ebitda: Optional[float] = None
+    ebitda_margin: Optional[float] = None
+    roa: Optional[float] = None
+    roe: Optional[float] = None
+    current_ratio: Optional[float] = None
+    quick_ratio: Optional[float] = None
+    free_cashflow_yield: Optional[float] = None
+
+
+class CompanyComparisonItem(CompanyDetailResponse):
+    """Compared company; latest_* fields hold the compared fiscal year"""
+    ratios: CompanyRatios
 
 
 class CompanyComparisonResponse(BaseModel):
     """Response with compared companies"""
-    companies: List[CompanyDetailResponse]
-    fiscal_year: int
+    companies: List[CompanyComparisonItem]
+    fiscal_year: Optional[int] = None  # None if none of the companies has financial data
+    missing_company_ids: List[int] = []
+
+
+class PeerRatioRanking(BaseModel):
+    """Where one ratio sits in the peer group"""
+    ratio: str
+    value: Optional[float] = None
+    percentile: Optional[float] = None  # 0-100, share of peers below (ties count half)
+    peer_count: int  # Peers with a value for this ratio
+    p25: Optional[float] = None
+    median: Optional[float] = None
+    p75: Optional[float] = None
+    higher_is_better: bool
+
+
+class CompanyPeersResponse(BaseModel):
+    """Percentile ranking of a company's latest ratios against its peers"""
+    company: CompanySummary
+    scope: str  # country_sector, sector or country
+    country_code: Optional[str] = None
+    nace_code: Optional[str] = None
+    calculation_date: date
+    peer_group_size: int
+    rankings: List[PeerRatioRanking]
+
+
+class CompanyRiskHistoryResponse(BaseModel):
+    """Latest risk score per fiscal year, oldest first"""
+    company: CompanySummary
+    points: List[CompanyRiskScoreResponse]
+
+
+class RiskBackfillRequest(BaseModel):
+    """Recompute stored risk scores for all fiscal years"""
+    company_ids: Optional[List[int]] = Field(None, max_items=1000)  # All companies when omitted
+    from_year: Optional[int] = Field(None, ge=1950)
+
+
+# Stress Test Schemas
+class RevenueShock(BaseModel):
+    """Revenue change for the companies matching a NACE prefix and/or country"""
+    nace_prefix: Optional[str] = Field(None, max_length=10)  # e.g. "C" or "C10"; all sectors when omitted
+    country_code: Optional[str] = Field(None, min_length=2, max_length=2)
+    change_pct: float = Field(..., ge=-100, le=100)  # -20 = revenue falls by a fifth
+    flow_through: float = Field(0.5, ge=0, le=1)  # Share of the revenue change reaching EBITDA and cash flow
+
+
+class RiskWeights(BaseModel):
+    """Weights of the overall risk score components (must add up to 1)"""
+    macro: float = Field(..., ge=0, le=1)
+    sector: float = Field(..., ge=0, le=1)
+    financial: float = Field(..., ge=0, le=1)
+    
+    @validator('financial')
+    def weights_add_up(cls, v, values):
+        total = v + values.get('macro', 0) + values.get('sector', 0)
+        if abs(total - 1) > 1e-6:
+            raise ValueError('weights must add up to 1')
+        return v
+
+
+class RiskThresholds(BaseModel):
+    """Upper bounds of the Low, Medium and High risk categories"""
+    low: float = Field(..., gt=0, lt=100)
+    medium: float = Field(..., gt=0, lt=100)
+    high: float = Field(..., gt=0, lt=100)
+    
+    @validator('high')
+    def thresholds_increase(cls, v, values):
+        if not values.get('low', 0) < values.get('medium', 100) < v:
+            raise ValueError('thresholds must increase: low < medium < high')
+        return v
+
+
+class StressTestRequest(BaseModel):
+    """Shocks and scoring parameters applied to every company's latest financials"""
+    rate_shock_bp: float = Field(0, ge=-1000, le=2000)  # Extra interest on long-term debt
+    gdp_shock_pct: float = Field(0, ge=-30, le=30)  # GDP change, raises macro risk when negative
+    gdp_countries: Optional[List[str]] = None  # Countries hit by the GDP shock; all when omitted
+    revenue_shocks: List[RevenueShock] = Field([], max_items=20)
+    weights: Optional[RiskWeights] = None  # Defaults to the scoring model's weights
+    thresholds: Optional[RiskThresholds] = None  # Defaults to the scoring model's thresholds
+    model: Optional[str] = Field(None, max_length=60)  # Scoring model for the scenario (name@version); active when omitted
+    migrations_limit: int = Field(100, ge=0, le=1000)
+
+
+class RiskDistribution(BaseModel):
+    """Overall risk scores across the universe"""
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    p10: Optional[float] = None
+    p90: Optional[float] = None
+    categories: Dict[str, int]  # Low / Medium / High / Critical -> companies
+    histogram: List[int]  # Companies per 10-point score bucket, 0-10 ... 90-100
+
+
+class RiskMigration(BaseModel):
+    """A company whose risk category changes under the scenario"""
+    company_id: int
+    name: str
+    country_code: Optional[str] = None
+    nace_code: Optional[str] = None
+    baseline_score: float
+    scenario_score: float
+    baseline_category: str
+    scenario_category: str
+
+
+class StressTestResponse(BaseModel):
+    """Baseline vs. scenario risk across all companies with financials"""
+    universe_size: int
+    baseline_model: str  # Active scoring model, name@version
+    scenario_model: str
+    baseline: RiskDistribution
+    scenario: RiskDistribution
+    mean_shift: Optional[float] = None
+    migration_matrix: Dict[str, Dict[str, int]]  # baseline category -> scenario category -> companies
+    downgrades: int  # Companies moving to a riskier category
+    upgrades: int
+    migrations: List[RiskMigration]  # Largest score changes first, up to migrations_limit
+    duration_ms: float
 
 
 # Data Ingestion Schemas
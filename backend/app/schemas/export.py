@@ -0,0 +1,65 @@
+"""
+Pydantic schemas for data export requests and responses
+"""
+from datetime import date, datetime
+from typing import Optional, List
+from pydantic import BaseModel, Field, ConfigDict
+
+
+class ExportRequest(BaseModel):
+    """Schema for requesting a CSV/Excel export"""
+    dataset: str = Field(
+        default="indicators",
+        pattern="^(indicators|macro)$",
+        description="Dataset to export: indicators (IndicatorValue) or macro (MacroIndicator)"
+    )
+    country_codes: Optional[List[str]] = Field(
+        None,
+        description="Filter by country codes"
+    )
+    indicator_codes: Optional[List[str]] = Field(
+        None,
+        description="Filter by indicator codes"
+    )
+    sources: Optional[List[str]] = Field(
+        None,
+        description="Filter by data sources"
+    )
+    date_from: Optional[date] = Field(
+        None,
+        description="Start date (inclusive)"
+    )
+    date_to: Optional[date] = Field(
+        None,
+        description="End date (inclusive)"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "dataset": "indicators",
+                "country_codes": ["NL", "BE"],
+                "indicator_codes": ["GDP_GROWTH"],
+                "date_from": "2020-01-01"
+            }
+        }
+    )
+
+
+class ExportResponse(BaseModel):
+    """Schema for export status response"""
+    id: int
+    export_type: str
+    filename: str
+    status: str
+    progress: Optional[float] = None
+    file_size_bytes: int
+    row_count: Optional[int] = None
+    column_count: Optional[int] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
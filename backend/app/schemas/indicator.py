@@ -61,7 +61,15 @@ class IndicatorQuery(BaseModel):
     offset: int = Field(
         default=0,
         ge=0,
-        description="Number of records to skip"
+        description="Number of records to skip (ignored when cursor is set)"
+    )
+    cursor: Optional[str] = Field(
+        None,
+        description="Opaque cursor from a previous response's next_cursor"
+    )
+    include_total: bool = Field(
+        default=False,
+        description="Compute the exact total number of matching records"
     )
     
     model_config = ConfigDict(
@@ -79,7 +87,8 @@ class IndicatorQuery(BaseModel):
 
 class IndicatorListResponse(BaseModel):
     """Schema for paginated indicator list"""
-    total: int = Field(..., description="Total number of records")
+    total: Optional[int] = Field(None, description="Total number of records (only if include_total)")
     items: List[IndicatorValueResponse] = Field(..., description="List of indicators")
     limit: int
     offset: int
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, None on the last page")
@@ -0,0 +1,59 @@
+"""
+Pydantic schemas for risk scoring model versions
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field, validator
+
+from app.schemas.company import RiskThresholds, RiskWeights
+
+
+class ScoringBand(BaseModel):
+    """Points for values below or above a threshold (first matching band of a factor wins)"""
+    metric: Optional[str] = None  # Defaults to the factor's metric
+    below: Optional[float] = None
+    above: Optional[float] = None
+    points: float = Field(..., ge=0)
+
+    @validator('points')
+    def one_bound(cls, v, values):
+        if (values.get('below') is None) == (values.get('above') is None):
+            raise ValueError('set exactly one of below / above')
+        return v
+
+
+class ScoringFactor(BaseModel):
+    """One component of the financial health score"""
+    name: str = Field(..., min_length=1, max_length=50)
+    metric: str  # e.g. net_margin, debt_to_ebitda, current_ratio, equity_ratio, operating_cashflow
+    missing_points: float = Field(0, ge=0)  # When the company has no value for the metric
+    bands: List[ScoringBand] = Field(..., min_items=1, max_items=20)
+
+
+class ScoringModelDefinition(BaseModel):
+    """Weights, category thresholds and health score bands"""
+    weights: RiskWeights
+    thresholds: RiskThresholds
+    max_points: float = Field(100, gt=0)  # Health score = points / max_points * 100
+    factors: List[ScoringFactor] = Field(..., min_items=1, max_items=30)
+
+
+class ScoringModelCreate(BaseModel):
+    """New version of a scoring model (versions number from 1 per name)"""
+    name: str = Field(..., min_length=1, max_length=50, pattern="^[A-Za-z0-9_-]+$")
+    description: Optional[str] = Field(None, max_length=500)
+    definition: ScoringModelDefinition
+    activate: bool = False
+
+
+class ScoringModelResponse(BaseModel):
+    """Stored or built-in scoring model version"""
+    name: str
+    version: int
+    label: str  # name@version, as stored on risk scores
+    description: Optional[str] = None
+    definition: ScoringModelDefinition
+    is_active: bool
+    built_in: bool = False
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
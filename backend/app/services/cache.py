@@ -0,0 +1,132 @@
+"""
+In-process cache with stale-while-revalidate and single-flight refresh
+"""
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Every live cache, for metrics
+_caches: "weakref.WeakSet[SWRCache]" = weakref.WeakSet()
+
+
+def all_caches() -> List["SWRCache"]:
+    """Caches created in this process that are still alive"""
+    return list(_caches)
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with its freshness deadlines (time.monotonic based)"""
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class SWRCache:
+    """
+    Async TTL cache with stale-while-revalidate semantics
+
+    - Fresh entries are returned straight from memory.
+    - Stale entries (past ``ttl`` but within ``ttl + stale_ttl``) are returned
+      immediately while one background task recomputes them.
+    - Missing or expired entries are computed once; concurrent callers for
+      the same key await the same task instead of recomputing.
+    - With ``max_entries`` set, the oldest entry is dropped to make room.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0, name: str = "cache", max_entries: Optional[int] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, CacheEntry] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        _caches.add(self)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a cached value, computing it if needed
+
+        Args:
+            key: Cache key
+            compute: Coroutine factory producing the value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            if now < entry.fresh_until:
+                self.hits += 1
+                return entry.value
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_refresh(key, compute)
+                return entry.value
+
+        self.misses += 1
+        task = self._inflight.get(key) or self._start_refresh(key, compute)
+        # Shield so a cancelled request does not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value if present and not past its stale deadline"""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry.stale_until:
+            return None
+        return entry.value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value with fresh deadlines"""
+        now = time.monotonic()
+        if self.max_entries is not None and key not in self._entries and len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = CacheEntry(
+            value=value,
+            fresh_until=now + self.ttl,
+            stale_until=now + self.ttl + self.stale_ttl,
+        )
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or every key when none is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+    def _start_refresh(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(self._refresh(key, compute))
+        self._inflight[key] = task
+        return task
+
+    async def _refresh(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            self.set(key, value)
+            return value
+        except Exception as e:
+            logger.error(f"{self.name} refresh failed for {key!r}: {e}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
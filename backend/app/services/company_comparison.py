@@ -0,0 +1,208 @@
+"""
+Company comparison service
+Loads a peer group in a fixed number of queries and computes its ratios in one pass
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.company import CashFlow, Company, CompanyRiskScore, FinancialStatement
+
+RATIO_NAMES = (
+    'debt_to_ebitda',
+    'ebitda_margin',
+    'roa',
+    'roe',
+    'current_ratio',
+    'quick_ratio',
+    'free_cashflow_yield',
+)
+
+
+@dataclass
+class ComparisonRow:
+    """One company in a comparison, with its data for the compared year"""
+    company: Company
+    financial: Optional[FinancialStatement] = None
+    cashflow: Optional[CashFlow] = None
+    risk_score: Optional[CompanyRiskScore] = None
+    ratios: Dict[str, Optional[float]] = field(default_factory=dict)
+
+
+def latest_common_year(years_by_company: Dict[int, Iterable[int]]) -> Optional[int]:
+    """
+    Pick the fiscal year to compare companies on
+
+    The latest year every company reported; if there is none, the latest
+    year reported by the most companies.
+
+    Returns:
+        Fiscal year, or None if no company has financial statements
+    """
+    counts = Counter(year for years in years_by_company.values() for year in set(years))
+    if not counts:
+        return None
+    return max(counts, key=lambda year: (counts[year], year))
+
+
+def _column(rows: Sequence, name: str) -> np.ndarray:
+    return np.array(
+        [np.nan if row is None or getattr(row, name) is None else getattr(row, name) for row in rows],
+        dtype=float,
+    )
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, mask: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=mask)
+    return np.round(out * scale, 2)
+
+
+def compute_ratios(
+    financials: Sequence[Optional[FinancialStatement]],
+    cashflows: Sequence[Optional[CashFlow]],
+) -> List[Dict[str, Optional[float]]]:
+    """
+    Calculate key financial ratios for many companies at once
+
+    Same definitions as the risk scoring service: a ratio is None when its
+    numerator is missing or zero, or its denominator is missing or not
+    positive.
+
+    Args:
+        financials: Financial statement per company (None if missing)
+        cashflows: Cash flow per company, aligned with financials
+
+    Returns:
+        Ratios per company, in input order
+    """
+    def present(values):
+        return ~np.isnan(values) & (values != 0)
+
+    def positive(values):
+        return np.nan_to_num(values, nan=0.0) > 0
+
+    long_term_debt = _column(financials, 'long_term_debt')
+    ebitda = _column(financials, 'ebitda')
+    revenue = _column(financials, 'revenue')
+    net_income = _column(financials, 'net_income')
+    total_assets = _column(financials, 'total_assets')
+    total_equity = _column(financials, 'total_equity')
+    current_assets = _column(financials, 'current_assets')
+    current_liabilities = _column(financials, 'current_liabilities')
+    inventory = np.nan_to_num(_column(financials, 'inventory'), nan=0.0)
+    free_cashflow = _column(cashflows, 'free_cashflow')
+
+    liquidity = present(current_assets) & positive(current_liabilities)
+    columns = np.vstack([
+        _ratio(long_term_debt, ebitda, present(long_term_debt) & positive(ebitda)),
+        _ratio(ebitda, revenue, present(ebitda) & positive(revenue), 100),
+        _ratio(net_income, total_assets, present(net_income) & positive(total_assets), 100),
+        _ratio(net_income, total_equity, present(net_income) & positive(total_equity), 100),
+        _ratio(current_assets, current_liabilities, liquidity),
+        _ratio(current_assets - inventory, current_liabilities, liquidity),
+        _ratio(free_cashflow, total_assets, present(free_cashflow) & positive(total_assets), 100),
+    ])
+
+    return [
+        {name: None if np.isnan(value) else float(value) for name, value in zip(RATIO_NAMES, values)}
+        for values in columns.T
+    ]
+
+
+class CompanyComparisonService:
+    """
+    Side-by-side comparison of a peer group of companies
+
+    Three queries regardless of group size: companies with their financial
+    statements, cash flows for the compared year, and the latest risk score
+    per company for that year.
+    """
+
+    async def compare(
+        self,
+        db: AsyncSession,
+        company_ids: List[int],
+        fiscal_year: Optional[int] = None,
+    ) -> Tuple[List[ComparisonRow], Optional[int]]:
+        """
+        Load companies and their data for one fiscal year
+
+        Args:
+            db: Database session
+            company_ids: Companies to compare (unknown ids are skipped)
+            fiscal_year: Year to compare; defaults to the latest common year
+
+        Returns:
+            (rows in requested order, compared fiscal year)
+        """
+        ids = list(dict.fromkeys(company_ids))
+
+        # Companies with their statements (only the requested year, if given)
+        join_on = FinancialStatement.company_id == Company.id
+        if fiscal_year is not None:
+            join_on = and_(join_on, FinancialStatement.fiscal_year == fiscal_year)
+        result = await db.execute(
+            select(Company, FinancialStatement)
+            .outerjoin(FinancialStatement, join_on)
+            .where(Company.id.in_(ids))
+        )
+        companies: Dict[int, Company] = {}
+        statements: Dict[int, Dict[int, FinancialStatement]] = {}
+        for company, statement in result.tuples():
+            companies[company.id] = company
+            years = statements.setdefault(company.id, {})
+            if statement is not None:
+                years[statement.fiscal_year] = statement
+
+        if fiscal_year is None:
+            fiscal_year = latest_common_year(statements)
+
+        rows = [
+            ComparisonRow(company=companies[company_id], financial=statements[company_id].get(fiscal_year))
+            for company_id in ids if company_id in companies
+        ]
+        if rows and fiscal_year is not None:
+            await self._load_year_data(db, rows, fiscal_year)
+
+        ratios = compute_ratios([row.financial for row in rows], [row.cashflow for row in rows])
+        for row, company_ratios in zip(rows, ratios):
+            row.ratios = company_ratios
+
+        return rows, fiscal_year
+
+    async def _load_year_data(self, db: AsyncSession, rows: List[ComparisonRow], fiscal_year: int):
+        """Attach each company's cash flow and latest risk score for the year"""
+        found_ids = [row.company.id for row in rows]
+
+        cashflow_result = await db.execute(
+            select(CashFlow).where(CashFlow.company_id.in_(found_ids), CashFlow.fiscal_year == fiscal_year)
+        )
+        cashflows = {cashflow.company_id: cashflow for cashflow in cashflow_result.scalars()}
+
+        ranked = select(
+            CompanyRiskScore,
+            func.row_number().over(
+                partition_by=CompanyRiskScore.company_id,
+                order_by=(CompanyRiskScore.calculation_date.desc(), CompanyRiskScore.id.desc()),
+            ).label("rn"),
+        ).where(
+            CompanyRiskScore.company_id.in_(found_ids),
+            CompanyRiskScore.fiscal_year == fiscal_year,
+        ).subquery()
+        latest_risk = aliased(CompanyRiskScore, ranked)
+        risk_result = await db.execute(select(latest_risk).where(ranked.c.rn == 1))
+        risk_scores = {score.company_id: score for score in risk_result.scalars()}
+
+        for row in rows:
+            row.cashflow = cashflows.get(row.company.id)
+            row.risk_score = risk_scores.get(row.company.id)
+
+
+# Singleton instance
+company_comparison_service = CompanyComparisonService()
@@ -3,28 +3,21 @@ Company risk scoring service
 Calculates risk scores based on macro, sector, and financial health
 """
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
+import numpy as np
 from app.models.company import Company, FinancialStatement, CashFlow, CompanyRiskScore
+from app.services.scoring_models import CATEGORIES, ScoringModel, scoring_model_registry, statement_columns
 
 
 class CompanyRiskScoringService:
     """
     Service for calculating company risk scores
-    """
-    
-    # Risk weights
-    MACRO_WEIGHT = 0.30
-    SECTOR_WEIGHT = 0.20
-    FINANCIAL_WEIGHT = 0.50
     
-    # Risk thresholds
-    RISK_THRESHOLDS = {
-        'low': 30,
-        'medium': 50,
-        'high': 70,
-    }
+    Component weights, category thresholds and the financial health bands
+    come from the active scoring model (see app.services.scoring_models).
+    """
     
     async def calculate_company_risk(
         self,
@@ -67,98 +60,114 @@ class CompanyRiskScoringService:
         result = await db.execute(stmt)
         cashflow = result.scalar_one_or_none()
         
+        return self.score_statement(
+            company_id,
+            company.country_code,
+            company.nace_code,
+            financial,
+            cashflow,
+            fiscal_year,
+            datetime.utcnow().date(),
+            model=await scoring_model_registry.get_active(),
+        )
+    
+    def score_statement(
+        self,
+        company_id: int,
+        country_code: str,
+        nace_code: Optional[str],
+        financial: Any,
+        cashflow: Optional[Any],
+        fiscal_year: int,
+        calculation_date: date,
+        model: Optional[ScoringModel] = None,
+        financial_health: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Score one fiscal year from already loaded data (no database access)
+        
+        Args:
+            company_id: Company ID
+            country_code: Company country (macro risk)
+            nace_code: Company NACE code (sector risk)
+            financial: Financial statement, or any object with its fields
+            cashflow: Cash flow statement (optional)
+            fiscal_year: Fiscal year scored
+            calculation_date: Date stored with the score
+            model: Scoring model (the last loaded active model when omitted)
+            financial_health: Health score already computed with `model` for a batch
+        
+        Returns:
+            Risk score dict
+        """
+        model = model or scoring_model_registry.active
+        
         # Calculate risk components
-        macro_risk = await self._calculate_macro_risk(db, company.country_code)
-        sector_risk = await self._calculate_sector_risk(db, company.nace_code)
-        financial_health = self._calculate_financial_health_score(financial, cashflow)
+        macro_risk = self._macro_risk(country_code)
+        sector_risk = self._sector_risk(nace_code)
+        if financial_health is None:
+            financial_health = float(model.health_scores(*statement_columns(financial, cashflow))[0])
         
         # Calculate financial ratios
         ratios = self._calculate_financial_ratios(financial, cashflow)
         
-        # Weighted overall risk score
-        overall_risk = (
-            (macro_risk or 50) * self.MACRO_WEIGHT +
-            (sector_risk or 50) * self.SECTOR_WEIGHT +
-            (financial_health or 50) * self.FINANCIAL_WEIGHT
-        )
-        
-        # Determine risk category
-        risk_category = self._get_risk_category(overall_risk)
+        # Weighted overall risk score and category
+        overall = model.overall_scores(np.array([macro_risk]), np.array([sector_risk]), np.array([financial_health]))
+        overall_risk = float(overall[0])
+        risk_category = CATEGORIES[model.categories(overall)[0]]
         
         return {
             'company_id': company_id,
-            'calculation_date': datetime.utcnow().date(),
+            'calculation_date': calculation_date,
             'fiscal_year': fiscal_year,
             'macro_risk_score': macro_risk,
             'sector_risk_score': sector_risk,
             'financial_health_score': financial_health,
             'overall_risk_score': round(overall_risk, 2),
             'risk_category': risk_category,
+            'model_version': model.label,
             **ratios
         }
     
-    def _calculate_financial_health_score(
-        self,
-        financial: FinancialStatement,
-        cashflow: Optional[CashFlow]
-    ) -> float:
+    async def recalculate_all(self, db: AsyncSession) -> int:
         """
-        Calculate financial health score (0-100, higher = more risk)
+        Recalculate today's risk score for every company with financials
+
+        Uses each company's latest fiscal year. Scores already calculated
+        today are overwritten, so the job can safely run more than once.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of companies scored
         """
-        risk_points = 0
-        max_points = 100
-        
-        # 1. Profitability (20 points)
-        if financial.net_income and financial.revenue:
-            net_margin = (financial.net_income / financial.revenue) * 100
-            if net_margin < -10:
-                risk_points += 20
-            elif net_margin < 0:
-                risk_points += 15
-            elif net_margin < 5:
-                risk_points += 10
-            elif net_margin < 10:
-                risk_points += 5
-        else:
-            risk_points += 10  # Missing data = medium risk
-        
-        # 2. Leverage (30 points)
-        if financial.long_term_debt and financial.ebitda:
-            debt_to_ebitda = financial.long_term_debt / financial.ebitda
-            if debt_to_ebitda > 5:
-                risk_points += 30
-            elif debt_to_ebitda > 3:
-                risk_points += 20
-            elif debt_to_ebitda > 2:
-                risk_points += 10
-        
-        # 3. Liquidity (20 points)
-        if financial.current_assets and financial.current_liabilities:
-            current_ratio = financial.current_assets / financial.current_liabilities
-            if current_ratio < 0.8:
-                risk_points += 20
-            elif current_ratio < 1.0:
-                risk_points += 15
-            elif current_ratio < 1.2:
-                risk_points += 10
-        
-        # 4. Cash Flow (20 points)
-        if cashflow and cashflow.operating_cashflow:
-            if cashflow.operating_cashflow < 0:
-                risk_points += 20
-            elif cashflow.free_cashflow and cashflow.free_cashflow < 0:
-                risk_points += 10
-        
-        # 5. Solvency (10 points)
-        if financial.total_equity and financial.total_assets:
-            equity_ratio = (financial.total_equity / financial.total_assets) * 100
-            if equity_ratio < 10:
-                risk_points += 10
-            elif equity_ratio < 20:
-                risk_points += 5
-        
-        return (risk_points / max_points) * 100
-    
+        latest_years = await db.execute(
+            select(FinancialStatement.company_id, func.max(FinancialStatement.fiscal_year))
+            .group_by(FinancialStatement.company_id)
+        )
+        today = datetime.utcnow().date()
+        existing_result = await db.execute(
+            select(CompanyRiskScore).where(CompanyRiskScore.calculation_date == today)
+        )
+        existing = {score.company_id: score for score in existing_result.scalars().all()}
+
+        scored = 0
+        for company_id, fiscal_year in latest_years.all():
+            risk_data = await self.calculate_company_risk(db, company_id, fiscal_year)
+            if not risk_data:
+                continue
+
+            score = existing.get(company_id)
+            if score is None:
+                db.add(CompanyRiskScore(**risk_data))
+            else:
+                for field, value in risk_data.items():
+                    setattr(score, field, value)
+            scored += 1
+
+        return scored
+
     def _calculate_financial_ratios(
         self,
         financial: FinancialStatement,
@@ -215,6 +224,9 @@ class CompanyRiskScoringService:
         Calculate macro risk based on country economic indicators
         Placeholder - should integrate with existing macro data
         """
+        return self._macro_risk(country_code)
+    
+    def _macro_risk(self, country_code: str) -> Optional[float]:
         # TODO: Query actual macro risk from countries/indicators tables
         # For now, return default risk by country
         country_risks = {
@@ -230,6 +242,9 @@ class CompanyRiskScoringService:
         Calculate sector risk based on NACE code
         Placeholder - should integrate with sector benchmarks
         """
+        return self._sector_risk(nace_code)
+    
+    def _sector_risk(self, nace_code: Optional[str]) -> Optional[float]:
         if not nace_code:
             return 50
         
@@ -256,17 +271,6 @@ class CompanyRiskScoringService:
             'R': 45,  # Arts/entertainment
         }
         return sector_risks.get(section, 50)
-    
-    def _get_risk_category(self, risk_score: float) -> str:
-        """Categorize risk score into Low/Medium/High/Critical"""
-        if risk_score < self.RISK_THRESHOLDS['low']:
-            return 'Low'
-        elif risk_score < self.RISK_THRESHOLDS['medium']:
-            return 'Medium'
-        elif risk_score < self.RISK_THRESHOLDS['high']:
-            return 'High'
-        else:
-            return 'Critical'
 
 
 # Singleton instance
@@ -0,0 +1,268 @@
+"""
+Dashboard aggregation service
+Builds the dashboard summary from stored indicators and risk scores
+"""
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.company import Company, CompanyRiskScore
+from app.models.indicator import IndicatorValue
+from app.models.macro_indicators import MacroIndicator
+from app.services.cache import SWRCache
+
+logger = logging.getLogger(__name__)
+
+# Dashboard metric -> indicator codes accepted for it (first match by recency wins)
+DASHBOARD_METRICS: Dict[str, List[str]] = {
+    "gdp_growth": ["GDP_GROWTH", "NGDP_RPCH"],
+    "inflation": ["INFLATION", "HICP", "PCPIPCH"],
+    "unemployment": ["UNEMPLOYMENT", "UNEMP", "LUR"],
+    "business_confidence": ["BUSINESS_CONFIDENCE", "BCI"],
+}
+
+CODE_TO_METRIC = {
+    code: metric
+    for metric, codes in DASHBOARD_METRICS.items()
+    for code in codes
+}
+
+
+@dataclass(frozen=True)
+class DashboardPayload:
+    """Pre-encoded dashboard response"""
+    body: bytes
+    etag: str
+
+
+def country_flag(country_code: str) -> str:
+    """Emoji flag for an ISO 3166-1 alpha-2 code"""
+    return "".join(chr(0x1F1E6 + ord(c) - ord("A")) for c in country_code.upper())
+
+
+def _as_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class DashboardService:
+    """
+    Computes the dashboard summary and caches the encoded response
+
+    The summary is the same for every user, so it is computed once per TTL
+    and served as pre-encoded JSON bytes. Stale entries are served while a
+    single background task recomputes them.
+    """
+
+    CACHE_KEY = "summary"
+
+    def __init__(self):
+        self.cache = SWRCache(
+            ttl=settings.CACHE_DASHBOARD_TTL,
+            stale_ttl=settings.CACHE_DASHBOARD_STALE_TTL,
+            name="dashboard",
+        )
+
+    async def get_summary(self) -> DashboardPayload:
+        """
+        Get the encoded dashboard summary, from cache when possible
+
+        Returns:
+            DashboardPayload with JSON body and ETag
+        """
+        if not settings.CACHE_ENABLED:
+            return await self._compute()
+        return await self.cache.get_or_compute(self.CACHE_KEY, self._compute)
+
+    def invalidate(self):
+        """Drop the cached summary (call after ingesting new data)"""
+        self.cache.invalidate()
+
+    async def _compute(self) -> DashboardPayload:
+        async with AsyncSessionLocal() as db:
+            summary = await self.build_summary(db)
+
+        body = json.dumps(jsonable_encoder(summary), separators=(",", ":")).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        return DashboardPayload(body=body, etag=etag)
+
+    async def build_summary(self, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Aggregate latest values, freshness and chart series
+
+        Args:
+            db: Database session
+
+        Returns:
+            Dashboard summary dictionary
+        """
+        countries = settings.SUPPORTED_COUNTRIES
+        now = datetime.utcnow()
+
+        latest = await self._get_latest_values(db, countries)
+        risk_scores = await self._get_country_risk_scores(db, countries)
+        total_indicators = await self._count_indicators(db)
+
+        rows = []
+        last_updated: Optional[datetime] = None
+        for code in countries:
+            metrics = latest.get(code, {})
+            refreshed = [m["refreshed_at"] for m in metrics.values() if m["refreshed_at"]]
+            country_updated = max(refreshed) if refreshed else None
+            if country_updated and (last_updated is None or country_updated > last_updated):
+                last_updated = country_updated
+
+            row = {
+                "country": {
+                    "code": code,
+                    "name": settings.COUNTRY_NAMES.get(code, code),
+                    "flag": country_flag(code),
+                },
+                "risk_score": risk_scores.get(code),
+                "data_freshness": (now - country_updated).days if country_updated else None,
+            }
+            for metric in DASHBOARD_METRICS:
+                value = metrics.get(metric)
+                row[metric] = value["value"] if value else None
+                row[f"{metric}_period"] = value["period"] if value else None
+            rows.append(row)
+
+        return {
+            "total_indicators": total_indicators,
+            "data_freshness": (now - last_updated).days if last_updated else None,
+            "last_updated": last_updated.isoformat() + "Z" if last_updated else None,
+            "countries": rows,
+            "charts": {
+                "gdp_growth": [
+                    {"country": row["country"]["code"], "value": row["gdp_growth"]}
+                    for row in rows if row["gdp_growth"] is not None
+                ],
+                "risk_scores": [
+                    {"country": row["country"]["code"], "value": row["risk_score"]}
+                    for row in rows if row["risk_score"] is not None
+                ],
+            },
+        }
+
+    async def _get_latest_values(
+        self,
+        db: AsyncSession,
+        countries: List[str]
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Latest non-forecast value per country and dashboard metric
+
+        Reads both MacroIndicator (alpha-3 codes) and IndicatorValue
+        (alpha-2 codes); the most recent period wins when both have a value.
+        """
+        codes = list(CODE_TO_METRIC)
+        today = date.today()
+        iso3_to_iso2 = {
+            settings.COUNTRY_ISO3[c]: c for c in countries if c in settings.COUNTRY_ISO3
+        }
+
+        macro_ranked = (
+            select(
+                MacroIndicator.country_code,
+                MacroIndicator.indicator_code,
+                MacroIndicator.value,
+                MacroIndicator.period_date.label("period"),
+                func.coalesce(MacroIndicator.last_refreshed, MacroIndicator.created_at).label("refreshed_at"),
+                func.row_number().over(
+                    partition_by=(MacroIndicator.country_code, MacroIndicator.indicator_code),
+                    order_by=MacroIndicator.period_date.desc(),
+                ).label("rn"),
+            )
+            .where(
+                MacroIndicator.country_code.in_(list(iso3_to_iso2)),
+                MacroIndicator.indicator_code.in_(codes),
+                MacroIndicator.value.isnot(None),
+                MacroIndicator.period_date <= today,
+            )
+            .subquery()
+        )
+
+        indicator_ranked = (
+            select(
+                IndicatorValue.country_code,
+                IndicatorValue.indicator_code,
+                IndicatorValue.value,
+                IndicatorValue.date.label("period"),
+                IndicatorValue.fetched_at.label("refreshed_at"),
+                func.row_number().over(
+                    partition_by=(IndicatorValue.country_code, IndicatorValue.indicator_code),
+                    order_by=IndicatorValue.date.desc(),
+                ).label("rn"),
+            )
+            .where(
+                IndicatorValue.country_code.in_(countries),
+                IndicatorValue.indicator_code.in_(codes),
+                IndicatorValue.sector.is_(None),
+                IndicatorValue.date <= today,
+            )
+            .subquery()
+        )
+
+        latest: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for ranked, code_map in ((macro_ranked, iso3_to_iso2), (indicator_ranked, None)):
+            result = await db.execute(select(ranked).where(ranked.c.rn == 1))
+            for row in result:
+                country = code_map[row.country_code] if code_map else row.country_code
+                metric = CODE_TO_METRIC[row.indicator_code]
+                current = latest.setdefault(country, {}).get(metric)
+                if current is None or row.period > current["period"]:
+                    latest[country][metric] = {
+                        "value": round(row.value, 2),
+                        "period": row.period,
+                        "refreshed_at": _as_utc_naive(row.refreshed_at),
+                    }
+
+        return latest
+
+    async def _get_country_risk_scores(self, db: AsyncSession, countries: List[str]) -> Dict[str, float]:
+        """Average of each company's latest overall risk score, per country"""
+        ranked = (
+            select(
+                CompanyRiskScore.company_id,
+                CompanyRiskScore.overall_risk_score,
+                func.row_number().over(
+                    partition_by=CompanyRiskScore.company_id,
+                    order_by=(CompanyRiskScore.calculation_date.desc(), CompanyRiskScore.id.desc()),
+                ).label("rn"),
+            )
+            .where(CompanyRiskScore.overall_risk_score.isnot(None))
+            .subquery()
+        )
+
+        result = await db.execute(
+            select(Company.country_code, func.avg(ranked.c.overall_risk_score))
+            .join(ranked, ranked.c.company_id == Company.id)
+            .where(ranked.c.rn == 1, Company.country_code.in_(countries))
+            .group_by(Company.country_code)
+        )
+        return {country: round(score, 1) for country, score in result}
+
+    async def _count_indicators(self, db: AsyncSession) -> int:
+        """Number of distinct indicator codes stored"""
+        codes = union(
+            select(MacroIndicator.indicator_code),
+            select(IndicatorValue.indicator_code),
+        ).subquery()
+        result = await db.execute(select(func.count()).select_from(codes))
+        return result.scalar() or 0
+
+
+# Singleton instance
+dashboard_service = DashboardService()
@@ -0,0 +1,89 @@
+"""
+ECB Data Portal Service
+Euro foreign exchange reference rates from the ECB SDMX REST API
+"""
+
+import io
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ECBDataService:
+    """
+    Service to fetch data from the ECB Data Portal
+    Free API, no authentication required
+    """
+
+    # Daily (D) reference rates (SP00) against the euro, average of observations (A)
+    EXR_SERIES_KEY = "D.{currencies}.EUR.SP00.A"
+
+    def __init__(self):
+        """Initialize ECB data service"""
+        self.base_url = settings.ECB_API_BASE
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'text/csv',
+            'User-Agent': 'AtlasIQ/1.0'
+        })
+        logger.info("ECB data service initialized")
+
+    def get_reference_rates(
+        self,
+        currencies: List[str],
+        start: date
+    ) -> Optional[Dict[str, pd.Series]]:
+        """
+        Get daily euro reference rates
+
+        Dataset: EXR (Exchange rates), quoted as units of currency per 1 EUR
+
+        Args:
+            currencies: ISO 4217 currency codes (USD, GBP, CHF)
+            start: First date to fetch
+
+        Returns:
+            Dictionary mapping currency to a date-indexed rate series,
+            or None if the request failed
+        """
+        if not currencies:
+            return {}
+
+        try:
+            url = f"{self.base_url}/EXR/{self.EXR_SERIES_KEY.format(currencies='+'.join(currencies))}"
+            params = {
+                'startPeriod': start.isoformat(),
+                'format': 'csvdata',
+            }
+
+            logger.info(f"Fetching ECB reference rates for {currencies} from {start}")
+            response = self.session.get(url, params=params, timeout=settings.ECB_TIMEOUT)
+            if response.status_code == 404:
+                # The API answers 404 when no observations match
+                return {}
+            response.raise_for_status()
+
+            df = pd.read_csv(io.StringIO(response.text), usecols=['CURRENCY', 'TIME_PERIOD', 'OBS_VALUE'])
+            df['TIME_PERIOD'] = pd.to_datetime(df['TIME_PERIOD'])
+
+            result = {}
+            for currency, group in df.dropna(subset=['OBS_VALUE']).groupby('CURRENCY'):
+                result[currency] = pd.Series(
+                    group['OBS_VALUE'].astype(float).values,
+                    index=group['TIME_PERIOD'].values,
+                    name=currency,
+                ).sort_index()
+
+            logger.info(f"Retrieved ECB reference rates for {len(result)} currencies")
+            return result
+
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            logger.error(f"Error fetching ECB reference rates: {e}")
+            return None
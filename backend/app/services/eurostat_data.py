@@ -52,7 +52,8 @@ class EurostatDataService:
                 filter_pars={
                     'geo': countries,
                     'unit': 'CLV10_EUR',  # Chain linked volumes
-                    'na_item': 'B1GQ'  # Gross domestic product
+                    'na_item': 'B1GQ',  # Gross domestic product
+                    'startPeriod': start_year - 1  # Base year for the first growth rate
                 }
             )
             
@@ -63,9 +64,9 @@ class EurostatDataService:
             # Calculate year-over-year growth rates
             result = {}
             
-            # Filter by start year and pivot
+            # Filter by start year (keeping the base year) and pivot
             time_cols = [col for col in df.columns if col.isdigit()]
-            time_cols = [col for col in time_cols if int(col) >= start_year]
+            time_cols = [col for col in time_cols if int(col) >= start_year - 1]
             
             for country in countries:
                 country_data = df[df['geo'] == country]
@@ -74,11 +75,11 @@ class EurostatDataService:
                     # Extract time series
                     values = country_data[time_cols].iloc[0]
                     
-                    # Calculate growth rates
-                    growth_rates = values.pct_change() * 100
+                    # Calculate growth rates, dropping the base year
+                    growth_rates = (values.pct_change() * 100)[1:]
                     
                     # Convert to Series with datetime index
-                    dates = pd.to_datetime([f"{year}-12-31" for year in time_cols])
+                    dates = pd.to_datetime([f"{year}-12-31" for year in time_cols[1:]])
                     series = pd.Series(growth_rates.values, index=dates, name=country)
                     
                     result[country] = series
@@ -120,7 +121,8 @@ class EurostatDataService:
                 filter_pars={
                     'geo': countries,
                     'coicop': 'CP00',  # All-items HICP
-                    'unit': 'RCH_A'  # Rate of change, annual
+                    'unit': 'RCH_A',  # Rate of change, annual
+                    'startPeriod': start_year
                 }
             )
             
@@ -184,7 +186,8 @@ class EurostatDataService:
                     'geo': countries,
                     'sex': 'T',  # Total (both sexes)
                     'age': 'Y15-74',  # Age 15-74
-                    'unit': 'PC_ACT'  # Percentage of active population
+                    'unit': 'PC_ACT',  # Percentage of active population
+                    'startPeriod': start_year
                 }
             )
             
@@ -247,7 +250,8 @@ class EurostatDataService:
                 filter_pars={
                     'geo': countries,
                     'indic': 'BS-ICI',  # Business confidence indicator
-                    's_adj': 'SA'  # Seasonally adjusted
+                    's_adj': 'SA',  # Seasonally adjusted
+                    'startPeriod': start_year
                 }
             )
             
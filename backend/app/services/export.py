@@ -0,0 +1,248 @@
+"""
+Data export service
+Streams indicator data to CSV/XLSX files with constant memory use
+"""
+import asyncio
+import csv
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.export import Export
+from app.models.indicator import IndicatorValue
+from app.models.macro_indicators import MacroIndicator
+from app.schemas.export import ExportRequest
+
+
+# Exportable datasets: model, projected columns and the column used for date filters
+EXPORT_DATASETS = {
+    "indicators": {
+        "model": IndicatorValue,
+        "columns": [
+            "country_code", "sector", "indicator_code", "indicator_name", "date",
+            "period_type", "value", "unit", "source", "source_dataset",
+            "is_estimated", "is_provisional",
+        ],
+        "date_column": "date",
+    },
+    "macro": {
+        "model": MacroIndicator,
+        "columns": [
+            "source", "indicator_code", "indicator_name", "country_code",
+            "period_date", "frequency", "value", "unit", "status",
+        ],
+        "date_column": "period_date",
+    },
+}
+
+FILE_EXTENSIONS = {
+    "csv": "csv",
+    "excel": "xlsx",
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class _CsvSink:
+    """Appends row chunks to a CSV file"""
+
+    def __init__(self, path: str, header: List[str]):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def write_rows(self, rows: List[Tuple[Any, ...]]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ExcelSink:
+    """Appends row chunks to an XLSX workbook in write-only mode"""
+
+    def __init__(self, path: str, header: List[str]):
+        from openpyxl import Workbook
+
+        self.path = path
+        # Write-only workbooks stream rows to disk instead of keeping cells in memory
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title="data")
+        self.sheet.append(header)
+
+    def write_rows(self, rows: List[Tuple[Any, ...]]):
+        for row in rows:
+            self.sheet.append(list(row))
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+SINKS = {
+    "csv": _CsvSink,
+    "excel": _ExcelSink,
+}
+
+
+class DataExportService:
+    """
+    Service for generating export files tracked in the exports table
+    """
+
+    def __init__(self):
+        self.export_dir = settings.EXPORT_TEMP_DIR
+        self.chunk_size = settings.EXPORT_CHUNK_SIZE
+        self.max_rows = settings.EXPORT_MAX_ROWS
+
+    async def create_export(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        export_type: str,
+        request: ExportRequest
+    ) -> Export:
+        """
+        Register a pending export
+
+        Args:
+            db: Database session
+            user_id: Owner of the export
+            export_type: csv or excel
+            request: Dataset and filters to export
+
+        Returns:
+            Pending Export row (flushed, so it has an id)
+        """
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        filename = f"{request.dataset}_{timestamp}_{uuid.uuid4().hex[:8]}.{FILE_EXTENSIONS[export_type]}"
+
+        export = Export(
+            user_id=user_id,
+            export_type=export_type,
+            filename=filename,
+            file_path=os.path.join(self.export_dir, filename),
+            file_size_bytes=0,
+            query_params=request.model_dump(mode="json"),
+            status="pending",
+        )
+        db.add(export)
+        await db.flush()
+
+        return export
+
+    async def run_export(
+        self,
+        db: AsyncSession,
+        export: Export,
+        progress_callback: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> Export:
+        """
+        Stream the export's rows into its file and record the outcome
+
+        Rows are read from a server-side cursor in chunks of EXPORT_CHUNK_SIZE
+        and appended to the file as they arrive, so memory stays flat
+        regardless of the number of rows.
+
+        Args:
+            db: Database session
+            export: Pending Export row
+            progress_callback: Optional coroutine called after each chunk with
+                (rows written, expected rows)
+
+        Returns:
+            Export row with status completed or failed
+        """
+        request = ExportRequest(**(export.query_params or {}))
+        dataset = EXPORT_DATASETS[request.dataset]
+        header = dataset["columns"]
+
+        os.makedirs(self.export_dir, exist_ok=True)
+
+        sink = None
+        row_count = 0
+        try:
+            query = self._build_query(request)
+
+            expected_rows = 0
+            if progress_callback is not None:
+                expected_rows = await db.scalar(
+                    select(func.count()).select_from(query.subquery())
+                )
+
+            sink = await asyncio.to_thread(SINKS[export.export_type], export.file_path, header)
+
+            result = await db.stream(query.execution_options(yield_per=self.chunk_size))
+            async for partition in result.partitions(self.chunk_size):
+                rows = [tuple(row) for row in partition]
+                await asyncio.to_thread(sink.write_rows, rows)
+                row_count += len(rows)
+                if progress_callback is not None:
+                    await progress_callback(row_count, expected_rows)
+
+            await asyncio.to_thread(sink.close)
+            sink = None
+
+            now = datetime.utcnow()
+            export.status = "completed"
+            export.progress = 100.0
+            export.row_count = row_count
+            export.column_count = len(header)
+            export.file_size_bytes = os.path.getsize(export.file_path)
+            export.completed_at = now
+            export.expires_at = now + timedelta(hours=settings.EXPORT_EXPIRE_HOURS)
+
+        except Exception as e:
+            if sink is not None:
+                await asyncio.to_thread(sink.close)
+            self.remove_file(export.file_path)
+            export.status = "failed"
+            export.error_message = str(e)
+            export.row_count = row_count
+
+        await db.flush()
+        return export
+
+    def _build_query(self, request: ExportRequest):
+        """Build the projected, filtered and capped export query"""
+        dataset = EXPORT_DATASETS[request.dataset]
+        model = dataset["model"]
+        date_column = getattr(model, dataset["date_column"])
+
+        stmt = select(*[getattr(model, name) for name in dataset["columns"]])
+
+        if request.country_codes:
+            stmt = stmt.where(model.country_code.in_([c.upper() for c in request.country_codes]))
+        if request.indicator_codes:
+            stmt = stmt.where(model.indicator_code.in_(request.indicator_codes))
+        if request.sources:
+            stmt = stmt.where(model.source.in_(request.sources))
+        if request.date_from:
+            stmt = stmt.where(date_column >= request.date_from)
+        if request.date_to:
+            stmt = stmt.where(date_column <= request.date_to)
+
+        return stmt.order_by(model.country_code, model.indicator_code, date_column).limit(self.max_rows)
+
+    def get_media_type(self, export: Export) -> str:
+        """Get the download media type for an export"""
+        return MEDIA_TYPES.get(export.export_type, "application/octet-stream")
+
+    def remove_file(self, path: Optional[str]):
+        """Delete a (partial) export file if present"""
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# Singleton instance
+export_service = DataExportService()
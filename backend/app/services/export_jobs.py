@@ -0,0 +1,247 @@
+"""
+Background export job runner
+Processes pending Export rows with bounded concurrency and sweeps expired files
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+
+from app.config import settings
+from app.database import AsyncSessionLocal, db_writer, engine
+from app.models.export import Export
+from app.services.export import export_service
+
+logger = logging.getLogger(__name__)
+
+
+class ExportQueueFull(Exception):
+    """Raised when the export queue cannot accept more jobs"""
+
+
+class ExportJobRunner:
+    """
+    In-process export job queue
+
+    Jobs are Export ids. A fixed pool of worker tasks claims each job by
+    flipping its status from pending to processing, so a job enqueued twice
+    (or by two processes) only runs once.
+
+    A claim is stamped with claimed_at, refreshed by every progress write.
+    Jobs left processing by a crashed or restarted process are re-queued
+    once their claim is older than stale_claim seconds; a job another live
+    worker is running keeps a fresh claim and is left alone.
+
+    Progress is kept in memory per running job and written to the row as
+    well through the single writer. On SQLite this needs WAL mode, otherwise
+    the progress write would block on the export's own read cursor.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = settings.EXPORT_WORKER_CONCURRENCY,
+        queue_size: int = settings.EXPORT_QUEUE_SIZE,
+        sweep_interval: int = settings.EXPORT_SWEEP_INTERVAL_SECONDS,
+        stale_claim: int = settings.EXPORT_STALE_CLAIM_SECONDS
+    ):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.sweep_interval = sweep_interval
+        self.stale_claim = stale_claim
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        self.progress: Dict[int, Tuple[int, float]] = {}
+        self.persist_progress = engine.dialect.name != "sqlite" or (
+            settings.SQLITE_TUNING and settings.SQLITE_JOURNAL_MODE.upper() == "WAL"
+        )
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.tasks)
+
+    async def start(self):
+        """Start worker and sweeper tasks and re-queue pending jobs"""
+        if self.is_running:
+            return
+
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.tasks = [
+            asyncio.create_task(self._worker(i), name=f"export-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self.tasks.append(asyncio.create_task(self._sweeper(), name="export-sweeper"))
+
+        await self._requeue_pending()
+        logger.info(f"Export job runner started with {self.concurrency} workers")
+
+    async def stop(self):
+        """Cancel all tasks; unfinished jobs stay pending, or processing until their claim goes stale"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.queue = None
+
+    def submit(self, export_id: int):
+        """
+        Queue an export for processing
+
+        Raises:
+            ExportQueueFull: If the queue is at capacity or not running
+        """
+        if self.queue is None:
+            raise ExportQueueFull("Export runner is not running")
+        try:
+            self.queue.put_nowait(export_id)
+        except asyncio.QueueFull:
+            raise ExportQueueFull("Too many exports in progress, try again later")
+
+    async def process(self, export_id: int):
+        """Claim and run a single export job"""
+        async with AsyncSessionLocal() as db:
+            claimed = await db.execute(
+                update(Export)
+                .where(Export.id == export_id, Export.status == "pending")
+                .values(status="processing", progress=0.0, claimed_at=datetime.utcnow())
+            )
+            await db.commit()
+            if claimed.rowcount == 0:
+                return
+
+            export = await db.get(Export, export_id)
+
+            async def report_progress(rows: int, expected: int):
+                await self._report_progress(export_id, rows, expected)
+
+            try:
+                await export_service.run_export(db, export, progress_callback=report_progress)
+                await db.commit()
+            finally:
+                self.progress.pop(export_id, None)
+
+            logger.info(f"Export {export_id} {export.status}: {export.row_count} rows")
+
+    def get_progress(self, export_id: int) -> Optional[Tuple[int, float]]:
+        """Get (rows written, percent) for an export running in this process"""
+        return self.progress.get(export_id)
+
+    async def sweep_expired(self) -> int:
+        """
+        Delete files of exports past expires_at and mark them expired
+
+        Returns:
+            Number of exports expired
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Export).where(
+                    Export.status == "completed",
+                    Export.expires_at < datetime.utcnow()
+                )
+            )
+            expired = result.scalars().all()
+
+            for export in expired:
+                export_service.remove_file(export.file_path)
+                export.status = "expired"
+
+            await db.commit()
+
+        if expired:
+            logger.info(f"Expired {len(expired)} export files")
+        return len(expired)
+
+    async def release_stale_claims(self) -> List[int]:
+        """
+        Return processing exports with a stale claim to pending
+
+        Returns:
+            Ids of the released exports
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_claim)
+        stale = (
+            Export.status == "processing",
+            or_(Export.claimed_at.is_(None), Export.claimed_at < cutoff),
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Export.id).where(*stale).order_by(Export.id))
+            export_ids = result.scalars().all()
+            if export_ids:
+                # Same condition again: a job reclaimed in between stays with its worker
+                await db.execute(
+                    update(Export)
+                    .where(Export.id.in_(export_ids), *stale)
+                    .values(status="pending", progress=None, claimed_at=None)
+                )
+                await db.commit()
+
+        if export_ids:
+            logger.warning(f"Re-queueing {len(export_ids)} exports abandoned while processing")
+        return export_ids
+
+    async def _worker(self, index: int):
+        while True:
+            export_id = await self.queue.get()
+            try:
+                await self.process(export_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Export worker {index} failed on export {export_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _sweeper(self):
+        while True:
+            try:
+                await self.sweep_expired()
+                for export_id in await self.release_stale_claims():
+                    self.submit(export_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Export sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    async def _requeue_pending(self):
+        """Queue exports left pending (or stuck processing) by a previous process"""
+        try:
+            await self.release_stale_claims()
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(Export.id).where(Export.status == "pending").order_by(Export.id)
+                )
+                for export_id in result.scalars().all():
+                    self.submit(export_id)
+        except ExportQueueFull:
+            logger.warning("Export queue full while re-queueing pending exports")
+        except Exception as e:
+            logger.error(f"Failed to re-queue pending exports: {e}")
+
+    async def _report_progress(self, export_id: int, rows: int, expected: int):
+        """Record progress in memory and, best-effort, in the export row"""
+        progress = round(min(99.0, rows * 100.0 / expected) if expected else 0.0, 1)
+        self.progress[export_id] = (rows, progress)
+
+        if not self.persist_progress:
+            return
+
+        async def write(db):
+            await db.execute(
+                update(Export)
+                .where(Export.id == export_id)
+                .values(row_count=rows, progress=progress, claimed_at=datetime.utcnow())
+            )
+            await db.commit()
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db_writer.submit(write, db)
+        except Exception as e:
+            logger.debug(f"Progress update for export {export_id} skipped: {e}")
+
+
+# Singleton instance
+export_job_runner = ExportJobRunner()
@@ -0,0 +1,218 @@
+"""
+Financial history service
+Multi-year statements with derived growth, CAGR and margin series,
+cached per company and data version
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.company import CashFlow, FinancialStatement
+from app.schemas.company import CashFlowResponse, FinancialStatementResponse
+from app.services.cache import SWRCache
+
+# Metrics with YoY growth and CAGR: (source, field)
+GROWTH_METRICS = (
+    ('financial', 'revenue'),
+    ('financial', 'gross_profit'),
+    ('financial', 'ebitda'),
+    ('financial', 'net_income'),
+    ('financial', 'total_assets'),
+    ('cashflow', 'operating_cashflow'),
+    ('cashflow', 'free_cashflow'),
+)
+
+# Margins as a share of revenue: name -> (source, numerator field)
+MARGINS = {
+    'gross_margin': ('financial', 'gross_profit'),
+    'ebitda_margin': ('financial', 'ebitda'),
+    'net_margin': ('financial', 'net_income'),
+    'fcf_margin': ('cashflow', 'free_cashflow'),
+}
+
+ROLLING_WINDOW = 3  # Years per rolling margin
+
+
+@dataclass
+class FinancialHistory:
+    """Statements for a run of fiscal years (newest first) and their derived series"""
+    financial_statements: List[FinancialStatementResponse]
+    cashflows: List[CashFlowResponse]
+    derived: Dict[str, Any]
+
+
+def _series(rows: Sequence[Any], name: str) -> np.ndarray:
+    return np.array(
+        [np.nan if row is None or getattr(row, name) is None else getattr(row, name) for row in rows],
+        dtype=float,
+    )
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+
+def compute_derived_series(
+    fiscal_years: Sequence[int],
+    financials: Sequence[Optional[FinancialStatement]],
+    cashflows: Sequence[Optional[CashFlow]],
+) -> Dict[str, Any]:
+    """
+    Derive growth and margin series from yearly statements
+
+    Inputs are aligned and in ascending fiscal year order. All series are
+    percentages aligned with fiscal_years, None where undefined:
+    - yoy_growth: change on the previous fiscal year (None across a gap
+      in the years, or when the previous value is zero)
+    - cagr: compound annual growth from the first to the last year with a
+      value (both must be positive)
+    - margins: share of revenue, for years with positive revenue
+    - rolling_margins: summed numerator / summed revenue over the last
+      ROLLING_WINDOW consecutive years
+
+    Args:
+        fiscal_years: Fiscal years, ascending
+        financials: Financial statement per year (None if missing)
+        cashflows: Cash flow per year (None if missing)
+
+    Returns:
+        Dictionary of derived series
+    """
+    years = np.array(fiscal_years, dtype=float)
+    sources = {'financial': financials, 'cashflow': cashflows}
+    consecutive = np.concatenate([[False], np.diff(years) == 1])
+
+    yoy_growth = {}
+    cagr = {}
+    for source, name in GROWTH_METRICS:
+        values = _series(sources[source], name)
+        previous = np.concatenate([[np.nan], values[:-1]])
+        valid = consecutive & ~np.isnan(values) & ~np.isnan(previous) & (previous != 0)
+        growth = np.full(values.shape, np.nan)
+        np.divide(values - previous, np.abs(previous), out=growth, where=valid)
+        yoy_growth[name] = _to_list(growth * 100)
+
+        present = np.flatnonzero(~np.isnan(values))
+        cagr[name] = None
+        if len(present) >= 2:
+            first, last = present[0], present[-1]
+            span = years[last] - years[first]
+            if values[first] > 0 and values[last] > 0 and span > 0:
+                cagr[name] = round(float(((values[last] / values[first]) ** (1 / span) - 1) * 100), 2)
+
+    revenue = _series(financials, 'revenue')
+    has_revenue = ~np.isnan(revenue) & (revenue > 0)
+    margins = {}
+    rolling_margins = {}
+    window = np.ones(ROLLING_WINDOW)
+    # A window is usable when its years are consecutive: the span equals ROLLING_WINDOW - 1
+    full_window = np.full(years.shape, False)
+    if len(years) >= ROLLING_WINDOW:
+        full_window[ROLLING_WINDOW - 1:] = (years[ROLLING_WINDOW - 1:] - years[:1 - ROLLING_WINDOW]) == ROLLING_WINDOW - 1
+    for margin, (source, name) in MARGINS.items():
+        numerator = _series(sources[source], name)
+        margin_values = np.full(numerator.shape, np.nan)
+        np.divide(numerator, revenue, out=margin_values, where=has_revenue & ~np.isnan(numerator))
+        margins[margin] = _to_list(margin_values * 100)
+
+        rolling = np.full(numerator.shape, np.nan)
+        if len(years) >= ROLLING_WINDOW:
+            # NaN in any year of a window makes the window sum NaN
+            numerator_sums = np.convolve(numerator, window, mode='valid')
+            revenue_sums = np.convolve(revenue, window, mode='valid')
+            usable = full_window[ROLLING_WINDOW - 1:] & ~np.isnan(numerator_sums) & (np.nan_to_num(revenue_sums) > 0)
+            tail = rolling[ROLLING_WINDOW - 1:]
+            np.divide(numerator_sums, revenue_sums, out=tail, where=usable)
+        rolling_margins[margin] = _to_list(rolling * 100)
+
+    return {
+        'fiscal_years': [int(year) for year in fiscal_years],
+        'yoy_growth': yoy_growth,
+        'cagr': cagr,
+        'margins': margins,
+        'rolling_margins': rolling_margins,
+        'rolling_window': ROLLING_WINDOW,
+    }
+
+
+class FinancialHistoryService:
+    """
+    Loads multi-year financials and memoizes them per data version
+
+    A request costs one small query for the company's data version (row
+    counts and last update of its statements and cash flows). Only when
+    that changed does it run the joined statements / cash flows query and
+    recompute the derived series. That load opens its own session on the
+    request session's database (primary or replica, whichever produced the
+    version): the cache shares one computation between concurrent requests
+    and may finish it after the request that started it has closed its session.
+    """
+
+    def __init__(self):
+        self.cache = SWRCache(
+            ttl=settings.CACHE_FINANCIAL_HISTORY_TTL,
+            name="financial_history",
+            max_entries=settings.CACHE_FINANCIAL_HISTORY_MAX_ENTRIES,
+        )
+
+    async def get_history(self, db: AsyncSession, company_id: int, years: int) -> FinancialHistory:
+        """
+        Get up to `years` fiscal years of statements with derived series
+
+        Args:
+            db: Database session
+            company_id: Company ID
+            years: Number of most recent fiscal years
+
+        Returns:
+            FinancialHistory
+        """
+        version = await self._data_version(db, company_id)
+        # Load from the database the version was read from, so rows from a
+        # lagging replica are never cached under a newer version
+        bind = db.bind
+
+        async def compute():
+            async with AsyncSession(bind, expire_on_commit=False) as load_db:
+                return await self._load(load_db, company_id, years)
+
+        return await self.cache.get_or_compute((company_id, years, version), compute)
+
+    async def _data_version(self, db: AsyncSession, company_id: int) -> Tuple:
+        statements = select(
+            func.count(FinancialStatement.id), func.max(FinancialStatement.updated_at)
+        ).where(FinancialStatement.company_id == company_id).subquery()
+        cashflows = select(
+            func.count(CashFlow.id), func.max(CashFlow.updated_at)
+        ).where(CashFlow.company_id == company_id).subquery()
+        result = await db.execute(select(statements, cashflows).join_from(statements, cashflows, true()))
+        return tuple(result.one())
+
+    async def _load(self, db: AsyncSession, company_id: int, years: int) -> FinancialHistory:
+        result = await db.execute(
+            select(FinancialStatement, CashFlow)
+            .outerjoin(CashFlow, and_(
+                CashFlow.company_id == FinancialStatement.company_id,
+                CashFlow.fiscal_year == FinancialStatement.fiscal_year,
+            ))
+            .where(FinancialStatement.company_id == company_id)
+            .order_by(FinancialStatement.fiscal_year.desc())
+            .limit(years)
+        )
+        rows = list(reversed(result.tuples().all()))
+        financials = [financial for financial, _ in rows]
+        cashflows = [cashflow for _, cashflow in rows]
+
+        return FinancialHistory(
+            financial_statements=[FinancialStatementResponse.model_validate(f) for f in reversed(financials)],
+            cashflows=[CashFlowResponse.model_validate(c) for c in reversed(cashflows) if c is not None],
+            derived=compute_derived_series([f.fiscal_year for f in financials], financials, cashflows),
+        )
+
+
+# Singleton instance
+financial_history_service = FinancialHistoryService()
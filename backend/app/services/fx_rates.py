@@ -0,0 +1,172 @@
+"""
+FX rate service
+Converts amounts to EUR at the ECB reference rate of their own date,
+from per-currency sorted arrays held in memory
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncReadSessionLocal
+from app.models.macro_indicators import FxRate
+from app.services.cache import SWRCache
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = 'EUR'
+
+
+def to_days(dates: Iterable) -> np.ndarray:
+    """Dates, datetimes or ISO strings as days since the epoch (NaT for None)"""
+    return np.asarray(list(dates), dtype='datetime64[D]')
+
+
+@dataclass
+class FxRateTable:
+    """
+    Reference rates of every currency, one pair of sorted arrays each
+
+    A lookup takes the latest rate on or before the requested date (the
+    ECB publishes on TARGET business days only), provided it is at most
+    max_lag_days old. Anything else - an unknown currency, a date before
+    the first rate or after a gap - has no rate rather than a guessed one.
+    """
+    rates: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)  # Currency -> (days, EUR per unit)
+    max_lag_days: int = settings.FX_RATE_MAX_LAG_DAYS
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple], max_lag_days: int = settings.FX_RATE_MAX_LAG_DAYS) -> 'FxRateTable':
+        """Build from (currency, rate_date, units per EUR) rows sorted by currency and date"""
+        rates = {}
+        start = 0
+        for end in range(1, len(rows) + 1):
+            if end == len(rows) or rows[end][0] != rows[start][0]:
+                chunk = rows[start:end]
+                rates[chunk[0][0]] = (
+                    to_days(row[1] for row in chunk).astype(np.int64),
+                    1.0 / np.array([row[2] for row in chunk], dtype=float),
+                )
+                start = end
+        return cls(rates=rates, max_lag_days=max_lag_days)
+
+    @property
+    def currencies(self) -> List[str]:
+        return [BASE_CURRENCY, *sorted(self.rates)]
+
+    def rates_to_eur(self, currencies: Iterable[Optional[str]], dates: Iterable) -> np.ndarray:
+        """
+        EUR per unit of currency as of each date
+
+        Args:
+            currencies: Currency code per row
+            dates: As-of date per row (date, datetime or ISO string)
+
+        Returns:
+            Rate per row, NaN where no reference rate applies
+        """
+        codes = np.array([(c or '').upper() for c in currencies], dtype=str)
+        days = to_days(dates)
+        result = np.full(len(codes), np.nan)
+        result[codes == BASE_CURRENCY] = 1.0
+
+        known_days = ~np.isnat(days)
+        day_numbers = days.astype(np.int64)
+        # One vectorized as-of search per currency present in the batch
+        for currency in np.unique(codes[known_days]):
+            if currency not in self.rates:
+                continue
+            rate_days, rates = self.rates[currency]
+            rows = np.flatnonzero(known_days & (codes == currency))
+            position = np.searchsorted(rate_days, day_numbers[rows], side='right') - 1
+            found = position >= 0
+            position[~found] = 0
+            found &= day_numbers[rows] - rate_days[position] <= self.max_lag_days
+            result[rows[found]] = rates[position[found]]
+        return result
+
+    def convert(
+        self,
+        amounts: np.ndarray,
+        currencies: Iterable[Optional[str]],
+        dates: Iterable
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert a batch of amounts to EUR, rounded to cents
+
+        Args:
+            amounts: One row per (currency, date); extra columns share the row's rate
+            currencies: Currency code per row
+            dates: As-of date per row
+
+        Returns:
+            (converted amounts, rate known per row); rows without a rate are NaN
+        """
+        rates = self.rates_to_eur(currencies, dates)
+        amounts = np.asarray(amounts, dtype=float)
+        converted = np.round(amounts * rates.reshape(-1, *([1] * (amounts.ndim - 1))), 2)
+        return converted, ~np.isnan(rates)
+
+
+class FxRateService:
+    """
+    Serves the FX rate table from memory
+
+    The table is loaded from fx_rates on first use, reloaded in the
+    background once older than FX_TABLE_MAX_AGE, and dropped when this
+    process stores new rates, so converting a batch of statements never
+    touches the database. An empty table (no rates ingested yet) is not
+    kept: the next conversion loads it again.
+    """
+
+    def __init__(self, session_factory=AsyncReadSessionLocal, max_age: int = settings.FX_TABLE_MAX_AGE):
+        self.session_factory = session_factory
+        # Never expires: once stale it is served while one task reloads it
+        self.cache = SWRCache(ttl=max_age, stale_ttl=float("inf"), name="fx_rates", max_entries=1)
+
+    @property
+    def table(self) -> Optional[FxRateTable]:
+        """The current table, None until first loaded"""
+        return self.cache.get("table")
+
+    async def get_table(self) -> FxRateTable:
+        """
+        Current FX rate table, loading it if needed
+
+        Returns:
+            FxRateTable
+        """
+        table = await self.cache.get_or_compute("table", self._load)
+        if not table.rates:
+            # Rates may be ingested by another worker at any time
+            self.cache.invalidate()
+        return table
+
+    def invalidate(self):
+        """Drop the table; the next conversion reloads it"""
+        self.cache.invalidate()
+
+    async def _load(self) -> FxRateTable:
+        started = time.perf_counter()
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(FxRate.currency, FxRate.rate_date, FxRate.rate)
+                .where(FxRate.rate > 0)
+                .order_by(FxRate.currency, FxRate.rate_date)
+            )
+            rows = result.all()
+
+        table = FxRateTable.from_rows(rows)
+        logger.info(
+            f"FX rate table loaded: {len(rows)} rates for {len(table.rates)} currencies "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return table
+
+
+# Singleton instance
+fx_rate_service = FxRateService()
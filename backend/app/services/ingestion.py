@@ -0,0 +1,644 @@
+"""
+Data ingestion service
+Fetches upstream sources in the background and persists them locally
+"""
+import asyncio
+import logging
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal, db_writer
+from app.metrics import upstream_call
+from app.models.data_source import FetchLog
+from app.models.macro_indicators import DataRefreshLog, FxRate, MacroIndicator, MarketData
+from app.services.dashboard import dashboard_service
+from app.services.fx_rates import BASE_CURRENCY, fx_rate_service
+from app.services.realtime import realtime_hub
+from app.services.yahoo_finance import yahoo_client
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT ... ON CONFLICT statement (keeps SQLite under its variable limit)
+UPSERT_BATCH_SIZE = 500
+
+# full: re-fetch everything from INGESTION_START_YEAR and overwrite
+# incremental: fetch from each series' watermark (latest stored period) onwards
+# backfill: fetch from an explicit start year and only insert missing periods
+REFRESH_TYPES = ("full", "incremental", "backfill")
+
+
+@dataclass(frozen=True)
+class MacroDataset:
+    """One indicator fetched from one macro source"""
+    source: str
+    indicator_code: str  # Canonical code shared across sources
+    indicator_name: str
+    unit: str
+    frequency: str  # A=Annual, M=Monthly
+    method: str  # Fetch method on the source client, called as (countries, start_year)
+    country_format: str = "iso3"  # Country codes the client expects: iso2 or iso3
+
+
+MACRO_DATASETS: List[MacroDataset] = [
+    MacroDataset("eurostat", "GDP_GROWTH", "Real GDP growth", "%", "A", "get_gdp_growth", "iso2"),
+    MacroDataset("eurostat", "INFLATION", "HICP inflation", "%", "M", "get_inflation_rate", "iso2"),
+    MacroDataset("eurostat", "UNEMPLOYMENT", "Unemployment rate", "%", "A", "get_unemployment_rate", "iso2"),
+    MacroDataset("eurostat", "BUSINESS_CONFIDENCE", "Business confidence indicator", "Index", "M",
+                 "get_business_confidence", "iso2"),
+    MacroDataset("imf", "GDP_GROWTH", "Real GDP growth", "%", "A", "get_gdp_growth"),
+    MacroDataset("imf", "INFLATION", "Inflation, average consumer prices", "%", "A", "get_inflation_rate"),
+    MacroDataset("imf", "UNEMPLOYMENT", "Unemployment rate", "%", "A", "get_unemployment_rate"),
+    MacroDataset("worldbank", "GDP_GROWTH", "Real GDP growth", "%", "A", "get_gdp_growth"),
+    MacroDataset("worldbank", "INFLATION", "Inflation, consumer prices", "%", "A", "get_inflation_rate"),
+    MacroDataset("worldbank", "UNEMPLOYMENT", "Unemployment rate", "%", "A", "get_unemployment_rate"),
+]
+
+
+def _create_client(source: str):
+    """Instantiate a macro source client (imported lazily; some connect on init)"""
+    if source == "eurostat":
+        from app.services.eurostat_data import EurostatDataService
+        return EurostatDataService()
+    if source == "imf":
+        from app.services.imf_data import IMFDataService
+        return IMFDataService()
+    if source == "worldbank":
+        from app.services.worldbank_data import WorldBankData360Service
+        return WorldBankData360Service()
+    if source == "ecb":
+        from app.services.ecb_data import ECBDataService
+        return ECBDataService()
+    raise ValueError(f"Unknown macro source: {source}")
+
+
+def _period_to_date(period: Any) -> Optional[date]:
+    """Convert a series index value (Timestamp, Period, '2023', '2023-05', '2023-Q1') to a date"""
+    if isinstance(period, tuple):
+        period = period[-1]
+    if isinstance(period, pd.Timestamp):
+        return period.date()
+    if isinstance(period, datetime):
+        return period.date()
+    if isinstance(period, date):
+        return period
+    try:
+        if not isinstance(period, pd.Period):
+            period = pd.Period(str(period))
+        return period.to_timestamp(how="end").date()
+    except (ValueError, TypeError):
+        return None
+
+
+def series_points(series: pd.Series) -> List[Tuple[date, float]]:
+    """
+    Extract (period_date, value) pairs from a source series
+
+    Args:
+        series: Series indexed by period (any index type the source clients return)
+
+    Returns:
+        Sorted list of (date, value), NaN values dropped
+    """
+    points = {}
+    for period, value in series.items():
+        if value is None or pd.isna(value):
+            continue
+        period_date = _period_to_date(period)
+        if period_date is not None:
+            points[period_date] = float(value)
+    return sorted(points.items())
+
+
+def _market_security_type(ticker: str) -> str:
+    if ticker.startswith("^"):
+        return "index"
+    if ticker.endswith("=X"):
+        return "currency"
+    return "stock"
+
+
+async def upsert_rows(
+    db: AsyncSession,
+    model,
+    rows: List[Dict[str, Any]],
+    index_elements: List[str],
+    update_columns: List[str]
+):
+    """
+    INSERT ... ON CONFLICT DO UPDATE for PostgreSQL and SQLite
+
+    Args:
+        db: Database session
+        model: Mapped model class
+        rows: Row dicts to write
+        index_elements: Columns of the unique constraint to conflict on
+        update_columns: Columns overwritten when the row already exists;
+            existing rows are left untouched when empty
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert not supported for {dialect}")
+
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = insert(model).values(rows[start:start + UPSERT_BATCH_SIZE])
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        await db.execute(stmt)
+
+
+class IngestionService:
+    """
+    Runs source fetches and persists results into MacroIndicator / MarketData / FxRate
+
+    Each run of a source writes one DataRefreshLog row, and each dataset
+    (indicator or ticker) within it one FetchLog row. A failing dataset is
+    logged and skipped without aborting the rest of the source.
+
+    Incremental runs use the latest stored period per series as a
+    watermark: upstream is asked only for periods from the watermark's year
+    on, and only rows at or after the watermark are written (the watermark
+    period itself is re-written to pick up revisions of provisional values).
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+
+    async def run_all(
+        self,
+        trigger: str = "scheduled",
+        triggered_by: str = "system",
+        refresh_type: str = "incremental",
+        start_year: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Refresh every configured source, one after another
+
+        Args:
+            trigger: What started the run (scheduled, manual)
+            triggered_by: User id or 'system'
+            refresh_type: full, incremental or backfill
+            start_year: First year to fetch for backfill runs
+
+        Returns:
+            Summary per source
+        """
+        summaries = []
+        for source in settings.INGESTION_SOURCES:
+            summaries.append(await self.run_source(
+                source,
+                trigger=trigger,
+                triggered_by=triggered_by,
+                refresh_type=refresh_type,
+                start_year=start_year,
+            ))
+        return summaries
+
+    async def run_source(
+        self,
+        source: str,
+        trigger: str = "manual",
+        triggered_by: str = "system",
+        refresh_type: str = "incremental",
+        start_year: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Refresh a single source and record a DataRefreshLog
+
+        Args:
+            source: eurostat, imf, worldbank, yahoo or ecb
+            trigger: What started the run
+            triggered_by: User id or 'system'
+            refresh_type: full, incremental or backfill
+            start_year: First year to fetch for backfill runs
+                (defaults to INGESTION_START_YEAR)
+
+        Returns:
+            Summary with status and record counts
+        """
+        if refresh_type not in REFRESH_TYPES:
+            raise ValueError(f"Unknown refresh type: {refresh_type}")
+        if start_year is None:
+            start_year = settings.INGESTION_START_YEAR
+
+        started = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            refresh_log = DataRefreshLog(
+                source=source,
+                refresh_type=refresh_type,
+                status="started",
+                started_at=started,
+                trigger=trigger,
+                triggered_by=triggered_by,
+            )
+            db.add(refresh_log)
+            await db_writer.submit(db.commit)
+
+            log_id = refresh_log.id
+
+            results = []
+            error_message = error_details = None
+            try:
+                if source == "yahoo":
+                    for ticker in settings.MARKET_DATA_TICKERS:
+                        results.append(await self._run_dataset(
+                            db, source, ticker, self._ingest_ticker(db, ticker, refresh_type, start_year)
+                        ))
+                elif source == "ecb":
+                    results.append(await self._run_dataset(
+                        db, source, "EXR", self._ingest_fx_rates(db, refresh_type, start_year)
+                    ))
+                else:
+                    for dataset in [d for d in MACRO_DATASETS if d.source == source]:
+                        results.append(await self._run_dataset(
+                            db, source, dataset.indicator_code,
+                            self._ingest_macro(db, dataset, refresh_type, start_year)
+                        ))
+                if not results:
+                    raise ValueError(f"No datasets configured for source {source}")
+            except Exception as e:
+                logger.error(f"Ingestion of {source} failed: {e}")
+                error_message, error_details = str(e), traceback.format_exc()
+
+            failed = [r for r in results if r["status"] == "error"]
+            if failed and not error_message:
+                error_message = "; ".join(f"{r['dataset']}: {r['error']}" for r in failed)
+
+            # A dataset rollback expires the log row; reload it before updating
+            refresh_log = await db.get(DataRefreshLog, log_id)
+            refresh_log.status = "failed" if not results or len(failed) == len(results) else "completed"
+            refresh_log.completed_at = datetime.utcnow()
+            refresh_log.duration_seconds = int((refresh_log.completed_at - started).total_seconds())
+            refresh_log.records_processed = sum(r["fetched"] for r in results)
+            refresh_log.records_inserted = sum(r["inserted"] for r in results)
+            refresh_log.records_updated = sum(r["updated"] for r in results)
+            refresh_log.records_failed = len(failed)
+            refresh_log.error_message = error_message
+            refresh_log.error_details = error_details
+            await db_writer.submit(db.commit)
+
+        dashboard_service.invalidate()
+        await self._publish_changes(results)
+        logger.info(
+            f"Ingestion {source} {refresh_log.status}: "
+            f"{refresh_log.records_inserted} inserted, {refresh_log.records_updated} updated, "
+            f"{len(failed)} datasets failed"
+        )
+        return {
+            "source": source,
+            "refresh_type": refresh_type,
+            "status": refresh_log.status,
+            "records_inserted": refresh_log.records_inserted,
+            "records_updated": refresh_log.records_updated,
+            "datasets_failed": len(failed),
+        }
+
+    async def prune_logs(self, retention_days: int = settings.INGESTION_LOG_RETENTION_DAYS) -> int:
+        """
+        Delete refresh and fetch logs older than the retention window
+
+        Returns:
+            Number of rows deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        async def prune(db: AsyncSession) -> int:
+            fetch_result = await db.execute(delete(FetchLog).where(FetchLog.completed_at < cutoff))
+            refresh_result = await db.execute(delete(DataRefreshLog).where(DataRefreshLog.started_at < cutoff))
+            await db.commit()
+            return fetch_result.rowcount + refresh_result.rowcount
+
+        async with AsyncSessionLocal() as db:
+            return await db_writer.submit(prune, db)
+
+    async def _publish_changes(self, results: List[Dict[str, Any]]):
+        """Push committed changes to realtime subscribers"""
+        changes = [change for r in results for change in r["changes"]]
+        try:
+            for change in changes:
+                await realtime_hub.publish(change)
+            if changes:
+                await realtime_hub.publish({"type": "dashboard_updated"})
+        except Exception as e:
+            logger.warning(f"Failed to publish realtime updates: {e}")
+
+    async def _run_dataset(self, db: AsyncSession, source: str, dataset: str, ingest) -> Dict[str, Any]:
+        """Run one dataset ingest coroutine and record its FetchLog"""
+        started = datetime.utcnow()
+        clock = time.perf_counter()
+        result = {"dataset": dataset, "status": "success", "fetched": 0, "inserted": 0, "updated": 0,
+                  "changes": [], "error": None}
+
+        try:
+            # The ingest coroutine commits its own writes through db_writer
+            fetched, inserted, updated, changes = await ingest
+            result.update(fetched=fetched, inserted=inserted, updated=updated, changes=changes)
+            if fetched == 0:
+                result["status"] = "partial"
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Ingestion of {source}/{dataset} failed: {e}")
+            result.update(status="error", error=str(e))
+
+        db.add(FetchLog(
+            source_name=source,
+            dataset=dataset,
+            status=result["status"],
+            records_fetched=result["fetched"],
+            records_stored=result["inserted"] + result["updated"],
+            records_skipped=result["fetched"] - result["inserted"] - result["updated"],
+            duration_seconds=round(time.perf_counter() - clock, 3),
+            error_message=result["error"],
+            started_at=started,
+            completed_at=datetime.utcnow(),
+        ))
+        await db_writer.submit(db.commit)
+        return result
+
+    async def get_watermarks(self, db: AsyncSession, dataset: MacroDataset) -> Dict[str, date]:
+        """
+        Latest stored non-forecast period per country for a macro dataset
+
+        Forecast periods (after today) are ignored so their actuals are
+        fetched again once published.
+
+        Returns:
+            Dictionary mapping alpha-3 country code to its latest period_date
+        """
+        result = await db.execute(
+            select(MacroIndicator.country_code, func.max(MacroIndicator.period_date))
+            .where(
+                MacroIndicator.source == dataset.source,
+                MacroIndicator.indicator_code == dataset.indicator_code,
+                MacroIndicator.period_date <= date.today(),
+            )
+            .group_by(MacroIndicator.country_code)
+        )
+        return dict(result.all())
+
+    async def _ingest_macro(
+        self,
+        db: AsyncSession,
+        dataset: MacroDataset,
+        refresh_type: str,
+        start_year: int
+    ) -> Tuple[int, int, int, List[Dict[str, Any]]]:
+        """
+        Fetch one macro dataset and write it
+
+        Returns:
+            (fetched, inserted, updated, changes) where changes holds one
+            indicator_update event per country whose stored values changed
+        """
+        to_iso3 = {c: settings.COUNTRY_ISO3[c] for c in settings.SUPPORTED_COUNTRIES}
+        watermarks = await self.get_watermarks(db, dataset) if refresh_type == "incremental" else {}
+
+        # One upstream request per distinct start year
+        requests_by_year: Dict[int, List[str]] = {}
+        for country, country_iso3 in to_iso3.items():
+            watermark = watermarks.get(country_iso3)
+            year = watermark.year if watermark else start_year
+            code = country if dataset.country_format == "iso2" else country_iso3
+            requests_by_year.setdefault(year, []).append(code)
+
+        client = self._get_client(dataset.source)
+        fetch = getattr(client, dataset.method)
+
+        now = datetime.utcnow()
+        today = now.date()
+        fetched = 0
+        rows = []
+        for year, countries in sorted(requests_by_year.items()):
+            # Source clients are synchronous; keep them off the event loop
+            with upstream_call(dataset.source, dataset.method) as call:
+                data = await asyncio.to_thread(fetch, countries, year)
+                call.result(data)
+            for country, series in (data or {}).items():
+                country_iso3 = to_iso3.get(country, country)
+                watermark = watermarks.get(country_iso3)
+                for period_date, value in series_points(series):
+                    fetched += 1
+                    if watermark and period_date < watermark:
+                        continue
+                    rows.append({
+                        "source": dataset.source,
+                        "indicator_code": dataset.indicator_code,
+                        "indicator_name": dataset.indicator_name,
+                        "country_code": country_iso3,
+                        "period_date": period_date,
+                        "frequency": dataset.frequency,
+                        "value": value,
+                        "unit": dataset.unit,
+                        "is_forecast": "true" if period_date > today else "false",
+                        "last_refreshed": now,
+                    })
+
+        if not rows:
+            return fetched, 0, 0, []
+
+        existing_result = await db.execute(
+            select(MacroIndicator.country_code, MacroIndicator.period_date, MacroIndicator.value).where(
+                MacroIndicator.source == dataset.source,
+                MacroIndicator.indicator_code == dataset.indicator_code,
+                MacroIndicator.country_code.in_({r["country_code"] for r in rows}),
+                MacroIndicator.period_date >= min(r["period_date"] for r in rows),
+            )
+        )
+        existing = {(country, period): value for country, period, value in existing_result.all()}
+
+        await db_writer.submit(
+            self._write_rows, db, MacroIndicator, rows,
+            ["source", "indicator_code", "country_code", "period_date"],
+            [] if refresh_type == "backfill" else [
+                "indicator_name", "frequency", "value", "unit", "is_forecast", "last_refreshed",
+            ],
+        )
+        matched = sum(1 for r in rows if (r["country_code"], r["period_date"]) in existing)
+        updated = 0 if refresh_type == "backfill" else matched
+        return fetched, len(rows) - matched, updated, self._macro_changes(dataset, rows, existing, refresh_type)
+
+    def _macro_changes(
+        self,
+        dataset: MacroDataset,
+        rows: List[Dict[str, Any]],
+        existing: Dict[Tuple[str, date], Optional[float]],
+        refresh_type: str
+    ) -> List[Dict[str, Any]]:
+        """Build one event per country with the latest period whose value was added or changed"""
+        changed: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            key = (row["country_code"], row["period_date"])
+            if key in existing and (refresh_type == "backfill" or existing[key] == row["value"]):
+                continue
+            changed.setdefault(row["country_code"], []).append(row)
+
+        events = []
+        for country, country_rows in changed.items():
+            latest = max(country_rows, key=lambda r: r["period_date"])
+            events.append({
+                "type": "indicator_update",
+                "source": dataset.source,
+                "indicator_code": dataset.indicator_code,
+                "country_code": country,
+                "period": latest["period_date"].isoformat(),
+                "value": latest["value"],
+                "periods_changed": len(country_rows),
+            })
+        return events
+
+    async def _ingest_ticker(
+        self,
+        db: AsyncSession,
+        ticker: str,
+        refresh_type: str,
+        start_year: int
+    ) -> Tuple[int, int, int, List[Dict[str, Any]]]:
+        """Fetch price history for one ticker and write it; returns (fetched, inserted, updated, changes)"""
+        start = None
+        if refresh_type == "incremental":
+            watermark_result = await db.execute(
+                select(func.max(MarketData.date)).where(MarketData.ticker == ticker)
+            )
+            start = watermark_result.scalar()
+        elif refresh_type == "backfill":
+            start = date(start_year, 1, 1)
+
+        prices = await yahoo_client.get_price_history(ticker, start=start)
+        if prices is None:
+            raise RuntimeError(f"Price history unavailable for {ticker}")
+        if not prices:
+            return 0, 0, 0, []
+
+        now = datetime.utcnow()
+        security_type = _market_security_type(ticker)
+        rows = [
+            {
+                **price,
+                "ticker": ticker,
+                "security_type": security_type,
+                "data_source": "yahoo_finance",
+                "last_refreshed": now,
+            }
+            for price in prices
+        ]
+
+        existing_result = await db.execute(
+            select(MarketData.date).where(
+                MarketData.ticker == ticker,
+                MarketData.date >= rows[0]["date"],
+            )
+        )
+        existing = set(existing_result.scalars().all())
+
+        await db_writer.submit(
+            self._write_rows, db, MarketData, rows,
+            ["ticker", "date"],
+            [] if refresh_type == "backfill" else [
+                "open_price", "high_price", "low_price", "close_price",
+                "adjusted_close", "volume", "last_refreshed",
+            ],
+        )
+        matched = sum(1 for r in rows if r["date"] in existing)
+        updated = 0 if refresh_type == "backfill" else matched
+        # Market data has no realtime topics yet
+        return len(rows), len(rows) - matched, updated, []
+
+    async def _ingest_fx_rates(
+        self,
+        db: AsyncSession,
+        refresh_type: str,
+        start_year: int
+    ) -> Tuple[int, int, int, List[Dict[str, Any]]]:
+        """Fetch ECB reference rates for ECB_FX_CURRENCIES and write them; returns (fetched, inserted, updated, changes)"""
+        currencies = [c for c in settings.ECB_FX_CURRENCIES if c != BASE_CURRENCY]
+        watermarks: Dict[str, date] = {}
+        if refresh_type == "incremental":
+            watermark_result = await db.execute(
+                select(FxRate.currency, func.max(FxRate.rate_date))
+                .where(FxRate.currency.in_(currencies))
+                .group_by(FxRate.currency)
+            )
+            watermarks = dict(watermark_result.all())
+
+        # One upstream request per distinct start date
+        requests_by_start: Dict[date, List[str]] = {}
+        for currency in currencies:
+            start = watermarks.get(currency) or date(start_year, 1, 1)
+            requests_by_start.setdefault(start, []).append(currency)
+
+        client = self._get_client("ecb")
+        now = datetime.utcnow()
+        rows = []
+        for start, batch in sorted(requests_by_start.items()):
+            with upstream_call("ecb", "get_reference_rates") as call:
+                data = await asyncio.to_thread(client.get_reference_rates, batch, start)
+                call.result(data)
+            if data is None:
+                raise RuntimeError(f"ECB reference rates unavailable for {', '.join(batch)}")
+            for currency, series in data.items():
+                for rate_date, rate in series_points(series):
+                    rows.append({
+                        "currency": currency,
+                        "rate_date": rate_date,
+                        "rate": rate,
+                        "source": "ECB",
+                        "last_refreshed": now,
+                    })
+
+        if not rows:
+            return 0, 0, 0, []
+
+        existing_result = await db.execute(
+            select(FxRate.currency, FxRate.rate_date).where(
+                FxRate.currency.in_({r["currency"] for r in rows}),
+                FxRate.rate_date >= min(r["rate_date"] for r in rows),
+            )
+        )
+        existing = set(existing_result.all())
+
+        await db_writer.submit(
+            self._write_rows, db, FxRate, rows,
+            ["currency", "rate_date"],
+            [] if refresh_type == "backfill" else ["rate", "source", "last_refreshed"],
+        )
+        fx_rate_service.invalidate()
+        matched = sum(1 for r in rows if (r["currency"], r["rate_date"]) in existing)
+        updated = 0 if refresh_type == "backfill" else matched
+        # FX rates have no realtime topics
+        return len(rows), len(rows) - matched, updated, []
+
+    async def _write_rows(
+        self,
+        db: AsyncSession,
+        model,
+        rows: List[Dict[str, Any]],
+        index_elements: List[str],
+        update_columns: List[str]
+    ):
+        """Upsert and commit in one go (runs on the single writer)"""
+        await upsert_rows(db, model, rows, index_elements, update_columns)
+        await db.commit()
+
+    def _get_client(self, source: str):
+        if source not in self._clients:
+            self._clients[source] = _create_client(source)
+        return self._clients[source]
+
+
+# Singleton instance
+ingestion_service = IngestionService()
@@ -0,0 +1,287 @@
+"""
+Leader election for scheduled jobs
+Makes sure only one worker process across all replicas runs the scheduler
+"""
+import asyncio
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine, is_sqlite
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary 64-bit key shared by every process of this app
+ADVISORY_LOCK_KEY = 0x41744951  # "AtIQ"
+
+LEADER_BACKENDS = ("auto", "postgres", "redis", "file", "none")
+
+
+class PostgresAdvisoryLock:
+    """
+    Session-level pg_try_advisory_lock held on a dedicated connection
+
+    The lock lives as long as the connection: if the leader process dies or
+    its connection drops, Postgres releases it and another worker takes over.
+    The connection runs in autocommit mode, so holding the lock never leaves
+    a transaction open (idle in transaction) between renewals.
+    """
+
+    def __init__(self, key: int = ADVISORY_LOCK_KEY):
+        self.key = key
+        self.conn = None
+
+    async def acquire(self) -> bool:
+        conn = await engine.connect()
+        try:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+        except Exception:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        self.conn = conn
+        return True
+
+    async def renew(self) -> bool:
+        # The lock is ours while the session is alive
+        if self.conn is None:
+            return False
+        await self.conn.execute(text("SELECT 1"))
+        return True
+
+    async def release(self):
+        if self.conn is None:
+            return
+        try:
+            await self.conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        finally:
+            await self.conn.close()
+            self.conn = None
+
+
+class RedisLeaseLock:
+    """
+    Lease stored under a Redis key with SET NX PX
+
+    The key holds a random token so a worker only extends or deletes its own
+    lease. A leader that stops renewing loses the key after the lease TTL.
+    """
+
+    RENEW_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, key: str, ttl_seconds: int):
+        from redis import asyncio as aioredis
+
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self.key = key
+        self.ttl_ms = ttl_seconds * 1000
+        self.token = uuid.uuid4().hex
+
+    async def acquire(self) -> bool:
+        return bool(await self.client.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def renew(self) -> bool:
+        return bool(await self.client.eval(self.RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    async def release(self):
+        await self.client.eval(self.RELEASE_SCRIPT, 1, self.key, self.token)
+
+
+class FileLock:
+    """
+    Exclusive flock on a local file, for single-host SQLite deployments
+
+    The OS drops the lock when the holding process exits, so a surviving
+    worker picks it up on its next attempt.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd: Optional[int] = None
+
+    async def acquire(self) -> bool:
+        import fcntl
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self.fd = fd
+        return True
+
+    async def renew(self) -> bool:
+        return self.fd is not None
+
+    async def release(self):
+        import fcntl
+
+        if self.fd is None:
+            return
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+class AlwaysLeader:
+    """No election: every process leads (single worker deployments)"""
+
+    async def acquire(self) -> bool:
+        return True
+
+    async def renew(self) -> bool:
+        return True
+
+    async def release(self):
+        pass
+
+
+def create_lock(backend: Optional[str] = None):
+    """
+    Build the lock for the configured backend
+
+    Args:
+        backend: One of LEADER_BACKENDS; "auto" picks postgres or file from DATABASE_URL
+
+    Returns:
+        Lock object with acquire/renew/release coroutines
+    """
+    backend = backend or settings.LEADER_ELECTION_BACKEND
+    if backend not in LEADER_BACKENDS:
+        raise ValueError(f"Unknown leader election backend: {backend}")
+    if backend == "auto":
+        backend = "file" if is_sqlite else "postgres"
+
+    if backend == "postgres":
+        return PostgresAdvisoryLock()
+    if backend == "redis":
+        return RedisLeaseLock(settings.get_redis_url(), settings.LEADER_LOCK_KEY, settings.LEADER_LEASE_TTL)
+    if backend == "file":
+        return FileLock(settings.LEADER_LOCK_FILE)
+    return AlwaysLeader()
+
+
+class LeaderElection:
+    """
+    Campaigns for leadership and keeps the lease renewed
+
+    Every process runs the same loop: followers try to acquire the lock each
+    interval, the leader renews it. Losing the lock (failed renewal, dropped
+    connection) calls on_revoked straight away; when the leader dies another
+    worker is elected within one interval (plus the lease TTL for Redis).
+    """
+
+    def __init__(self, lock=None, interval: Optional[float] = None):
+        self.lock = lock
+        self.interval = interval or settings.LEADER_RENEW_INTERVAL
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_revoked: Optional[Callable[[], Awaitable[None]]] = None
+
+    async def start(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_revoked: Callable[[], Awaitable[None]]
+    ):
+        """
+        Start campaigning in the background
+
+        Args:
+            on_elected: Called when this process becomes leader
+            on_revoked: Called when leadership is lost or given up
+        """
+        if self._task is not None:
+            return
+        if self.lock is None:
+            self.lock = create_lock()
+        self._on_elected = on_elected
+        self._on_revoked = on_revoked
+        self._task = asyncio.create_task(self._campaign())
+
+    async def stop(self):
+        """Stop campaigning and release the lock if held"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._step_down()
+
+    async def _campaign(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                # Keep campaigning: one failed round must not end the loop
+                logger.error("Leader election round failed", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def tick(self):
+        """Run one acquire-or-renew round"""
+        if self.is_leader:
+            try:
+                held = await self.lock.renew()
+            except Exception as e:
+                logger.warning(f"Leader lease renewal failed: {e}")
+                held = False
+            if not held:
+                await self._step_down()
+            return
+
+        try:
+            acquired = await self.lock.acquire()
+        except Exception as e:
+            logger.warning(f"Leader election attempt failed: {e}")
+            return
+        if acquired:
+            self.is_leader = True
+            logger.info(f"Process {os.getpid()} elected scheduler leader")
+            try:
+                await self._on_elected()
+            except Exception:
+                # Don't hold the lock without running the jobs; retry next round
+                logger.error("Scheduler failed to start on election", exc_info=True)
+                await self._step_down()
+
+    async def _step_down(self):
+        self.is_leader = False
+        logger.warning(f"Process {os.getpid()} is no longer scheduler leader")
+        try:
+            await self._on_revoked()
+        finally:
+            # Best effort: the lock may already be gone with its connection
+            try:
+                await self.lock.release()
+            except Exception as e:
+                logger.warning(f"Failed to release leader lock: {e}")
+
+
+# Singleton instance
+leader_election = LeaderElection()
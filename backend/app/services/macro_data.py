@@ -0,0 +1,195 @@
+"""
+Macro Data Service
+Reads macro series stored by the ingestion jobs for the macro API
+"""
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.macro_indicators import MacroIndicator
+from app.services.historical_economic_data import HistoricalEconomicDataService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNTRIES = ['NLD', 'BEL', 'LUX', 'DEU']
+
+
+class MacroDataService:
+    """
+    Serves annual macro series from the local database
+
+    When several sources store the same indicator for a country, the first
+    one in SOURCE_PREFERENCE wins. Countries with no stored data fall back
+    to the curated historical baseline, so the API works before the first
+    ingestion run. Each returned series carries ``attrs['source']`` and
+    ``attrs['last_refreshed']``.
+    """
+
+    SOURCE_PREFERENCE = ("eurostat", "worldbank", "imf")
+    BASELINE_SOURCE = "baseline"
+
+    def __init__(self):
+        self.baseline = HistoricalEconomicDataService()
+        self.baseline_methods = {
+            "GDP_GROWTH": self.baseline.get_gdp_growth,
+            "INFLATION": self.baseline.get_inflation_rate,
+            "UNEMPLOYMENT": self.baseline.get_unemployment_rate,
+        }
+
+    async def get_series(
+        self,
+        db: AsyncSession,
+        indicator_code: str,
+        countries: Optional[List[str]] = None,
+        start_year: int = 2015
+    ) -> Dict[str, pd.Series]:
+        """
+        Get annual series for an indicator
+
+        Args:
+            db: Database session
+            indicator_code: Canonical indicator code (GDP_GROWTH, INFLATION, UNEMPLOYMENT)
+            countries: List of 3-letter country codes
+            start_year: Start year
+
+        Returns:
+            Dictionary mapping country to series indexed by period end date
+        """
+        if countries is None:
+            countries = DEFAULT_COUNTRIES
+
+        result = await db.execute(
+            select(
+                MacroIndicator.source,
+                MacroIndicator.country_code,
+                MacroIndicator.period_date,
+                MacroIndicator.value,
+                MacroIndicator.last_refreshed,
+            )
+            .where(
+                MacroIndicator.indicator_code == indicator_code,
+                MacroIndicator.country_code.in_(countries),
+                MacroIndicator.frequency == "A",
+                MacroIndicator.period_date >= date(start_year, 1, 1),
+                MacroIndicator.period_date <= date.today(),
+                MacroIndicator.value.isnot(None),
+            )
+            .order_by(MacroIndicator.period_date)
+        )
+
+        stored: Dict[str, Dict[str, list]] = {}
+        for row in result:
+            stored.setdefault(row.country_code, {}).setdefault(row.source, []).append(row)
+
+        series_by_country = {}
+        for country in countries:
+            sources = stored.get(country)
+            if not sources:
+                continue
+            source = min(sources, key=self._source_rank)
+            rows = sources[source]
+            series = pd.Series(
+                [row.value for row in rows],
+                index=pd.to_datetime([row.period_date for row in rows]),
+                name=country,
+            )
+            series.attrs["source"] = source
+            series.attrs["last_refreshed"] = max(
+                (row.last_refreshed for row in rows if row.last_refreshed), default=None
+            )
+            series_by_country[country] = series
+
+        missing = [c for c in countries if c not in series_by_country]
+        if missing and indicator_code in self.baseline_methods:
+            for country, series in self.baseline_methods[indicator_code](missing, start_year).items():
+                series.attrs["source"] = self.BASELINE_SOURCE
+                series.attrs["last_refreshed"] = None
+                series_by_country[country] = series
+
+        return series_by_country
+
+    # Indicators of the comprehensive view: (column, indicator code)
+    COMPREHENSIVE_INDICATORS = (
+        ("gdp_growth", "GDP_GROWTH"),
+        ("inflation", "INFLATION"),
+        ("unemployment", "UNEMPLOYMENT"),
+    )
+
+    async def get_comprehensive_series(
+        self,
+        db: AsyncSession,
+        countries: Optional[List[str]] = None,
+        start_year: int = 2020
+    ) -> Dict[str, Dict[str, pd.Series]]:
+        """
+        Get GDP growth, inflation and unemployment series
+
+        Args:
+            db: Database session
+            countries: List of 3-letter country codes
+            start_year: Start year
+
+        Returns:
+            Dictionary mapping indicator column to get_series' result
+        """
+        return {
+            indicator_name: await self.get_series(db, code, countries, start_year)
+            for indicator_name, code in self.COMPREHENSIVE_INDICATORS
+        }
+
+    async def get_comprehensive_indicators(
+        self,
+        db: AsyncSession,
+        countries: Optional[List[str]] = None,
+        start_year: int = 2020
+    ) -> pd.DataFrame:
+        """
+        Get GDP growth, inflation and unemployment in one wide DataFrame
+
+        Args:
+            db: Database session
+            countries: List of 3-letter country codes
+            start_year: Start year
+
+        Returns:
+            DataFrame with one row per country and date
+        """
+        return self.comprehensive_frame(await self.get_comprehensive_series(db, countries, start_year))
+
+    @staticmethod
+    def comprehensive_frame(series_by_indicator: Dict[str, Dict[str, pd.Series]]) -> pd.DataFrame:
+        """Pivot get_comprehensive_series' result to one row per country and date"""
+        all_data = []
+        for indicator_name, series_by_country in series_by_indicator.items():
+            for country, series in series_by_country.items():
+                for period, value in series.items():
+                    all_data.append({
+                        'country': country,
+                        'indicator': indicator_name,
+                        'date': period,
+                        'value': value
+                    })
+
+        df = pd.DataFrame(all_data)
+        if not df.empty:
+            df = df.pivot_table(
+                index=['country', 'date'],
+                columns='indicator',
+                values='value'
+            ).reset_index()
+            # Sources can cover different years; gaps become nulls, not NaN
+            df = df.astype(object).where(df.notna(), None)
+        return df
+
+    def _source_rank(self, source: str) -> int:
+        if source in self.SOURCE_PREFERENCE:
+            return self.SOURCE_PREFERENCE.index(source)
+        return len(self.SOURCE_PREFERENCE)
+
+
+# Singleton instance
+macro_data_service = MacroDataService()
@@ -2,27 +2,38 @@
 Data normalization service
 Handles currency conversion, field standardization, and validation
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import asyncio
 
+import numpy as np
+
+from app.services.fx_rates import BASE_CURRENCY, FxRateTable, fx_rate_service
+
+FINANCIAL_FIELDS = [
+    'revenue', 'cost_of_revenue', 'gross_profit', 'operating_expenses',
+    'ebitda', 'ebit', 'interest_expense', 'tax_expense', 'net_income',
+    'total_assets', 'current_assets', 'cash_and_equivalents',
+    'accounts_receivable', 'inventory', 'total_liabilities',
+    'current_liabilities', 'long_term_debt', 'short_term_debt',
+    'total_equity', 'retained_earnings'
+]
+
+CASHFLOW_FIELDS = [
+    'operating_cashflow', 'capex', 'investing_cashflow',
+    'financing_cashflow', 'free_cashflow', 'dividends_paid',
+    'debt_issued', 'debt_repaid', 'equity_issued', 'net_change_in_cash'
+]
+
 
 class DataNormalizationService:
     """
     Service for normalizing company financial data
+
+    Stateless, so the shared instance can serve concurrent requests:
+    validation errors are returned with each result.
     """
     
-    # FX rates to EUR (approximate, should be updated from API in production)
-    FX_RATES_TO_EUR = {
-        'EUR': 1.0,
-        'USD': 0.92,  # 1 USD = 0.92 EUR (approximate)
-        'GBP': 1.16,  # 1 GBP = 1.16 EUR
-        'CHF': 1.05,  # 1 CHF = 1.05 EUR
-        'DKK': 0.134, # 1 DKK = 0.134 EUR
-        'SEK': 0.088, # 1 SEK = 0.088 EUR
-        'NOK': 0.086, # 1 NOK = 0.086 EUR
-    }
-    
     # Country code mapping
     COUNTRY_CODES = {
         'Netherlands': 'NL',
@@ -33,9 +44,6 @@ class DataNormalizationService:
         'United Kingdom': 'GB',
     }
     
-    def __init__(self):
-        self.validation_errors = []
-    
     async def normalize_company_info(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Normalize company information
@@ -62,7 +70,7 @@ class DataNormalizationService:
         self, 
         data: Dict[str, Any], 
         source_currency: str = 'USD'
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], List[str]]:
         """
         Normalize financial statement data
         
@@ -71,44 +79,43 @@ class DataNormalizationService:
             source_currency: Original currency of the data
         
         Returns:
-            Normalized financial data in EUR
+            (normalized financial data in EUR, validation errors)
         """
-        self.validation_errors = []
-        
-        # Convert all amounts to EUR
-        fx_rate = self.FX_RATES_TO_EUR.get(source_currency, 1.0)
+        normalized, errors = await self.normalize_financial_statements([data], source_currency)
+        return normalized[0], errors
+    
+    async def normalize_financial_statements(
+        self,
+        statements: List[Dict[str, Any]],
+        source_currency: str = 'USD'
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Normalize a batch of financial statements
         
-        normalized = {
-            'fiscal_year': data.get('fiscal_year'),
-            'period_end_date': self._parse_date(data.get('period_end_date')),
-            'currency': 'EUR',
-        }
+        Each statement is converted at the ECB reference rate of its period
+        end date (December 31 of the fiscal year when the date is missing).
         
-        # Convert financial fields
-        financial_fields = [
-            'revenue', 'cost_of_revenue', 'gross_profit', 'operating_expenses',
-            'ebitda', 'ebit', 'interest_expense', 'tax_expense', 'net_income',
-            'total_assets', 'current_assets', 'cash_and_equivalents',
-            'accounts_receivable', 'inventory', 'total_liabilities',
-            'current_liabilities', 'long_term_debt', 'short_term_debt',
-            'total_equity', 'retained_earnings'
-        ]
+        Args:
+            statements: Raw financial data, one dict per period
+            source_currency: Original currency of the data
         
-        for field in financial_fields:
-            value = data.get(field)
-            if value is not None:
-                normalized[field] = self._convert_currency(value, fx_rate)
+        Returns:
+            (normalized financial data, in EUR where a rate was available,
+            validation errors of the whole batch)
+        """
+        normalized, errors = await self._convert_statements(statements, FINANCIAL_FIELDS, source_currency)
         
-        # Validate financial statement
-        self._validate_financial_statement(normalized)
+        # Validate financial statements
+        for statement in normalized:
+            errors.extend(self._validate_financial_statement(statement))
         
-        return normalized
+        return normalized, errors
     
     async def normalize_cashflow_statement(
         self,
         data: Dict[str, Any],
         source_currency: str = 'USD'
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], List[str]]:
         """
         Normalize cash flow statement data
         
@@ -117,33 +124,85 @@ class DataNormalizationService:
             source_currency: Original currency
         
         Returns:
-            Normalized cash flow data in EUR
+            (normalized cash flow data in EUR, validation errors)
         """
-        fx_rate = self.FX_RATES_TO_EUR.get(source_currency, 1.0)
+        normalized, errors = await self.normalize_cashflow_statements([data], source_currency)
+        return normalized[0], errors
+    
+    async def normalize_cashflow_statements(
+        self,
+        statements: List[Dict[str, Any]],
+        source_currency: str = 'USD'
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Normalize a batch of cash flow statements (converted like financial statements)
         
-        normalized = {
-            'fiscal_year': data.get('fiscal_year'),
-            'period_end_date': self._parse_date(data.get('period_end_date')),
-            'currency': 'EUR',
-        }
+        Args:
+            statements: Raw cash flow data, one dict per period
+            source_currency: Original currency
+        
+        Returns:
+            (normalized cash flow data, in EUR where a rate was available,
+            validation errors of the whole batch)
+        """
+        return await self._convert_statements(statements, CASHFLOW_FIELDS, source_currency)
+    
+    async def _convert_statements(
+        self,
+        statements: List[Dict[str, Any]],
+        fields: List[str],
+        source_currency: str
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Convert the amount fields of a batch of statements to EUR in one pass
         
-        # Convert cash flow fields
-        cashflow_fields = [
-            'operating_cashflow', 'capex', 'investing_cashflow',
-            'financing_cashflow', 'free_cashflow', 'dividends_paid',
-            'debt_issued', 'debt_repaid', 'equity_issued', 'net_change_in_cash'
+        A statement with no reference rate for its date keeps its amounts in
+        the source currency (and says so in 'currency'), and a validation
+        error is returned for it, instead of being converted at a made-up rate.
+        Callers must not store such statements: every consumer reads amounts as EUR.
+        """
+        normalized = [
+            {
+                'fiscal_year': data.get('fiscal_year'),
+                'period_end_date': self._parse_date(data.get('period_end_date')),
+                'currency': BASE_CURRENCY,
+            }
+            for data in statements
         ]
+        errors = []
+        if not statements:
+            return normalized, errors
         
-        for field in cashflow_fields:
-            value = data.get(field)
-            if value is not None:
-                normalized[field] = self._convert_currency(value, fx_rate)
+        as_of = [
+            n['period_end_date'] or (f"{n['fiscal_year']}-12-31" if n['fiscal_year'] else None)
+            for n in normalized
+        ]
+        amounts = np.array(
+            [[np.nan if data.get(field) is None else data.get(field) for field in fields] for data in statements],
+            dtype=float,
+        )
         
-        return normalized
-    
-    def _convert_currency(self, amount: float, fx_rate: float) -> float:
-        """Convert amount to EUR using FX rate"""
-        return round(amount * fx_rate, 2)
+        # Statements already in EUR need no rates, nor the table loaded
+        if source_currency == BASE_CURRENCY:
+            fx_table = FxRateTable()
+        else:
+            fx_table = await fx_rate_service.get_table()
+        converted, known = fx_table.convert(amounts, [source_currency] * len(statements), as_of)
+        
+        for i, statement in enumerate(normalized):
+            values = converted[i]
+            if not known[i]:
+                errors.append(
+                    f"No EUR reference rate for {source_currency} on {as_of[i] or 'an unknown date'}; "
+                    f"fiscal year {statement['fiscal_year']} not converted from {source_currency}"
+                )
+                statement['currency'] = source_currency
+                values = amounts[i]
+            for field, value in zip(fields, values):
+                if not np.isnan(value):
+                    statement[field] = float(value)
+        
+        return normalized, errors
     
     def _normalize_country_code(self, country: Optional[str]) -> Optional[str]:
         """Normalize country name to 2-letter code"""
@@ -185,10 +244,14 @@ class DataNormalizationService:
         
         return None
     
-    def _validate_financial_statement(self, data: Dict[str, Any]):
+    def _validate_financial_statement(self, data: Dict[str, Any]) -> List[str]:
         """
         Validate financial statement for logical consistency
+        
+        Returns:
+            Validation errors (empty if consistent)
         """
+        errors = []
         revenue = data.get('revenue')
         ebitda = data.get('ebitda')
         net_income = data.get('net_income')
@@ -198,11 +261,11 @@ class DataNormalizationService:
         
         # Check EBITDA <= Revenue
         if revenue and ebitda and ebitda > revenue:
-            self.validation_errors.append(f"EBITDA ({ebitda}) > Revenue ({revenue})")
+            errors.append(f"EBITDA ({ebitda}) > Revenue ({revenue})")
         
         # Check Net Income <= Revenue
         if revenue and net_income and net_income > revenue * 2:  # Allow some margin for unusual cases
-            self.validation_errors.append(f"Net Income ({net_income}) suspiciously high vs Revenue ({revenue})")
+            errors.append(f"Net Income ({net_income}) suspiciously high vs Revenue ({revenue})")
         
         # Check balance sheet equation: Assets = Liabilities + Equity
         if total_assets and total_liabilities and total_equity:
@@ -210,7 +273,7 @@ class DataNormalizationService:
             tolerance = total_assets * 0.01  # 1% tolerance
             
             if balance_check > tolerance:
-                self.validation_errors.append(
+                errors.append(
                     f"Balance sheet doesn't balance: Assets={total_assets}, L+E={total_liabilities + total_equity}"
                 )
         
@@ -218,15 +281,9 @@ class DataNormalizationService:
         if revenue and ebitda:
             ebitda_margin = (ebitda / revenue) * 100
             if ebitda_margin > 80:
-                self.validation_errors.append(f"EBITDA margin unusually high: {ebitda_margin:.1f}%")
-    
-    def has_validation_errors(self) -> bool:
-        """Check if there are validation errors"""
-        return len(self.validation_errors) > 0
-    
-    def get_validation_errors(self) -> list:
-        """Get list of validation errors"""
-        return self.validation_errors
+                errors.append(f"EBITDA margin unusually high: {ebitda_margin:.1f}%")
+        
+        return errors
 
 
 # Singleton instance
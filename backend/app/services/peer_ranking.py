@@ -0,0 +1,372 @@
+"""
+Peer group ranking service
+Percentile of each company ratio within its country / NACE peer group,
+served from sorted in-memory arrays
+"""
+import logging
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.database import AsyncReadSessionLocal
+from app.models.company import Company, CompanyRiskScore
+from app.services.cache import SWRCache
+from app.services.company_comparison import RATIO_NAMES
+
+logger = logging.getLogger(__name__)
+
+# For every ratio but leverage, a higher value is the healthier one
+HIGHER_IS_BETTER = {name: name != 'debt_to_ebitda' for name in RATIO_NAMES}
+
+# Peer group scopes: same country and NACE code, same NACE code, same country
+PEER_SCOPES = ('country_sector', 'sector', 'country')
+
+GroupKey = Tuple[str, Optional[str], Optional[str]]
+
+
+def _group_keys(country_code: Optional[str], nace_code: Optional[str]) -> Dict[str, GroupKey]:
+    keys = {}
+    if country_code and nace_code:
+        keys['country_sector'] = ('country_sector', country_code, nace_code)
+    if nace_code:
+        keys['sector'] = ('sector', None, nace_code)
+    if country_code:
+        keys['country'] = ('country', country_code, None)
+    return keys
+
+
+def _quantile(values: array, q: float) -> Optional[float]:
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return round(values[lower] + (values[upper] - values[lower]) * (position - lower), 2)
+
+
+class PeerGroups:
+    """
+    Sorted ratio values per peer group
+
+    Every company with a risk score sits in up to three groups (see
+    PEER_SCOPES). Each group keeps one sorted array per ratio, so a
+    percentile is two binary searches, and replacing a company's score
+    removes and inserts single values.
+
+    Not thread-safe: use from the event loop only.
+    """
+
+    def __init__(self):
+        self._groups: Dict[GroupKey, Dict[str, array]] = {}
+        self._sizes: Dict[GroupKey, int] = {}  # companies per group
+        # company id -> (country, nace code, calculation date, ratio values)
+        self._companies: Dict[int, Tuple[Optional[str], Optional[str], date, Tuple[Optional[float], ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._companies)
+
+    def __contains__(self, company_id: int) -> bool:
+        return company_id in self._companies
+
+    def load(self, rows: Iterable[Tuple[int, Optional[str], Optional[str], date, Tuple[Optional[float], ...]]]):
+        """Bulk load (company id, country, nace, date, values) rows, sorting once per array"""
+        lists: Dict[GroupKey, List[List[float]]] = {}
+        for company_id, country_code, nace_code, calculation_date, values in rows:
+            self._companies[company_id] = (country_code, nace_code, calculation_date, values)
+            for key in _group_keys(country_code, nace_code).values():
+                self._sizes[key] = self._sizes.get(key, 0) + 1
+                columns = lists.setdefault(key, [[] for _ in RATIO_NAMES])
+                for column, value in zip(columns, values):
+                    if value is not None:
+                        column.append(value)
+        for key, columns in lists.items():
+            self._groups[key] = {
+                name: array('d', sorted(column)) for name, column in zip(RATIO_NAMES, columns)
+            }
+
+    def upsert(
+        self,
+        company_id: int,
+        country_code: Optional[str],
+        nace_code: Optional[str],
+        calculation_date: date,
+        values: Tuple[Optional[float], ...],
+    ) -> bool:
+        """
+        Set a company's ratios, unless a newer score is already indexed
+
+        Returns:
+            True if the index changed
+        """
+        current = self._companies.get(company_id)
+        if current is not None:
+            if current[2] > calculation_date:
+                return False
+            self.remove(company_id)
+        self._companies[company_id] = (country_code, nace_code, calculation_date, values)
+        self._add_values(country_code, nace_code, values)
+        return True
+
+    def move(self, company_id: int, country_code: Optional[str], nace_code: Optional[str]):
+        """Regroup a company after its country or NACE code changed"""
+        current = self._companies.get(company_id)
+        if current is not None and current[:2] != (country_code, nace_code):
+            self.upsert(company_id, country_code, nace_code, current[2], current[3])
+
+    def remove(self, company_id: int):
+        current = self._companies.pop(company_id, None)
+        if current is None:
+            return
+        country_code, nace_code, _, values = current
+        for key in _group_keys(country_code, nace_code).values():
+            self._sizes[key] -= 1
+            group = self._groups[key]
+            for name, value in zip(RATIO_NAMES, values):
+                if value is not None:
+                    column = group[name]
+                    del column[bisect_left(column, value)]
+
+    def group(self, company_id: int) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        current = self._companies.get(company_id)
+        return current[:2] if current is not None else None
+
+    def rank(self, company_id: int, scope: str = 'country_sector') -> Optional[Dict[str, Any]]:
+        """
+        Percentile of each of a company's ratios within its peer group
+
+        The percentile counts peers below the value plus half of the ties
+        (the company itself included), so the median company sits at 50.
+
+        Returns:
+            Ranking dictionary, or None if the company is not indexed or
+            has no group for the scope
+        """
+        current = self._companies.get(company_id)
+        if current is None:
+            return None
+        country_code, nace_code, calculation_date, values = current
+        key = _group_keys(country_code, nace_code).get(scope)
+        if key is None:
+            return None
+        group = self._groups[key]
+
+        rankings = []
+        for name, value in zip(RATIO_NAMES, values):
+            column = group[name]
+            percentile = None
+            if value is not None:
+                below = bisect_left(column, value)
+                ties = bisect_right(column, value, lo=below) - below
+                percentile = round((below + ties / 2) / len(column) * 100, 1)
+            rankings.append({
+                'ratio': name,
+                'value': value,
+                'percentile': percentile,
+                'peer_count': len(column),
+                'p25': _quantile(column, 0.25),
+                'median': _quantile(column, 0.5),
+                'p75': _quantile(column, 0.75),
+                'higher_is_better': HIGHER_IS_BETTER[name],
+            })
+
+        return {
+            'scope': scope,
+            'country_code': country_code,
+            'nace_code': nace_code,
+            'calculation_date': calculation_date,
+            'peer_group_size': self._sizes[key],
+            'rankings': rankings,
+        }
+
+    def _add_values(self, country_code: Optional[str], nace_code: Optional[str], values: Tuple[Optional[float], ...]):
+        for key in _group_keys(country_code, nace_code).values():
+            self._sizes[key] = self._sizes.get(key, 0) + 1
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = {name: array('d') for name in RATIO_NAMES}
+            for name, value in zip(RATIO_NAMES, values):
+                if value is not None:
+                    insort(group[name], value)
+
+
+def _score_values(score: CompanyRiskScore) -> Tuple[Optional[float], ...]:
+    return tuple(getattr(score, name) for name in RATIO_NAMES)
+
+
+class PeerRankingService:
+    """
+    Keeps a PeerGroups index of every company's latest risk score
+
+    The index is built from the database on first use. Scores committed
+    through the ORM in this process are applied to it as they land (see the
+    listeners below). It is rebuilt in the background once it is older than
+    PEER_INDEX_MAX_AGE, which picks up writes from other workers.
+    """
+
+    def __init__(self, session_factory=AsyncReadSessionLocal, max_age: int = settings.PEER_INDEX_MAX_AGE):
+        self.session_factory = session_factory
+        # Never expires: once stale it is served while one task rebuilds it
+        self.cache = SWRCache(ttl=max_age, stale_ttl=float("inf"), name="peer_index", max_entries=1)
+        self._replay: Optional[List[Tuple]] = None  # changes applied while a rebuild runs
+        self._unplaced: Dict[int, Tuple[date, Tuple[Optional[float], ...]]] = {}  # scores of unknown companies
+
+    async def rank(self, company: Company, scope: str = 'country_sector') -> Optional[Dict[str, Any]]:
+        """
+        Rank a company's latest ratios against its peers
+
+        Args:
+            company: Company to rank
+            scope: One of PEER_SCOPES
+
+        Returns:
+            Ranking dictionary, or None if the company has no risk score
+        """
+        await self._get_index()
+        if self._unplaced:
+            await self._place_unplaced()
+        # The company row is current even if another worker regrouped it
+        self.index.move(company.id, company.country_code, company.nace_code)
+        return self.index.rank(company.id, scope)
+
+    def apply(self, changes: List[Tuple]):
+        """Apply committed changes: ("score", id, date, values), ("move", id, country, nace), ("remove", id)"""
+        if self.index is None:
+            return
+        if self._replay is not None:
+            self._replay.extend(changes)
+        for change in changes:
+            self._apply_one(self.index, change)
+
+    @property
+    def index(self) -> Optional[PeerGroups]:
+        """The current index, None until first built"""
+        return self.cache.get("index")
+
+    def invalidate(self):
+        """Drop the index; the next request rebuilds it"""
+        self.cache.invalidate()
+        self._unplaced.clear()
+
+    async def _get_index(self) -> PeerGroups:
+        return await self.cache.get_or_compute("index", self._build)
+
+    async def _build(self) -> PeerGroups:
+        started = time.perf_counter()
+        self._replay = []
+        try:
+            ranked = select(
+                CompanyRiskScore.company_id,
+                CompanyRiskScore.calculation_date,
+                *(getattr(CompanyRiskScore, name) for name in RATIO_NAMES),
+                func.row_number().over(
+                    partition_by=CompanyRiskScore.company_id,
+                    order_by=(CompanyRiskScore.calculation_date.desc(), CompanyRiskScore.id.desc()),
+                ).label("rn"),
+            ).subquery()
+            stmt = select(
+                ranked.c.company_id,
+                Company.country_code,
+                Company.nace_code,
+                ranked.c.calculation_date,
+                *(ranked.c[name] for name in RATIO_NAMES),
+            ).join(Company, Company.id == ranked.c.company_id).where(ranked.c.rn == 1)
+
+            async with self.session_factory() as db:
+                result = await db.execute(stmt)
+                rows = result.all()
+
+            index = PeerGroups()
+            index.load((row[0], row[1], row[2], row[3], tuple(row[4:])) for row in rows)
+            for change in self._replay:
+                self._apply_one(index, change)
+        finally:
+            self._replay = None
+
+        logger.info(f"Peer index built: {len(index)} companies in {time.perf_counter() - started:.2f}s")
+        return index
+
+    def _apply_one(self, index: PeerGroups, change: Tuple):
+        kind, company_id = change[0], change[1]
+        if kind == "score":
+            _, _, calculation_date, values = change
+            group = index.group(company_id)
+            if group is None:
+                # Country and NACE code are looked up on the next request
+                pending = self._unplaced.get(company_id)
+                if pending is None or pending[0] <= calculation_date:
+                    self._unplaced[company_id] = (calculation_date, values)
+            else:
+                index.upsert(company_id, group[0], group[1], calculation_date, values)
+        elif kind == "move":
+            index.move(company_id, change[2], change[3])
+        elif kind == "remove":
+            index.remove(company_id)
+            self._unplaced.pop(company_id, None)
+
+    async def _place_unplaced(self):
+        unplaced, self._unplaced = self._unplaced, {}
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Company.id, Company.country_code, Company.nace_code)
+                .where(Company.id.in_(list(unplaced)))
+            )
+            for company_id, country_code, nace_code in result.all():
+                calculation_date, values = unplaced[company_id]
+                self.index.upsert(company_id, country_code, nace_code, calculation_date, values)
+
+
+# Singleton instance
+peer_ranking_service = PeerRankingService()
+
+
+# Committed risk scores and company changes reach the index without a rebuild.
+# Changes are collected per session at flush time and applied on commit, so
+# rolled back work never shows up.
+_PENDING_KEY = "peer_index_changes"
+
+
+def _pending(target) -> Optional[List[Tuple]]:
+    session = object_session(target)
+    return session.info.setdefault(_PENDING_KEY, []) if session is not None else None
+
+
+@event.listens_for(CompanyRiskScore, "after_insert")
+@event.listens_for(CompanyRiskScore, "after_update")
+def _stage_score(mapper, connection, target: CompanyRiskScore):
+    pending = _pending(target)
+    if pending is not None:
+        pending.append(("score", target.company_id, target.calculation_date, _score_values(target)))
+
+
+@event.listens_for(Company, "after_update")
+def _stage_company_move(mapper, connection, target: Company):
+    state = inspect(target)
+    if state.attrs.country_code.history.has_changes() or state.attrs.nace_code.history.has_changes():
+        pending = _pending(target)
+        if pending is not None:
+            pending.append(("move", target.id, target.country_code, target.nace_code))
+
+
+@event.listens_for(Company, "after_delete")
+def _stage_company_removal(mapper, connection, target: Company):
+    pending = _pending(target)
+    if pending is not None:
+        pending.append(("remove", target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        peer_ranking_service.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,181 @@
+"""
+Realtime update hub
+Fans change events out to WebSocket subscribers through Redis pub/sub
+"""
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.config import settings
+from app.services.dashboard import dashboard_service
+
+logger = logging.getLogger(__name__)
+
+# dashboard, country:<ISO3>, indicator:<CODE>
+TOPIC_PATTERN = re.compile(r"^(dashboard|country:[A-Z]{3}|indicator:[A-Z0-9_]{1,50})$")
+
+
+def event_topics(event: Dict[str, Any]) -> List[str]:
+    """Topics an event is delivered to"""
+    if event.get("type") == "indicator_update":
+        return [f"country:{event['country_code']}", f"indicator:{event['indicator_code']}"]
+    return ["dashboard"]
+
+
+class Subscription:
+    """
+    One WebSocket connection's topics and outbound queue
+
+    The queue is bounded: when a slow client falls behind, the oldest
+    messages are dropped and the client is told to resync instead.
+    """
+
+    def __init__(self, max_queue: int = settings.REALTIME_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.topics: Set[str] = set()
+        self.overflowed = False
+
+    def push(self, message: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(message)
+
+
+class RealtimeHub:
+    """
+    Routes published events to the subscriptions held by this process
+
+    With the redis broker, publish() goes through a Redis channel that every
+    worker listens on, so a change ingested by the scheduler leader reaches
+    sockets connected to any worker. If Redis is unavailable the hub falls
+    back to delivering within the publishing process only.
+    """
+
+    def __init__(self):
+        self.topics: Dict[str, Set[Subscription]] = {}
+        self.subscriptions: Set[Subscription] = set()
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def connection_count(self) -> int:
+        return len(self.subscriptions)
+
+    async def start(self):
+        """Connect to the broker and listen for events"""
+        if not settings.FEATURE_REALTIME_UPDATES or settings.REALTIME_BROKER != "redis":
+            return
+        try:
+            from redis import asyncio as aioredis
+
+            self._redis = aioredis.from_url(settings.get_redis_url(), decode_responses=True)
+            await self._redis.ping()
+        except Exception as e:
+            logger.warning(f"Realtime broker unavailable, delivering in-process only: {e}")
+            self._redis = None
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop listening and close the broker connection"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    def connect(self) -> Optional[Subscription]:
+        """Register a new connection; None when this worker is at capacity"""
+        if len(self.subscriptions) >= settings.REALTIME_MAX_CONNECTIONS:
+            return None
+        subscription = Subscription()
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def disconnect(self, subscription: Subscription):
+        self.unsubscribe(subscription, list(subscription.topics))
+        self.subscriptions.discard(subscription)
+
+    def subscribe(self, subscription: Subscription, topics: Iterable[str]) -> List[str]:
+        """
+        Add topics to a subscription
+
+        Args:
+            subscription: Connection subscription
+            topics: Requested topic names
+
+        Returns:
+            Topics accepted (invalid names and those over the per-connection cap are ignored)
+        """
+        accepted = []
+        for topic in topics:
+            if not isinstance(topic, str) or not TOPIC_PATTERN.match(topic):
+                continue
+            if topic not in subscription.topics and len(subscription.topics) >= settings.REALTIME_MAX_TOPICS:
+                break
+            subscription.topics.add(topic)
+            self.topics.setdefault(topic, set()).add(subscription)
+            accepted.append(topic)
+        return accepted
+
+    def unsubscribe(self, subscription: Subscription, topics: Iterable[str]):
+        for topic in topics:
+            subscription.topics.discard(topic)
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.topics[topic]
+
+    async def publish(self, event: Dict[str, Any]):
+        """Publish an event to every worker's subscribers"""
+        if not settings.FEATURE_REALTIME_UPDATES:
+            return
+        message = json.dumps(event, default=str)
+        if self._redis is not None:
+            try:
+                await self._redis.publish(settings.REALTIME_CHANNEL, message)
+                return
+            except Exception as e:
+                logger.warning(f"Realtime publish failed, delivering in-process only: {e}")
+        self.dispatch(message)
+
+    def dispatch(self, message: str) -> int:
+        """Deliver an encoded event to local subscribers; returns the number reached"""
+        event = json.loads(message)
+        if event.get("type") == "dashboard_updated":
+            # Only the worker that wrote dropped its cached summary; every worker
+            # relays this event, so each drops its own before its clients refetch
+            dashboard_service.invalidate()
+        targets: Set[Subscription] = set()
+        for topic in event_topics(event):
+            targets |= self.topics.get(topic, set())
+        for subscription in targets:
+            subscription.push(message)
+        return len(targets)
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                await pubsub.subscribe(settings.REALTIME_CHANNEL)
+                async for item in pubsub.listen():
+                    if item.get("type") == "message":
+                        self.dispatch(item["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime listener error, reconnecting: {e}")
+                await asyncio.sleep(5)
+
+
+# Singleton instance
+realtime_hub = RealtimeHub()
@@ -0,0 +1,261 @@
+"""
+Risk score backfill
+Scores every stored fiscal year of every company in bulk
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal, db_writer
+from app.models.company import CashFlow, Company, CompanyRiskScore, FinancialStatement
+from app.services.company_risk import risk_scoring_service
+from app.services.dashboard import dashboard_service
+from app.services.ingestion import upsert_rows
+from app.services.peer_ranking import peer_ranking_service
+from app.services.scoring_models import CASHFLOW_FIELDS, FINANCIAL_FIELDS, ScoringModel, scoring_model_registry
+
+logger = logging.getLogger(__name__)
+
+SCORE_KEY = ['company_id', 'calculation_date']
+SCORE_COLUMNS = [
+    'fiscal_year', 'macro_risk_score', 'sector_risk_score', 'financial_health_score',
+    'overall_risk_score', 'risk_category', 'debt_to_ebitda', 'ebitda_margin', 'roa', 'roe',
+    'current_ratio', 'quick_ratio', 'free_cashflow_yield', 'model_version',
+]
+
+
+def score_rows(rows: Sequence[Tuple], model_spec: Tuple[str, int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Score a chunk of statement rows (see RiskBackfill._chunk_query for the layout)
+
+    A plain function of plain values, so it can run in a worker process:
+    the scoring model arrives as (name, version, definition) and health
+    scores are computed for the whole chunk at once. Each score is dated
+    at its fiscal year end: the period end date, or 31 December when that
+    is missing.
+    """
+    model = ScoringModel(*model_spec)
+    width = len(FINANCIAL_FIELDS)
+    matrix = np.array(
+        [[np.nan if v is None else v for v in (*row[6:6 + width], *row[7 + width:])] for row in rows],
+        dtype=float,
+    ).reshape(len(rows), width + len(CASHFLOW_FIELDS))
+    columns = {name: matrix[:, i] for i, name in enumerate((*FINANCIAL_FIELDS, *CASHFLOW_FIELDS))}
+    health = model.health_scores(columns, np.array([row[6 + width] is not None for row in rows], dtype=bool))
+
+    scores = []
+    for row, financial_health in zip(rows, health.tolist()):
+        _, company_id, country_code, nace_code, fiscal_year, period_end_date = row[:6]
+        financial = SimpleNamespace(**dict(zip(FINANCIAL_FIELDS, row[6:6 + width])))
+        cashflow_id = row[6 + width]
+        cashflow = None
+        if cashflow_id is not None:
+            cashflow = SimpleNamespace(**dict(zip(CASHFLOW_FIELDS, row[7 + width:])))
+        scores.append(risk_scoring_service.score_statement(
+            company_id,
+            country_code,
+            nace_code,
+            financial,
+            cashflow,
+            fiscal_year,
+            period_end_date or date(fiscal_year, 12, 31),
+            model=model,
+            financial_health=financial_health,
+        ))
+    return scores
+
+
+class RiskBackfill:
+    """
+    Computes risk scores for all fiscal years and companies
+
+    Statements are read in keyset-paginated chunks (one short query each,
+    so SQLite writers are never blocked by an open cursor), scored, and
+    written with one INSERT ... ON CONFLICT per chunk through the write
+    queue. Re-running overwrites the same rows. For universes of at least
+    RISK_BACKFILL_PARALLEL_MIN_ROWS statements, scoring is spread over a
+    process pool of RISK_BACKFILL_WORKERS processes, with a bounded number
+    of chunks in flight. start() runs one backfill at a time in the
+    background.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        chunk_size: int = settings.RISK_BACKFILL_CHUNK_SIZE,
+        workers: int = settings.RISK_BACKFILL_WORKERS,
+        parallel_min_rows: int = settings.RISK_BACKFILL_PARALLEL_MIN_ROWS,
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.parallel_min_rows = parallel_min_rows
+        self.current: Optional[Dict[str, Any]] = None  # Backfill started by start(), while it runs
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, company_ids: Optional[List[int]] = None, from_year: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run a backfill in the background
+
+        Args:
+            company_ids: Only these companies (all when omitted)
+            from_year: Only fiscal years from this one on
+
+        Returns:
+            The started job: company_ids, from_year and started_at
+
+        Raises:
+            RuntimeError: A backfill started here is still running
+        """
+        if self.is_running:
+            raise RuntimeError("A risk backfill is already running")
+        self.current = {
+            'company_ids': company_ids,
+            'from_year': from_year,
+            'started_at': datetime.now(timezone.utc),
+        }
+        self._task = asyncio.create_task(self._run_in_background(company_ids, from_year))
+        return self.current
+
+    async def _run_in_background(self, company_ids: Optional[List[int]], from_year: Optional[int]):
+        try:
+            await self.run(company_ids, from_year)
+        except Exception as e:
+            logger.error(f"Risk backfill failed: {e}", exc_info=True)
+        finally:
+            self.current = None
+
+    async def run(
+        self,
+        company_ids: Optional[List[int]] = None,
+        from_year: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Score stored fiscal years and write them
+
+        Args:
+            company_ids: Only these companies (all when omitted)
+            from_year: Only fiscal years from this one on
+
+        Returns:
+            Summary with statement count, scores written and timing
+        """
+        started = time.perf_counter()
+        filters = []
+        if company_ids:
+            filters.append(FinancialStatement.company_id.in_(company_ids))
+        if from_year:
+            filters.append(FinancialStatement.fiscal_year >= from_year)
+
+        async with self.session_factory() as db:
+            total = await db.scalar(select(func.count(FinancialStatement.id)).where(*filters))
+        model = await scoring_model_registry.get_active()
+        model_spec = (model.name, model.version, model.definition)
+
+        executor: Optional[Executor] = None
+        if self.workers > 0 and total >= self.parallel_min_rows:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+        written = 0
+        chunks = 0
+        in_flight: set = set()
+        max_in_flight = max(self.workers, 1) * 2
+        try:
+            last_id = 0
+            while True:
+                rows = await self._read_chunk(filters, last_id)
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                chunks += 1
+                in_flight.add(asyncio.create_task(self._score_and_write(rows, model_spec, executor)))
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    written += sum(task.result() for task in done)
+            if in_flight:
+                written += sum(await asyncio.gather(*in_flight))
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        peer_ranking_service.invalidate()
+        dashboard_service.invalidate()
+
+        summary = {
+            'statements': total,
+            'scores_written': written,
+            'chunks': chunks,
+            'parallel': executor is not None,
+            'model_version': model.label,
+            'duration_seconds': round(time.perf_counter() - started, 2),
+        }
+        logger.info(f"Risk backfill finished: {summary}")
+        return summary
+
+    def _chunk_query(self, filters: List, last_id: int):
+        return (
+            select(
+                FinancialStatement.id,
+                FinancialStatement.company_id,
+                Company.country_code,
+                Company.nace_code,
+                FinancialStatement.fiscal_year,
+                FinancialStatement.period_end_date,
+                *(getattr(FinancialStatement, name) for name in FINANCIAL_FIELDS),
+                CashFlow.id,
+                *(getattr(CashFlow, name) for name in CASHFLOW_FIELDS),
+            )
+            .join(Company, Company.id == FinancialStatement.company_id)
+            .outerjoin(CashFlow, and_(
+                CashFlow.company_id == FinancialStatement.company_id,
+                CashFlow.fiscal_year == FinancialStatement.fiscal_year,
+            ))
+            .where(FinancialStatement.id > last_id, *filters)
+            .order_by(FinancialStatement.id)
+            .limit(self.chunk_size)
+        )
+
+    async def _read_chunk(self, filters: List, last_id: int) -> List[Tuple]:
+        async with self.session_factory() as db:
+            result = await db.execute(self._chunk_query(filters, last_id))
+            return [tuple(row) for row in result.all()]
+
+    async def _score_and_write(self, rows: List[Tuple], model_spec: Tuple, executor: Optional[Executor]) -> int:
+        if executor is not None:
+            scores = await asyncio.get_running_loop().run_in_executor(executor, score_rows, rows, model_spec)
+        else:
+            scores = score_rows(rows, model_spec)
+        return await db_writer.submit(self._write, scores)
+
+    async def _write(self, scores: List[Dict[str, Any]]) -> int:
+        async with self.session_factory() as db:
+            await self._upsert(db, scores)
+            await db.commit()
+        return len(scores)
+
+    async def _upsert(self, db: AsyncSession, scores: List[Dict[str, Any]]):
+        await upsert_rows(db, CompanyRiskScore, scores, SCORE_KEY, SCORE_COLUMNS)
+
+
+# Singleton instance
+risk_backfill = RiskBackfill()
@@ -0,0 +1,131 @@
+"""
+Background job scheduler
+Runs ingestion, risk recalculation and cleanup on the configured cron schedules
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from app.config import settings
+from app.database import AsyncSessionLocal, db_writer
+from app.services.company_risk import risk_scoring_service
+from app.services.dashboard import dashboard_service
+from app.services.export_jobs import export_job_runner
+from app.services.ingestion import ingestion_service
+from app.services.leader import LeaderElection, leader_election
+from app.services.realtime import realtime_hub
+
+logger = logging.getLogger(__name__)
+
+
+async def run_fetch_job():
+    """Fetch new periods from all upstream sources into the local database"""
+    summaries = await ingestion_service.run_all(trigger="scheduled", refresh_type="incremental")
+    logger.info(f"Scheduled fetch finished: {summaries}")
+
+
+async def run_risk_job():
+    """Recalculate company risk scores from the latest stored financials"""
+    async def recalculate(db):
+        scored = await risk_scoring_service.recalculate_all(db)
+        await db.commit()
+        return scored
+
+    async with AsyncSessionLocal() as db:
+        scored = await db_writer.submit(recalculate, db)
+    dashboard_service.invalidate()
+    # Tells the other workers to drop their cached summaries too
+    await realtime_hub.publish({"type": "dashboard_updated"})
+    logger.info(f"Scheduled risk calculation scored {scored} companies")
+
+
+async def run_cleanup_job():
+    """Prune old ingestion logs and expired export files"""
+    pruned = await ingestion_service.prune_logs()
+    expired = await export_job_runner.sweep_expired()
+    logger.info(f"Scheduled cleanup removed {pruned} log rows and {expired} exports")
+
+
+# Job id -> (coroutine, cron setting name)
+SCHEDULED_JOBS = {
+    "fetch": (run_fetch_job, "FETCH_SCHEDULE_CRON"),
+    "risk": (run_risk_job, "RISK_CALC_SCHEDULE_CRON"),
+    "cleanup": (run_cleanup_job, "CLEANUP_SCHEDULE_CRON"),
+}
+
+
+class JobScheduler:
+    """
+    Wraps an APScheduler AsyncIOScheduler running on the app's event loop
+
+    Each job runs at most once at a time; runs missed while the process was
+    down are coalesced into a single run if within the grace period.
+
+    Every worker campaigns for leadership but only the elected leader runs
+    the scheduler, so jobs fire once per deployment rather than once per
+    process. Jobs already running when leadership is lost finish normally.
+    """
+
+    misfire_grace_time = 3600
+
+    def __init__(self, election: LeaderElection = leader_election):
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self.election = election
+
+    @property
+    def is_running(self) -> bool:
+        return self.scheduler is not None and self.scheduler.running
+
+    @property
+    def is_leader(self) -> bool:
+        return self.election.is_leader
+
+    async def start(self):
+        """Start campaigning for leadership; the scheduler runs while elected"""
+        if not settings.SCHEDULER_ENABLED:
+            return
+        await self.election.start(on_elected=self._start_jobs, on_revoked=self._stop_jobs)
+
+    async def stop(self):
+        """Give up leadership and stop the scheduler"""
+        await self.election.stop()
+        await self._stop_jobs()
+
+    async def _start_jobs(self):
+        """Register the cron jobs and start the scheduler"""
+        if self.is_running:
+            return
+
+        self.scheduler = AsyncIOScheduler(timezone="UTC")
+        for job_id, (func, cron_setting) in SCHEDULED_JOBS.items():
+            self.scheduler.add_job(
+                func,
+                CronTrigger.from_crontab(getattr(settings, cron_setting), timezone="UTC"),
+                id=job_id,
+                max_instances=1,
+                coalesce=True,
+                misfire_grace_time=self.misfire_grace_time,
+            )
+        self.scheduler.start()
+        logger.info(f"Scheduler started with jobs: {', '.join(SCHEDULED_JOBS)}")
+
+    async def _stop_jobs(self):
+        """Stop the scheduler without waiting for running jobs"""
+        if self.is_running:
+            self.scheduler.shutdown(wait=False)
+        self.scheduler = None
+
+    def get_jobs(self) -> List[Dict[str, Any]]:
+        """List scheduled jobs with their next run time"""
+        if not self.is_running:
+            return []
+        return [
+            {"id": job.id, "next_run_time": job.next_run_time}
+            for job in self.scheduler.get_jobs()
+        ]
+
+
+# Singleton instance
+job_scheduler = JobScheduler()
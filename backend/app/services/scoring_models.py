@@ -0,0 +1,345 @@
+"""
+Risk scoring model registry
+Versioned scoring models stored as data and compiled to vectorized evaluators
+"""
+import asyncio
+import copy
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.company import RiskScoringModel
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ('Low', 'Medium', 'High', 'Critical')
+
+# Statement inputs of a health score, as float columns (NaN = missing)
+FINANCIAL_FIELDS = (
+    'revenue', 'ebitda', 'net_income', 'total_assets', 'total_equity',
+    'current_assets', 'current_liabilities', 'inventory', 'long_term_debt',
+)
+CASHFLOW_FIELDS = ('operating_cashflow', 'free_cashflow')
+
+DEFAULT_MODEL_NAME = 'default'
+DEFAULT_MODEL_VERSION = 1
+
+# The original hard-coded model: health score bands, component weights and
+# category thresholds. Built in, so scoring works without any stored model.
+DEFAULT_DEFINITION: Dict[str, Any] = {
+    'weights': {'macro': 0.30, 'sector': 0.20, 'financial': 0.50},
+    'thresholds': {'low': 30, 'medium': 50, 'high': 70},
+    'max_points': 100,
+    'factors': [
+        {
+            'name': 'profitability', 'metric': 'net_margin', 'missing_points': 10,
+            'bands': [
+                {'below': -10, 'points': 20}, {'below': 0, 'points': 15},
+                {'below': 5, 'points': 10}, {'below': 10, 'points': 5},
+            ],
+        },
+        {
+            'name': 'leverage', 'metric': 'debt_to_ebitda',
+            'bands': [{'above': 5, 'points': 30}, {'above': 3, 'points': 20}, {'above': 2, 'points': 10}],
+        },
+        {
+            'name': 'liquidity', 'metric': 'current_ratio',
+            'bands': [{'below': 0.8, 'points': 20}, {'below': 1.0, 'points': 15}, {'below': 1.2, 'points': 10}],
+        },
+        {
+            'name': 'cash_flow', 'metric': 'operating_cashflow',
+            'bands': [{'below': 0, 'points': 20}, {'metric': 'free_cashflow', 'below': 0, 'points': 10}],
+        },
+        {
+            'name': 'solvency', 'metric': 'equity_ratio',
+            'bands': [{'below': 10, 'points': 10}, {'below': 20, 'points': 5}],
+        },
+    ],
+}
+
+Columns = Dict[str, np.ndarray]
+
+
+def _present(values: np.ndarray) -> np.ndarray:
+    """Vector form of the original truthiness checks: known and non-zero"""
+    return ~np.isnan(values) & (values != 0)
+
+
+def _positive(values: np.ndarray) -> np.ndarray:
+    return np.nan_to_num(values) > 0
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, known: np.ndarray, scale: float = 1.0):
+    values = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=values, where=known)
+    return values * scale, known
+
+
+# Metric name -> (columns, has_cashflow) -> (values, known). "Known" follows
+# the original scoring rules, so the default model reproduces them exactly.
+METRICS: Dict[str, Callable[[Columns, np.ndarray], Tuple[np.ndarray, np.ndarray]]] = {
+    'net_margin': lambda c, cf: _ratio(
+        c['net_income'], c['revenue'], _present(c['net_income']) & _present(c['revenue']), 100),
+    'debt_to_ebitda': lambda c, cf: _ratio(
+        c['long_term_debt'], c['ebitda'], _present(c['long_term_debt']) & _present(c['ebitda'])),
+    'current_ratio': lambda c, cf: _ratio(
+        c['current_assets'], c['current_liabilities'],
+        _present(c['current_assets']) & _present(c['current_liabilities'])),
+    'quick_ratio': lambda c, cf: _ratio(
+        c['current_assets'] - np.nan_to_num(c['inventory']), c['current_liabilities'],
+        _present(c['current_assets']) & _positive(c['current_liabilities'])),
+    'equity_ratio': lambda c, cf: _ratio(
+        c['total_equity'], c['total_assets'], _present(c['total_equity']) & _present(c['total_assets']), 100),
+    'ebitda_margin': lambda c, cf: _ratio(
+        c['ebitda'], c['revenue'], _present(c['ebitda']) & _positive(c['revenue']), 100),
+    'roa': lambda c, cf: _ratio(
+        c['net_income'], c['total_assets'], _present(c['net_income']) & _positive(c['total_assets']), 100),
+    'roe': lambda c, cf: _ratio(
+        c['net_income'], c['total_equity'], _present(c['net_income']) & _positive(c['total_equity']), 100),
+    'free_cashflow_yield': lambda c, cf: _ratio(
+        c['free_cashflow'], c['total_assets'], cf & _present(c['free_cashflow']) & _positive(c['total_assets']), 100),
+    'operating_cashflow': lambda c, cf: (c['operating_cashflow'], cf & _present(c['operating_cashflow'])),
+    'free_cashflow': lambda c, cf: (c['free_cashflow'], cf & _present(c['free_cashflow'])),
+}
+
+
+def statement_columns(financial: Any, cashflow: Optional[Any]) -> Tuple[Columns, np.ndarray]:
+    """One-row columns from a financial statement and cash flow (or objects with their fields)"""
+    columns = {
+        name: np.array([np.nan if getattr(financial, name) is None else getattr(financial, name)], dtype=float)
+        for name in FINANCIAL_FIELDS
+    }
+    for name in CASHFLOW_FIELDS:
+        value = None if cashflow is None else getattr(cashflow, name)
+        columns[name] = np.array([np.nan if value is None else value], dtype=float)
+    return columns, np.array([cashflow is not None])
+
+
+class ScoringModel:
+    """
+    A scoring model compiled from its definition
+
+    Each factor of the definition scores one metric. Its bands are checked
+    in order and the first match gives the factor's points; a company with
+    no value for the factor's metric gets missing_points instead. A band
+    may test another metric (matching only where that one is known).
+
+    Factors whose bands all test the factor metric in one direction with
+    monotonic thresholds compile to a np.searchsorted lookup; any other
+    factor compiles to np.select. Either way a whole universe is scored
+    with a handful of array operations.
+    """
+
+    def __init__(self, name: str, version: int, definition: Dict[str, Any]):
+        self.name = name
+        self.version = version
+        self.definition = definition
+        weights = definition['weights']
+        self.weights = (float(weights['macro']), float(weights['sector']), float(weights['financial']))
+        thresholds = definition['thresholds']
+        self.thresholds = np.array([thresholds['low'], thresholds['medium'], thresholds['high']], dtype=float)
+        if abs(sum(self.weights) - 1) > 1e-6:
+            raise ValueError("Weights must add up to 1")
+        if not np.all(np.diff(self.thresholds) > 0):
+            raise ValueError("Thresholds must increase: low < medium < high")
+        self.max_points = float(definition.get('max_points', 100))
+        if self.max_points <= 0:
+            raise ValueError("max_points must be positive")
+        self._factors = [self._compile(factor) for factor in definition['factors']]
+
+    @property
+    def label(self) -> str:
+        """Version label stored with each score, e.g. default@1"""
+        return f"{self.name}@{self.version}"
+
+    def with_overrides(self, weights: Optional[Any] = None, thresholds: Optional[Any] = None) -> 'ScoringModel':
+        """Copy of the model with other weights and/or thresholds (objects with macro/sector/financial, low/medium/high)"""
+        model = copy.copy(self)
+        if weights is not None:
+            model.weights = (weights.macro, weights.sector, weights.financial)
+        if thresholds is not None:
+            model.thresholds = np.array([thresholds.low, thresholds.medium, thresholds.high], dtype=float)
+        return model
+
+    def health_scores(self, columns: Columns, has_cashflow: np.ndarray) -> np.ndarray:
+        """
+        Financial health score per company
+
+        Args:
+            columns: Statement and cash flow fields as float arrays (NaN = missing)
+            has_cashflow: Whether each company has a cash flow statement
+
+        Returns:
+            Scores, 0-100, higher = more risk
+        """
+        metrics: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        def metric(name: str):
+            if name not in metrics:
+                metrics[name] = METRICS[name](columns, has_cashflow)
+            return metrics[name]
+
+        points = np.zeros(len(has_cashflow))
+        with np.errstate(invalid='ignore'):
+            for evaluate in self._factors:
+                points += evaluate(metric)
+        return (points / self.max_points) * 100
+
+    def overall_scores(self, macro: np.ndarray, sector: np.ndarray, health: np.ndarray) -> np.ndarray:
+        """Weighted overall scores; a zero (unknown) component counts as 50"""
+        macro_weight, sector_weight, financial_weight = self.weights
+        return (
+            np.where(macro == 0, 50, macro) * macro_weight +
+            np.where(sector == 0, 50, sector) * sector_weight +
+            np.where(health == 0, 50, health) * financial_weight
+        )
+
+    def categories(self, overall: np.ndarray) -> np.ndarray:
+        """Index into CATEGORIES for each overall score"""
+        return np.searchsorted(self.thresholds, overall, side='right')
+
+    def _compile(self, factor: Dict[str, Any]) -> Callable:
+        name = factor['metric']
+        bands = factor['bands']
+        missing_points = float(factor.get('missing_points', 0))
+        for band in bands:
+            band_metric = band.get('metric') or name
+            if band_metric not in METRICS:
+                raise ValueError(f"Unknown metric '{band_metric}' in factor '{factor['name']}'")
+            if (band.get('below') is None) == (band.get('above') is None):
+                raise ValueError(f"Each band of factor '{factor['name']}' needs exactly one of below / above")
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric '{name}' in factor '{factor['name']}'")
+
+        lookup = self._compile_lookup(name, bands)
+        if lookup is not None:
+            thresholds, table, side = lookup
+
+            def evaluate(metric):
+                values, known = metric(name)
+                return np.where(known, table[np.searchsorted(thresholds, values, side=side)], missing_points)
+            return evaluate
+
+        tests = [
+            (band.get('metric') or name, band.get('below') is not None,
+             float(band['below'] if band.get('below') is not None else band['above']))
+            for band in bands
+        ]
+        points = [float(band['points']) for band in bands]
+
+        def evaluate(metric):
+            values, known = metric(name)
+            conditions = []
+            for band_metric, below, threshold in tests:
+                band_values, band_known = metric(band_metric)
+                conditions.append(band_known & (band_values < threshold if below else band_values > threshold))
+            return np.where(known, np.select(conditions, points, 0), missing_points)
+        return evaluate
+
+    @staticmethod
+    def _compile_lookup(name: str, bands: List[Dict[str, Any]]):
+        """(sorted thresholds, points table, searchsorted side) when the bands allow a lookup"""
+        if any((band.get('metric') or name) != name for band in bands):
+            return None
+        points = [float(band['points']) for band in bands]
+        if all(band.get('below') is not None for band in bands):
+            thresholds = np.array([band['below'] for band in bands], dtype=float)
+            if np.all(np.diff(thresholds) > 0):
+                # values < t[0] -> bands[0], ..., >= t[-1] -> no band
+                return thresholds, np.array(points + [0.0]), 'right'
+        if all(band.get('above') is not None for band in bands):
+            thresholds = np.array([band['above'] for band in bands], dtype=float)
+            if np.all(np.diff(thresholds) < 0):
+                # Count of thresholds below the value: 0 -> no band, n -> bands[0]
+                return thresholds[::-1].copy(), np.array([0.0] + points[::-1]), 'left'
+        return None
+
+
+class ScoringModelRegistry:
+    """
+    Stored scoring models and the one that scores new risk
+
+    The built-in default model is active until a stored model is
+    activated. The active model is re-read at most every
+    SCORING_MODEL_REFRESH_SECONDS, so an activation in one worker reaches
+    the others. It is read from the primary (one small query per interval),
+    so the worker that activated a model scores with it straight away even
+    when the replica lags. Compiled models are kept per name and version; versions
+    are never edited, only added.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        refresh_interval: int = settings.SCORING_MODEL_REFRESH_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.default = ScoringModel(DEFAULT_MODEL_NAME, DEFAULT_MODEL_VERSION, DEFAULT_DEFINITION)
+        self.active = self.default
+        self.checked_at = 0.0
+        self._compiled: Dict[Tuple[str, int], ScoringModel] = {}
+        self._lock = asyncio.Lock()
+
+    async def get_active(self) -> ScoringModel:
+        """The active model, re-read from the database when due"""
+        if time.monotonic() - self.checked_at > self.refresh_interval:
+            async with self._lock:
+                if time.monotonic() - self.checked_at > self.refresh_interval:
+                    await self._refresh()
+        return self.active
+
+    async def get(self, label: str) -> Optional[ScoringModel]:
+        """
+        Get a model by its name@version label
+
+        Args:
+            label: e.g. "default@1"
+
+        Returns:
+            Compiled model, or None if there is no such model
+        """
+        name, _, version = label.rpartition('@')
+        if not name or not version.isdigit():
+            return None
+        key = (name, int(version))
+        if key == (DEFAULT_MODEL_NAME, DEFAULT_MODEL_VERSION):
+            return self.default
+        if key not in self._compiled:
+            async with self.session_factory() as db:
+                row = (await db.execute(
+                    select(RiskScoringModel).where(
+                        RiskScoringModel.name == key[0], RiskScoringModel.version == key[1]
+                    )
+                )).scalar_one_or_none()
+            if row is None:
+                return None
+            self._compiled[key] = ScoringModel(row.name, row.version, row.definition)
+        return self._compiled[key]
+
+    def invalidate(self):
+        """Re-read the active model on next use"""
+        self.checked_at = 0.0
+
+    async def _refresh(self):
+        try:
+            async with self.session_factory() as db:
+                row = (await db.execute(
+                    select(RiskScoringModel.name, RiskScoringModel.version)
+                    .where(RiskScoringModel.is_active.is_(True))
+                    .order_by(RiskScoringModel.id.desc())
+                    .limit(1)
+                )).first()
+            self.active = self.default if row is None else await self.get(f"{row.name}@{row.version}")
+        except Exception as e:
+            logger.warning(f"Could not load the active scoring model, keeping {self.active.label}: {e}")
+        self.checked_at = time.monotonic()
+
+
+# Singleton instance
+scoring_model_registry = ScoringModelRegistry()
@@ -0,0 +1,267 @@
+"""
+Risk stress testing
+What-if scenarios (rate, GDP and revenue shocks, custom weights) scored
+over the whole company universe at once
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, func, select
+
+from app.config import settings
+from app.database import AsyncReadSessionLocal
+from app.models.company import CashFlow, Company, FinancialStatement
+from app.schemas.company import StressTestRequest
+from app.services.cache import SWRCache
+from app.services.company_risk import risk_scoring_service
+from app.services.scoring_models import CASHFLOW_FIELDS, CATEGORIES, FINANCIAL_FIELDS, ScoringModel, scoring_model_registry
+
+logger = logging.getLogger(__name__)
+
+GDP_MACRO_SENSITIVITY = 5.0  # Macro risk points per percentage point of GDP decline
+HISTOGRAM_BINS = np.linspace(0, 100, 11)
+
+
+@dataclass
+class RiskUniverse:
+    """
+    Latest statement inputs of every company, one numpy column per field
+
+    Missing values are NaN. Macro and sector risk are resolved per company
+    once, when the universe is built.
+    """
+    company_ids: np.ndarray
+    names: List[str]
+    country_codes: np.ndarray
+    nace_codes: np.ndarray  # '' when unknown
+    columns: Dict[str, np.ndarray]  # FINANCIAL_FIELDS and CASHFLOW_FIELDS
+    has_cashflow: np.ndarray
+    macro_risk: np.ndarray
+    sector_risk: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.company_ids)
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> 'RiskUniverse':
+        """Build from (id, name, country, nace, *FINANCIAL_FIELDS, cash flow id, *CASHFLOW_FIELDS) rows"""
+        width = len(FINANCIAL_FIELDS)
+        matrix = np.array(
+            [[np.nan if v is None else v for v in (*row[4:4 + width], *row[5 + width:])] for row in rows],
+            dtype=float,
+        ).reshape(len(rows), width + len(CASHFLOW_FIELDS))
+        countries = [row[2] for row in rows]
+        naces = [row[3] or '' for row in rows]
+        return cls(
+            company_ids=np.array([row[0] for row in rows], dtype=np.int64),
+            names=[row[1] for row in rows],
+            country_codes=np.array(countries, dtype=str),
+            nace_codes=np.array(naces, dtype=str),
+            columns={name: matrix[:, i] for i, name in enumerate((*FINANCIAL_FIELDS, *CASHFLOW_FIELDS))},
+            has_cashflow=np.array([row[4 + width] is not None for row in rows], dtype=bool),
+            macro_risk=np.array([risk_scoring_service._macro_risk(c) for c in countries], dtype=float),
+            sector_risk=np.array([risk_scoring_service._sector_risk(n or None) for n in naces], dtype=float),
+        )
+
+
+class StressTestService:
+    """
+    Runs stress scenarios against an in-memory risk universe
+
+    The universe (latest financial statement and cash flow of every
+    company) is loaded once into numpy columns and reloaded in the
+    background once older than STRESS_UNIVERSE_MAX_AGE. A scenario copies
+    the affected columns, applies its shocks and rescores every company
+    with array operations, so no query runs per scenario.
+    """
+
+    def __init__(self, session_factory=AsyncReadSessionLocal, max_age: int = settings.STRESS_UNIVERSE_MAX_AGE):
+        self.session_factory = session_factory
+        # Never expires: once stale it is served while one task reloads it
+        self.cache = SWRCache(ttl=max_age, stale_ttl=float("inf"), name="risk_universe", max_entries=1)
+
+    async def run(self, scenario: StressTestRequest, scenario_model: Optional[ScoringModel] = None) -> Dict[str, Any]:
+        """
+        Score the universe before and after a scenario
+
+        The baseline is the active scoring model as is. The scenario uses
+        scenario_model (the active model when omitted), with the request's
+        weights and thresholds if given.
+
+        Shocks act on each company's latest statements:
+        - rate_shock_bp: interest on long-term debt, deducted from net
+          income, operating and free cash flow (EBITDA is before interest)
+        - gdp_shock_pct: macro risk rises GDP_MACRO_SENSITIVITY points per
+          point of GDP decline (and falls on growth), capped to 0-100
+        - revenue_shocks: revenue changes for matching companies; the
+          flow_through share of the change reaches EBITDA, net income and
+          cash flow (the rest is absorbed by variable costs)
+
+        Args:
+            scenario: Stress test request
+            scenario_model: Scoring model version for the scenario side
+
+        Returns:
+            Dictionary matching StressTestResponse
+        """
+        started = time.perf_counter()
+        universe = await self._get_universe()
+        baseline_model = await scoring_model_registry.get_active()
+        scenario_model = (scenario_model or baseline_model).with_overrides(scenario.weights, scenario.thresholds)
+
+        baseline_score, baseline_category = self._score(
+            baseline_model, universe, universe.columns, universe.macro_risk
+        )
+        columns, macro_risk = self._apply_shocks(universe, scenario)
+        scenario_score, scenario_category = self._score(scenario_model, universe, columns, macro_risk)
+
+        matrix = np.zeros((len(CATEGORIES), len(CATEGORIES)), dtype=np.int64)
+        np.add.at(matrix, (baseline_category, scenario_category), 1)
+        moved = np.flatnonzero(baseline_category != scenario_category)
+        change = np.abs(scenario_score[moved] - baseline_score[moved])
+        top = moved[np.argsort(-change, kind='stable')[:scenario.migrations_limit]]
+
+        baseline = self._distribution(baseline_score, baseline_category)
+        stressed = self._distribution(scenario_score, scenario_category)
+        return {
+            'universe_size': len(universe),
+            'baseline_model': baseline_model.label,
+            'scenario_model': scenario_model.label,
+            'baseline': baseline,
+            'scenario': stressed,
+            'mean_shift': (
+                round(stressed['mean'] - baseline['mean'], 2) if len(universe) else None
+            ),
+            'migration_matrix': {
+                source: {target: int(matrix[i, j]) for j, target in enumerate(CATEGORIES)}
+                for i, source in enumerate(CATEGORIES)
+            },
+            'downgrades': int(np.triu(matrix, 1).sum()),
+            'upgrades': int(np.tril(matrix, -1).sum()),
+            'migrations': [
+                {
+                    'company_id': int(universe.company_ids[i]),
+                    'name': universe.names[i],
+                    'country_code': universe.country_codes[i] or None,
+                    'nace_code': universe.nace_codes[i] or None,
+                    'baseline_score': round(float(baseline_score[i]), 2),
+                    'scenario_score': round(float(scenario_score[i]), 2),
+                    'baseline_category': CATEGORIES[baseline_category[i]],
+                    'scenario_category': CATEGORIES[scenario_category[i]],
+                }
+                for i in top
+            ],
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    @property
+    def universe(self) -> Optional[RiskUniverse]:
+        """The current universe, None until first loaded"""
+        return self.cache.get("universe")
+
+    def invalidate(self):
+        """Drop the universe; the next scenario reloads it"""
+        self.cache.invalidate()
+
+    def _apply_shocks(self, universe: RiskUniverse, scenario: StressTestRequest):
+        columns = dict(universe.columns)
+        shocked = {}
+
+        def column(name: str) -> np.ndarray:
+            # Copy on first write; untouched columns stay shared with the universe
+            if name not in shocked:
+                shocked[name] = columns[name] = columns[name].copy()
+            return shocked[name]
+
+        for shock in scenario.revenue_shocks:
+            mask = np.ones(len(universe), dtype=bool)
+            if shock.nace_prefix:
+                mask &= np.char.startswith(universe.nace_codes, shock.nace_prefix.upper())
+            if shock.country_code:
+                mask &= universe.country_codes == shock.country_code.upper()
+            revenue = column('revenue')
+            delta = np.where(mask, np.nan_to_num(revenue) * shock.change_pct / 100, 0)
+            revenue += delta
+            for name in ('ebitda', 'net_income', 'operating_cashflow', 'free_cashflow'):
+                column(name)[:] += delta * shock.flow_through
+
+        if scenario.rate_shock_bp:
+            interest = np.nan_to_num(columns['long_term_debt']) * scenario.rate_shock_bp / 10000
+            for name in ('net_income', 'operating_cashflow', 'free_cashflow'):
+                column(name)[:] -= interest
+
+        macro_risk = universe.macro_risk
+        if scenario.gdp_shock_pct:
+            hit = np.ones(len(universe), dtype=bool)
+            if scenario.gdp_countries:
+                hit = np.isin(universe.country_codes, [c.upper() for c in scenario.gdp_countries])
+            macro_risk = np.where(
+                hit,
+                np.clip(macro_risk - scenario.gdp_shock_pct * GDP_MACRO_SENSITIVITY, 0, 100),
+                macro_risk,
+            )
+        return columns, macro_risk
+
+    def _score(self, model: ScoringModel, universe: RiskUniverse, columns, macro_risk):
+        health = model.health_scores(columns, universe.has_cashflow)
+        overall = model.overall_scores(macro_risk, universe.sector_risk, health)
+        return overall, model.categories(overall)
+
+    def _distribution(self, scores: np.ndarray, categories: np.ndarray) -> Dict[str, Any]:
+        counts = np.bincount(categories, minlength=len(CATEGORIES))
+        histogram, _ = np.histogram(np.clip(scores, 0, 100), bins=HISTOGRAM_BINS)
+        if not len(scores):
+            return {'categories': dict.fromkeys(CATEGORIES, 0), 'histogram': histogram.tolist()}
+        p10, median, p90 = np.percentile(scores, [10, 50, 90])
+        return {
+            'mean': round(float(scores.mean()), 2),
+            'median': round(float(median), 2),
+            'p10': round(float(p10), 2),
+            'p90': round(float(p90), 2),
+            'categories': {name: int(count) for name, count in zip(CATEGORIES, counts)},
+            'histogram': histogram.tolist(),
+        }
+
+    async def _get_universe(self) -> RiskUniverse:
+        return await self.cache.get_or_compute("universe", self._load)
+
+    async def _load(self) -> RiskUniverse:
+        started = time.perf_counter()
+        ranked = select(
+            FinancialStatement,
+            func.row_number().over(
+                partition_by=FinancialStatement.company_id,
+                order_by=(FinancialStatement.fiscal_year.desc(), FinancialStatement.id.desc()),
+            ).label("rn"),
+        ).subquery()
+        stmt = (
+            select(
+                Company.id,
+                Company.name,
+                Company.country_code,
+                Company.nace_code,
+                *(ranked.c[name] for name in FINANCIAL_FIELDS),
+                CashFlow.id,
+                *(getattr(CashFlow, name) for name in CASHFLOW_FIELDS),
+            )
+            .join(ranked, ranked.c.company_id == Company.id)
+            .outerjoin(CashFlow, and_(
+                CashFlow.company_id == Company.id,
+                CashFlow.fiscal_year == ranked.c.fiscal_year,
+            ))
+            .where(ranked.c.rn == 1)
+            .order_by(Company.id)
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(stmt)
+            rows = result.all()
+
+        logger.info(f"Risk universe loaded: {len(rows)} companies in {time.perf_counter() - started:.2f}s")
+        return RiskUniverse.from_rows(rows)
+
+
+# Singleton instance
+stress_test_service = StressTestService()
@@ -68,7 +68,7 @@ class WorldBankData360Service:
         indicator_ids: List[int],
         countries: List[str] = None,
         start_year: int = 2015,
-        end_year: int = 2023
+        end_year: Optional[int] = None
     ) -> pd.DataFrame:
         """
         Get data for specific indicators
@@ -77,7 +77,7 @@ class WorldBankData360Service:
             indicator_ids: List of indicator IDs from search results
             countries: List of country codes (NLD, BEL, LUX, DEU)
             start_year: Start year
-            end_year: End year
+            end_year: End year (latest available when None)
             
         Returns:
             DataFrame with time series data
@@ -198,7 +198,7 @@ class WorldBankData360Service:
             logger.info(f"Using GDP indicator: {indicators[0].get('indicatorName')}")
             
             # Fetch data
-            df = self.get_data([indicator_id], countries, start_year, 2023)
+            df = self.get_data([indicator_id], countries, start_year, datetime.utcnow().year)
             
             if df.empty:
                 return {}
@@ -258,7 +258,7 @@ class WorldBankData360Service:
             indicator_id = indicators[0].get('indicatorId')
             logger.info(f"Using inflation indicator: {indicators[0].get('indicatorName')}")
             
-            df = self.get_data([indicator_id], countries, start_year, 2023)
+            df = self.get_data([indicator_id], countries, start_year, datetime.utcnow().year)
             
             if df.empty:
                 return {}
@@ -313,7 +313,7 @@ class WorldBankData360Service:
             indicator_id = indicators[0].get('indicatorId')
             logger.info(f"Using unemployment indicator: {indicators[0].get('indicatorName')}")
             
-            df = self.get_data([indicator_id], countries, start_year, 2023)
+            df = self.get_data([indicator_id], countries, start_year, datetime.utcnow().year)
             
             if df.empty:
                 return {}
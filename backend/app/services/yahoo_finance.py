@@ -4,9 +4,10 @@ Fetches company financial data from Yahoo Finance
 """
 import asyncio
 from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import yfinance as yf
 from app.config import settings
+from app.metrics import upstream_call
 
 
 class YahooFinanceClient:
@@ -34,8 +35,9 @@ class YahooFinanceClient:
         
         try:
             # Run synchronous yfinance in thread pool
-            stock = await asyncio.to_thread(yf.Ticker, ticker)
-            info = await asyncio.to_thread(lambda: stock.info)
+            with upstream_call("yahoo", "get_company_info"):
+                stock = await asyncio.to_thread(yf.Ticker, ticker)
+                info = await asyncio.to_thread(lambda: stock.info)
             
             result = {
                 'ticker': ticker,
@@ -72,11 +74,13 @@ class YahooFinanceClient:
             return self.cache[cache_key]['data']
         
         try:
-            stock = await asyncio.to_thread(yf.Ticker, ticker)
+            with upstream_call("yahoo", "get_financial_statements") as call:
+                stock = await asyncio.to_thread(yf.Ticker, ticker)
             
-            # Get income statement and balance sheet
-            income_stmt = await asyncio.to_thread(lambda: stock.financials)
-            balance_sheet = await asyncio.to_thread(lambda: stock.balance_sheet)
+                # Get income statement and balance sheet
+                income_stmt = await asyncio.to_thread(lambda: stock.financials)
+                balance_sheet = await asyncio.to_thread(lambda: stock.balance_sheet)
+                call.result(income_stmt)
             
             if income_stmt.empty or balance_sheet.empty:
                 return None
@@ -142,8 +146,10 @@ class YahooFinanceClient:
             return self.cache[cache_key]['data']
         
         try:
-            stock = await asyncio.to_thread(yf.Ticker, ticker)
-            cashflow = await asyncio.to_thread(lambda: stock.cashflow)
+            with upstream_call("yahoo", "get_cashflow_statements") as call:
+                stock = await asyncio.to_thread(yf.Ticker, ticker)
+                cashflow = await asyncio.to_thread(lambda: stock.cashflow)
+                call.result(cashflow)
             
             if cashflow.empty:
                 return None
@@ -185,7 +191,61 @@ class YahooFinanceClient:
         except Exception as e:
             print(f"Error fetching cash flow for {ticker}: {e}")
             return None
-    
+
+    async def get_price_history(
+        self,
+        ticker: str,
+        start: Optional[date] = None,
+        period: str = "5y"
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get daily OHLCV price history (not cached, used by ingestion)
+
+        Args:
+            ticker: Ticker symbol (stock, index like '^AEX' or FX pair like 'EURUSD=X')
+            start: First date to fetch; when None the whole ``period`` is fetched
+            period: yfinance period used when no start date is given
+
+        Returns:
+            List of daily price dicts or None
+        """
+        try:
+            with upstream_call("yahoo", "get_price_history") as call:
+                stock = await asyncio.to_thread(yf.Ticker, ticker)
+                if start:
+                    history = await asyncio.to_thread(stock.history, start=start.isoformat(), auto_adjust=False)
+                else:
+                    history = await asyncio.to_thread(stock.history, period=period, auto_adjust=False)
+                call.result(history)
+
+            if history.empty:
+                return []
+
+            prices = []
+            for timestamp, row in history.iterrows():
+                if row.isna().get('Close', True):
+                    continue
+                prices.append({
+                    'date': timestamp.date(),
+                    'open_price': self._to_float(row.get('Open')),
+                    'high_price': self._to_float(row.get('High')),
+                    'low_price': self._to_float(row.get('Low')),
+                    'close_price': float(row['Close']),
+                    'adjusted_close': self._to_float(row.get('Adj Close')),
+                    'volume': self._to_float(row.get('Volume')),
+                })
+            return prices
+
+        except Exception as e:
+            print(f"Error fetching price history for {ticker}: {e}")
+            return None
+
+    def _to_float(self, value) -> Optional[float]:
+        """Convert a pandas scalar to float, mapping NaN to None"""
+        if value is None or value != value:
+            return None
+        return float(value)
+
     def _get_value(self, df, date, field_name: str) -> Optional[float]:
         """Extract value from DataFrame, handling missing data"""
         try:
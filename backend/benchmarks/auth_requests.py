@@ -0,0 +1,109 @@
+"""
+Authenticated request throughput with and without the user cache
+Fires dashboard-style bursts of concurrent calls at an endpoint guarded by
+get_current_active_user, in-process over ASGI
+
+Usage:
+    python benchmarks/auth_requests.py [--users 20] [--burst 8] [--seconds 5]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.auth.dependencies as dependencies
+from app.auth import create_access_token, get_current_active_user
+from app.database import Base
+from app.db_pool import PoolMetrics, engine_pool_options, install_sqlite_pragmas
+from app.models.user import User
+from app.services.cache import SWRCache
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(user: User = Depends(get_current_active_user)):
+        return {"id": user.id, "email": user.email}
+
+    return app
+
+
+async def run_mode(name, ttl, args, url):
+    engine = create_async_engine(url, **engine_pool_options(url, PoolMetrics()))
+    install_sqlite_pragmas(engine)
+    dependencies.AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    dependencies.user_cache = SWRCache(ttl=ttl, name="auth_users")
+
+    queries = 0
+
+    def count(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+
+    headers = [
+        {"Authorization": f"Bearer {create_access_token({'sub': f'user{i}@example.com'})}"}
+        for i in range(args.users)
+    ]
+    transport = httpx.ASGITransport(app=build_app())
+    requests = 0
+    deadline = time.perf_counter() + args.seconds
+
+    async def client_loop(user_headers):
+        nonlocal requests
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while time.perf_counter() < deadline:
+                responses = await asyncio.gather(*(client.get("/me", headers=user_headers) for _ in range(args.burst)))
+                assert all(r.status_code == 200 for r in responses)
+                requests += len(responses)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(h) for h in headers))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    print(f"\n{name}")
+    print(f"  requests/s         {requests / elapsed:8.0f}")
+    print(f"  user queries       {queries:8d}  ({queries / max(requests, 1):.3f} per request)")
+
+
+async def seed(url, users):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine)() as db:
+        db.add_all(User(email=f"user{i}@example.com", hashed_password="x") for i in range(users))
+        await db.commit()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20, help="Concurrent users")
+    parser.add_argument("--burst", type=int, default=8, help="Parallel calls per page load")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.users} users x bursts of {args.burst} calls for {args.seconds:g}s")
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{Path(tmp) / 'auth.db'}"
+        asyncio.run(seed(url, args.users))
+        asyncio.run(run_mode("uncached (one user query per request)", 0, args, url))
+        asyncio.run(run_mode("cached (AUTH_USER_CACHE_TTL=30)", 30, args, url))
+
+
+if __name__ == "__main__":
+    main()
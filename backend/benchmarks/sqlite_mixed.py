@@ -0,0 +1,150 @@
+"""
+Mixed read/write benchmark for the SQLite profile
+Compares the old setup (NullPool, default journal, concurrent writers) with
+WAL + tuned pragmas + pooled connections + the single-writer queue
+
+Usage:
+    python benchmarks/sqlite_mixed.py [--writers 4] [--readers 8] [--batches 25] [--batch-size 200]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.db_pool import PoolMetrics, engine_pool_options, install_sqlite_pragmas
+from app.db_writer import WriteQueue
+from app.models.macro_indicators import MacroIndicator
+from app.services.ingestion import upsert_rows
+
+COUNTRIES = ["NLD", "BEL", "LUX", "DEU"]
+
+
+def build_engine(url: str, tuned: bool):
+    if not tuned:
+        return create_async_engine(url, poolclass=NullPool)
+    engine = create_async_engine(url, **engine_pool_options(url, PoolMetrics()))
+    install_sqlite_pragmas(engine)
+    return engine
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def writer(index, factory, queue, args, stats):
+    """Upsert batches of monthly rows for one synthetic source"""
+    start = date(1990, 1, 31)
+    for batch in range(args.batches):
+        rows = [
+            {
+                "source": f"bench{index}",
+                "indicator_code": "INFLATION",
+                "indicator_name": "Inflation",
+                "country_code": COUNTRIES[i % len(COUNTRIES)],
+                "period_date": start + timedelta(days=31 * (batch * args.batch_size + i)),
+                "frequency": "M",
+                "value": float(i),
+                "last_refreshed": datetime.utcnow(),
+            }
+            for i in range(args.batch_size)
+        ]
+
+        async def write(db):
+            await upsert_rows(db, MacroIndicator, rows,
+                              ["source", "indicator_code", "country_code", "period_date"],
+                              ["value", "last_refreshed"])
+            await db.commit()
+
+        clock = time.perf_counter()
+        try:
+            async with factory() as db:
+                await queue.submit(write, db)
+            stats["write_latency"].append(time.perf_counter() - clock)
+        except Exception as e:
+            stats["write_errors"].append(str(e).splitlines()[0])
+
+
+async def reader(factory, done, stats):
+    """Run a latest-value-per-country aggregate until the writers finish"""
+    while not done.is_set():
+        clock = time.perf_counter()
+        try:
+            async with factory() as db:
+                await db.execute(
+                    select(MacroIndicator.country_code, func.max(MacroIndicator.period_date), func.count())
+                    .group_by(MacroIndicator.country_code)
+                )
+            stats["read_latency"].append(time.perf_counter() - clock)
+        except Exception as e:
+            stats["read_errors"].append(str(e).splitlines()[0])
+        await asyncio.sleep(0)
+
+
+async def run_mode(name, tuned, args, workdir):
+    url = f"sqlite+aiosqlite:///{workdir / f'{name}.db'}"
+    engine = build_engine(url, tuned)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    queue = WriteQueue(enabled=tuned)
+
+    stats = {"write_latency": [], "write_errors": [], "read_latency": [], "read_errors": []}
+    done = asyncio.Event()
+    started = time.perf_counter()
+    readers = [asyncio.create_task(reader(factory, done, stats)) for _ in range(args.readers)]
+    await asyncio.gather(*(writer(i, factory, queue, args, stats) for i in range(args.writers)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*readers)
+    await queue.stop()
+    await engine.dispose()
+
+    rows = len(stats["write_latency"]) * args.batch_size
+    print(f"\n{name}")
+    print(f"  elapsed            {elapsed:8.2f} s")
+    print(f"  rows written/s     {rows / elapsed:8.0f}")
+    print(f"  write p50 / p95    {percentile(stats['write_latency'], 50) * 1000:8.1f} / "
+          f"{percentile(stats['write_latency'], 95) * 1000:.1f} ms")
+    print(f"  write errors       {len(stats['write_errors']):8d}"
+          + (f"  ({stats['write_errors'][0]})" if stats["write_errors"] else ""))
+    print(f"  reads/s            {len(stats['read_latency']) / elapsed:8.0f}")
+    print(f"  read p50 / p95     {percentile(stats['read_latency'], 50) * 1000:8.1f} / "
+          f"{percentile(stats['read_latency'], 95) * 1000:.1f} ms")
+    print(f"  read errors        {len(stats['read_errors']):8d}")
+    return {"elapsed": elapsed, "reads": len(stats["read_latency"]),
+            "read_p50": statistics.median(stats["read_latency"]) if stats["read_latency"] else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batches", type=int, default=25, help="Write transactions per writer")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per write transaction")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.batches} batches x {args.batch_size} rows, {args.readers} readers")
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        asyncio.run(run_mode("baseline (NullPool, rollback journal, concurrent writers)", False, args, workdir))
+        asyncio.run(run_mode("tuned (WAL, pragmas, pooled, single writer)", True, args, workdir))
+
+
+if __name__ == "__main__":
+    main()
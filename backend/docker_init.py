@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Docker initialization script
-Creates database tables and initial admin account
+Applies database migrations and creates the initial admin account
 """
 import asyncio
 import os
@@ -13,23 +13,18 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 import bcrypt
 from sqlalchemy import select
-from app.database import engine, AsyncSessionLocal, Base
+from app.database import AsyncSessionLocal, init_db
+from app.migrations import head_revision
 from app.models.user import User
 
 
 async def init_database():
-    """Initialize database tables"""
-    print("🔧 Checking database tables...")
-    try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("✅ Database tables ready")
-    except Exception as e:
-        # If tables already exist, that's fine
-        if "already exists" in str(e):
-            print("✅ Database tables already exist")
-        else:
-            raise
+    """Apply pending database migrations"""
+    print("🔧 Checking database migrations...")
+    if await init_db():
+        print(f"✅ Database migrated to revision {head_revision()}")
+    else:
+        print("✅ Database schema already up to date")
 
 
 async def create_admin_account():
@@ -12,6 +12,13 @@ else
     echo "⚠️  Database initialization exited with code $?, continuing anyway..."
 fi
 
+# Metrics of every worker are shared through this directory (see app/metrics.py);
+# files left by a previous run would be counted again, so start from an empty one
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Start uvicorn with Railway's PORT or default to 8000
 PORT=${PORT:-8000}
 echo ""
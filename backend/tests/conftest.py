@@ -0,0 +1,87 @@
+"""
+Shared fixtures: a temporary SQLite database and an API app running on it
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.auth.dependencies import get_current_user
+from app.database import Base, get_db, get_read_db
+from app.metrics import instrument_engine
+from app.models.user import User
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """SQLite database with every table, instrumented so query_budget sees its statements"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    instrument_engine(engine)
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return async_sessionmaker(db_engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def api_user():
+    """The signed-in user of api_app"""
+    return User(id=1, email="alice@example.com")
+
+
+@pytest.fixture
+def api_app(session_factory, api_user):
+    """
+    FastAPI app whose database dependencies use the test database
+
+    Tests include the routers they exercise.
+    """
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+            await db.commit()
+
+    async def override_read_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_read_db
+    app.dependency_overrides[get_current_user] = lambda: api_user
+    return app
+
+
+@pytest.fixture
+def api_client(api_app):
+    """
+    Opens an httpx client on api_app
+
+    Requests run in the caller's event loop and context (unlike TestClient),
+    so their queries count toward an enclosing query_budget.
+
+    Usage:
+        async with api_client() as client:
+            response = await client.get("/companies/1/peers")
+    """
+    def open_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=api_app), base_url="http://test")
+
+    return open_client
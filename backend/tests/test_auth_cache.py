@@ -0,0 +1,78 @@
+"""
+Test the user cache behind get_current_user
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.auth.dependencies as dependencies
+from app.auth import create_access_token, get_current_active_user
+from app.database import Base
+from app.models.user import User
+from app.services.cache import SWRCache
+
+
+def test_user_lookup_is_shared_and_invalidated_on_deactivation(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(dependencies, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(dependencies, "user_cache", SWRCache(ttl=60, name="auth_users"))
+
+    queries = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: queries.append(statement) if "FROM users" in statement else None,
+    )
+
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(user: User = Depends(get_current_active_user)):
+        return {"id": user.id}
+
+    alice = {"Authorization": f"Bearer {create_access_token({'sub': 'alice@example.com'})}"}
+    ghost = {"Authorization": f"Bearer {create_access_token({'sub': 'ghost@example.com'})}"}
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add(User(email="alice@example.com", hashed_password="x"))
+            await db.commit()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # A dashboard load: concurrent calls share one lookup
+            responses = await asyncio.gather(*(client.get("/me", headers=alice) for _ in range(8)))
+            assert [r.status_code for r in responses] == [200] * 8
+            assert len(queries) == 1
+
+            await client.get("/me", headers=alice)
+            assert len(queries) == 1
+
+            # Unknown subjects are rejected and not remembered
+            assert (await client.get("/me", headers=ghost)).status_code == 401
+            assert (await client.get("/me", headers=ghost)).status_code == 401
+            assert len(queries) == 3
+
+            # Deactivating through the ORM drops the cached user
+            async with session_factory() as db:
+                user = (await db.execute(select(User).where(User.email == "alice@example.com"))).scalar_one()
+                user.is_active = False
+                await db.commit()
+            lookups = len(queries)
+            assert (await client.get("/me", headers=alice)).status_code == 403
+            assert len(queries) == lookups + 1
+
+        await engine.dispose()
+
+    asyncio.run(run())
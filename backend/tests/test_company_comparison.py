@@ -0,0 +1,101 @@
+"""
+Test the batched company comparison and its vectorized ratios
+"""
+
+import asyncio
+import os
+import random
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+import app.api.v1.companies as companies_api
+from app.models.company import CashFlow, Company, CompanyRiskScore, FinancialStatement
+from app.query_budget import query_budget
+from app.services.company_comparison import compute_ratios, latest_common_year
+from app.services.company_risk import risk_scoring_service
+
+
+def test_vectorized_ratios_match_risk_service():
+    rng = random.Random(7)
+    fields = [
+        'long_term_debt', 'ebitda', 'revenue', 'net_income', 'total_assets',
+        'total_equity', 'current_assets', 'current_liabilities', 'inventory',
+    ]
+
+    def value():
+        return rng.choice([None, 0.0, -50.0, round(rng.uniform(1, 1000), 3)])
+
+    financials = [FinancialStatement(**{name: value() for name in fields}) for _ in range(200)]
+    cashflows = [rng.choice([None, CashFlow(free_cashflow=value())]) for _ in range(200)]
+    financials[0] = None
+
+    vectorized = compute_ratios(financials, cashflows)
+    for financial, cashflow, ratios in zip(financials, cashflows, vectorized):
+        if financial is None:
+            assert set(ratios.values()) == {None}
+            continue
+        assert ratios == risk_scoring_service._calculate_financial_ratios(financial, cashflow)
+
+
+def test_latest_common_year():
+    assert latest_common_year({1: [2021, 2022, 2023], 2: [2021, 2022]}) == 2022
+    # No year covers everyone: the most widely reported, latest first
+    assert latest_common_year({1: [2023], 2: [2022], 3: [2022, 2023], 4: []}) == 2023
+    assert latest_common_year({1: [], 2: []}) is None
+
+
+def test_comparing_fifty_companies_takes_three_queries(api_app, api_client, session_factory):
+    api_app.include_router(companies_api.router)
+
+    async def run():
+        async with session_factory() as db:
+            for i in range(50):
+                company = Company(name=f"Peer {i:02d}", country_code="DE")
+                db.add(company)
+                await db.flush()
+                # Everyone reported 2022; only some reported 2023
+                for year in (2022, 2023) if i % 2 else (2022,):
+                    db.add(FinancialStatement(
+                        company_id=company.id, fiscal_year=year,
+                        revenue=1000.0, ebitda=100.0 + i, total_assets=2000.0,
+                    ))
+                    db.add(CashFlow(company_id=company.id, fiscal_year=year, free_cashflow=50.0))
+                    db.add(CompanyRiskScore(
+                        company_id=company.id, fiscal_year=year,
+                        calculation_date=date(year + 1, 1, 1), overall_risk_score=float(i),
+                    ))
+            await db.commit()
+
+        async with api_client() as client:
+            ids = list(range(50, 0, -1))
+            with query_budget(3):
+                latest_common = await client.post("/companies/compare", json={"company_ids": ids})
+            requested = await client.post("/companies/compare", json={"company_ids": [2, 4, 6, 999], "fiscal_year": 2023})
+            too_many = await client.post("/companies/compare", json={"company_ids": list(range(1, 53))})
+        return latest_common, requested, too_many
+
+    latest_common, requested, too_many = asyncio.run(run())
+
+    assert latest_common.status_code == 200
+    body = latest_common.json()
+    assert body["fiscal_year"] == 2022
+    assert body["missing_company_ids"] == []
+    assert [c["id"] for c in body["companies"]] == list(range(50, 0, -1))
+    first = body["companies"][-1]  # id 1, "Peer 00"
+    assert first["latest_financial"]["fiscal_year"] == 2022
+    assert first["latest_cashflow"]["free_cashflow"] == 50.0
+    assert first["latest_risk_score"]["overall_risk_score"] == 0.0
+    assert first["ratios"]["ebitda_margin"] == 10.0
+    assert first["ratios"]["free_cashflow_yield"] == 2.5
+
+    # Peers 1, 3, 5 (ids 2, 4, 6) reported 2023
+    assert requested.status_code == 200
+    assert requested.json()["fiscal_year"] == 2023
+    assert requested.json()["missing_company_ids"] == [999]
+    assert all(c["latest_financial"]["fiscal_year"] == 2023 for c in requested.json()["companies"])
+
+    assert too_many.status_code == 422
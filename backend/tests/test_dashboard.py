@@ -0,0 +1,142 @@
+"""
+Test dashboard aggregation and the stale-while-revalidate cache
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models.company import Company, CompanyRiskScore
+from app.models.indicator import IndicatorValue
+from app.models.macro_indicators import MacroIndicator
+from app.services.cache import SWRCache
+from app.services.dashboard import DashboardService, country_flag
+
+
+def test_cache_single_flight_on_cold_start():
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        cache = SWRCache(ttl=60)
+        return await asyncio.gather(*[cache.get_or_compute("k", compute) for _ in range(20)]), cache
+
+    results, cache = asyncio.run(run())
+
+    assert calls == 1
+    assert results == [1] * 20
+    assert cache.misses == 20
+
+
+def test_cache_serves_stale_while_refreshing():
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def run():
+        cache = SWRCache(ttl=0, stale_ttl=60)
+        first = await cache.get_or_compute("k", compute)
+        stale = await cache.get_or_compute("k", compute)
+        await asyncio.sleep(0)  # let the background refresh finish
+        refreshed = cache.get("k")
+        return first, stale, refreshed, cache
+
+    first, stale, refreshed, cache = asyncio.run(run())
+
+    assert (first, stale, refreshed) == (1, 1, 2)
+    assert cache.stale_hits == 1
+
+
+def test_cache_invalidate():
+    async def run():
+        cache = SWRCache(ttl=60)
+        await cache.get_or_compute("k", lambda: asyncio.sleep(0, result="a"))
+        cache.invalidate()
+        return await cache.get_or_compute("k", lambda: asyncio.sleep(0, result="b"))
+
+    assert asyncio.run(run()) == "b"
+
+
+def test_cache_drops_oldest_entry_when_full():
+    cache = SWRCache(ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 3)  # replacing a key does not evict
+    cache.set("c", 4)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, 2, 4)
+    assert cache.stats()["entries"] == 2
+
+
+def test_build_summary(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dashboard.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        refreshed = datetime.utcnow() - timedelta(days=3)
+        async with session_factory() as db:
+            db.add_all([
+                MacroIndicator(source="imf", indicator_code="NGDP_RPCH", indicator_name="GDP growth",
+                               country_code="NLD", period_date=date(2022, 12, 31), frequency="A",
+                               value=4.3, last_refreshed=refreshed),
+                MacroIndicator(source="imf", indicator_code="NGDP_RPCH", indicator_name="GDP growth",
+                               country_code="NLD", period_date=date(2023, 12, 31), frequency="A",
+                               value=0.1, last_refreshed=refreshed),
+                # Forecasts beyond today are ignored
+                MacroIndicator(source="imf", indicator_code="NGDP_RPCH", indicator_name="GDP growth",
+                               country_code="NLD", period_date=date.today() + timedelta(days=400),
+                               frequency="A", value=9.9, last_refreshed=refreshed),
+                IndicatorValue(country_code="NL", indicator_code="INFLATION", date=date(2024, 6, 1),
+                               value=2.749, source="eurostat", fetched_at=refreshed),
+                IndicatorValue(country_code="BE", indicator_code="UNEMPLOYMENT", date=date(2024, 6, 1),
+                               value=5.5, source="eurostat", fetched_at=refreshed),
+            ])
+            company = Company(name="Acme", country_code="NL")
+            db.add(company)
+            await db.flush()
+            db.add_all([
+                CompanyRiskScore(company_id=company.id, calculation_date=date(2023, 1, 1),
+                                 fiscal_year=2022, overall_risk_score=80.0),
+                CompanyRiskScore(company_id=company.id, calculation_date=date(2024, 1, 1),
+                                 fiscal_year=2023, overall_risk_score=40.0),
+            ])
+            await db.flush()
+
+            summary = await DashboardService().build_summary(db)
+        await engine.dispose()
+        return summary
+
+    summary = asyncio.run(run())
+    countries = {row["country"]["code"]: row for row in summary["countries"]}
+
+    assert countries["NL"]["gdp_growth"] == 0.1
+    assert countries["NL"]["inflation"] == 2.75
+    assert countries["NL"]["risk_score"] == 40.0
+    assert countries["NL"]["data_freshness"] == 3
+    assert countries["BE"]["unemployment"] == 5.5
+    assert countries["LU"]["gdp_growth"] is None
+    assert summary["total_indicators"] == 3
+    assert summary["data_freshness"] == 3
+    assert summary["charts"]["gdp_growth"] == [{"country": "NL", "value": 0.1}]
+    assert summary["charts"]["risk_scores"] == [{"country": "NL", "value": 40.0}]
+
+
+def test_country_flag():
+    assert country_flag("nl") == "🇳🇱"
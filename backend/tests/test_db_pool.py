@@ -0,0 +1,171 @@
+"""
+Test pool selection and pool metrics against SQLite engines
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import exc as sa_exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.main as main
+from app.auth.dependencies import require_admin
+from app.db_pool import PoolMetrics, engine_pool_options, install_sqlite_pragmas, is_memory_sqlite
+from app.db_writer import WriteQueue
+from app.models.user import User
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("sqlite+aiosqlite://", True),
+    ("sqlite+aiosqlite:///:memory:", True),
+    ("sqlite+aiosqlite:///./atlasiq.db", False),
+    ("postgresql+asyncpg://u:p@localhost/atlasiq", False),
+])
+def test_is_memory_sqlite(url, expected):
+    assert is_memory_sqlite(url) is expected
+
+
+def test_postgres_options_are_tunable(monkeypatch):
+    monkeypatch.setattr("app.db_pool.settings.DB_POOL_RECYCLE", 600)
+    options = engine_pool_options("postgresql+asyncpg://u:p@localhost/atlasiq")
+
+    assert options["poolclass"].base_name == "AsyncAdaptedQueuePool"
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is True
+
+
+def test_memory_sqlite_shares_one_connection():
+    metrics = PoolMetrics()
+    engine = create_async_engine("sqlite+aiosqlite://", **engine_pool_options("sqlite+aiosqlite://", metrics))
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+        async with engine.connect() as conn:
+            count = await conn.scalar(text("SELECT COUNT(*) FROM t"))
+        await engine.dispose()
+        return count
+
+    assert asyncio.run(run()) == 1
+    assert metrics.snapshot(engine.sync_engine.pool)["pool_class"] == "StaticPool"
+
+
+def test_pool_reports_saturation_and_timeouts(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.db_pool.settings.DB_SQLITE_POOL_SIZE", 2)
+    monkeypatch.setattr("app.db_pool.settings.DB_MAX_OVERFLOW", 0)
+    url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+    metrics = PoolMetrics()
+    options = engine_pool_options(url, metrics)
+    options["pool_timeout"] = 0.1
+    engine = create_async_engine(url, **options)
+
+    async def run():
+        first = await engine.connect()
+        second = await engine.connect()
+        busy = metrics.snapshot(engine.sync_engine.pool)
+        with pytest.raises(sa_exc.TimeoutError):
+            await engine.connect()
+        await first.close()
+        await second.close()
+        idle = metrics.snapshot(engine.sync_engine.pool)
+        await engine.dispose()
+        return busy, idle
+
+    busy, idle = asyncio.run(run())
+
+    assert (busy["in_use"], busy["saturation"]) == (2, 1.0)
+    assert idle["in_use"] == 0
+    assert idle["idle"] == 2
+    assert idle["peak_saturation"] == 1.0
+    assert idle["checkouts"] == 2
+    assert idle["timeouts"] == 1
+    assert idle["wait_seconds_max"] >= 0.1
+    assert sum(idle["wait_seconds_histogram"].values()) == 3
+
+
+def test_reset_keeps_connections_in_use():
+    metrics = PoolMetrics()
+    for wait in (0.002, 0.2, 0.0):
+        metrics.record_checkout(wait)
+    metrics.record_checkin()
+
+    metrics.reset()
+    in_use, peak = metrics.in_use, metrics.peak_in_use
+    metrics.record_checkin()
+    metrics.record_checkin()
+
+    assert (in_use, peak) == (2, 2)
+    assert (metrics.checkouts, metrics.wait_max, sum(metrics.wait_buckets)) == (0, 0.0, 0)
+    assert metrics.in_use == 0
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'wal.db'}"
+    engine = create_async_engine(url, **engine_pool_options(url))
+    install_sqlite_pragmas(engine)
+
+    async def run():
+        async with engine.connect() as conn:
+            values = [
+                (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "temp_store")
+            ]
+        await engine.dispose()
+        return values
+
+    # synchronous NORMAL = 1, temp_store MEMORY = 2
+    assert asyncio.run(run()) == ["wal", 1, 5000, 2]
+
+
+def test_write_queue_runs_writes_one_at_a_time():
+    queue = WriteQueue(enabled=True)
+    running, order = [], []
+
+    async def write(name):
+        running.append(name)
+        assert len(running) == 1
+        await asyncio.sleep(0.01)
+        order.append(name)
+        running.remove(name)
+        return name
+
+    async def failing():
+        raise ValueError("constraint failed")
+
+    async def nested():
+        return await queue.submit(write, "inner")
+
+    async def run():
+        results = await asyncio.gather(*(queue.submit(write, i) for i in range(5)))
+        with pytest.raises(ValueError):
+            await queue.submit(failing)
+        inner = await queue.submit(nested)
+        await queue.stop()
+        return results, inner
+
+    results, inner = asyncio.run(run())
+
+    assert results == [0, 1, 2, 3, 4]
+    assert order == [0, 1, 2, 3, 4, "inner"]
+    assert inner == "inner"
+    assert queue.completed == 7
+
+
+def test_only_admins_reset_pool_counters(monkeypatch):
+    monkeypatch.setattr(main.pool_metrics, "checkouts", 5)
+    client = TestClient(main.app)
+
+    assert client.get("/health/pool", params={"reset": True}).json()["checkouts"] == 5
+    assert client.post("/health/pool/reset").status_code in (401, 403)
+    assert main.pool_metrics.checkouts == 5
+
+    monkeypatch.setitem(main.app.dependency_overrides, require_admin, lambda: User(id=7, is_admin=True))
+    assert client.post("/health/pool/reset").json()["checkouts"] == 5
+    assert main.pool_metrics.checkouts == 0
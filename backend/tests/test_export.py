@@ -0,0 +1,170 @@
+"""
+Test streaming CSV/XLSX exports against a throwaway SQLite database
+"""
+
+import asyncio
+import csv
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.services.export_jobs as export_jobs
+from app.api.files import parse_range_header
+from app.database import Base
+from app.models.export import Export
+from app.models.indicator import IndicatorValue
+from app.models.user import User
+from app.schemas.export import ExportRequest
+from app.services.export import DataExportService
+
+
+async def _export(tmp_path, export_type, request, rows=250, chunk_size=100):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as db:
+        user = User(email="export@test.com", hashed_password="x")
+        db.add(user)
+        db.add_all([
+            IndicatorValue(
+                country_code=["NL", "BE"][i % 2],
+                indicator_code="GDP_GROWTH",
+                date=date(2000, 1, 1) + timedelta(days=i),
+                value=float(i),
+                source="test",
+            )
+            for i in range(rows)
+        ])
+        await db.flush()
+
+        service = DataExportService()
+        service.export_dir = str(tmp_path / "exports")
+        service.chunk_size = chunk_size
+
+        export = await service.create_export(db, user.id, export_type, request)
+        export = await service.run_export(db, export)
+        await db.commit()
+
+    await engine.dispose()
+    return export
+
+
+def test_csv_export_streams_all_rows(tmp_path):
+    export = asyncio.run(_export(tmp_path, "csv", ExportRequest()))
+
+    assert export.status == "completed"
+    assert export.row_count == 250
+    assert export.file_size_bytes == os.path.getsize(export.file_path)
+    assert export.expires_at is not None
+
+    with open(export.file_path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][0] == "country_code"
+    assert len(rows) == 251
+
+
+def test_csv_export_applies_filters(tmp_path):
+    export = asyncio.run(_export(tmp_path, "csv", ExportRequest(country_codes=["nl"])))
+
+    assert export.status == "completed"
+    assert export.row_count == 125
+
+
+def test_excel_export(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    export = asyncio.run(_export(tmp_path, "excel", ExportRequest()))
+
+    assert export.status == "completed"
+    assert export.filename.endswith(".xlsx")
+    sheet = openpyxl.load_workbook(export.file_path, read_only=True)["data"]
+    assert sum(1 for _ in sheet.iter_rows(values_only=True)) == 251
+
+
+def test_run_export_reports_progress(tmp_path):
+    calls = []
+
+    async def report(rows, expected):
+        calls.append((rows, expected))
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'progress.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            db.add_all([
+                IndicatorValue(country_code="NL", indicator_code="CPI", date=date(2000, 1, 1) + timedelta(days=i),
+                               value=1.0, source="test")
+                for i in range(30)
+            ])
+            await db.flush()
+            service = DataExportService()
+            service.export_dir = str(tmp_path / "exports")
+            service.chunk_size = 10
+            export = await service.create_export(db, 1, "csv", ExportRequest())
+            export = await service.run_export(db, export, progress_callback=report)
+        await engine.dispose()
+        return export
+
+    export = asyncio.run(run())
+
+    assert export.progress == 100.0
+    assert calls == [(10, 30), (20, 30), (30, 30)]
+
+
+def test_abandoned_processing_exports_are_requeued(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'claims.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(export_jobs, "AsyncSessionLocal", session_factory)
+    runner = export_jobs.ExportJobRunner(stale_claim=600)
+    now = datetime.utcnow()
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add(User(id=1, email="export@test.com", hashed_password="x"))
+            for status, claimed_at in [
+                ("processing", now - timedelta(hours=2)),  # Worker died mid-run
+                ("processing", now - timedelta(seconds=30)),  # Still running elsewhere
+                ("processing", None),  # Claimed before claims were recorded
+                ("completed", now - timedelta(hours=2)),
+            ]:
+                db.add(Export(user_id=1, export_type="csv", filename="x.csv", file_path="/tmp/x.csv",
+                              file_size_bytes=0, status=status, progress=40.0, claimed_at=claimed_at))
+            await db.commit()
+
+        released = await runner.release_stale_claims()
+        async with session_factory() as db:
+            rows = (await db.execute(select(Export).order_by(Export.id))).scalars().all()
+        await engine.dispose()
+        return released, rows
+
+    released, rows = asyncio.run(run())
+
+    assert released == [1, 3]
+    assert [r.status for r in rows] == ["pending", "processing", "pending", "completed"]
+    assert rows[0].progress is None and rows[0].claimed_at is None
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-10", (990, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=0-1,5-9", (0, 999)),
+    ("bytes=1000-", None),
+    ("bytes=50-10", None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
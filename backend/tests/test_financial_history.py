@@ -0,0 +1,95 @@
+"""
+Test multi-year financials: derived growth / margin series and their memoization
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import select
+
+import app.api.v1.companies as companies_api
+from app.models.company import CashFlow, Company, FinancialStatement
+from app.query_budget import query_budget
+from app.services.financial_history import FinancialHistoryService, compute_derived_series
+
+
+def test_derived_series():
+    years = [2018, 2019, 2020, 2022, 2023, 2024]
+    revenue = [100.0, 110.0, 121.0, 150.0, 0.0, 200.0]
+    ebitda = [10.0, 22.0, None, 30.0, 5.0, 40.0]
+    free_cashflow = [5.0, 11.0, 12.1, None, None, 20.0]
+    financials = [FinancialStatement(fiscal_year=y, revenue=r, ebitda=e) for y, r, e in zip(years, revenue, ebitda)]
+    cashflows = [CashFlow(fiscal_year=y, free_cashflow=f) for y, f in zip(years, free_cashflow)]
+    cashflows[4] = None
+
+    derived = compute_derived_series(years, financials, cashflows)
+
+    assert derived["fiscal_years"] == years
+    # 2022 follows a gap; 2024 follows a zero
+    assert derived["yoy_growth"]["revenue"] == [None, 10.0, 10.0, None, -100.0, None]
+    assert derived["yoy_growth"]["ebitda"] == [None, 120.0, None, None, -83.33, 700.0]
+    assert derived["yoy_growth"]["net_income"] == [None] * 6
+    assert derived["cagr"]["revenue"] == pytest.approx(100 * (2 ** (1 / 6) - 1), abs=0.01)
+    assert derived["cagr"]["free_cashflow"] == pytest.approx(100 * (4 ** (1 / 6) - 1), abs=0.01)
+    assert derived["cagr"]["net_income"] is None
+    assert derived["margins"]["ebitda_margin"] == [10.0, 20.0, None, 20.0, None, 20.0]
+    # Windows must be three consecutive years with no missing value
+    assert derived["rolling_margins"]["ebitda_margin"] == [None] * 5 + [round(75 / 350 * 100, 2)]
+    assert derived["rolling_margins"]["fcf_margin"] == [None, None, round(28.1 / 331 * 100, 2), None, None, None]
+    assert derived["rolling_window"] == 3
+
+
+def test_short_history_has_no_rolling_margins():
+    derived = compute_derived_series([2023], [FinancialStatement(fiscal_year=2023, revenue=10.0)], [None])
+    assert derived["rolling_margins"]["gross_margin"] == [None]
+    assert derived["cagr"]["revenue"] is None
+
+
+def test_financials_endpoint_memoizes_per_data_version(api_app, api_client, session_factory, monkeypatch):
+    monkeypatch.setattr(companies_api, "financial_history_service", FinancialHistoryService())
+    api_app.include_router(companies_api.router)
+
+    async def run():
+        async with session_factory() as db:
+            db.add(Company(id=1, name="Grower BV", country_code="NL"))
+            for i, year in enumerate(range(2019, 2024)):
+                db.add(FinancialStatement(company_id=1, fiscal_year=year, revenue=100.0 * 2 ** i, ebitda=10.0 * 2 ** i))
+                if year != 2021:
+                    db.add(CashFlow(company_id=1, fiscal_year=year, free_cashflow=5.0))
+            await db.commit()
+
+        async with api_client() as client:
+            url = "/companies/1/financials"
+            with query_budget(3):
+                first = await client.get(url, params={"years": 3, "include_derived": True})
+            with query_budget(2):  # company + data version only
+                cached = await client.get(url, params={"years": 3, "include_derived": True})
+            plain = await client.get(url, params={"years": 3})
+
+            async with session_factory() as db:
+                statement = (await db.execute(
+                    select(FinancialStatement).where(FinancialStatement.fiscal_year == 2023)
+                )).scalar_one()
+                statement.revenue = 3200.0
+                await db.commit()
+            with query_budget(3):
+                updated = await client.get(url, params={"years": 3, "include_derived": True})
+        return first, cached, plain, updated
+
+    first, cached, plain, updated = asyncio.run(run())
+
+    body = first.json()
+    assert [s["fiscal_year"] for s in body["financial_statements"]] == [2023, 2022, 2021]
+    assert [c["fiscal_year"] for c in body["cashflows"]] == [2023, 2022]
+    assert body["derived"]["fiscal_years"] == [2021, 2022, 2023]
+    assert body["derived"]["yoy_growth"]["revenue"] == [None, 100.0, 100.0]
+    assert body["derived"]["cagr"]["revenue"] == 100.0
+    assert body["derived"]["margins"]["ebitda_margin"] == [10.0, 10.0, 10.0]
+    assert cached.json() == body
+    assert plain.json()["derived"] is None
+    assert updated.json()["derived"]["yoy_growth"]["revenue"] == [None, 100.0, 300.0]
@@ -0,0 +1,258 @@
+"""
+Test the FX rate table: as-of lookups, statement normalization and ECB ingestion
+"""
+
+import asyncio
+import os
+import random
+import sys
+from bisect import bisect_right
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+import app.api.v1.companies as companies_api
+import app.services.ingestion as ingestion
+import app.services.normalization as normalization
+from app.models.company import CashFlow, FinancialStatement
+from app.models.macro_indicators import FxRate
+from app.services.fx_rates import FxRateService, FxRateTable
+from app.services.ingestion import IngestionService
+from app.services.normalization import DataNormalizationService
+
+
+class FakeECB:
+    """Returns business-day rate series in the shape ECBDataService produces"""
+
+    def __init__(self, rates, last_day=date(2023, 1, 31)):
+        self.rates = rates
+        self.last_day = last_day
+        self.calls = []
+
+    def get_reference_rates(self, currencies, start):
+        self.calls.append((tuple(currencies), start))
+        days = pd.bdate_range(start, self.last_day)
+        return {c: pd.Series([self.rates[c]] * len(days), index=days, name=c) for c in currencies}
+
+
+@pytest.fixture
+def ingest_into_test_database(session_factory, monkeypatch):
+    monkeypatch.setattr(ingestion, "AsyncSessionLocal", session_factory)
+
+
+def test_as_of_lookups():
+    table = FxRateTable.from_rows([
+        ("GBP", date(2023, 6, 30), 0.8),
+        ("USD", date(2023, 6, 30), 1.25),
+        ("USD", date(2023, 7, 3), 1.0),
+    ], max_lag_days=10)
+
+    rates = table.rates_to_eur(
+        ["USD", "USD", "USD", "USD", "gbp", "EUR", "CHF", None, "USD"],
+        [
+            date(2023, 7, 1),  # Saturday: Friday's rate
+            "2023-07-03",
+            date(2023, 6, 29),  # Before the first rate
+            date(2023, 8, 1),  # Latest rate is 29 days old
+            date(2023, 7, 2),
+            None,
+            date(2023, 7, 3),
+            date(2023, 7, 3),
+            None,
+        ],
+    )
+
+    assert rates[:2].tolist() == [0.8, 1.0]
+    assert np.isnan(rates[2]) and np.isnan(rates[3])
+    assert rates[4:6].tolist() == [1.25, 1.0]
+    assert np.isnan(rates[6:]).all()
+    assert table.currencies == ["EUR", "GBP", "USD"]
+
+    converted, known = table.convert(np.array([[100.0, np.nan], [3.333, 1.0]]), ["USD", "CHF"], [date(2023, 7, 3)] * 2)
+    assert known.tolist() == [True, False]
+    assert converted[0, 0] == 100.0 and np.isnan(converted[0, 1]) and np.isnan(converted[1]).all()
+
+
+def test_vectorized_lookup_matches_a_scan():
+    rng = random.Random(5)
+    rows = []
+    for currency in ("GBP", "JPY", "USD"):
+        day = date(2020, 1, 1)
+        for _ in range(300):
+            day += timedelta(days=rng.choice([1, 1, 1, 3, 12]))
+            rows.append((currency, day, round(rng.uniform(0.5, 150), 4)))
+    table = FxRateTable.from_rows(rows, max_lag_days=10)
+
+    currencies = [rng.choice(["GBP", "JPY", "USD", "EUR", "NOK"]) for _ in range(5000)]
+    dates = [date(2019, 12, 1) + timedelta(days=rng.randrange(1400)) for _ in range(5000)]
+
+    def scan(currency, day):
+        if currency == "EUR":
+            return 1.0
+        series = [(d, r) for c, d, r in rows if c == currency]
+        i = bisect_right([d for d, _ in series], day) - 1
+        if i < 0 or (day - series[i][0]).days > 10:
+            return None
+        return 1.0 / series[i][1]
+
+    expected = [scan(c, d) for c, d in zip(currencies, dates)]
+    actual = table.rates_to_eur(currencies, dates)
+    assert [None if np.isnan(r) else r for r in actual] == expected
+    assert any(r is None for r in expected) and any(r not in (None, 1.0) for r in expected)
+
+
+def test_statements_convert_at_their_period_end(session_factory, monkeypatch):
+    service = FxRateService(session_factory=session_factory)
+    monkeypatch.setattr(normalization, "fx_rate_service", service)
+    normalizer = DataNormalizationService()
+
+    async def run():
+        async with session_factory() as db:
+            db.add(FxRate(currency="USD", rate_date=date(2019, 12, 31), rate=1.1234))
+            db.add(FxRate(currency="USD", rate_date=date(2023, 12, 29), rate=1.105))
+            await db.commit()
+
+        financials, financial_errors = await normalizer.normalize_financial_statements([
+            {"fiscal_year": 2019, "period_end_date": "2019-12-31", "revenue": 1123.4, "net_income": None},
+            # No period end: as of December 31, a Sunday, so Friday's rate
+            {"fiscal_year": 2023, "revenue": 1105.0, "ebitda": 221.0},
+        ], "USD")
+        table = service.table
+        cashflow, errors = await normalizer.normalize_cashflow_statement(
+            {"fiscal_year": 2023, "operating_cashflow": 500.0}, "SEK"
+        )
+        return financials, financial_errors, table, cashflow, errors
+
+    financials, financial_errors, table, cashflow, errors = asyncio.run(run())
+
+    assert financials[0] == {"fiscal_year": 2019, "period_end_date": "2019-12-31", "currency": "EUR",
+                             "revenue": 1000.0}
+    assert financials[1] == {"fiscal_year": 2023, "period_end_date": None, "currency": "EUR",
+                             "revenue": 1000.0, "ebitda": 200.0}
+    assert financial_errors == []
+    # Loaded once; the second batch reused the in-memory table
+    assert service.table is table
+    # No SEK rates: left in SEK and flagged, not passed off as EUR
+    assert cashflow["currency"] == "SEK"
+    assert cashflow["operating_cashflow"] == 500.0
+    assert errors == ["No EUR reference rate for SEK on 2023-12-31; fiscal year 2023 not converted from SEK"]
+
+
+def test_concurrent_batches_keep_their_own_errors(session_factory, monkeypatch):
+    monkeypatch.setattr(normalization, "fx_rate_service", FxRateService(session_factory=session_factory))
+    normalizer = DataNormalizationService()
+
+    async def run():
+        async with session_factory() as db:
+            db.add(FxRate(currency="USD", rate_date=date(2023, 12, 29), rate=1.105))
+            await db.commit()
+
+        return await asyncio.gather(
+            normalizer.normalize_financial_statements([{"fiscal_year": 2023, "revenue": 1.0}], "SEK"),
+            normalizer.normalize_financial_statements([{"fiscal_year": 2023, "revenue": 1105.0}], "USD"),
+        )
+
+    (_, sek_errors), (_, usd_errors) = asyncio.run(run())
+
+    assert sek_errors == ["No EUR reference rate for SEK on 2023-12-31; fiscal year 2023 not converted from SEK"]
+    assert usd_errors == []
+
+
+def test_ecb_source_ingests_from_watermark(session_factory, ingest_into_test_database, monkeypatch):
+    monkeypatch.setattr(ingestion.settings, "ECB_FX_CURRENCIES", ["EUR", "USD", "GBP"])
+    fx_service = FxRateService(session_factory=session_factory)
+    monkeypatch.setattr(ingestion, "fx_rate_service", fx_service)
+    service = IngestionService()
+
+    async def run():
+        service._clients["ecb"] = FakeECB({"USD": 1.1, "GBP": 0.85})
+        first = await service.run_source("ecb", refresh_type="backfill", start_year=2023)
+        before = (await fx_service.get_table()).rates_to_eur(["USD"], [date(2023, 2, 20)])
+
+        client = FakeECB({"USD": 1.2, "GBP": 0.9}, last_day=date(2023, 2, 28))
+        service._clients["ecb"] = client
+        second = await service.run_source("ecb", start_year=2023)
+        after = (await fx_service.get_table()).rates_to_eur(["USD", "GBP"], [date(2023, 2, 20), date(2023, 1, 2)])
+
+        async with session_factory() as db:
+            count = len((await db.execute(select(FxRate))).scalars().all())
+        return first, before, client.calls, second, after, count
+
+    first, before, calls, second, after, count = asyncio.run(run())
+
+    # 22 business days in January 2023, for two currencies
+    assert first["records_inserted"] == 44
+    assert np.isnan(before[0])
+    # One request from the shared watermark; January 31 re-written, February added
+    assert calls == [(("USD", "GBP"), date(2023, 1, 31))]
+    assert second["records_updated"] == 2
+    assert second["records_inserted"] == 40
+    assert count == 84
+    # Ingestion dropped the stale table, so new rates are visible at once
+    assert after.tolist() == [1 / 1.2, 1 / 0.85]
+
+
+def test_empty_table_is_reloaded(session_factory):
+    service = FxRateService(session_factory=session_factory)
+
+    async def run():
+        empty = await service.get_table()
+        async with session_factory() as db:
+            db.add(FxRate(currency="USD", rate_date=date(2023, 12, 29), rate=1.105))
+            await db.commit()
+        return empty, await service.get_table()
+
+    empty, loaded = asyncio.run(run())
+
+    assert empty.rates == {}
+    # Another worker's rates are picked up without waiting for FX_TABLE_MAX_AGE
+    assert loaded.currencies == ["EUR", "USD"]
+
+
+def test_ingest_skips_years_without_a_rate(api_app, api_client, session_factory, monkeypatch):
+    monkeypatch.setattr(normalization, "fx_rate_service", FxRateService(session_factory=session_factory))
+    api_app.include_router(companies_api.router)
+
+    async def company_info(ticker):
+        return {"name": "Dollar Corp", "country": "NL", "ticker": ticker, "currency": "USD"}
+
+    async def financials(ticker, count):
+        return [{"fiscal_year": 2023, "revenue": 1105.0}]
+
+    async def cashflows(ticker, count):
+        return [{"fiscal_year": 2023, "operating_cashflow": 221.0}]
+
+    monkeypatch.setattr(companies_api.yahoo_client, "get_company_info", company_info)
+    monkeypatch.setattr(companies_api.yahoo_client, "get_financial_statements", financials)
+    monkeypatch.setattr(companies_api.yahoo_client, "get_cashflow_statements", cashflows)
+
+    async def stored():
+        async with session_factory() as db:
+            statements = (await db.execute(select(FinancialStatement.revenue, FinancialStatement.currency))).all()
+            cashflows = (await db.execute(select(CashFlow.operating_cashflow, CashFlow.currency))).all()
+        return statements, cashflows
+
+    async def run():
+        async with api_client() as client:
+            before_rates = (await client.post("/companies/ingest", json={"ticker": "USD", "years": 1})).json()
+            skipped = await stored()
+            async with session_factory() as db:
+                db.add(FxRate(currency="USD", rate_date=date(2023, 12, 29), rate=1.105))
+                await db.commit()
+            after_rates = (await client.post("/companies/ingest", json={"ticker": "USD", "years": 1})).json()
+        return before_rates, skipped, after_rates, await stored()
+
+    before_rates, skipped, after_rates, converted = asyncio.run(run())
+
+    assert before_rates["financial_years"] == []
+    assert len(before_rates["validation_errors"]) == 2
+    assert skipped == ([], [])
+    # Not stored in USD, so the next ingest converts and stores it
+    assert after_rates["financial_years"] == [2023]
+    assert converted == ([(1000.0, "EUR")], [(200.0, "EUR")])
@@ -0,0 +1,91 @@
+"""
+Test the indicator query API keyset pagination against a throwaway SQLite database
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.data import query_indicators
+from app.database import Base
+from app.models.indicator import IndicatorValue
+from app.schemas.indicator import IndicatorListResponse, IndicatorQuery
+
+
+async def _run_queries(tmp_path, queries):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'query.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as db:
+        # Two countries share every date, so pages must break ties on id
+        db.add_all([
+            IndicatorValue(
+                country_code=country,
+                indicator_code="GDP_GROWTH",
+                date=date(2020, 1, 1) + timedelta(days=i),
+                value=float(i),
+                source="test",
+            )
+            for i in range(50)
+            for country in ("NL", "BE")
+        ])
+        await db.flush()
+
+        responses = []
+        for make_query in queries:
+            previous = responses[-1] if responses else None
+            responses.append(await query_indicators(make_query(previous), current_user=None, db=db))
+
+    await engine.dispose()
+    return responses
+
+
+def test_keyset_pagination_walks_all_rows(tmp_path):
+    def next_page(previous):
+        cursor = previous["next_cursor"] if previous else None
+        return IndicatorQuery(limit=30, cursor=cursor, include_total=previous is None)
+
+    pages = asyncio.run(_run_queries(tmp_path, [next_page] * 4))
+
+    assert pages[0]["total"] == 100
+    assert pages[1]["total"] is None
+    assert [len(p["items"]) for p in pages] == [30, 30, 30, 10]
+    assert pages[-1]["next_cursor"] is None
+
+    ids = [item["id"] for page in pages for item in page["items"]]
+    assert len(ids) == len(set(ids)) == 100
+
+    keys = [(item["date"], item["id"]) for page in pages for item in page["items"]]
+    assert keys == sorted(keys)
+
+    IndicatorListResponse.model_validate(pages[0])
+
+
+def test_query_filters(tmp_path):
+    query = IndicatorQuery(
+        country_codes=["nl"],
+        date_from=date(2020, 1, 11),
+        date_to=date(2020, 1, 20),
+        include_total=True,
+    )
+    (page,) = asyncio.run(_run_queries(tmp_path, [lambda _: query]))
+
+    assert page["total"] == 10
+    assert {item["country_code"] for item in page["items"]} == {"NL"}
+    assert "extra_metadata" not in page["items"][0]
+
+
+def test_invalid_cursor_rejected(tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(_run_queries(tmp_path, [lambda _: IndicatorQuery(cursor="not-a-cursor")]))
+    assert exc.value.status_code == 400
@@ -0,0 +1,250 @@
+"""
+Test background ingestion and local macro reads against a throwaway SQLite database
+"""
+
+import asyncio
+import json
+import os
+import sys
+from datetime import date, datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.api.v1.macro as macro_api
+import app.services.ingestion as ingestion
+from app.database import Base
+from app.models.data_source import FetchLog
+from app.models.macro_indicators import DataRefreshLog, MacroIndicator
+from app.services.ingestion import IngestionService, series_points
+from app.services.macro_data import MacroDataService
+from app.services.realtime import realtime_hub
+
+
+class FakeEurostat:
+    """Returns fixed series in the shape EurostatDataService produces"""
+
+    def __init__(self, value=1.0, fail=(), last_year=2023):
+        self.value = value
+        self.fail = fail
+        self.last_year = last_year
+        self.calls = []
+
+    def _series(self, name, countries, start_year):
+        self.calls.append((name, tuple(countries), start_year))
+        if name in self.fail:
+            raise RuntimeError("upstream down")
+        dates = pd.to_datetime([f"{year}-12-31" for year in range(start_year, self.last_year + 1)])
+        return {c: pd.Series([self.value] * len(dates), index=dates, name=c) for c in countries}
+
+    def get_gdp_growth(self, countries, start_year):
+        return self._series("gdp", countries, start_year)
+
+    def get_inflation_rate(self, countries, start_year):
+        return self._series("inflation", countries, start_year)
+
+    def get_unemployment_rate(self, countries, start_year):
+        return self._series("unemployment", countries, start_year)
+
+    def get_business_confidence(self, countries, start_year):
+        return self._series("confidence", countries, start_year)
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ingest.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(ingestion, "AsyncSessionLocal", factory)
+    monkeypatch.setattr(ingestion.settings, "INGESTION_START_YEAR", 2020)
+    yield factory
+    asyncio.run(engine.dispose())
+
+
+async def _fetch_all(factory, *queries):
+    async with factory() as db:
+        return [(await db.execute(q)).scalars().all() for q in queries]
+
+
+@pytest.mark.parametrize("period,expected", [
+    (pd.Timestamp("2023-12-31"), date(2023, 12, 31)),
+    ("2023", date(2023, 12, 31)),
+    ("2023-05", date(2023, 5, 31)),
+    ("2023-Q1", date(2023, 3, 31)),
+    (("NLD", "NGDP_RPCH", "2022"), date(2022, 12, 31)),
+])
+def test_series_points_index_types(period, expected):
+    series = pd.Series([1.5, float("nan")], index=[period, "2099"])
+    assert series_points(series) == [(expected, 1.5)]
+
+
+def test_run_source_upserts_and_logs(session_factory):
+    service = IngestionService()
+
+    service._clients["eurostat"] = FakeEurostat(value=1.0)
+    first = asyncio.run(service.run_source("eurostat", refresh_type="full"))
+    service._clients["eurostat"] = FakeEurostat(value=2.0, fail=("confidence",))
+    second = asyncio.run(service.run_source("eurostat", refresh_type="full"))
+
+    # 4 countries x 4 years per dataset
+    assert first == {"source": "eurostat", "refresh_type": "full", "status": "completed",
+                     "records_inserted": 64, "records_updated": 0, "datasets_failed": 0}
+    assert second["records_inserted"] == 0
+    assert second["records_updated"] == 48
+    assert second["datasets_failed"] == 1
+
+    rows, refresh_logs, fetch_logs = asyncio.run(_fetch_all(
+        session_factory,
+        select(MacroIndicator).where(MacroIndicator.indicator_code == "GDP_GROWTH"),
+        select(DataRefreshLog).order_by(DataRefreshLog.id),
+        select(FetchLog).order_by(FetchLog.id),
+    ))
+
+    assert len(rows) == 16
+    assert {r.country_code for r in rows} == {"NLD", "BEL", "LUX", "DEU"}
+    assert {r.value for r in rows} == {2.0}
+    assert [log.status for log in refresh_logs] == ["completed", "completed"]
+    assert refresh_logs[1].records_failed == 1
+    assert "upstream down" in refresh_logs[1].error_message
+    assert len(fetch_logs) == 8
+    assert fetch_logs[-1].status == "error"
+
+
+def test_incremental_refresh_fetches_from_watermark(session_factory):
+    service = IngestionService()
+    service._clients["eurostat"] = FakeEurostat(value=1.0)
+    asyncio.run(service.run_source("eurostat", refresh_type="full"))
+
+    client = FakeEurostat(value=2.0, last_year=2024)
+    service._clients["eurostat"] = client
+    summary = asyncio.run(service.run_source("eurostat"))
+
+    # Watermark is 2023-12-31 everywhere: one request per dataset from 2023,
+    # 2023 re-written for revisions and 2024 inserted
+    assert {call[2] for call in client.calls} == {2023}
+    assert len(client.calls) == 4
+    assert summary["refresh_type"] == "incremental"
+    assert summary["records_inserted"] == 16
+    assert summary["records_updated"] == 16
+
+    (rows,) = asyncio.run(_fetch_all(
+        session_factory,
+        select(MacroIndicator).where(
+            MacroIndicator.indicator_code == "GDP_GROWTH",
+            MacroIndicator.country_code == "NLD",
+        ).order_by(MacroIndicator.period_date),
+    ))
+    assert [(r.period_date.year, r.value) for r in rows] == [
+        (2020, 1.0), (2021, 1.0), (2022, 1.0), (2023, 2.0), (2024, 2.0)
+    ]
+
+
+def test_backfill_only_inserts_missing_periods(session_factory):
+    service = IngestionService()
+    service._clients["eurostat"] = FakeEurostat(value=1.0)
+    asyncio.run(service.run_source("eurostat", refresh_type="full"))
+
+    service._clients["eurostat"] = FakeEurostat(value=5.0)
+    summary = asyncio.run(service.run_source("eurostat", refresh_type="backfill", start_year=2018))
+
+    assert summary["records_inserted"] == 32
+    assert summary["records_updated"] == 0
+
+    (rows,) = asyncio.run(_fetch_all(
+        session_factory,
+        select(MacroIndicator).where(
+            MacroIndicator.indicator_code == "GDP_GROWTH",
+            MacroIndicator.country_code == "NLD",
+        ).order_by(MacroIndicator.period_date),
+    ))
+    assert [r.value for r in rows] == [5.0, 5.0, 1.0, 1.0, 1.0, 1.0]
+
+
+def test_changed_values_are_published(session_factory):
+    service = IngestionService()
+    service._clients["eurostat"] = FakeEurostat(value=1.0)
+    asyncio.run(service.run_source("eurostat", refresh_type="full"))
+
+    async def run():
+        subscription = realtime_hub.connect()
+        realtime_hub.subscribe(subscription, ["country:NLD", "dashboard"])
+        try:
+            # Same values again: nothing to push
+            await service.run_source("eurostat", refresh_type="full")
+            unchanged = subscription.queue.qsize()
+            service._clients["eurostat"] = FakeEurostat(value=2.0, fail=("gdp", "inflation", "confidence"))
+            await service.run_source("eurostat", refresh_type="full")
+            return unchanged, [json.loads(subscription.queue.get_nowait()) for _ in range(subscription.queue.qsize())]
+        finally:
+            realtime_hub.disconnect(subscription)
+
+    unchanged, events = asyncio.run(run())
+
+    assert unchanged == 0
+    assert events == [
+        {"type": "indicator_update", "source": "eurostat", "indicator_code": "UNEMPLOYMENT",
+         "country_code": "NLD", "period": "2023-12-31", "value": 2.0, "periods_changed": 4},
+        {"type": "dashboard_updated"},
+    ]
+
+
+def test_macro_data_prefers_stored_sources(session_factory):
+    async def run():
+        async with session_factory() as db:
+            for source, value in (("imf", 9.0), ("eurostat", 1.0)):
+                db.add(MacroIndicator(source=source, indicator_code="GDP_GROWTH", indicator_name="GDP",
+                                      country_code="NLD", period_date=date(2022, 12, 31),
+                                      frequency="A", value=value))
+            await db.flush()
+            return await MacroDataService().get_series(db, "GDP_GROWTH", ["NLD", "BEL"], 2020)
+
+    series = asyncio.run(run())
+
+    assert series["NLD"].attrs["source"] == "eurostat"
+    assert series["NLD"].tolist() == [1.0]
+    # No stored rows for Belgium: curated baseline fills in
+    assert series["BEL"].attrs["source"] == "baseline"
+    assert len(series["BEL"]) > 0
+
+
+def test_macro_meta_describes_the_served_data(api_app, api_client, session_factory):
+    api_app.include_router(macro_api.router)
+
+    async def run():
+        async with session_factory() as db:
+            for code in ("GDP_GROWTH", "INFLATION", "UNEMPLOYMENT"):
+                for year in (2022, 2023, 2024):
+                    db.add(MacroIndicator(source="eurostat", indicator_code=code, indicator_name=code,
+                                          country_code="NLD", period_date=date(year, 12, 31), frequency="A",
+                                          value=float(year - 2020), last_refreshed=datetime(2025, 3, 1)))
+            await db.commit()
+
+        async with api_client() as client:
+            comprehensive = await client.get("/api/v1/macro/comprehensive", params={"countries": ["NLD"]})
+            summary = await client.get("/api/v1/macro/summary", params={"countries": ["NLD", "BEL"]})
+        return comprehensive.json(), summary.json()
+
+    comprehensive, summary = asyncio.run(run())
+
+    assert comprehensive["meta"]["data_sources"] == {
+        "gdp_growth": "eurostat", "inflation": "eurostat", "unemployment": "eurostat",
+    }
+    assert comprehensive["meta"]["data_type"] == "ingested"
+    assert comprehensive["meta"]["last_updated"] == "2025-03-01"
+
+    nld, bel = summary["data"]
+    assert (nld["year"], nld["gdp_growth"]) == (2024, 4.0)
+    # Belgium has no stored rows and is served from the baseline
+    assert bel["year"] == 2023
+    assert summary["meta"]["reference_year"] == 2024
+    assert summary["meta"]["data_sources"]["inflation"] == "eurostat, Eurostat/OECD"
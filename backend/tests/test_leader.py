@@ -0,0 +1,130 @@
+"""
+Test scheduler leader election with file locks and a scripted lock
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.leader import AlwaysLeader, FileLock, LeaderElection
+from app.services.scheduler import JobScheduler
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    async def elected(self):
+        self.events.append("elected")
+
+    async def revoked(self):
+        self.events.append("revoked")
+
+
+class FlakyLock(AlwaysLeader):
+    """Acquires once, then fails to renew"""
+
+    async def renew(self):
+        raise ConnectionError("lease store unreachable")
+
+
+def test_file_lock_elects_one_leader_and_fails_over(tmp_path):
+    path = str(tmp_path / "leader.lock")
+
+    async def run():
+        first, second = Recorder(), Recorder()
+        a = LeaderElection(FileLock(path), interval=60)
+        b = LeaderElection(FileLock(path), interval=60)
+        a._on_elected, a._on_revoked = first.elected, first.revoked
+        b._on_elected, b._on_revoked = second.elected, second.revoked
+
+        await a.tick()
+        await b.tick()
+        await a.tick()  # renewal keeps the lease
+        leaders = (a.is_leader, b.is_leader)
+
+        # Leader goes away; the follower takes over on its next attempt
+        await a.stop()
+        await b.tick()
+        await b.stop()
+        return leaders, (a.is_leader, b.is_leader), first.events, second.events
+
+    leaders, after, first_events, second_events = asyncio.run(run())
+
+    assert leaders == (True, False)
+    assert after == (False, False)
+    assert first_events == ["elected", "revoked"]
+    assert second_events == ["elected", "revoked"]
+
+
+def test_failed_renewal_steps_down():
+    async def run():
+        recorder = Recorder()
+        election = LeaderElection(FlakyLock(), interval=60)
+        election._on_elected, election._on_revoked = recorder.elected, recorder.revoked
+        await election.tick()
+        await election.tick()
+        return election.is_leader, recorder.events
+
+    is_leader, events = asyncio.run(run())
+
+    assert not is_leader
+    assert events == ["elected", "revoked"]
+
+
+def test_failed_start_releases_leadership(tmp_path):
+    path = str(tmp_path / "leader.lock")
+
+    async def run():
+        recorder = Recorder()
+        attempts = []
+
+        async def elected():
+            attempts.append("elected")
+            if len(attempts) == 1:
+                raise RuntimeError("scheduler failed to start")
+            await recorder.elected()
+
+        a = LeaderElection(FileLock(path), interval=60)
+        b = LeaderElection(FileLock(path), interval=60)
+        a._on_elected, a._on_revoked = elected, recorder.revoked
+        b._on_elected, b._on_revoked = recorder.elected, recorder.revoked
+
+        await a.tick()
+        stepped_down = not a.is_leader
+        # The lock was released, so the other worker can take over
+        await b.tick()
+        taken_over = b.is_leader
+        await b.stop()
+        await a.tick()
+        leader = a.is_leader
+        await a.stop()
+        return stepped_down, taken_over, leader, attempts, recorder.events
+
+    stepped_down, taken_over, leader, attempts, events = asyncio.run(run())
+
+    assert stepped_down and taken_over and leader
+    assert attempts == ["elected", "elected"]
+    assert events == ["revoked", "elected", "revoked", "elected", "revoked"]
+
+
+def test_scheduler_runs_only_while_leader(monkeypatch):
+    monkeypatch.setattr("app.services.scheduler.settings.SCHEDULER_ENABLED", True)
+
+    async def run():
+        scheduler = JobScheduler(LeaderElection(FlakyLock(), interval=60))
+        await scheduler.start()
+        await asyncio.sleep(0)  # first campaign round acquires
+        elected = (scheduler.is_leader, scheduler.is_running, {j["id"] for j in scheduler.get_jobs()})
+        await scheduler.election.tick()  # renewal fails
+        revoked = (scheduler.is_leader, scheduler.is_running)
+        await scheduler.stop()
+        return elected, revoked
+
+    elected, revoked = asyncio.run(run())
+
+    assert elected == (True, True, {"fetch", "risk", "cleanup"})
+    assert revoked == (False, False)
@@ -0,0 +1,154 @@
+"""
+Test login throttling, token buckets and off-loop password hashing
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.api.v1.auth as auth_api
+from app.auth.security import get_password_hash, verify_password_async
+from app.auth.throttle import LoginThrottle
+from app.database import Base, get_db
+from app.models.user import User
+import app.rate_limit as rate_limit
+from app.rate_limit import TokenBuckets, parse_trusted_proxies
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_buckets_refill_and_report_wait():
+    clock = FakeClock()
+    buckets = TokenBuckets(rate=1.0, burst=2, clock=clock)
+
+    assert buckets.acquire("a") == 0.0
+    assert buckets.acquire("a") == 0.0
+    assert buckets.acquire("a") == pytest.approx(1.0)
+    assert buckets.peek("b", cost=3) == pytest.approx(1.0)
+
+    clock.now = 0.5
+    assert buckets.acquire("a") == pytest.approx(0.5)
+    clock.now = 1.0
+    assert buckets.acquire("a") == 0.0
+
+
+def test_token_buckets_drop_least_recent_key():
+    buckets = TokenBuckets(rate=0, burst=1, max_keys=2, clock=FakeClock())
+    buckets.acquire("a")
+    buckets.acquire("b")
+    buckets.acquire("a")
+    buckets.acquire("c")  # evicts b, the least recently used
+
+    assert len(buckets) == 2
+    assert buckets.peek("a") > 0 and buckets.peek("c") > 0
+    assert buckets.peek("b") == 0.0  # forgotten, so full again
+
+
+def test_only_failures_count_against_an_account():
+    throttle = LoginThrottle(enabled=True, requests_per_minute=600, burst=2)
+
+    for address in ("10.0.0.1", "10.0.0.2"):
+        assert throttle.check(address, "Alice@example.com") == 0.0
+        throttle.record_failure("alice@example.com")
+
+    # Account locked for every address, other accounts unaffected
+    assert throttle.check("10.0.0.3", "alice@example.com") > 0
+    assert throttle.check("10.0.0.3", "bob@example.com") == 0.0
+
+    throttle.record_success("alice@example.com")
+    assert throttle.check("10.0.0.4", "alice@example.com") == 0.0
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.auth.security.settings.BCRYPT_ROUNDS", 4)
+    monkeypatch.setattr(auth_api, "login_throttle", LoginThrottle(enabled=True, requests_per_minute=60, burst=3))
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'login.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add(User(email="alice@example.com", hashed_password=get_password_hash("correct-horse")))
+            await db.commit()
+
+    asyncio.run(create())
+
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(auth_api.router)
+    app.dependency_overrides[get_db] = override_db
+    yield TestClient(app)
+    asyncio.run(engine.dispose())
+
+
+def test_login_is_throttled_before_checking_password(client):
+    wrong = {"email": "alice@example.com", "password": "wrong-password"}
+    right = {"email": "alice@example.com", "password": "correct-horse"}
+
+    assert client.post("/login", json=right).status_code == 200
+    assert [client.post("/login", json=wrong).status_code for _ in range(2)] == [401, 401]
+
+    response = client.post("/login", json=right)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_password_hashing_does_not_block_event_loop(monkeypatch):
+    monkeypatch.setattr("app.auth.security.settings.BCRYPT_ROUNDS", 10)
+    hashed = get_password_hash("secret")
+
+    async def run():
+        gaps = []
+        done = asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        assert await verify_password_async("secret", hashed)
+        elapsed = time.perf_counter() - started
+        done.set()
+        await task
+        return elapsed, max(gaps)
+
+    elapsed, longest_gap = asyncio.run(run())
+    assert longest_gap < elapsed / 2
+
+
+def test_login_throttle_is_per_client_behind_a_proxy(client, monkeypatch):
+    monkeypatch.setattr(rate_limit, "trusted_proxies", parse_trusted_proxies("*"))
+    wrong = {"email": "bob@example.com", "password": "wrong-password"}
+    for _ in range(3):
+        client.post("/login", json=wrong, headers={"X-Forwarded-For": "203.0.113.7"})
+
+    assert client.post("/login", json=wrong, headers={"X-Forwarded-For": "203.0.113.7"}).status_code == 429
+    # Another user behind the same load balancer is not locked out
+    right = {"email": "alice@example.com", "password": "correct-horse"}
+    assert client.post("/login", json=right, headers={"X-Forwarded-For": "203.0.113.8"}).status_code == 200
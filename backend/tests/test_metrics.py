@@ -0,0 +1,115 @@
+"""
+Test Prometheus instrumentation: routes, SQL per request, upstream calls, collectors
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, generate_latest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.metrics import MetricsMiddleware, instrument_engine, metrics_registry, upstream_call
+from app.services.cache import SWRCache
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template_with_sql_work(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+    instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{item_id}")
+    async def item(item_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT :id"), {"id": item_id})
+        return {"id": item_id}
+
+    client = TestClient(app)
+    route = "/metrics-test/{item_id}"
+    selects_before = sample("atlasiq_db_query_duration_seconds_count", operation="SELECT")
+
+    assert client.get("/metrics-test/1").status_code == 200
+    assert client.get("/metrics-test/2").status_code == 200
+    assert client.get("/no-such-route").status_code == 404
+
+    assert sample("atlasiq_http_requests_total", method="GET", route=route, status="200") == 2
+    assert sample("atlasiq_http_request_duration_seconds_count", method="GET", route=route) == 2
+    assert sample("atlasiq_http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    assert sample("atlasiq_db_queries_per_request_sum", route=route) == 4
+    assert sample("atlasiq_db_query_duration_seconds_count", operation="SELECT") - selects_before == 4
+    assert sample("atlasiq_http_requests_in_progress", method="GET") == 0
+
+    asyncio.run(engine.dispose())
+
+
+def test_upstream_calls_are_classified():
+    def count(outcome):
+        return sample("atlasiq_upstream_fetches_total", source="test-source", outcome=outcome)
+
+    with upstream_call("test-source", "fetch") as call:
+        call.result({"NLD": [1.0]})
+    with upstream_call("test-source", "fetch") as call:
+        call.result({})
+    with upstream_call("test-source", "fetch") as call:
+        call.result(None)
+    with pytest.raises(TimeoutError):
+        with upstream_call("test-source", "fetch"):
+            raise TimeoutError("upstream timed out")
+
+    assert (count("ok"), count("empty"), count("error")) == (1, 1, 2)
+    assert sample("atlasiq_upstream_fetch_duration_seconds_count", source="test-source", operation="fetch") == 4
+
+
+def test_scrape_includes_cache_pool_and_rate_limit_metrics():
+    cache = SWRCache(ttl=60, name="metrics-test")
+
+    async def run():
+        async def compute():
+            return 1
+        await cache.get_or_compute("k", compute)
+        await cache.get_or_compute("k", compute)
+        await cache.get_or_compute("k", compute)
+
+    asyncio.run(run())
+    output = generate_latest(REGISTRY).decode()
+
+    assert sample("atlasiq_cache_hit_ratio", cache="metrics-test") == pytest.approx(2 / 3)
+    assert sample("atlasiq_cache_requests_total", cache="metrics-test", result="miss") == 1
+    assert 'atlasiq_db_pool_checkouts_total{pool="primary"}' in output
+    assert 'atlasiq_db_pool_wait_seconds_bucket{le="+Inf",pool="primary"}' in output
+    assert "atlasiq_rate_limit_decisions_total" in output
+
+
+def test_multiprocess_registry_sums_every_worker(tmp_path, monkeypatch):
+    backend = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    worker = (
+        "from app.metrics import HTTP_REQUESTS\n"
+        "HTTP_REQUESTS.labels('GET', '/multiprocess-test', '200').inc()\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": backend}
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, cwd=backend, check=True)
+
+    assert metrics_registry() is REGISTRY
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    registry = metrics_registry()
+
+    labels = {"method": "GET", "route": "/multiprocess-test", "status": "200"}
+    assert registry.get_sample_value("atlasiq_http_requests_total", labels) == 2
+    # Scrape-time gauges come from the serving worker
+    assert "atlasiq_rate_limit_decisions_total" in generate_latest(registry).decode()
@@ -0,0 +1,103 @@
+"""
+Test the Alembic migration chain and the startup schema check
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.migrations import check_schema, current_revision, head_revision, run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def schema_diff(engine):
+    async def run():
+        async with engine.connect() as conn:
+            return await conn.run_sync(
+                lambda sync_conn: compare_metadata(MigrationContext.configure(sync_conn), Base.metadata)
+            )
+    return asyncio.run(run())
+
+
+def test_empty_database_upgrades_to_models(engine):
+    assert asyncio.run(check_schema(engine)) is False
+    assert asyncio.run(run_migrations(engine)) is True
+
+    assert asyncio.run(current_revision(engine)) == head_revision()
+    assert asyncio.run(check_schema(engine)) is True
+    # Migrations produce exactly what the models declare
+    assert schema_diff(engine) == []
+
+
+def test_current_database_is_a_noop(engine):
+    asyncio.run(run_migrations(engine))
+    assert asyncio.run(run_migrations(engine)) is False
+
+
+def test_legacy_create_all_database_is_stamped_and_upgraded(engine):
+    async def legacy_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            # As built before the performance indexes, export progress and claims, scoring models and FX rates existed
+            await conn.execute(text("DROP INDEX ix_indicator_code_country_date_id"))
+            await conn.execute(text("DROP INDEX idx_refresh_started_at"))
+            await conn.execute(text("ALTER TABLE exports DROP COLUMN progress"))
+            await conn.execute(text("ALTER TABLE exports DROP COLUMN claimed_at"))
+            await conn.execute(text("DROP TABLE risk_scoring_models"))
+            await conn.execute(text("ALTER TABLE company_risk_scores DROP COLUMN model_version"))
+            await conn.execute(text("DROP TABLE fx_rates"))
+            await conn.execute(text("INSERT INTO users (email, hashed_password, is_active, is_admin, created_at, updated_at) "
+                                    "VALUES ('a@b.c', 'x', 1, 0, '2024-01-01', '2024-01-01')"))
+
+    async def indexes():
+        async with engine.connect() as conn:
+            return await conn.run_sync(
+                lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes("indicator_values")}
+            )
+
+    asyncio.run(legacy_schema())
+    assert asyncio.run(run_migrations(engine)) is True
+
+    assert "ix_indicator_code_country_date_id" in asyncio.run(indexes())
+    assert schema_diff(engine) == []
+
+    async def users():
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT COUNT(*) FROM users"))).scalar()
+
+    assert asyncio.run(users()) == 1
+
+
+def test_partial_legacy_database_gets_missing_baseline_tables(engine):
+    async def partial_schema():
+        async with engine.begin() as conn:
+            # What the old SQLite create_all left behind when it aborted on a duplicate index
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[
+                Base.metadata.tables[name] for name in ("users", "data_sources", "fetch_logs", "indicator_values")
+            ]))
+            await conn.execute(text("DROP INDEX ix_indicator_code_country_date_id"))
+
+    asyncio.run(partial_schema())
+    assert asyncio.run(run_migrations(engine)) is True
+
+    assert asyncio.run(current_revision(engine)) == head_revision()
+    assert schema_diff(engine) == []
+    # A restart finds nothing left to do
+    assert asyncio.run(run_migrations(engine)) is False
@@ -0,0 +1,185 @@
+"""
+Test peer group percentiles: sorted arrays, incremental updates and the endpoint
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import select
+
+import app.api.v1.companies as companies_api
+import app.services.peer_ranking as peer_ranking
+from app.models.company import Company, CompanyRiskScore
+from app.services.company_comparison import RATIO_NAMES
+from app.services.peer_ranking import PeerGroups, PeerRankingService
+
+
+def brute_force_percentile(values, value):
+    below = sum(v < value for v in values)
+    ties = sum(v == value for v in values)
+    return round((below + ties / 2) / len(values) * 100, 1)
+
+
+def test_incremental_updates_match_brute_force():
+    rng = random.Random(3)
+    groups = [("NL", "C10"), ("NL", "K64"), ("DE", "C10")]
+
+    def random_values():
+        return tuple(rng.choice([None, float(rng.randint(-5, 20))]) for _ in RATIO_NAMES)
+
+    companies = {
+        company_id: (*rng.choice(groups), date(2024, 1, 1), random_values())
+        for company_id in range(300)
+    }
+    index = PeerGroups()
+    index.load((company_id, *row) for company_id, row in list(companies.items())[:200])
+    for company_id, row in list(companies.items())[200:]:
+        index.upsert(company_id, *row)
+
+    for step in range(500):
+        company_id = rng.randrange(300)
+        action = rng.random()
+        if action < 0.6:
+            group = companies[company_id][:2] if company_id in companies else rng.choice(groups)
+            row = (*group, date(2024, 1, step % 28 + 1), random_values())
+            if company_id not in companies or companies[company_id][2] <= row[2]:
+                companies[company_id] = row
+            index.upsert(company_id, *row)
+        elif action < 0.8 and company_id in companies:
+            country, nace = rng.choice(groups)
+            companies[company_id] = (country, nace, *companies[company_id][2:])
+            index.move(company_id, country, nace)
+        else:
+            companies.pop(company_id, None)
+            index.remove(company_id)
+
+    for company_id, (country, nace, _, values) in companies.items():
+        ranking = index.rank(company_id, "country_sector")
+        peers = [row for row in companies.values() if row[:2] == (country, nace)]
+        assert ranking["peer_group_size"] == len(peers)
+        for i, entry in enumerate(ranking["rankings"]):
+            column = [row[3][i] for row in peers if row[3][i] is not None]
+            assert entry["peer_count"] == len(column)
+            if values[i] is None:
+                assert entry["percentile"] is None
+            else:
+                assert entry["percentile"] == brute_force_percentile(column, values[i])
+
+    assert index.rank(10_000) is None
+
+
+def test_older_scores_do_not_replace_newer_ones():
+    index = PeerGroups()
+    values = tuple(float(i) for i in range(len(RATIO_NAMES)))
+    assert index.upsert(1, "NL", "C10", date(2024, 6, 1), values)
+    assert not index.upsert(1, "NL", "C10", date(2024, 1, 1), tuple(v + 1 for v in values))
+    assert index.rank(1)["rankings"][0]["value"] == 0.0
+    assert index.rank(1, "sector")["peer_group_size"] == 1
+    assert index.rank(1, "country")["calculation_date"] == date(2024, 6, 1)
+
+
+def test_lookup_with_100k_companies_is_fast():
+    rng = random.Random(5)
+    sectors = [f"C{n}" for n in range(10, 34)]
+    index = PeerGroups()
+    index.load(
+        (company_id, rng.choice(["NL", "BE", "LU", "DE"]), rng.choice(sectors), date(2024, 1, 1),
+         tuple(rng.uniform(-10, 50) for _ in RATIO_NAMES))
+        for company_id in range(100_000)
+    )
+
+    started = time.perf_counter()
+    for company_id in range(0, 100_000, 100):
+        index.rank(company_id, "country")
+    per_lookup = (time.perf_counter() - started) / 1000
+    assert per_lookup < 0.001
+
+    started = time.perf_counter()
+    for company_id in range(100):
+        index.upsert(company_id, "NL", "C10", date(2024, 2, 1), tuple(0.0 for _ in RATIO_NAMES))
+    assert (time.perf_counter() - started) / 100 < 0.005
+
+
+@pytest.fixture
+def service(session_factory, monkeypatch):
+    service = PeerRankingService(session_factory=session_factory, max_age=3600)
+    monkeypatch.setattr(peer_ranking, "peer_ranking_service", service)
+    monkeypatch.setattr(companies_api, "peer_ranking_service", service)
+
+    async def seed():
+        async with session_factory() as db:
+            for i in range(4):
+                company = Company(name=f"Bank {i}", country_code="NL", nace_code="K64")
+                db.add(company)
+                await db.flush()
+                db.add(CompanyRiskScore(
+                    company_id=company.id, fiscal_year=2023, calculation_date=date(2024, 1, 1),
+                    roe=float(i * 10), debt_to_ebitda=float(i),
+                ))
+            db.add(Company(name="Unscored", country_code="NL", nace_code="K64"))
+            await db.commit()
+
+    asyncio.run(seed())
+    return service
+
+
+def test_peers_endpoint_follows_committed_scores(service, session_factory, api_app, api_client):
+    api_app.include_router(companies_api.router)
+
+    def roe(response):
+        return next(r for r in response.json()["rankings"] if r["ratio"] == "roe")
+
+    async def run():
+        async with api_client() as client:
+            first = await client.get("/companies/1/peers")
+            index = service.index
+
+            # A new, better score for company 1 lands through the ORM
+            async with session_factory() as db:
+                db.add(CompanyRiskScore(
+                    company_id=1, fiscal_year=2024, calculation_date=date(2025, 1, 1), roe=99.0,
+                ))
+                await db.commit()
+            # Rolled back work is never applied
+            async with session_factory() as db:
+                score = (await db.execute(select(CompanyRiskScore).where(CompanyRiskScore.company_id == 2))).scalar_one()
+                score.roe = -100.0
+                await db.flush()
+                await db.rollback()
+            # The unscored company gets its first score
+            async with session_factory() as db:
+                db.add(CompanyRiskScore(
+                    company_id=5, fiscal_year=2024, calculation_date=date(2025, 1, 1), roe=15.0,
+                ))
+                await db.commit()
+
+            second = await client.get("/companies/1/peers")
+            newcomer = await client.get("/companies/5/peers", params={"scope": "country"})
+            missing = await client.get("/companies/42/peers")
+            bad_scope = await client.get("/companies/1/peers", params={"scope": "galaxy"})
+        return first, second, newcomer, missing, bad_scope, index
+
+    first, second, newcomer, missing, bad_scope, index = asyncio.run(run())
+
+    assert first.status_code == 200
+    assert first.json()["peer_group_size"] == 4
+    assert roe(first) == {
+        "ratio": "roe", "value": 0.0, "percentile": 12.5, "peer_count": 4,
+        "p25": 7.5, "median": 15.0, "p75": 22.5, "higher_is_better": True,
+    }
+    assert second.json()["calculation_date"] == "2025-01-01"
+    assert roe(second)["percentile"] == 90.0  # top of 5 peers, company 2 kept its 10.0
+    assert roe(second)["median"] == 20.0
+    assert service.index is index  # updated in place, not rebuilt
+    assert newcomer.json()["peer_group_size"] == 5
+    assert roe(newcomer)["percentile"] == 30.0  # 15.0 among 10, 15, 20, 30, 99
+    assert missing.status_code == 404
+    assert bad_scope.status_code == 422
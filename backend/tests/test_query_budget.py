@@ -0,0 +1,127 @@
+"""
+Test per-request query counting, N+1 detection and endpoint query budgets
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import select, text
+
+import app.api.v1.companies as companies_api
+from app.metrics import MetricsMiddleware, statement_shape
+from app.models.company import CashFlow, Company, CompanyRiskScore, FinancialStatement
+from app.query_budget import QueryBudgetExceeded, query_budget
+
+
+def test_statement_shape_ignores_values_and_in_list_length():
+    assert statement_shape(
+        "SELECT * FROM companies WHERE id IN (?, ?, ?) AND name = 'ACME'"
+    ) == statement_shape("SELECT *\n  FROM companies WHERE id IN (?) AND name = 'Other'")
+    assert statement_shape("SELECT * FROM t WHERE a = %(a_1)s LIMIT 5") == "SELECT * FROM t WHERE a = ? LIMIT ?"
+    assert statement_shape("SELECT $1, anon_1.id") == "SELECT ?, anon_1.id"
+
+
+@pytest.fixture
+def app(api_app, session_factory):
+    api_app.add_middleware(MetricsMiddleware, debug_headers=True, repeat_threshold=3)
+    api_app.include_router(companies_api.router)
+
+    async def seed():
+        async with session_factory() as db:
+            for i in range(10):
+                company = Company(name=f"Company {i:02d}", country_code="NL")
+                db.add(company)
+                await db.flush()
+                for year in (2022, 2023):
+                    db.add(FinancialStatement(company_id=company.id, fiscal_year=year, revenue=year * 10 + i))
+                    db.add(CompanyRiskScore(
+                        company_id=company.id, fiscal_year=year,
+                        calculation_date=date(year + 1, 3, 1), overall_risk_score=year - 2000 + i,
+                    ))
+            await db.commit()
+
+    asyncio.run(seed())
+    return api_app
+
+
+def test_search_query_count_does_not_grow_with_page_size(app, api_client):
+    async def run():
+        async with api_client() as client:
+            with query_budget(4):
+                return await client.get("/companies/search", params={"limit": 10})
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.headers["X-Query-Count"] == "4"
+    assert response.headers["X-Query-Max-Repeats"] == "1"
+
+    results = response.json()["results"]
+    assert len(results) == 10
+    assert results[3]["latest_revenue"] == 20233
+    assert results[3]["risk_score"] == 26
+
+
+def test_ingest_checks_existing_years_once(app, api_client, session_factory, monkeypatch):
+    years = [2019, 2020, 2021, 2022, 2023]
+
+    async def company_info(ticker):
+        return {"name": "Ingested NV", "country": "NL", "ticker": ticker, "currency": "EUR"}
+
+    async def financials(ticker, count):
+        return [{"fiscal_year": year, "revenue": 100.0} for year in years[-count:]]
+
+    async def cashflows(ticker, count):
+        return [{"fiscal_year": year, "operating_cashflow": 10.0} for year in years[-count:]]
+
+    monkeypatch.setattr(companies_api.yahoo_client, "get_company_info", company_info)
+    monkeypatch.setattr(companies_api.yahoo_client, "get_financial_statements", financials)
+    monkeypatch.setattr(companies_api.yahoo_client, "get_cashflow_statements", cashflows)
+
+    async def ingest(client, count):
+        with query_budget(9) as log:
+            response = await client.post("/companies/ingest", json={"ticker": "ING", "years": count})
+        assert response.json()["success"], response.json()
+        return log.queries, response.json()["financial_years"]
+
+    async def run():
+        async with api_client() as client:
+            first = await ingest(client, 2)
+            second = await ingest(client, 5)
+        async with session_factory() as db:
+            stored = (await db.execute(select(CashFlow.fiscal_year).order_by(CashFlow.fiscal_year))).scalars().all()
+        return first, second, stored
+
+    (first_count, first_years), (second_count, second_years), stored = asyncio.run(run())
+    assert first_years == [2022, 2023]
+    assert second_years == [2019, 2020, 2021]
+    assert stored == years
+    assert first_count == second_count  # independent of the number of years
+
+
+def test_queries_in_a_loop_are_flagged_and_fail_the_budget(app, api_client, db_engine, caplog):
+    @app.get("/loop")
+    async def loop():
+        async with db_engine.connect() as conn:
+            for company_id in range(1, 6):
+                await conn.execute(text("SELECT name FROM companies WHERE id = :id"), {"id": company_id})
+        return {}
+
+    async def run():
+        async with api_client() as client:
+            with query_budget(2):
+                return await client.get("/loop")
+
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        with pytest.raises(QueryBudgetExceeded) as exc_info:
+            asyncio.run(run())
+
+    assert "5 queries issued, budget is 2" in str(exc_info.value)
+    assert "5x SELECT name FROM companies WHERE id = ?" in str(exc_info.value)
+    assert "Possible N+1: GET /loop ran 5x" in caplog.text
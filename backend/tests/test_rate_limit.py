@@ -0,0 +1,130 @@
+"""
+Test the rate limit middleware and the cluster-wide window
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth.security import create_access_token
+import app.rate_limit as rate_limit
+from app.rate_limit import ClusterWindow, RateLimiter, RateLimitMiddleware, client_address, parse_trusted_proxies
+
+
+@pytest.fixture
+def limiter():
+    return RateLimiter(
+        requests_per_minute=60,
+        burst=3,
+        backend="local",
+        route_costs=[("POST", "/exports", 3.0), (None, "/exports/big", 50.0)],
+        exempt_paths=["/health"],
+    )
+
+
+@pytest.fixture
+def client(limiter):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.get("/items")
+    async def items():
+        return []
+
+    @app.post("/exports")
+    async def export():
+        return {}
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    return TestClient(app)
+
+
+def bearer(subject):
+    return {"Authorization": f"Bearer {create_access_token({'sub': subject})}"}
+
+
+def test_requests_over_burst_get_429(client):
+    assert [client.get("/items").status_code for _ in range(4)] == [200, 200, 200, 429]
+
+    response = client.get("/items")
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/health").status_code == 200
+
+
+def test_users_have_their_own_buckets_and_forged_tokens_do_not(client):
+    for _ in range(3):
+        client.get("/items")
+    assert client.get("/items").status_code == 429
+
+    assert client.get("/items", headers=bearer("alice@example.com")).status_code == 200
+    assert client.get("/items", headers={"Authorization": "Bearer forged"}).status_code == 429
+
+
+def scope(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return {"client": (peer, 443), "headers": headers}
+
+
+def test_client_address_trusts_forwarded_for_only_from_proxies(monkeypatch):
+    monkeypatch.setattr(rate_limit, "trusted_proxies", parse_trusted_proxies("10.0.0.0/8,::1"))
+
+    # Behind the load balancer: the hop before it, not the proxy
+    assert client_address(scope("10.1.2.3", "203.0.113.7")) == "203.0.113.7"
+    # A spoofed entry on the left does not win over what the proxy appended
+    assert client_address(scope("10.1.2.3", "1.1.1.1, 203.0.113.7, 10.9.9.9")) == "203.0.113.7"
+    # Direct clients cannot choose their address
+    assert client_address(scope("198.51.100.4", "203.0.113.7")) == "198.51.100.4"
+    assert client_address(scope("10.1.2.3")) == "10.1.2.3"
+    assert client_address({"headers": []}) == "unknown"
+
+
+def test_clients_behind_a_proxy_get_their_own_buckets(client, monkeypatch):
+    monkeypatch.setattr(rate_limit, "trusted_proxies", parse_trusted_proxies("*"))
+    first = {"X-Forwarded-For": "203.0.113.7"}
+    for _ in range(3):
+        client.get("/items", headers=first)
+
+    assert client.get("/items", headers=first).status_code == 429
+    assert client.get("/items", headers={"X-Forwarded-For": "203.0.113.8"}).status_code == 200
+
+
+def test_route_costs_weight_expensive_routes(client, limiter):
+    headers = bearer("bob@example.com")
+    assert limiter.cost("POST", "/exports") == 3
+    assert limiter.cost("GET", "/exports") == 1
+    assert limiter.cost("GET", "/exports/big") == 3  # capped at the burst
+
+    assert client.post("/exports", headers=headers).status_code == 200
+    assert client.get("/items", headers=headers).status_code == 429
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_cluster_window_counts_other_workers_usage():
+    clock = [125.0]  # 5s into the window starting at 120
+    window = ClusterWindow(limit=10, window=60, clock=lambda: clock[0])
+
+    # Last sync: 12 requests in the previous window, 2 in this one
+    window._usage["user:a"] = (12.0, 2.0, 2)
+    # 12 * 55/60 + 2 = 13 > 10: wait until enough of the previous window slides out
+    assert window.wait("user:a", 1) == pytest.approx((13 + 1 - 10) / 12 * 60)
+
+    clock[0] = 175.0
+    # 12 * 5/60 + 2 = 3
+    assert window.wait("user:a", 1) == 0.0
+    for _ in range(7):
+        window.record("user:a", 1)
+    assert window.wait("user:a", 1) == pytest.approx(5.0)  # 1 excess over 12/min of previous window
+
+    clock[0] = 185.0
+    # Next window: the synced 2 slide out; 2 * 55/60 + 7 unsynced + 1 < 10
+    assert window.wait("user:a", 1) == 0.0
+    assert window.wait("user:a", 2) > 0
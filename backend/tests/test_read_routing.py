@@ -0,0 +1,119 @@
+"""
+Test read-replica routing with read-your-writes fallback
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.database as database
+from app.db_routing import ReadYourWritesMiddleware, RecentWrites
+
+
+class FakeRedis:
+    """The SET PX / EXISTS subset of a Redis server shared by several trackers"""
+
+    def __init__(self):
+        self.keys = {}
+
+    async def set(self, key, value, px):
+        self.keys[key] = time.monotonic() + px / 1000
+
+    async def exists(self, key):
+        return int(self.keys.get(key, 0) > time.monotonic())
+
+
+def test_recent_writes_expire_and_stay_bounded():
+    tracker = RecentWrites(window=0.05, max_entries=2, backend="local")
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await tracker.mark(key)
+        evicted, fresh = await tracker.wrote_recently("a"), await tracker.wrote_recently("c")
+        await asyncio.sleep(0.06)
+        return evicted, fresh, await tracker.wrote_recently("c")
+
+    assert asyncio.run(run()) == (False, True, False)
+
+
+def test_marks_are_shared_between_workers():
+    shared = FakeRedis()
+    worker_a = RecentWrites(window=0.05)
+    worker_b = RecentWrites(window=0.05)
+    worker_a._redis = worker_b._redis = shared
+
+    async def run():
+        await worker_a.mark("alice")
+        seen = await worker_b.wrote_recently("alice"), await worker_b.wrote_recently("bob")
+        await asyncio.sleep(0.06)
+        return seen, await worker_b.wrote_recently("alice")
+
+    assert asyncio.run(run()) == ((True, False), False)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engines = {}
+
+    async def create():
+        for name in ("primary", "replica"):
+            engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE role (name TEXT)"))
+                await conn.execute(text(f"INSERT INTO role VALUES ('{name}')"))
+            engines[name] = engine
+
+    asyncio.run(create())
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(engines["primary"]))
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", async_sessionmaker(engines["replica"]))
+    monkeypatch.setattr(database, "read_engine", engines["replica"])
+
+    app = FastAPI()
+    tracker = RecentWrites(window=60, backend="local")
+    monkeypatch.setattr(database, "recent_writes", tracker)
+    app.add_middleware(ReadYourWritesMiddleware, tracker=tracker)
+
+    @app.get("/role")
+    async def role(db=Depends(database.get_read_db)):
+        return (await db.execute(text("SELECT name FROM role"))).scalar()
+
+    @app.post("/write")
+    async def write():
+        return {}
+
+    @app.post("/api/v1/companies/compare")
+    async def compare():
+        return {}
+
+    yield TestClient(app)
+    for engine in engines.values():
+        asyncio.run(engine.dispose())
+
+
+def test_reads_go_to_replica_until_client_writes(client):
+    alice = {"Authorization": "Bearer alice"}
+    bob = {"Authorization": "Bearer bob"}
+
+    assert client.get("/role", headers=alice).json() == "replica"
+    client.post("/write", headers=alice)
+
+    assert client.get("/role", headers=alice).json() == "primary"
+    assert client.get("/role", headers=bob).json() == "replica"
+
+
+def test_read_only_posts_do_not_pin_to_primary(client):
+    alice = {"Authorization": "Bearer alice"}
+
+    client.post("/api/v1/companies/compare", headers=alice)
+
+    assert client.get("/role", headers=alice).json() == "replica"
@@ -0,0 +1,126 @@
+"""
+Test the realtime hub routing and the WebSocket subscription protocol
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.websockets import WebSocketDisconnect
+
+import app.api.v1.realtime as realtime_api
+from app.auth.security import create_access_token
+from app.database import Base
+from app.models.user import User
+import app.services.realtime as realtime
+from app.services.realtime import RealtimeHub, Subscription, realtime_hub
+
+NLD_GDP = {"type": "indicator_update", "source": "eurostat", "indicator_code": "GDP_GROWTH",
+           "country_code": "NLD", "period": "2024-12-31", "value": 1.2, "periods_changed": 1}
+
+
+def test_hub_routes_events_to_matching_topics():
+    async def run():
+        hub = RealtimeHub()
+        by_country, by_indicator, dashboard = hub.connect(), hub.connect(), hub.connect()
+        hub.subscribe(by_country, ["country:NLD", "indicator:GDP_GROWTH"])
+        hub.subscribe(by_indicator, ["indicator:INFLATION"])
+        hub.subscribe(dashboard, ["dashboard"])
+
+        reached = hub.dispatch(json.dumps(NLD_GDP))
+        hub.dispatch(json.dumps({"type": "dashboard_updated"}))
+        hub.disconnect(by_country)
+        return reached, by_country, by_indicator, dashboard, hub
+
+    reached, by_country, by_indicator, dashboard, hub = asyncio.run(run())
+
+    assert reached == 1
+    # Matching two topics still delivers once
+    assert by_country.queue.qsize() == 1
+    assert by_indicator.queue.empty()
+    assert json.loads(dashboard.queue.get_nowait()) == {"type": "dashboard_updated"}
+    assert set(hub.topics) == {"indicator:INFLATION", "dashboard"}
+
+
+def test_dashboard_updates_drop_each_workers_cached_summary(monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(realtime.dashboard_service, "invalidate", lambda: invalidated.append(True))
+    hub = RealtimeHub()
+
+    hub.dispatch(json.dumps(NLD_GDP))
+    assert invalidated == []
+    # As relayed from Redis by a worker that did not ingest anything itself
+    hub.dispatch(json.dumps({"type": "dashboard_updated"}))
+    assert invalidated == [True]
+
+
+def test_subscription_limits(monkeypatch):
+    monkeypatch.setattr("app.services.realtime.settings.REALTIME_MAX_TOPICS", 2)
+
+    async def run():
+        hub = RealtimeHub()
+        subscription = hub.connect()
+        accepted = hub.subscribe(subscription, ["country:nld", "country:NLD", "country:BEL", "country:LUX"])
+
+        slow = Subscription(max_queue=2)
+        for i in range(3):
+            slow.push(str(i))
+        return accepted, [slow.queue.get_nowait() for _ in range(2)], slow.overflowed
+
+    accepted, queued, overflowed = asyncio.run(run())
+
+    assert accepted == ["country:NLD", "country:BEL"]
+    assert queued == ["1", "2"]
+    assert overflowed
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'realtime.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            db.add(User(email="analyst@example.com", hashed_password="x", is_active=True))
+            await db.commit()
+
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(create())
+    monkeypatch.setattr(realtime_api, "AsyncSessionLocal", factory)
+
+    app = FastAPI()
+    app.include_router(realtime_api.router, prefix="/api/v1/realtime")
+    yield TestClient(app)
+    asyncio.run(engine.dispose())
+
+
+def test_websocket_subscribe_and_receive(client):
+    token = create_access_token({"sub": "analyst@example.com"})
+
+    with client.websocket_connect(f"/api/v1/realtime/ws?token={token}") as ws:
+        ws.send_json({"action": "subscribe", "topics": ["country:NLD", "bogus"]})
+        assert ws.receive_json() == {"type": "subscribed", "topics": ["country:NLD"]}
+
+        ws.portal.call(realtime_hub.dispatch, json.dumps(NLD_GDP))
+        assert ws.receive_json() == NLD_GDP
+
+        ws.send_json({"action": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+    assert realtime_hub.connection_count == 0
+
+
+def test_websocket_rejects_invalid_token(client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/api/v1/realtime/ws?token=invalid") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
@@ -0,0 +1,67 @@
+"""
+Test content negotiation for time-series responses
+Row JSON, columnar JSON and Arrow IPC must carry the same data
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from starlette.requests import Request
+
+from app.api.formats import (
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    build_columnar_payload,
+    negotiate_media_type,
+    render_records,
+)
+
+RECORDS = [
+    {"country": "NLD", "date": "2022-12-31", "value": 4.3, "indicator": "gdp_growth", "unit": "percent"},
+    {"country": "BEL", "date": "2022-12-31", "value": 3.0, "indicator": "gdp_growth", "unit": "percent"},
+    {"country": "DEU", "date": "2023-12-31", "value": -0.3, "indicator": "gdp_growth", "unit": "percent"},
+]
+
+
+def make_request(accept=None):
+    headers = [(b"accept", accept.encode())] if accept else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.parametrize("accept,expected", [
+    (None, JSON_MEDIA_TYPE),
+    ("*/*", JSON_MEDIA_TYPE),
+    ("text/html", JSON_MEDIA_TYPE),
+    (COLUMNAR_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE),
+    (f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.5", ARROW_STREAM_MEDIA_TYPE),
+    (f"{ARROW_STREAM_MEDIA_TYPE};q=0.2, {COLUMNAR_MEDIA_TYPE}", COLUMNAR_MEDIA_TYPE),
+])
+def test_negotiate_media_type(accept, expected):
+    assert negotiate_media_type(make_request(accept)) == expected
+
+
+def test_columnar_payload_hoists_constant_columns():
+    payload = build_columnar_payload(RECORDS, {"total_records": 3})
+
+    assert payload["row_count"] == 3
+    assert payload["constants"] == {"indicator": "gdp_growth", "unit": "percent"}
+    assert payload["columns"]["country"] == ["NLD", "BEL", "DEU"]
+    assert payload["columns"]["value"] == [4.3, 3.0, -0.3]
+
+
+def test_arrow_stream_round_trip():
+    pa = pytest.importorskip("pyarrow")
+
+    response = render_records(make_request(ARROW_STREAM_MEDIA_TYPE), RECORDS, {"total_records": 3})
+    table = pa.ipc.open_stream(response.body).read_all()
+
+    assert response.media_type == ARROW_STREAM_MEDIA_TYPE
+    assert table.num_rows == 3
+    assert table.schema.field("date").type == pa.date32()
+    assert table.column("value").to_pylist() == [4.3, 3.0, -0.3]
+    assert b"meta" in table.schema.metadata
@@ -0,0 +1,187 @@
+"""
+Test risk score history: bulk backfill across fiscal years and the history endpoint
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import func, select
+
+import app.api.v1.companies as companies_api
+from app.auth.dependencies import require_admin
+from app.models.company import CashFlow, Company, CompanyRiskScore, FinancialStatement
+from app.services.company_risk import risk_scoring_service
+from app.services.risk_backfill import RiskBackfill
+from app.services.scoring_models import scoring_model_registry
+
+SCORED_FIELDS = (
+    'macro_risk_score', 'sector_risk_score', 'financial_health_score', 'overall_risk_score',
+    'risk_category', 'model_version', 'debt_to_ebitda', 'ebitda_margin', 'roa', 'roe', 'current_ratio',
+    'quick_ratio', 'free_cashflow_yield',
+)
+
+
+@pytest.fixture(autouse=True)
+def default_model(monkeypatch):
+    monkeypatch.setattr(scoring_model_registry, "active", scoring_model_registry.default)
+    monkeypatch.setattr(scoring_model_registry, "refresh_interval", float("inf"))
+
+
+async def seed(session_factory):
+    async with session_factory() as db:
+        db.add(Company(id=1, name="Steady NV", country_code="NL", nace_code="C10"))
+        db.add(Company(id=2, name="Leveraged SA", country_code="BE", nace_code="K64"))
+        for year in range(2019, 2024):
+            growth = year - 2018
+            db.add(FinancialStatement(
+                company_id=1, fiscal_year=year, revenue=1000.0 * growth, ebitda=150.0 * growth,
+                net_income=60.0 * growth, total_assets=2000.0, total_equity=800.0,
+                current_assets=700.0, current_liabilities=400.0, inventory=100.0,
+                long_term_debt=500.0,
+                period_end_date=date(year, 6, 30) if year == 2023 else None,
+            ))
+            if year != 2020:
+                db.add(CashFlow(company_id=1, fiscal_year=year, operating_cashflow=120.0, free_cashflow=80.0))
+        for year in (2022, 2023):
+            db.add(FinancialStatement(
+                company_id=2, fiscal_year=year, revenue=500.0, ebitda=20.0, net_income=-10.0,
+                total_assets=3000.0, total_equity=100.0, long_term_debt=2500.0,
+            ))
+        await db.commit()
+
+
+def test_backfill_scores_every_year_and_is_idempotent(session_factory):
+    backfill = RiskBackfill(session_factory=session_factory, chunk_size=3, workers=0)
+
+    async def run():
+        await seed(session_factory)
+        first = await backfill.run()
+        second = await backfill.run(company_ids=[1], from_year=2022)
+        async with session_factory() as db:
+            scores = (await db.execute(
+                select(CompanyRiskScore).order_by(CompanyRiskScore.company_id, CompanyRiskScore.fiscal_year)
+            )).scalars().all()
+            expected = {}
+            for score in scores:
+                computed = await risk_scoring_service.calculate_company_risk(db, score.company_id, score.fiscal_year)
+                expected[score.company_id, score.fiscal_year] = computed
+        return first, second, scores, expected
+
+    first, second, scores, expected = asyncio.run(run())
+
+    assert first["statements"] == 7
+    assert first["scores_written"] == 7
+    assert first["chunks"] == 3
+    assert not first["parallel"]
+    assert second["scores_written"] == 2
+    # The second run overwrote its rows rather than adding new ones
+    assert [(s.company_id, s.fiscal_year) for s in scores] == [(1, y) for y in range(2019, 2024)] + [(2, 2022), (2, 2023)]
+    assert scores[4].calculation_date == date(2023, 6, 30)
+    assert scores[0].calculation_date == date(2019, 12, 31)
+    # Bulk scoring matches the one-at-a-time path
+    for score in scores:
+        computed = expected[score.company_id, score.fiscal_year]
+        assert {f: getattr(score, f) for f in SCORED_FIELDS} == {f: computed[f] for f in SCORED_FIELDS}
+
+
+def test_parallel_backfill_matches_serial(session_factory):
+    parallel = RiskBackfill(session_factory=session_factory, chunk_size=3, workers=2, parallel_min_rows=1)
+    serial = RiskBackfill(session_factory=session_factory, chunk_size=3, workers=0)
+
+    async def scored():
+        async with session_factory() as db:
+            scores = (await db.execute(
+                select(CompanyRiskScore).order_by(CompanyRiskScore.company_id, CompanyRiskScore.fiscal_year)
+            )).scalars().all()
+        return [(s.company_id, s.fiscal_year, *(getattr(s, f) for f in SCORED_FIELDS)) for s in scores]
+
+    async def run():
+        await seed(session_factory)
+        first = await parallel.run()
+        from_pool = await scored()
+        await serial.run()
+        return first, from_pool, await scored()
+
+    first, from_pool, from_serial = asyncio.run(run())
+
+    assert first["parallel"]
+    assert first["chunks"] == 3
+    assert first["scores_written"] == 7
+    assert from_pool == from_serial
+
+
+def test_backfill_endpoint_rejects_a_second_run(api_app, api_client, api_user, session_factory, monkeypatch):
+    release = asyncio.Event()
+
+    class SlowBackfill(RiskBackfill):
+        async def run(self, company_ids=None, from_year=None):
+            await release.wait()
+            return await super().run(company_ids, from_year)
+
+    backfill = SlowBackfill(session_factory=session_factory, workers=0)
+    monkeypatch.setattr(companies_api, "risk_backfill", backfill)
+    api_app.include_router(companies_api.router)
+    api_app.dependency_overrides[require_admin] = lambda: api_user
+
+    async def run():
+        await seed(session_factory)
+        async with api_client() as client:
+            first = await client.post("/companies/risk/backfill", json={"from_year": 2022})
+            second = await client.post("/companies/risk/backfill", json={})
+            release.set()
+            await backfill._task
+            third = await client.post("/companies/risk/backfill", json={})
+            await backfill._task
+        async with session_factory() as db:
+            total = await db.scalar(select(func.count(CompanyRiskScore.id)))
+        return first, second, third, total
+
+    first, second, third, total = asyncio.run(run())
+
+    assert first.status_code == 202
+    assert first.json()["from_year"] == 2022
+    assert second.status_code == 409
+    assert "already running" in second.json()["detail"]
+    assert third.status_code == 202
+    assert total == 7
+    assert backfill.current is None
+
+
+def test_risk_history_endpoint(api_app, api_client, session_factory):
+    api_app.include_router(companies_api.router)
+
+    async def run():
+        await seed(session_factory)
+        await RiskBackfill(session_factory=session_factory, workers=0).run()
+        # A later recalculation of 2023 supersedes the backfilled one
+        async with session_factory() as db:
+            db.add(CompanyRiskScore(
+                company_id=1, fiscal_year=2023, calculation_date=date(2024, 3, 1), overall_risk_score=12.0,
+            ))
+            await db.commit()
+
+        async with api_client() as client:
+            full = await client.get("/companies/1/risk/history")
+            window = await client.get("/companies/1/risk/history", params={"from_year": 2021, "to_year": 2022})
+            missing = await client.get("/companies/42/risk/history")
+        async with session_factory() as db:
+            total = await db.scalar(select(func.count(CompanyRiskScore.id)))
+        return full, window, missing, total
+
+    full, window, missing, total = asyncio.run(run())
+
+    assert full.status_code == 200
+    body = full.json()
+    assert body["company"]["name"] == "Steady NV"
+    assert [p["fiscal_year"] for p in body["points"]] == [2019, 2020, 2021, 2022, 2023]
+    assert body["points"][-1]["overall_risk_score"] == 12.0
+    assert body["points"][-1]["calculation_date"] == "2024-03-01"
+    assert [p["fiscal_year"] for p in window.json()["points"]] == [2021, 2022]
+    assert missing.status_code == 404
+    assert total == 8
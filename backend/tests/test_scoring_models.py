@@ -0,0 +1,256 @@
+"""
+Test scoring models as data: compiled evaluators, versions and the registry endpoints
+"""
+
+import asyncio
+import os
+import random
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+import app.api.v1.companies as companies_api
+import app.api.v1.scoring_models as scoring_models_api
+from app.auth.dependencies import require_admin
+from app.database import get_db
+from app.models.company import CashFlow, Company, CompanyRiskScore, FinancialStatement, RiskScoringModel
+from app.models.user import User
+from app.services.scoring_models import (
+    CASHFLOW_FIELDS,
+    DEFAULT_DEFINITION,
+    FINANCIAL_FIELDS,
+    ScoringModel,
+    scoring_model_registry,
+)
+from app.services.stress_testing import StressTestService
+
+
+def original_health_score(f, cf):
+    """The hard-coded if/elif rules the default model replaces"""
+    risk_points = 0
+    if f['net_income'] and f['revenue']:
+        net_margin = (f['net_income'] / f['revenue']) * 100
+        if net_margin < -10:
+            risk_points += 20
+        elif net_margin < 0:
+            risk_points += 15
+        elif net_margin < 5:
+            risk_points += 10
+        elif net_margin < 10:
+            risk_points += 5
+    else:
+        risk_points += 10
+    if f['long_term_debt'] and f['ebitda']:
+        debt_to_ebitda = f['long_term_debt'] / f['ebitda']
+        if debt_to_ebitda > 5:
+            risk_points += 30
+        elif debt_to_ebitda > 3:
+            risk_points += 20
+        elif debt_to_ebitda > 2:
+            risk_points += 10
+    if f['current_assets'] and f['current_liabilities']:
+        current_ratio = f['current_assets'] / f['current_liabilities']
+        if current_ratio < 0.8:
+            risk_points += 20
+        elif current_ratio < 1.0:
+            risk_points += 15
+        elif current_ratio < 1.2:
+            risk_points += 10
+    if cf and cf['operating_cashflow']:
+        if cf['operating_cashflow'] < 0:
+            risk_points += 20
+        elif cf['free_cashflow'] and cf['free_cashflow'] < 0:
+            risk_points += 10
+    if f['total_equity'] and f['total_assets']:
+        equity_ratio = (f['total_equity'] / f['total_assets']) * 100
+        if equity_ratio < 10:
+            risk_points += 10
+        elif equity_ratio < 20:
+            risk_points += 5
+    return (risk_points / 100) * 100
+
+
+def random_columns(rng, count):
+    def value():
+        return rng.choice([None, 0.0, rng.choice([-1, 1]) * round(rng.uniform(0, 5000), 1)])
+
+    financials = [{name: value() for name in FINANCIAL_FIELDS} for _ in range(count)]
+    cashflows = [{name: value() for name in CASHFLOW_FIELDS} if rng.random() < 0.8 else None for _ in range(count)]
+    columns = {
+        name: np.array([np.nan if f[name] is None else f[name] for f in financials], dtype=float)
+        for name in FINANCIAL_FIELDS
+    }
+    for name in CASHFLOW_FIELDS:
+        columns[name] = np.array(
+            [np.nan if cf is None or cf[name] is None else cf[name] for cf in cashflows], dtype=float
+        )
+    return financials, cashflows, columns, np.array([cf is not None for cf in cashflows])
+
+
+def test_default_model_reproduces_the_original_rules():
+    financials, cashflows, columns, has_cashflow = random_columns(random.Random(13), 5000)
+    model = ScoringModel("default", 1, DEFAULT_DEFINITION)
+
+    scores = model.health_scores(columns, has_cashflow)
+
+    assert scores.tolist() == [original_health_score(f, cf) for f, cf in zip(financials, cashflows)]
+    assert model.categories(np.array([0.0, 29.99, 30.0, 50.0, 69.99, 70.0])).tolist() == [0, 0, 1, 2, 2, 3]
+
+
+def test_lookup_and_select_evaluators_agree():
+    _, _, columns, has_cashflow = random_columns(random.Random(17), 2000)
+    bands = [{'above': 5, 'points': 30}, {'above': 3, 'points': 20}, {'above': 2, 'points': 10}]
+    definition = {
+        **DEFAULT_DEFINITION,
+        'factors': [
+            {'name': 'lookup', 'metric': 'debt_to_ebitda', 'missing_points': 7, 'bands': bands},
+            # Unordered thresholds cannot be a lookup: first match wins, so the 3 band shadows the 5 band
+            {'name': 'select', 'metric': 'debt_to_ebitda', 'missing_points': 7, 'bands': [bands[1], bands[0], bands[2]]},
+        ],
+    }
+    assert ScoringModel._compile_lookup('debt_to_ebitda', bands) is not None
+    assert ScoringModel._compile_lookup('debt_to_ebitda', definition['factors'][1]['bands']) is None
+
+    lookup_only = ScoringModel("a", 1, {**definition, 'factors': definition['factors'][:1]})
+    select_only = ScoringModel("b", 1, {**definition, 'factors': definition['factors'][1:]})
+    leverage = np.full(len(has_cashflow), np.nan)
+    known = ~np.isnan(columns['long_term_debt']) & (columns['long_term_debt'] != 0) & \
+        ~np.isnan(columns['ebitda']) & (columns['ebitda'] != 0)
+    np.divide(columns['long_term_debt'], columns['ebitda'], out=leverage, where=known)
+
+    expected_lookup = np.where(known, np.select([leverage > 5, leverage > 3, leverage > 2], [30, 20, 10], 0), 7)
+    expected_select = np.where(known, np.select([leverage > 3, leverage > 2], [20, 10], 0), 7)
+    # Health score = points / max_points * 100
+    assert lookup_only.health_scores(columns, has_cashflow).tolist() == (expected_lookup / 100 * 100).tolist()
+    assert select_only.health_scores(columns, has_cashflow).tolist() == (expected_select / 100 * 100).tolist()
+
+
+def test_invalid_definitions_are_rejected():
+    with pytest.raises(ValueError, match="Unknown metric"):
+        ScoringModel("x", 1, {**DEFAULT_DEFINITION, 'factors': [{'name': 'f', 'metric': 'vibes', 'bands': [{'below': 1, 'points': 1}]}]})
+    with pytest.raises(ValueError, match="add up to 1"):
+        ScoringModel("x", 1, {**DEFAULT_DEFINITION, 'weights': {'macro': 0.5, 'sector': 0.5, 'financial': 0.5}})
+
+
+@pytest.fixture
+def api_user():
+    return User(id=7, email="admin@example.com", is_admin=True)
+
+
+def test_model_versions_through_the_api(api_app, api_client, api_user, session_factory, monkeypatch):
+    monkeypatch.setattr(scoring_model_registry, "session_factory", session_factory)
+    monkeypatch.setattr(scoring_model_registry, "active", scoring_model_registry.default)
+    monkeypatch.setattr(scoring_model_registry, "checked_at", 0.0)
+    monkeypatch.setattr(scoring_model_registry, "_compiled", {})
+    monkeypatch.setattr(companies_api, "stress_test_service", StressTestService(session_factory=session_factory))
+
+    api_app.include_router(companies_api.router)
+    api_app.include_router(scoring_models_api.router)
+    api_app.dependency_overrides[require_admin] = lambda: api_user
+
+    # Leverage counts double and any debt/EBITDA above 1 is penalized
+    conservative = {
+        "weights": {"macro": 0.2, "sector": 0.2, "financial": 0.6},
+        "thresholds": {"low": 20, "medium": 40, "high": 60},
+        "factors": [
+            *DEFAULT_DEFINITION["factors"][:1],
+            {"name": "leverage", "metric": "debt_to_ebitda", "bands": [{"above": 1, "points": 60}]},
+            *DEFAULT_DEFINITION["factors"][2:],
+        ],
+    }
+
+    async def run():
+        async with session_factory() as db:
+            db.add(Company(id=1, name="Levered NV", country_code="NL", nace_code="C10"))
+            db.add(FinancialStatement(
+                company_id=1, fiscal_year=2023, revenue=1000.0, ebitda=150.0, net_income=60.0,
+                total_assets=2000.0, total_equity=800.0, current_assets=700.0, current_liabilities=400.0,
+                long_term_debt=300.0,
+            ))
+            db.add(CashFlow(company_id=1, fiscal_year=2023, operating_cashflow=120.0, free_cashflow=80.0))
+            await db.commit()
+
+        async with api_client() as client:
+            before = await client.get("/companies/1/risk")
+            created = await client.post("/scoring-models", json={"name": "conservative", "definition": conservative})
+            second = await client.post("/scoring-models", json={"name": "conservative", "definition": conservative})
+            bad = await client.post("/scoring-models", json={
+                "name": "broken", "definition": {**conservative, "factors": [
+                    {"name": "f", "metric": "vibes", "bands": [{"below": 1, "points": 1}]}
+                ]},
+            })
+            side_by_side = await client.post("/companies/stress-test", json={"model": "conservative@1"})
+            unknown = await client.post("/companies/stress-test", json={"model": "conservative@9"})
+
+            activated = await client.post("/scoring-models/conservative/2/activate")
+            async with session_factory() as db:
+                score = (await db.execute(select(CompanyRiskScore))).scalar_one()
+                await db.delete(score)
+                await db.commit()
+            after = await client.get("/companies/1/risk")
+            listing = await client.get("/scoring-models")
+            reset = await client.post("/scoring-models/default/1/activate")
+            listing_after_reset = await client.get("/scoring-models")
+        return before, created, second, bad, side_by_side, unknown, activated, after, listing, reset, listing_after_reset
+
+    (before, created, second, bad, side_by_side, unknown,
+     activated, after, listing, reset, listing_after_reset) = asyncio.run(run())
+
+    assert before.json()["risk_score"]["model_version"] == "default@1"
+    assert created.status_code == 201
+    assert created.json()["label"] == "conservative@1"
+    assert not created.json()["is_active"]
+    assert second.json()["version"] == 2
+    assert bad.status_code == 400
+    body = side_by_side.json()
+    assert (body["baseline_model"], body["scenario_model"]) == ("default@1", "conservative@1")
+    assert body["migrations"][0]["company_id"] == 1
+    assert unknown.status_code == 404
+
+    assert activated.json()["is_active"]
+    risk = after.json()["risk_score"]
+    assert risk["model_version"] == "conservative@2"
+    assert risk["financial_health_score"] == 65.0  # 60 for leverage 2.0 > 1, 5 for a 6% net margin
+    assert [m["is_active"] for m in listing.json()] == [False, False, True]
+    assert reset.json()["built_in"]
+    assert [m["is_active"] for m in listing_after_reset.json()] == [True, False, False]
+
+
+def test_concurrent_create_takes_the_next_version(api_app, api_client, api_user, session_factory, monkeypatch):
+    monkeypatch.setattr(scoring_model_registry, "session_factory", session_factory)
+    api_app.include_router(scoring_models_api.router)
+    api_app.dependency_overrides[require_admin] = lambda: api_user
+    raced = []
+
+    async def racing_db():
+        # Another admin adds version 1 right after this request numbered its version
+        async with session_factory() as db:
+            scalar = db.scalar
+
+            async def scalar_then_race(*args, **kwargs):
+                result = await scalar(*args, **kwargs)
+                if not raced:
+                    raced.append(True)
+                    async with session_factory() as other:
+                        other.add(RiskScoringModel(name="racy", version=1, definition=DEFAULT_DEFINITION))
+                        await other.commit()
+                return result
+
+            db.scalar = scalar_then_race
+            yield db
+
+    api_app.dependency_overrides[get_db] = racing_db
+
+    async def run():
+        async with api_client() as client:
+            return await client.post("/scoring-models", json={"name": "racy", "definition": DEFAULT_DEFINITION})
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 201
+    assert response.json()["label"] == "racy@2"
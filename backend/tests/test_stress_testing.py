@@ -0,0 +1,173 @@
+"""
+Test risk stress scenarios: vectorized scoring, shocks and the endpoint
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+import app.api.v1.companies as companies_api
+from app.models.company import CashFlow, Company, FinancialStatement
+from app.schemas.company import StressTestRequest
+from app.services.company_risk import risk_scoring_service
+from app.services.scoring_models import CASHFLOW_FIELDS, FINANCIAL_FIELDS, scoring_model_registry
+from app.services.stress_testing import CATEGORIES, RiskUniverse, StressTestService
+
+
+def random_rows(rng, count):
+    def value():
+        return rng.choice([None, 0.0, round(rng.uniform(-500, 3000), 1)])
+
+    rows = []
+    for company_id in range(count):
+        has_cashflow = rng.random() < 0.8
+        rows.append((
+            company_id,
+            f"Company {company_id}",
+            rng.choice(["NL", "BE", "LU", "DE", "FR"]),
+            rng.choice([None, "C10", "K64", "F41", "Q86", "X99"]),
+            *(value() for _ in FINANCIAL_FIELDS),
+            company_id if has_cashflow else None,
+            *((value() for _ in CASHFLOW_FIELDS) if has_cashflow else (None,) * len(CASHFLOW_FIELDS)),
+        ))
+    return rows
+
+
+@pytest.fixture(autouse=True)
+def default_model(monkeypatch):
+    # Score with the built-in model; the endpoint test points the registry at its database
+    monkeypatch.setattr(scoring_model_registry, "active", scoring_model_registry.default)
+    monkeypatch.setattr(scoring_model_registry, "refresh_interval", float("inf"))
+
+
+class StaticUniverse(StressTestService):
+    def __init__(self, universe):
+        super().__init__()
+        self.cache.set("universe", universe)
+
+
+def test_baseline_matches_scoring_model():
+    rows = random_rows(random.Random(7), 2000)
+    service = StaticUniverse(RiskUniverse.from_rows(rows))
+    scores, categories = service._score(
+        scoring_model_registry.default, service.universe, service.universe.columns, service.universe.macro_risk
+    )
+
+    width = len(FINANCIAL_FIELDS)
+    for row, score, category in zip(rows, scores, categories):
+        financial = SimpleNamespace(**dict(zip(FINANCIAL_FIELDS, row[4:4 + width])))
+        cashflow = None
+        if row[4 + width] is not None:
+            cashflow = SimpleNamespace(**dict(zip(CASHFLOW_FIELDS, row[5 + width:])))
+        expected = risk_scoring_service.score_statement(row[0], row[2], row[3], financial, cashflow, 2024, None)
+        assert round(float(score), 2) == expected['overall_risk_score']
+        assert CATEGORIES[category] == expected['risk_category']
+
+
+def test_shocks_move_the_right_companies():
+    rows = [
+        # id, name, country, nace, FINANCIAL_FIELDS..., cash flow id, CASHFLOW_FIELDS...
+        (1, "Indebted Mfg", "NL", "C10", 1000.0, 150.0, 60.0, 2000.0, 800.0, 700.0, 400.0, 100.0, 500.0, 1, 120.0, 80.0),
+        (2, "Debt-free Bank", "NL", "K64", 1000.0, 150.0, 60.0, 2000.0, 800.0, 700.0, 400.0, 100.0, None, 2, 120.0, 80.0),
+        (3, "Belgian Mfg", "BE", "C20", 1000.0, 150.0, 60.0, 2000.0, 800.0, 700.0, 400.0, 100.0, None, None, None, None),
+    ]
+    service = StaticUniverse(RiskUniverse.from_rows(rows))
+
+    def run(**scenario):
+        return asyncio.run(service.run(StressTestRequest(**scenario)))
+
+    baseline = run()
+    assert baseline["universe_size"] == 3
+    assert baseline["mean_shift"] == 0.0
+    assert baseline["migrations"] == []
+    assert sum(baseline["baseline"]["histogram"]) == 3
+
+    # 2000bp on 500 of debt wipes out company 1's net income (60 - 100) and cash flow
+    rates = run(rate_shock_bp=2000)
+    assert [m["company_id"] for m in rates["migrations"]] == [1]
+    assert rates["downgrades"] == 1 and rates["upgrades"] == 0
+
+    # Only manufacturing in the Netherlands loses revenue
+    revenue = run(revenue_shocks=[{"nace_prefix": "c", "country_code": "NL", "change_pct": -50, "flow_through": 1}])
+    assert [m["company_id"] for m in revenue["migrations"]] == [1]
+    assert revenue["migrations"][0]["scenario_score"] > revenue["migrations"][0]["baseline_score"]
+
+    # GDP only hits Belgium's macro risk: 30 + 3 * 5 points, weighted 0.3
+    gdp = run(gdp_shock_pct=-3, gdp_countries=["BE"])
+    assert gdp["mean_shift"] == pytest.approx(4.5 / 3, abs=0.01)
+
+    # Everything is Critical when the thresholds say so
+    strict = run(thresholds={"low": 1, "medium": 2, "high": 3}, migrations_limit=2)
+    assert strict["scenario"]["categories"]["Critical"] == 3
+    assert len(strict["migrations"]) == 2
+    assert sum(strict["migration_matrix"]["Low"].values()) + sum(strict["migration_matrix"]["Medium"].values()) == 3
+
+
+def test_full_universe_scenario_under_a_second():
+    rows = random_rows(random.Random(11), 100_000)
+    service = StaticUniverse(RiskUniverse.from_rows(rows))
+    scenario = StressTestRequest(
+        rate_shock_bp=200,
+        gdp_shock_pct=-3,
+        revenue_shocks=[{"nace_prefix": "C", "change_pct": -20}],
+        weights={"macro": 0.4, "sector": 0.2, "financial": 0.4},
+    )
+
+    started = time.perf_counter()
+    result = asyncio.run(service.run(scenario))
+    assert time.perf_counter() - started < 1.0
+    assert result["universe_size"] == 100_000
+    assert sum(result["scenario"]["categories"].values()) == 100_000
+    assert result["scenario"]["mean"] > result["baseline"]["mean"]
+    # The universe itself is never modified
+    assert np.array_equal(
+        service.universe.columns["revenue"], RiskUniverse.from_rows(rows).columns["revenue"], equal_nan=True
+    )
+
+
+def test_stress_test_endpoint(api_app, api_client, session_factory, monkeypatch):
+    service = StressTestService(session_factory=session_factory, max_age=3600)
+    monkeypatch.setattr(companies_api, "stress_test_service", service)
+    monkeypatch.setattr(scoring_model_registry, "session_factory", session_factory)
+    monkeypatch.setattr(scoring_model_registry, "refresh_interval", 0)
+
+    api_app.include_router(companies_api.router)
+
+    async def run():
+        async with session_factory() as db:
+            db.add(Company(id=1, name="Old Data NV", country_code="NL", nace_code="C10"))
+            db.add(Company(id=2, name="No Data BV", country_code="NL"))
+            db.add(FinancialStatement(company_id=1, fiscal_year=2022, revenue=100.0, net_income=-50.0))
+            db.add(FinancialStatement(
+                company_id=1, fiscal_year=2023, revenue=1000.0, ebitda=150.0, net_income=60.0,
+                total_assets=2000.0, total_equity=800.0, long_term_debt=500.0,
+            ))
+            db.add(CashFlow(company_id=1, fiscal_year=2023, operating_cashflow=120.0, free_cashflow=80.0))
+            await db.commit()
+
+        async with api_client() as client:
+            ok = await client.post("/companies/stress-test", json={"rate_shock_bp": 200})
+            bad_weights = await client.post(
+                "/companies/stress-test", json={"weights": {"macro": 0.5, "sector": 0.5, "financial": 0.5}}
+            )
+        return ok, bad_weights
+
+    ok, bad_weights = asyncio.run(run())
+
+    assert ok.status_code == 200
+    body = ok.json()
+    assert body["universe_size"] == 1
+    # Latest year only: 2023 statements with cash flow
+    assert service.universe.columns["revenue"].tolist() == [1000.0]
+    assert service.universe.has_cashflow.tolist() == [True]
+    assert body["baseline"]["categories"] == {"Low": 1, "Medium": 0, "High": 0, "Critical": 0}
+    assert bad_weights.status_code == 422
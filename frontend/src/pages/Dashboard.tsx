@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '@/context/AuthContext';
 import { dataService } from '@/services/data';
+import { subscribeRealtime } from '@/services/realtime';
 import { Card } from '@/components/Card';
 import { Button } from '@/components/Button';
 import { Loading } from '@/components/Loading';
@@ -19,15 +20,18 @@ export const Dashboard = () => {
 
   useEffect(() => {
     loadDashboard();
+    // Refresh when ingestion changes stored data instead of polling
+    return subscribeRealtime(['dashboard'], () => loadDashboard(false));
   }, []);
 
-  const loadDashboard = async () => {
+  const loadDashboard = async (showLoading = true) => {
     try {
-      setLoading(true);
+      if (showLoading) setLoading(true);
       const data = await dataService.getDashboardSummary();
       setSummary(data);
     } catch (err: any) {
-      setError(err.response?.data?.detail || 'Failed to load dashboard');
+      // Keep showing the current data if a background refresh fails
+      if (showLoading) setError(err.response?.data?.detail || 'Failed to load dashboard');
     } finally {
       setLoading(false);
     }
@@ -50,7 +54,7 @@ export const Dashboard = () => {
             <AlertTriangle className="h-12 w-12 text-red-500 mx-auto mb-4" />
             <h2 className="text-xl font-bold text-gray-900 mb-2">Error Loading Dashboard</h2>
             <p className="text-gray-600 mb-4">{error}</p>
-            <Button onClick={loadDashboard}>Try Again</Button>
+            <Button onClick={() => loadDashboard()}>Try Again</Button>
           </div>
         </Card>
       </div>
@@ -127,7 +131,7 @@ export const Dashboard = () => {
             <div className="flex items-center justify-between">
               <div>
                 <p className="text-sm text-gray-600 mb-1">Data Freshness</p>
-                <p className="text-3xl font-bold text-gray-900">{summary?.data_freshness || 0}h</p>
+                <p className="text-3xl font-bold text-gray-900">{summary?.data_freshness ?? 0}d</p>
               </div>
               <div className="bg-blue-100 p-3 rounded-full">
                 <TrendingUp className="h-6 w-6 text-blue-600" />
@@ -1,7 +1,7 @@
 import axios, { AxiosInstance, AxiosError, InternalAxiosRequestConfig } from 'axios';
 import type { ApiError } from '@/types';
 
-const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
+export const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
 
 class ApiClient {
   private client: AxiosInstance;
@@ -90,6 +90,10 @@ class ApiClient {
     localStorage.removeItem('refresh_token');
   }
 
+  public getAccessToken(): string | null {
+    return this.accessToken;
+  }
+
   public isAuthenticated(): boolean {
     return !!this.accessToken;
   }
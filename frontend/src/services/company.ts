@@ -8,6 +8,9 @@ import type {
   CompanyDetail,
   CompanyFinancials,
   CompanyRiskAnalysis,
+  CompanyRiskHistory,
+  StressTestRequest,
+  StressTestResult,
   CompanyIngestRequest,
   CompanyIngestResponse,
 } from '@/types/company';
@@ -47,11 +50,15 @@ export const companyService = {
   },
 
   /**
-   * Get multi-year financial data
+   * Get multi-year financial data, optionally with server-computed growth and margin series
    */
-  async getCompanyFinancials(companyId: number, years: number = 5): Promise<CompanyFinancials> {
+  async getCompanyFinancials(
+    companyId: number,
+    years: number = 5,
+    includeDerived: boolean = false
+  ): Promise<CompanyFinancials> {
     const response = await apiClient.getClient().get<CompanyFinancials>(
-      `/api/v1/companies/${companyId}/financials?years=${years}`
+      `/api/v1/companies/${companyId}/financials?years=${years}&include_derived=${includeDerived}`
     );
     return response.data;
   },
@@ -68,6 +75,21 @@ export const companyService = {
     return response.data;
   },
 
+  /**
+   * Get the company's risk score for each fiscal year
+   */
+  async getCompanyRiskHistory(
+    companyId: number,
+    fromYear?: number,
+    toYear?: number
+  ): Promise<CompanyRiskHistory> {
+    const response = await apiClient.getClient().get<CompanyRiskHistory>(
+      `/api/v1/companies/${companyId}/risk/history`,
+      { params: { from_year: fromYear, to_year: toYear } }
+    );
+    return response.data;
+  },
+
   /**
    * Compare multiple companies
    */
@@ -79,6 +101,17 @@ export const companyService = {
     return response.data;
   },
 
+  /**
+   * Run a what-if scenario across all companies
+   */
+  async runStressTest(scenario: StressTestRequest): Promise<StressTestResult> {
+    const response = await apiClient.getClient().post<StressTestResult>(
+      '/api/v1/companies/stress-test',
+      scenario
+    );
+    return response.data;
+  },
+
   /**
    * Ingest company data from Yahoo Finance
    */
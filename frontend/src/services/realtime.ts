@@ -0,0 +1,73 @@
+/**
+ * Realtime updates over WebSocket
+ * Subscribes to dashboard, country and indicator topics and reconnects with backoff
+ */
+
+import apiClient, { API_BASE_URL } from './api';
+
+export interface IndicatorUpdateEvent {
+  type: 'indicator_update';
+  source: string;
+  indicator_code: string;
+  country_code: string;
+  period: string;
+  value: number;
+  periods_changed: number;
+}
+
+export type RealtimeEvent =
+  | IndicatorUpdateEvent
+  | { type: 'dashboard_updated' }
+  | { type: 'resync' };
+
+const MAX_BACKOFF_MS = 30000;
+
+/**
+ * Subscribe to realtime topics (e.g. "dashboard", "country:NLD", "indicator:GDP_GROWTH")
+ * Returns an unsubscribe function that closes the connection.
+ */
+export function subscribeRealtime(topics: string[], onEvent: (event: RealtimeEvent) => void): () => void {
+  let socket: WebSocket | null = null;
+  let closed = false;
+  let attempts = 0;
+  let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+  const connect = () => {
+    const token = apiClient.getAccessToken();
+    if (!token || closed) return;
+
+    const url = `${API_BASE_URL.replace(/^http/, 'ws')}/api/v1/realtime/ws?token=${encodeURIComponent(token)}`;
+    socket = new WebSocket(url);
+
+    socket.onopen = () => {
+      attempts = 0;
+      socket?.send(JSON.stringify({ action: 'subscribe', topics }));
+    };
+
+    socket.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      if (['indicator_update', 'dashboard_updated', 'resync'].includes(event.type)) {
+        onEvent(event as RealtimeEvent);
+      }
+    };
+
+    socket.onclose = () => {
+      if (closed) return;
+      // Missed events while disconnected: let the caller refetch once reconnected
+      const delay = Math.min(1000 * 2 ** attempts, MAX_BACKOFF_MS);
+      attempts += 1;
+      retryTimer = setTimeout(() => {
+        connect();
+        onEvent({ type: 'resync' });
+      }, delay);
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    socket?.close();
+  };
+}
@@ -108,6 +108,7 @@ export interface CompanyRiskScore {
   quick_ratio?: number;
   free_cashflow_yield?: number;
   
+  model_version?: string | null; // scoring model, name@version
   created_at: string;
 }
 
@@ -146,10 +147,20 @@ export interface CompanySearchResponse {
   limit: number;
 }
 
+export interface FinancialDerivedSeries {
+  fiscal_years: number[];
+  yoy_growth: Record<string, (number | null)[]>;
+  cagr: Record<string, number | null>;
+  margins: Record<string, (number | null)[]>;
+  rolling_margins: Record<string, (number | null)[]>;
+  rolling_window: number;
+}
+
 export interface CompanyFinancials {
   company: Company;
   financial_statements: FinancialStatement[];
   cashflows: CashFlow[];
+  derived?: FinancialDerivedSeries | null;
 }
 
 export interface CompanyRiskAnalysis {
@@ -160,6 +171,65 @@ export interface CompanyRiskAnalysis {
   peer_comparison?: any;
 }
 
+export interface CompanyRiskHistory {
+  company: CompanySummary;
+  points: CompanyRiskScore[]; // latest score per fiscal year, oldest first
+}
+
+export type RiskCategory = 'Low' | 'Medium' | 'High' | 'Critical';
+
+export interface RevenueShock {
+  nace_prefix?: string;
+  country_code?: string;
+  change_pct: number;
+  flow_through?: number;
+}
+
+export interface StressTestRequest {
+  rate_shock_bp?: number;
+  gdp_shock_pct?: number;
+  gdp_countries?: string[];
+  revenue_shocks?: RevenueShock[];
+  weights?: { macro: number; sector: number; financial: number };
+  thresholds?: { low: number; medium: number; high: number };
+  model?: string; // scoring model for the scenario, name@version
+  migrations_limit?: number;
+}
+
+export interface RiskDistribution {
+  mean?: number | null;
+  median?: number | null;
+  p10?: number | null;
+  p90?: number | null;
+  categories: Record<RiskCategory, number>;
+  histogram: number[]; // companies per 10-point bucket
+}
+
+export interface RiskMigration {
+  company_id: number;
+  name: string;
+  country_code?: string | null;
+  nace_code?: string | null;
+  baseline_score: number;
+  scenario_score: number;
+  baseline_category: RiskCategory;
+  scenario_category: RiskCategory;
+}
+
+export interface StressTestResult {
+  universe_size: number;
+  baseline_model: string;
+  scenario_model: string;
+  baseline: RiskDistribution;
+  scenario: RiskDistribution;
+  mean_shift?: number | null;
+  migration_matrix: Record<RiskCategory, Record<RiskCategory, number>>;
+  downgrades: number;
+  upgrades: number;
+  migrations: RiskMigration[];
+  duration_ms: number;
+}
+
 export interface CompanyIngestRequest {
   ticker: string;
   years?: number;
@@ -130,7 +130,7 @@ export interface DashboardSummary {
   countries: CountrySummary[];
   last_updated: string;
   total_indicators: number;
-  data_freshness: number;
+  data_freshness: number | null; // days since last data refresh
 }
 
 export interface CountryDetail {